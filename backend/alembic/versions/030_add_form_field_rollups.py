@@ -0,0 +1,46 @@
+"""add form field rollups table
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '030'
+down_revision = '029'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create form_field_rollups table for incremental form statistics"""
+    from sqlalchemy import inspect
+    
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    
+    if 'form_field_rollups' not in existing_tables:
+        op.create_table(
+            'form_field_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('form_id', sa.Integer(), nullable=False),
+            sa.Column('field_name', sa.String(length=200), nullable=False, server_default=''),
+            sa.Column('bucket', sa.String(length=255), nullable=False, server_default=''),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('value_sum', sa.Float(), nullable=True),
+            sa.Column('value_min', sa.Float(), nullable=True),
+            sa.Column('value_max', sa.Float(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('form_id', 'field_name', 'bucket', name='uq_form_field_rollups_bucket'),
+        )
+
+
+def downgrade():
+    """Drop form_field_rollups table"""
+    op.drop_table('form_field_rollups')
@@ -0,0 +1,75 @@
+"""add activities table
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '031'
+down_revision = '030'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create activities table and backfill it from data modification audit logs"""
+    from sqlalchemy import inspect
+    
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    
+    if 'activities' in existing_tables:
+        return
+    
+    op.create_table(
+        'activities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('verb', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('metadata', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'idx_activities_entity_feed', 'activities', ['entity_type', 'entity_id', 'created_at', 'id'],
+        postgresql_include=['actor_id', 'verb'],
+    )
+    op.create_index(
+        'idx_activities_actor_feed', 'activities', ['actor_id', 'created_at', 'id'],
+        postgresql_include=['entity_type', 'entity_id', 'verb'],
+    )
+    op.create_index('idx_activities_created_at', 'activities', ['created_at', 'id'])
+    
+    if bind.dialect.name == 'postgresql' and 'security_audit_logs' in existing_tables:
+        # Data modification events log {"resource_type": "page", "page_id": 1, "action": "created"}
+        op.execute("""
+            INSERT INTO activities (actor_id, entity_type, entity_id, verb, created_at, metadata)
+            SELECT u.id,
+                   l.metadata->>'resource_type',
+                   (l.metadata->>((l.metadata->>'resource_type') || '_id'))::integer,
+                   l.metadata->>'action',
+                   l.timestamp,
+                   l.metadata
+            FROM security_audit_logs l
+            LEFT JOIN users u ON u.id = l.user_id
+            WHERE l.event_type IN ('data_modified', 'data_deleted')
+              AND l.metadata->>'action' IS NOT NULL
+              AND l.metadata->>((l.metadata->>'resource_type') || '_id') ~ '^[0-9]+$'
+            ORDER BY l.timestamp, l.id
+        """)
+
+
+def downgrade():
+    """Drop activities table"""
+    op.drop_index('idx_activities_created_at', table_name='activities')
+    op.drop_index('idx_activities_actor_feed', table_name='activities')
+    op.drop_index('idx_activities_entity_feed', table_name='activities')
+    op.drop_table('activities')
@@ -0,0 +1,164 @@
+"""partition security audit logs by month and add daily rollups
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '032'
+down_revision = '031'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created ahead of the current month (later ones are
+# created by AuditLogMaintenance)
+PARTITIONS_AHEAD = 3
+
+COLUMNS = (
+    "id, timestamp, event_type, severity, user_id, user_email, api_key_id, ip_address, "
+    "user_agent, request_method, request_path, description, metadata, success"
+)
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes(table):
+    op.create_index('idx_security_audit_user_timestamp', table, ['user_id', 'timestamp'])
+    op.create_index('idx_security_audit_event_type_timestamp', table, ['event_type', 'timestamp'])
+    op.create_index('idx_security_audit_timestamp', table, ['timestamp'])
+    op.create_index('idx_security_audit_ip_address', table, ['ip_address'])
+
+
+def upgrade():
+    """Convert security_audit_logs to a partitioned table and create daily rollups"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'security_audit_daily_stats' not in existing_tables:
+        op.create_table(
+            'security_audit_daily_stats',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('event_type', sa.String(length=50), nullable=False),
+            sa.Column('severity', sa.String(length=20), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('day', 'user_id', 'event_type', 'severity'),
+        )
+        op.create_index('idx_security_audit_daily_stats_user_day', 'security_audit_daily_stats', ['user_id', 'day'])
+
+    if bind.dialect.name != 'postgresql' or 'security_audit_logs' not in existing_tables:
+        return
+    partitioned = bind.execute(sa.text(
+        "SELECT relkind::text FROM pg_class WHERE oid = to_regclass('security_audit_logs')"
+    )).scalar() == 'p'
+    if partitioned:
+        return
+
+    # Keep the id sequence: ids continue where the old table stopped
+    op.execute("ALTER TABLE security_audit_logs RENAME TO security_audit_logs_old")
+    op.execute("ALTER SEQUENCE security_audit_logs_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE security_audit_logs_id_seq AS bigint")
+    op.execute("ALTER TABLE security_audit_logs_old RENAME CONSTRAINT security_audit_logs_pkey TO security_audit_logs_old_pkey")
+    for index in inspector.get_indexes('security_audit_logs_old'):
+        op.execute(f"DROP INDEX IF EXISTS {index['name']}")
+
+    op.execute("""
+        CREATE TABLE security_audit_logs (
+            id BIGINT NOT NULL DEFAULT nextval('security_audit_logs_id_seq'),
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            event_type VARCHAR(50) NOT NULL,
+            severity VARCHAR(20) NOT NULL DEFAULT 'info',
+            user_id INTEGER,
+            user_email VARCHAR(255),
+            api_key_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            request_method VARCHAR(10),
+            request_path VARCHAR(500),
+            description TEXT NOT NULL,
+            metadata JSON,
+            success VARCHAR(10) NOT NULL DEFAULT 'unknown',
+            CONSTRAINT security_audit_logs_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE security_audit_logs_id_seq OWNED BY security_audit_logs.id")
+    _create_indexes('security_audit_logs')
+
+    # One partition per month from the oldest row, plus a default partition
+    # so an insert never fails if maintenance falls behind
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM security_audit_logs_old")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = date(oldest.astimezone(timezone.utc).year, oldest.astimezone(timezone.utc).month, 1) if oldest else current
+    last = _add_months(current, PARTITIONS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE security_audit_logs_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF security_audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+    op.execute("CREATE TABLE security_audit_logs_default PARTITION OF security_audit_logs DEFAULT")
+
+    op.execute(f"INSERT INTO security_audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM security_audit_logs_old")
+    op.execute("DROP TABLE security_audit_logs_old")
+    op.execute("ANALYZE security_audit_logs")
+
+
+def downgrade():
+    """Convert security_audit_logs back to a regular table and drop the rollups"""
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        partitioned = bind.execute(sa.text(
+            "SELECT relkind::text FROM pg_class WHERE oid = to_regclass('security_audit_logs')"
+        )).scalar() == 'p'
+        if partitioned:
+            op.execute("ALTER TABLE security_audit_logs RENAME TO security_audit_logs_partitioned")
+            op.execute("ALTER TABLE security_audit_logs_partitioned RENAME CONSTRAINT security_audit_logs_pkey TO security_audit_logs_partitioned_pkey")
+            for name in ('idx_security_audit_user_timestamp', 'idx_security_audit_event_type_timestamp',
+                         'idx_security_audit_timestamp', 'idx_security_audit_ip_address'):
+                op.execute(f"DROP INDEX IF EXISTS {name}")
+            op.execute("ALTER SEQUENCE security_audit_logs_id_seq OWNED BY NONE")
+            op.execute("""
+                CREATE TABLE security_audit_logs (
+                    id INTEGER NOT NULL DEFAULT nextval('security_audit_logs_id_seq'),
+                    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                    event_type VARCHAR(50) NOT NULL,
+                    severity VARCHAR(20) NOT NULL DEFAULT 'info',
+                    user_id INTEGER,
+                    user_email VARCHAR(255),
+                    api_key_id INTEGER,
+                    ip_address VARCHAR(45),
+                    user_agent VARCHAR(500),
+                    request_method VARCHAR(10),
+                    request_path VARCHAR(500),
+                    description TEXT NOT NULL,
+                    metadata JSON,
+                    success VARCHAR(10) NOT NULL DEFAULT 'unknown',
+                    CONSTRAINT security_audit_logs_pkey PRIMARY KEY (id)
+                )
+            """)
+            op.execute(f"INSERT INTO security_audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM security_audit_logs_partitioned")
+            op.execute("DROP TABLE security_audit_logs_partitioned CASCADE")
+            op.execute("ALTER SEQUENCE security_audit_logs_id_seq AS integer")
+            op.execute("ALTER SEQUENCE security_audit_logs_id_seq OWNED BY security_audit_logs.id")
+            op.create_index('idx_security_audit_user_id', 'security_audit_logs', ['user_id'])
+            op.create_index('idx_security_audit_event_type', 'security_audit_logs', ['event_type'])
+            op.create_index('idx_security_audit_timestamp', 'security_audit_logs', ['timestamp'])
+            op.create_index('idx_security_audit_ip_address', 'security_audit_logs', ['ip_address'])
+
+    op.drop_index('idx_security_audit_daily_stats_user_day', table_name='security_audit_daily_stats')
+    op.drop_table('security_audit_daily_stats')
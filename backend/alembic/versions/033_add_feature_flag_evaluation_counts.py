@@ -0,0 +1,55 @@
+"""add feature flag evaluation counters
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '033'
+down_revision = '032'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create feature_flag_evaluation_counts and backfill it from feature_flag_logs"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # feature_flags is created by init_db on fresh installs, along with this table
+    if 'feature_flags' not in existing_tables or 'feature_flag_evaluation_counts' in existing_tables:
+        return
+
+    op.create_table(
+        'feature_flag_evaluation_counts',
+        sa.Column('flag_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=False),
+        sa.Column('variant', sa.String(length=50), nullable=False, server_default=''),
+        sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['flag_id'], ['feature_flags.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('flag_id', 'day', 'enabled', 'variant'),
+    )
+
+    if 'feature_flag_logs' in existing_tables:
+        op.execute("""
+            INSERT INTO feature_flag_evaluation_counts (flag_id, day, enabled, variant, count)
+            SELECT flag_id, CAST(timestamp AS DATE), enabled, COALESCE(variant, ''), COUNT(*)
+            FROM feature_flag_logs
+            GROUP BY flag_id, CAST(timestamp AS DATE), enabled, COALESCE(variant, '')
+        """)
+
+
+def downgrade():
+    """Drop feature_flag_evaluation_counts table"""
+    from sqlalchemy import inspect
+
+    if 'feature_flag_evaluation_counts' in inspect(op.get_bind()).get_table_names():
+        op.drop_table('feature_flag_evaluation_counts')
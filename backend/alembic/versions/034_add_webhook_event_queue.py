@@ -0,0 +1,67 @@
+"""add processing queue columns to webhook_events
+
+Revision ID: 034
+Revises: 033
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '034'
+down_revision = '033'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Turn webhook_events into the Stripe webhook processing queue"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'webhook_events' not in inspector.get_table_names():
+        return
+
+    existing_columns = {column['name'] for column in inspector.get_columns('webhook_events')}
+    if 'status' in existing_columns:
+        return
+
+    # Rows already present were processed inline by the previous webhook endpoint
+    op.add_column('webhook_events', sa.Column('status', sa.String(length=20), nullable=False, server_default='processed'))
+    op.alter_column('webhook_events', 'status', server_default=None)
+    op.add_column('webhook_events', sa.Column('ordering_key', sa.String(length=255), nullable=True))
+    op.add_column('webhook_events', sa.Column('stripe_created', sa.BigInteger(), nullable=True))
+    op.add_column('webhook_events', sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'))
+    op.alter_column('webhook_events', 'attempts', server_default=None)
+    op.add_column('webhook_events', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('webhook_events', sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('webhook_events', sa.Column('last_error', sa.Text(), nullable=True))
+
+    # processed_at is now set by the worker when processing completes
+    op.alter_column('webhook_events', 'processed_at', nullable=True, server_default=None)
+
+    op.create_index('idx_webhook_events_queue', 'webhook_events', ['status', 'next_attempt_at'], unique=False)
+    op.create_index(
+        'idx_webhook_events_ordering', 'webhook_events', ['ordering_key', 'stripe_created', 'id'], unique=False
+    )
+
+
+def downgrade():
+    """Drop the processing queue columns from webhook_events"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'webhook_events' not in inspector.get_table_names():
+        return
+    if 'status' not in {column['name'] for column in inspector.get_columns('webhook_events')}:
+        return
+
+    op.drop_index('idx_webhook_events_ordering', table_name='webhook_events')
+    op.drop_index('idx_webhook_events_queue', table_name='webhook_events')
+    op.execute("UPDATE webhook_events SET processed_at = created_at WHERE processed_at IS NULL")
+    op.alter_column('webhook_events', 'processed_at', nullable=False, server_default=sa.text('now()'))
+    for column in ('last_error', 'locked_at', 'next_attempt_at', 'attempts', 'stripe_created', 'ordering_key', 'status'):
+        op.drop_column('webhook_events', column)
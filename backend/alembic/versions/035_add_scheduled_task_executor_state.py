@@ -0,0 +1,60 @@
+"""add executor state to scheduled_tasks
+
+Revision ID: 035
+Revises: 034
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '035'
+down_revision = '034'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('attempts', 'next_attempt_at', 'locked_at', 'locked_by')
+
+
+def upgrade():
+    """Add attempt, retry and lease columns used by the task executor"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    # scheduled_tasks is created by init_db on fresh installs, with these columns
+    if 'scheduled_tasks' not in inspector.get_table_names():
+        return
+
+    existing_columns = {column['name'] for column in inspector.get_columns('scheduled_tasks')}
+    if 'attempts' not in existing_columns:
+        op.add_column('scheduled_tasks', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        op.alter_column('scheduled_tasks', 'attempts', server_default=None)
+    if 'next_attempt_at' not in existing_columns:
+        op.add_column('scheduled_tasks', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    if 'locked_at' not in existing_columns:
+        op.add_column('scheduled_tasks', sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True))
+    if 'locked_by' not in existing_columns:
+        op.add_column('scheduled_tasks', sa.Column('locked_by', sa.String(length=100), nullable=True))
+
+    existing_indexes = {index['name'] for index in inspector.get_indexes('scheduled_tasks')}
+    if 'idx_scheduled_tasks_due' not in existing_indexes:
+        op.create_index('idx_scheduled_tasks_due', 'scheduled_tasks', ['status', 'scheduled_at'], unique=False)
+
+
+def downgrade():
+    """Drop the task executor columns"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'scheduled_tasks' not in inspector.get_table_names():
+        return
+
+    if 'idx_scheduled_tasks_due' in {index['name'] for index in inspector.get_indexes('scheduled_tasks')}:
+        op.drop_index('idx_scheduled_tasks_due', table_name='scheduled_tasks')
+    existing_columns = {column['name'] for column in inspector.get_columns('scheduled_tasks')}
+    for column in COLUMNS:
+        if column in existing_columns:
+            op.drop_column('scheduled_tasks', column)
@@ -0,0 +1,58 @@
+"""add project daily rollups tables
+
+Revision ID: 036
+Revises: 035
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '036'
+down_revision = '035'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create project_daily_rollups and project_rollup_state for the insights/analytics counts"""
+    from sqlalchemy import inspect
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Same type as projects.status (created with the projects table by init_db)
+    project_status = postgresql.ENUM('ACTIVE', 'ARCHIVED', 'COMPLETED', name='projectstatus', create_type=False)
+    if bind.dialect.name == 'postgresql':
+        project_status.create(bind, checkfirst=True)
+
+    if 'project_daily_rollups' not in existing_tables:
+        op.create_table(
+            'project_daily_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('status', project_status, nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'day', 'status', name='uq_project_daily_rollups_day'),
+        )
+
+    if 'project_rollup_state' not in existing_tables:
+        op.create_table(
+            'project_rollup_state',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('rebuilt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+
+
+def downgrade():
+    """Drop the project rollup tables"""
+    op.drop_table('project_rollup_state')
+    op.drop_table('project_daily_rollups')
@@ -1,7 +1,10 @@
 """AI endpoints using OpenAI and Anthropic (Claude)."""
 
-from typing import Optional, List, Literal
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, List, Literal, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.dependencies import get_current_user
@@ -26,6 +29,7 @@ class ChatRequest(BaseModel):
     temperature: Optional[float] = Field(None, ge=0.0, le=2.0)
     max_tokens: Optional[int] = Field(None, ge=1, le=4000)
     system_prompt: Optional[str] = None
+    stream: bool = Field(default=False, description="Stream the response as server-sent events")
 
 
 class SimpleChatRequest(BaseModel):
@@ -34,6 +38,7 @@ class SimpleChatRequest(BaseModel):
     provider: Optional[Literal["openai", "anthropic", "auto"]] = Field(default="auto", description="AI provider to use")
     system_prompt: Optional[str] = None
     model: Optional[str] = None
+    stream: bool = Field(default=False, description="Stream the response as server-sent events")
 
 
 class ChatResponse(BaseModel):
@@ -45,6 +50,32 @@ class ChatResponse(BaseModel):
     finish_reason: str
 
 
+def _sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream completion events as server-sent events.
+    
+    Each event is a `data:` line with a JSON object: {"type": "delta", "content": ...}
+    for each piece of the response, then {"type": "done", ...} with the model, usage
+    and finish reason, or {"type": "error", "detail": ...} if the provider fails.
+    """
+    async def event_generator():
+        try:
+            async for event in events:
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'detail': f'AI service error: {e}'})}\n\n"
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_completion(
     request: ChatRequest,
@@ -65,6 +96,15 @@ async def chat_completion(
         # Convert Pydantic models to dicts
         messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
         
+        if request.stream:
+            return _sse_response(service.stream_chat_completion(
+                messages=messages,
+                model=request.model,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                system_prompt=request.system_prompt,
+            ))
+        
         response = await service.chat_completion(
             messages=messages,
             model=request.model,
@@ -104,6 +144,13 @@ async def simple_chat(
         provider = AIProvider(request.provider) if request.provider != "auto" else AIProvider.AUTO
         service = AIService(provider=provider)
         
+        if request.stream:
+            return _sse_response(service.stream_chat_completion(
+                messages=[{"role": "user", "content": request.message}],
+                model=request.model,
+                system_prompt=request.system_prompt,
+            ))
+        
         response = await service.simple_chat(
             user_message=request.message,
             system_prompt=request.system_prompt,
@@ -127,6 +174,12 @@ async def simple_chat(
         )
 
 
+def _documentation_context(query: str) -> Tuple[str, str]:
+    """Documentation chunks relevant to the query, and the list of documentation files"""
+    doc_service = get_documentation_service()
+    return doc_service.format_relevant_documentation(query), doc_service.get_documentation_summary()
+
+
 @router.post("/chat/template", response_model=ChatResponse)
 async def template_chat(
     request: ChatRequest,
@@ -134,7 +187,7 @@ async def template_chat(
 ):
     """
     Chat completion with template documentation context.
-    This endpoint automatically includes template documentation in the system prompt.
+    This endpoint includes the most relevant template documentation chunks in the system prompt.
     """
     if not AIService.is_configured():
         raise HTTPException(
@@ -143,15 +196,18 @@ async def template_chat(
         )
     
     try:
-        # Load documentation
-        doc_service = get_documentation_service()
-        documentation_context = doc_service.format_documentation_for_context(max_total_size=80000)
-        doc_summary = doc_service.get_documentation_summary()
+        # Retrieve the documentation relevant to the conversation; the latest
+        # user messages carry the question, earlier ones its context
+        user_messages = [msg.content for msg in request.messages if msg.role == "user"]
+        query = "\n".join(user_messages[-2:])
+        # The index may rescan or rebuild (under a lock held by the startup
+        # build), so the lookup runs off the event loop
+        documentation_context, doc_summary = await asyncio.to_thread(_documentation_context, query)
         
         # Build enhanced system prompt
         base_system_prompt = request.system_prompt or """You are a helpful AI assistant specialized in helping users understand and work with the Next.js Full-Stack Template.
 
-You have access to the complete template documentation. Use this information to provide accurate, helpful answers about:
+You are given the template documentation excerpts most relevant to the conversation. Use this information to provide accurate, helpful answers about:
 - Template features and capabilities
 - Setup and configuration
 - Architecture and design patterns
@@ -176,7 +232,7 @@ Be friendly, professional, and concise. Format your responses clearly with prope
 
 === END DOCUMENTATION ===
 
-Remember: You have access to the complete template documentation above. Use it to provide accurate, detailed answers."""
+Remember: The excerpts above are the parts of the template documentation relevant to this conversation. Use them to provide accurate, detailed answers."""
 
         # Resolve provider
         provider = AIProvider(request.provider) if request.provider != "auto" else AIProvider.AUTO
@@ -185,6 +241,15 @@ Remember: You have access to the complete template documentation above. Use it t
         # Convert Pydantic models to dicts
         messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
         
+        if request.stream:
+            return _sse_response(service.stream_chat_completion(
+                messages=messages,
+                model=request.model,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens or 2000,
+                system_prompt=enhanced_system_prompt,
+            ))
+        
         response = await service.chat_completion(
             messages=messages,
             model=request.model,
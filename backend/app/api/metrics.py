@@ -0,0 +1,27 @@
+"""Prometheus metrics endpoint."""
+
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.core.config import settings
+from app.core.metrics import METRICS_ENABLED, refresh_scrape_time_metrics, render_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str = Header(default="")):
+    """Metrics in the Prometheus text format (aggregated across workers in multiprocess mode).
+
+    Only served to scrapers presenting METRICS_TOKEN: without a token configured
+    the endpoint does not exist.
+    """
+    if not METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    if not hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    await refresh_scrape_time_metrics()
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -25,6 +25,8 @@ ALLOWED_MIME_TYPES = {
     'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
     'text/plain', 'text/csv'
 }
+# Bytes handed to libmagic; enough for the signatures above (incl. OOXML zips)
+SNIFF_BYTES = 8192
 
 
 def sanitize_filename(filename: str) -> str:
@@ -67,12 +69,12 @@ def validate_file_content(file: UploadFile) -> None:
         if not has_magic:
             return
         
-        # Read file content
-        file_content = file.file.read()
+        # Only the file signature is needed, not the whole upload
+        header = file.file.read(SNIFF_BYTES)
         file.file.seek(0)  # Reset file pointer
         
         # Check magic bytes
-        mime_type = magic.from_buffer(file_content, mime=True)
+        mime_type = magic.from_buffer(header, mime=True)
         
         # Map extensions to expected MIME types
         file_ext = os.path.splitext(file.filename or "")[1].lower()
@@ -112,6 +114,16 @@ def validate_file_content(file: UploadFile) -> None:
         # Continue with basic validation
 
 
+def get_upload_size(file: UploadFile) -> int:
+    """Size of an upload without reading it into memory."""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
 def validate_file(file: UploadFile) -> None:
     """Validate file size, type, and name."""
     # Check filename
@@ -157,9 +169,8 @@ async def upload_file(
     validate_file(file)
     validate_file_content(file)
     
-    # Read file content to check size
-    file_content = await file.read()
-    file_size = len(file_content)
+    # Check size from the spooled upload rather than reading it
+    file_size = get_upload_size(file)
     
     # Check file size only for non-image files (images have no size limit)
     is_image = file.content_type and file.content_type.startswith('image/')
@@ -174,9 +185,7 @@ async def upload_file(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File is empty",
         )
-    
-    # Reset file pointer for upload
-    await file.seek(0)
+
 
     # Check if S3 is configured
     if not S3Service.is_configured():
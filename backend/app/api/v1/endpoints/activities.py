@@ -3,19 +3,21 @@ Activity Feed API Endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel, Field
-from sqlalchemy import select, desc, and_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.dependencies import get_current_user
 from app.core.database import get_db
-from app.core.security_audit import SecurityAuditLog
 from app.core.logging import logger
+from app.services.activity_service import ActivityService, ActivityPage
 
 router = APIRouter()
 
+# Response header carrying the cursor of the next page for list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 class ActivityResponse(BaseModel):
     """Activity response model"""
@@ -31,79 +33,118 @@ class ActivityResponse(BaseModel):
         from_attributes = True
 
 
+class ActivityFeedResponse(BaseModel):
+    """One page of an activity feed"""
+    items: List[ActivityResponse]
+    next_cursor: Optional[str] = None
+
+
+async def _read_feed(coro) -> ActivityPage:
+    try:
+        return await coro
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to fetch activities: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch activities: {str(e)}"
+        )
+
+
 @router.get("/activities", response_model=List[ActivityResponse], tags=["activities"])
 async def get_activities(
+    response: Response,
     entity_type: Optional[str] = Query(None, description="Filter by entity type"),
     entity_id: Optional[int] = Query(None, description="Filter by entity ID"),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    offset: int = Query(0, ge=0, le=10000, description="Offset for pagination (deprecated, use cursor)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get activity feed with optional filters
     """
-    try:
-        query = select(SecurityAuditLog).order_by(desc(SecurityAuditLog.timestamp))
-        
-        # Apply filters
-        filters = []
-        if entity_type:
-            # Filter by event_type or description containing entity_type
-            filters.append(
-                (SecurityAuditLog.event_type.ilike(f'%{entity_type}%')) |
-                (SecurityAuditLog.description.ilike(f'%{entity_type}%'))
-            )
-        if user_id:
-            filters.append(SecurityAuditLog.user_id == user_id)
-        
-        if filters:
-            query = query.where(and_(*filters))
-        
-        # Apply pagination
-        query = query.limit(limit).offset(offset)
-        
-        result = await db.execute(query)
-        activities = result.scalars().all()
-        
-        return [
-            ActivityResponse(
-                id=activity.id,
-                action=activity.event_type or activity.description or 'unknown',
-                entity_type=entity_type or 'system',
-                entity_id=str(activity.id) if entity_id else None,
-                user_id=activity.user_id or 0,
-                timestamp=activity.timestamp.isoformat() if activity.timestamp else '',
-                event_metadata=activity.event_metadata
-            )
-            for activity in activities
-        ]
-    except Exception as e:
-        logger.error(f"Failed to fetch activities: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch activities: {str(e)}"
-        )
+    page = await _read_feed(ActivityService(db).list_activities(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        actor_id=user_id,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+    ))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/activities/timeline", response_model=List[ActivityResponse], tags=["activities"])
 async def get_activity_timeline(
+    response: Response,
     entity_type: Optional[str] = Query(None),
     entity_id: Optional[int] = Query(None),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get activity timeline (more results for timeline view)
     """
-    return await get_activities(
+    page = await _read_feed(ActivityService(db).list_activities(
         entity_type=entity_type,
         entity_id=entity_id,
+        cursor=cursor,
         limit=limit,
-        offset=0,
-        current_user=current_user,
-        db=db
-    )
+    ))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
 
+@router.get("/activities/feed", response_model=ActivityFeedResponse, tags=["activities"])
+async def get_home_feed(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the current user's home feed: their own activity and activity on the
+    entities they favorited
+    """
+    page = await _read_feed(ActivityService(db).get_home_feed(current_user.id, cursor=cursor, limit=limit))
+    return ActivityFeedResponse(items=page.items, next_cursor=page.next_cursor)
+
+
+@router.get("/activities/entity/{entity_type}/{entity_id}", response_model=ActivityFeedResponse, tags=["activities"])
+async def get_entity_feed(
+    entity_type: str,
+    entity_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the activity of one entity
+    """
+    page = await _read_feed(ActivityService(db).get_entity_feed(entity_type, entity_id, cursor=cursor, limit=limit))
+    return ActivityFeedResponse(items=page.items, next_cursor=page.next_cursor)
+
+
+@router.get("/activities/user/{user_id}", response_model=ActivityFeedResponse, tags=["activities"])
+async def get_user_feed(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the activity of one user
+    """
+    page = await _read_feed(ActivityService(db).get_user_feed(user_id, cursor=cursor, limit=limit))
+    return ActivityFeedResponse(items=page.items, next_cursor=page.next_cursor)
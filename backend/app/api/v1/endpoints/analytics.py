@@ -7,14 +7,13 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from datetime import datetime, timedelta
 
 from app.models.user import User
-from app.models.project import Project
+from app.models.project import ProjectStatus
 from app.dependencies import get_current_user, get_db
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
-from app.core.tenancy_helpers import apply_tenant_scope
+from app.services.project_rollup_service import DayRange, ProjectRollupService
 from fastapi import Request
 
 router = APIRouter()
@@ -53,35 +52,20 @@ async def get_analytics_metrics(
     else:
         start_dt = end_dt - timedelta(days=30)
     
-    # Calculate metrics from projects
-    projects_query = select(Project).where(
-        Project.user_id == current_user.id,
-        Project.created_at >= start_dt,
-        Project.created_at <= end_dt
-    )
-    projects_query = apply_tenant_scope(projects_query, Project)
+    # Creation days of the period (inclusive) and of the same number of days before it
+    start_day, end_day = start_dt.date(), end_dt.date()
+    period_days = timedelta(days=(end_day - start_day).days + 1)
     
-    result = await db.execute(projects_query)
-    projects = result.scalars().all()
-    
-    # Calculate previous period for comparison
-    period_duration = end_dt - start_dt
-    prev_start_dt = start_dt - period_duration
-    prev_end_dt = start_dt
-    
-    prev_projects_query = select(Project).where(
-        Project.user_id == current_user.id,
-        Project.created_at >= prev_start_dt,
-        Project.created_at < prev_end_dt
-    )
-    prev_projects_query = apply_tenant_scope(prev_projects_query, Project)
-    prev_result = await db.execute(prev_projects_query)
-    prev_projects = prev_result.scalars().all()
+    counts = await ProjectRollupService(db).count_projects(current_user.id, {
+        "total": DayRange(start_day, end_day),
+        "active": DayRange(start_day, end_day, ProjectStatus.ACTIVE),
+        "prev_total": DayRange(start_day - period_days, start_day - timedelta(days=1)),
+    })
     
     # Calculate metrics
-    total_projects = len(projects)
-    active_projects = len([p for p in projects if p.status == 'active'])
-    prev_total = len(prev_projects)
+    total_projects = counts["total"]
+    active_projects = counts["active"]
+    prev_total = counts["prev_total"]
     
     # Calculate growth
     growth = 0.0
@@ -8,6 +8,8 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 
 from app.services.announcement_service import AnnouncementService
+from app.services.rbac_service import RBACService
+from app.core.tenancy import get_user_tenant_id
 from app.models.user import User
 from app.models.announcement import AnnouncementType, AnnouncementPriority
 from app.dependencies import get_current_user
@@ -111,26 +113,25 @@ async def get_announcements(
 ):
     """Get active announcements for the current user"""
     service = AnnouncementService(db)
-    
-    from app.services.rbac_service import RBACService
-    from app.core.tenancy import get_user_tenant_id
+    active_set = await service.get_active_set()
     
     user_id = current_user.id if current_user else None
-    # Get user team_id from tenancy context
-    user_team_id = await get_user_tenant_id(current_user.id, db) if current_user else None
-    # Get user roles from RBAC service
-    if current_user:
+    # Team and roles are only looked up when an active announcement targets them
+    user_team_id = None
+    user_roles = None
+    if current_user and active_set.targets_teams:
+        user_team_id = await get_user_tenant_id(current_user.id, db)
+    if current_user and active_set.targets_roles:
         rbac_service = RBACService(db)
         user_roles_objects = await rbac_service.get_user_roles(current_user.id)
         user_roles = [role.slug for role in user_roles_objects] if user_roles_objects else None
-    else:
-        user_roles = None
     
     announcements = await service.get_active_announcements(
         user_id=user_id,
         user_team_id=user_team_id,
         user_roles=user_roles,
-        show_on_login=show_on_login
+        show_on_login=show_on_login,
+        active_set=active_set
     )
     
     return [AnnouncementResponse.model_validate(a) for a in announcements]
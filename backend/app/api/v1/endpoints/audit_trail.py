@@ -9,6 +9,7 @@ from datetime import datetime
 
 from app.models.user import User
 from app.core.security_audit import SecurityAuditLog
+from app.services.audit_log_service import AuditStatsService
 from app.dependencies import get_current_user, is_superadmin
 from app.core.database import get_db
 from sqlalchemy import select, and_, or_, desc
@@ -149,44 +150,9 @@ async def get_audit_stats(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get audit trail statistics"""
-    from sqlalchemy import func
+    """Get audit trail statistics
     
-    query = select(SecurityAuditLog).where(SecurityAuditLog.user_id == current_user.id)
-    
-    if start_date:
-        query = query.where(SecurityAuditLog.timestamp >= start_date)
-    
-    if end_date:
-        query = query.where(SecurityAuditLog.timestamp <= end_date)
-    
-    # Count by event type
-    event_type_result = await db.execute(
-        select(
-            SecurityAuditLog.event_type,
-            func.count(SecurityAuditLog.id).label('count')
-        ).where(
-            SecurityAuditLog.user_id == current_user.id
-        ).group_by(SecurityAuditLog.event_type)
-    )
-    event_type_counts = {row[0]: row[1] for row in event_type_result.all()}
-    
-    # Count by severity
-    severity_result = await db.execute(
-        select(
-            SecurityAuditLog.severity,
-            func.count(SecurityAuditLog.id).label('count')
-        ).where(
-            SecurityAuditLog.user_id == current_user.id
-        ).group_by(SecurityAuditLog.severity)
-    )
-    severity_counts = {row[0]: row[1] for row in severity_result.all()}
-    
-    return {
-        'event_type_counts': event_type_counts,
-        'severity_counts': severity_counts,
-    }
-
-
-
-
+    Complete days are read from the daily rollups, only the days not rolled
+    up yet are counted from the raw logs.
+    """
+    return await AuditStatsService(db).get_stats(current_user.id, start_date=start_date, end_date=end_date)
@@ -229,8 +229,7 @@ async def create_payment_intent(
             # Retrieve existing payment intent
             stripe_service = StripeService(db)
             try:
-                import stripe
-                payment_intent = stripe.PaymentIntent.retrieve(booking.payment_intent_id)
+                payment_intent = await stripe_service.gateway.retrieve_payment_intent(booking.payment_intent_id)
                 return PaymentIntentResponse(
                     client_secret=payment_intent.client_secret,
                     payment_intent_id=payment_intent.id,
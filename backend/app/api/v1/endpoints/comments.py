@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
 
 from app.services.comment_service import CommentService
+from app.services.activity_service import ActivityService
 from app.models.user import User
 from app.dependencies import get_current_user
 from app.core.database import get_db
@@ -71,6 +72,9 @@ async def create_comment(
             parent_id=comment_data.parent_id,
             content_html=comment_data.content_html
         )
+        await ActivityService(db).record(
+            current_user.id, "commented", comment.entity_type, comment.entity_id, {"comment_id": comment.id}
+        )
         return CommentResponse.model_validate(comment)
     except Exception as e:
         logger.error(f"Failed to create comment: {e}")
@@ -3,15 +3,15 @@ Commercial Contacts Endpoints
 API endpoints for managing commercial contacts
 """
 
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, delete
 from sqlalchemy.orm import selectinload
 from datetime import datetime as dt
 import json
-import asyncio
 import uuid
 import zipfile
 import os
@@ -19,7 +19,7 @@ import unicodedata
 import re
 from io import BytesIO
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.cache_enhanced import cache_query
 from app.dependencies import get_current_user
 from app.models.contact import Contact
@@ -27,15 +27,31 @@ from app.models.company import Company
 from app.models.user import User
 from app.schemas.contact import ContactCreate, ContactUpdate, Contact as ContactSchema
 from app.services.import_service import ImportService
+from app.services.import_job_service import import_job_service, TERMINAL_STATUSES
 from app.services.export_service import ExportService
+from app.services.entity_export_service import get_export_entity, stream_entity_rows
 from app.services.s3_service import S3Service
 from app.core.logging import logger
 
 router = APIRouter(prefix="/commercial/contacts", tags=["commercial-contacts"])
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
+# Column -> header label for the contacts Excel export
+CONTACT_EXPORT_LABELS = {
+    'first_name': 'Prénom',
+    'last_name': 'Nom',
+    'company_name': 'Entreprise',
+    'position': 'Poste',
+    'circle': 'Cercle',
+    'linkedin': 'LinkedIn',
+    'photo_url': 'Photo URL',
+    'email': 'Courriel',
+    'phone': 'Téléphone',
+    'city': 'Ville',
+    'country': 'Pays',
+    'birthday': 'Anniversaire',
+    'language': 'Langue',
+    'employee_name': 'Employé',
+}
 
 # Cache for presigned URLs (file_key -> (presigned_url, expiration_timestamp))
 _presigned_url_cache: Dict[str, tuple[str, float]] = {}
@@ -166,38 +182,14 @@ def regenerate_photo_url(photo_url: Optional[str], contact_id: Optional[int] = N
         return None
 
 
-def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
-    """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    # Keep only last 1000 logs per import
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
+async def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
+    """Add a log entry to the import job stream"""
+    await import_job_service.add_log(import_id, message, level, data)
 
 
-def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
-    """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
+async def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
+    """Update import status (also pushed to stream consumers)"""
+    await import_job_service.update_status(import_id, status, progress=progress, total=total)
 
 
 async def find_company_by_name(
@@ -599,6 +591,7 @@ async def delete_contact(
 async def import_contacts(
     file: UploadFile = File(...),
     import_id: Optional[str] = Query(None, description="Optional import ID for tracking logs"),
+    background: bool = Query(False, description="Run the import in a background job and return its ID immediately"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -642,6 +635,8 @@ async def import_contacts(
     Args:
         file: Excel file or ZIP file with contacts data and photos
         import_id: Optional import ID for tracking logs (auto-generated if not provided)
+        background: Return 202 with the import_id right away; the result is then
+            available from GET /import/{import_id} once the job completes
         current_user: Current authenticated user
         db: Database session
         
@@ -653,23 +648,59 @@ async def import_contacts(
         import_id = str(uuid.uuid4())
     
     # Initialize logs and status
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    await import_job_service.create_job(import_id, owner_id=current_user.id, filename=file.filename)
+    await add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
-    add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
+    # Read file content
+    file_content = await file.read()
+    filename = file.filename or ""
+    
+    if background:
+        # Run the heavy work outside the request with its own DB session
+        await update_import_status(import_id, "queued")
+        import_job_service.submit(
+            import_id,
+            _run_contacts_import_job(import_id, file_content, filename, current_user.id),
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"import_id": import_id, "status": "queued"},
+        )
+    
+    return await _run_contacts_import(import_id, file_content, filename, db, current_user.id)
+
+
+async def _run_contacts_import_job(
+    import_id: str,
+    file_content: bytes,
+    filename: str,
+    user_id: int,
+) -> None:
+    """Run a contacts import in the background; the outcome is recorded on the job"""
+    async with AsyncSessionLocal() as db:
+        try:
+            await _run_contacts_import(import_id, file_content, filename, db, user_id)
+        except HTTPException:
+            # Already recorded as the job result with a "failed" status
+            pass
+
+
+async def _run_contacts_import(
+    import_id: str,
+    file_content: bytes,
+    filename: str,
+    db: AsyncSession,
+    user_id: int,
+) -> Dict:
+    """
+    Import contacts from an already-read Excel or ZIP payload.
     
+    Progress is recorded on the import job so it can be streamed from any worker.
+    """
     try:
-        # Read file content
-        file_content = await file.read()
-        filename = file.filename or ""
         file_ext = os.path.splitext(filename.lower())[1]
         
-        add_import_log(import_id, f"Fichier lu: {len(file_content)} bytes, extension: {file_ext}", "info")
+        await add_import_log(import_id, f"Fichier lu: {len(file_content)} bytes, extension: {file_ext}", "info")
         
         # Dictionary to store photos from ZIP (filename -> file content)
         photos_dict = {}
@@ -677,7 +708,7 @@ async def import_contacts(
         
         # Check if it's a ZIP file
         if file_ext == '.zip':
-            add_import_log(import_id, "Détection d'un fichier ZIP, extraction en cours...", "info")
+            await add_import_log(import_id, "Détection d'un fichier ZIP, extraction en cours...", "info")
             try:
                 with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_ref:
                     photo_count = 0
@@ -689,10 +720,10 @@ async def import_contacts(
                         if file_name_lower.endswith(('.xlsx', '.xls')):
                             if excel_content is None:
                                 excel_content = zip_ref.read(file_info)
-                                add_import_log(import_id, f"Fichier Excel trouvé dans le ZIP: {file_info}", "info")
+                                await add_import_log(import_id, f"Fichier Excel trouvé dans le ZIP: {file_info}", "info")
                             else:
                                 logger.warning(f"Multiple Excel files found in ZIP, using first: {file_info}")
-                                add_import_log(import_id, f"Plusieurs fichiers Excel trouvés, utilisation du premier: {file_info}", "warning")
+                                await add_import_log(import_id, f"Plusieurs fichiers Excel trouvés, utilisation du premier: {file_info}", "warning")
                         
                         # Find photos (in photos/ folder or root)
                         elif file_name_lower.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
@@ -707,10 +738,10 @@ async def import_contacts(
                                 photos_dict[photo_filename_normalized] = photo_content
                             photo_count += 1
                     
-                    add_import_log(import_id, f"Extraction ZIP terminée: {photo_count} photo(s) trouvée(s)", "info")
+                    await add_import_log(import_id, f"Extraction ZIP terminée: {photo_count} photo(s) trouvée(s)", "info")
                 
                 if excel_content is None:
-                    add_import_log(import_id, "ERREUR: Aucun fichier Excel trouvé dans le ZIP", "error")
+                    await add_import_log(import_id, "ERREUR: Aucun fichier Excel trouvé dans le ZIP", "error")
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="No Excel file found in ZIP. Please include contacts.xlsx or contacts.xls"
@@ -720,13 +751,13 @@ async def import_contacts(
                 logger.info(f"Extracted Excel from ZIP with {len(photos_dict)} photos")
                 
             except zipfile.BadZipFile:
-                add_import_log(import_id, "ERREUR: Format ZIP invalide", "error")
+                await add_import_log(import_id, "ERREUR: Format ZIP invalide", "error")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid ZIP file format"
                 )
             except Exception as e:
-                add_import_log(import_id, f"ERREUR lors de l'extraction ZIP: {str(e)}", "error")
+                await add_import_log(import_id, f"ERREUR lors de l'extraction ZIP: {str(e)}", "error")
                 logger.error(f"Error extracting ZIP: {e}")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -734,14 +765,14 @@ async def import_contacts(
                 )
         
         # Import from Excel
-        add_import_log(import_id, "Lecture du fichier Excel...", "info")
+        await add_import_log(import_id, "Lecture du fichier Excel...", "info")
         try:
             result = ImportService.import_from_excel(
                 file_content=file_content,
                 has_headers=True
             )
         except Exception as e:
-            add_import_log(import_id, f"ERREUR lors de la lecture Excel: {str(e)}", "error")
+            await add_import_log(import_id, f"ERREUR lors de la lecture Excel: {str(e)}", "error")
             logger.error(f"Error importing Excel file: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -750,25 +781,25 @@ async def import_contacts(
         
         # Validate result structure
         if not result or 'data' not in result:
-            add_import_log(import_id, "ERREUR: Format de fichier Excel invalide ou fichier vide", "error")
+            await add_import_log(import_id, "ERREUR: Format de fichier Excel invalide ou fichier vide", "error")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid Excel file format or empty file"
             )
         
         if not isinstance(result['data'], list):
-            add_import_log(import_id, "ERREUR: Le fichier Excel ne contient pas de lignes de données valides", "error")
+            await add_import_log(import_id, "ERREUR: Le fichier Excel ne contient pas de lignes de données valides", "error")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Excel file does not contain valid data rows"
             )
         
         total_rows = len(result['data'])
-        add_import_log(import_id, f"Fichier Excel lu avec succès: {total_rows} ligne(s) trouvée(s)", "info")
-        update_import_status(import_id, "processing", progress=0, total=total_rows)
+        await add_import_log(import_id, f"Fichier Excel lu avec succès: {total_rows} ligne(s) trouvée(s)", "info")
+        await update_import_status(import_id, "processing", progress=0, total=total_rows)
         
         # Load all companies once to create a name -> ID mapping (case-insensitive)
-        add_import_log(import_id, "Chargement des entreprises existantes...", "info")
+        await add_import_log(import_id, "Chargement des entreprises existantes...", "info")
         try:
             companies_result = await db.execute(select(Company))
             all_companies = companies_result.scalars().all()
@@ -777,9 +808,9 @@ async def import_contacts(
             for company in all_companies:
                 if company.name:
                     company_name_to_id[company.name.lower().strip()] = company.id
-            add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) chargée(s) pour le matching", "info")
+            await add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) chargée(s) pour le matching", "info")
         except Exception as e:
-            add_import_log(import_id, f"ERREUR lors du chargement des entreprises: {str(e)}", "error")
+            await add_import_log(import_id, f"ERREUR lors du chargement des entreprises: {str(e)}", "error")
             logger.error(f"Error loading companies: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -787,11 +818,11 @@ async def import_contacts(
             )
         
         # Load all existing contacts once to check for duplicates
-        add_import_log(import_id, "Chargement des contacts existants pour détecter les doublons...", "info")
+        await add_import_log(import_id, "Chargement des contacts existants pour détecter les doublons...", "info")
         try:
             contacts_result = await db.execute(select(Contact))
             all_existing_contacts = contacts_result.scalars().all()
-            add_import_log(import_id, f"{len(all_existing_contacts)} contact(s) existant(s) chargé(s)", "info")
+            await add_import_log(import_id, f"{len(all_existing_contacts)} contact(s) existant(s) chargé(s)", "info")
             # Create mappings for duplicate detection:
             # 1. By email (if email exists)
             # 2. By first_name + last_name + email (if email exists)
@@ -811,7 +842,7 @@ async def import_contacts(
                     name_company_key = (contact.first_name.lower().strip(), contact.last_name.lower().strip(), contact.company_id)
                     contacts_by_name_company[name_company_key] = contact
         except Exception as e:
-            add_import_log(import_id, f"ERREUR lors du chargement des contacts existants: {str(e)}", "error")
+            await add_import_log(import_id, f"ERREUR lors du chargement des contacts existants: {str(e)}", "error")
             logger.error(f"Error loading existing contacts: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -912,8 +943,9 @@ async def import_contacts(
         
         for idx, row_data in enumerate(result['data']):
             try:
-                # Update progress
-                update_import_status(import_id, "processing", progress=idx + 1, total=total_rows)
+                # Update progress (batched to keep job store writes off the per-row path)
+                if (idx + 1) % 25 == 0 or idx + 1 == total_rows:
+                    await update_import_status(import_id, "processing", progress=idx + 1, total=total_rows)
                 
                 # Map Excel columns to Contact fields with multiple possible column names
                 first_name = get_field_value(row_data, [
@@ -1074,7 +1106,7 @@ async def import_contacts(
                                 upload_result = s3_service.upload_file(
                                     file=temp_file,
                                     folder='contacts/photos',
-                                    user_id=str(current_user.id)
+                                    user_id=str(user_id)
                                 )
                                 
                                 uploaded_photo_url = upload_result.get('file_key')
@@ -1085,7 +1117,7 @@ async def import_contacts(
                                         else:
                                             uploaded_photo_url = f"contacts/photos/{uploaded_photo_url}"
                                     
-                                    add_import_log(import_id, f"Ligne {idx + 2}: Photo uploadée pour {first_name} {last_name}", "success", {"row": idx + 2, "photo": pattern_to_use})
+                                    await add_import_log(import_id, f"Ligne {idx + 2}: Photo uploadée pour {first_name} {last_name}", "success", {"row": idx + 2, "photo": pattern_to_use})
                             except Exception as e:
                                 logger.error(f"Failed to upload photo {pattern_to_use} for {first_name} {last_name}: {e}", exc_info=True)
                                 warnings.append({
@@ -1125,7 +1157,7 @@ async def import_contacts(
                                     upload_result = s3_service.upload_file(
                                         file=temp_file,
                                         folder='contacts/photos',
-                                        user_id=str(current_user.id)
+                                        user_id=str(user_id)
                                     )
                                     
                                     uploaded_photo_url = upload_result.get('file_key')
@@ -1136,7 +1168,7 @@ async def import_contacts(
                                             else:
                                                 uploaded_photo_url = f"contacts/photos/{uploaded_photo_url}"
                                         
-                                        add_import_log(import_id, f"Ligne {idx + 2}: Photo uploadée pour {first_name} {last_name}", "success", {"row": idx + 2, "photo": pattern})
+                                        await add_import_log(import_id, f"Ligne {idx + 2}: Photo uploadée pour {first_name} {last_name}", "success", {"row": idx + 2, "photo": pattern})
                                         break
                                 except Exception as e:
                                     logger.error(f"Failed to upload photo {pattern} for {first_name} {last_name}: {e}", exc_info=True)
@@ -1193,7 +1225,7 @@ async def import_contacts(
                         match_reason = f"name+company: {first_name} {last_name} + company_id:{company_id}"
                 
                 if existing_contact:
-                    add_import_log(import_id, f"Ligne {idx + 2}: Contact existant trouvé ({match_reason}) - sera mis à jour", "info", {"row": idx + 2, "match_reason": match_reason, "existing_id": existing_contact.id})
+                    await add_import_log(import_id, f"Ligne {idx + 2}: Contact existant trouvé ({match_reason}) - sera mis à jour", "info", {"row": idx + 2, "match_reason": match_reason, "existing_id": existing_contact.id})
             
                 # Get phone
                 phone = get_field_value(row_data, [
@@ -1275,7 +1307,7 @@ async def import_contacts(
                 # Validate required fields before creating contact
                 if not first_name or not first_name.strip():
                     error_msg = f"Ligne {idx + 2}: Prénom manquant - contact ignoré"
-                    add_import_log(import_id, error_msg, "warning", {"row": idx + 2, "contact": f"{first_name} {last_name}"})
+                    await add_import_log(import_id, error_msg, "warning", {"row": idx + 2, "contact": f"{first_name} {last_name}"})
                     errors.append({
                         'row': idx + 2,
                         'data': row_data,
@@ -1285,7 +1317,7 @@ async def import_contacts(
                 
                 if not last_name or not last_name.strip():
                     error_msg = f"Ligne {idx + 2}: Nom manquant - contact ignoré"
-                    add_import_log(import_id, error_msg, "warning", {"row": idx + 2, "contact": f"{first_name} {last_name}"})
+                    await add_import_log(import_id, error_msg, "warning", {"row": idx + 2, "contact": f"{first_name} {last_name}"})
                     errors.append({
                         'row': idx + 2,
                         'data': row_data,
@@ -1330,17 +1362,17 @@ async def import_contacts(
                     
                     contact = existing_contact
                     created_contacts.append(contact)
-                    add_import_log(import_id, f"Ligne {idx + 2}: Contact mis à jour - {first_name} {last_name} (ID: {existing_contact.id})", "success", {"row": idx + 2, "action": "updated", "contact_id": existing_contact.id})
+                    await add_import_log(import_id, f"Ligne {idx + 2}: Contact mis à jour - {first_name} {last_name} (ID: {existing_contact.id})", "success", {"row": idx + 2, "action": "updated", "contact_id": existing_contact.id})
                 else:
                     # Create new contact
                     contact = Contact(**contact_data.model_dump(exclude_none=True))
                     db.add(contact)
                     created_contacts.append(contact)
-                    add_import_log(import_id, f"Ligne {idx + 2}: Nouveau contact créé - {first_name} {last_name}", "success", {"row": idx + 2, "action": "created"})
+                    await add_import_log(import_id, f"Ligne {idx + 2}: Nouveau contact créé - {first_name} {last_name}", "success", {"row": idx + 2, "action": "created"})
             
             except Exception as e:
                 error_msg = f"Ligne {idx + 2}: Erreur lors de l'import - {str(e)}"
-                add_import_log(import_id, error_msg, "error", {"row": idx + 2, "error": str(e)})
+                await add_import_log(import_id, error_msg, "error", {"row": idx + 2, "error": str(e)})
                 errors.append({
                     'row': idx + 2,
                     'data': row_data,
@@ -1354,7 +1386,7 @@ async def import_contacts(
         new_contacts = []
         
         # Commit all contacts
-        add_import_log(import_id, f"Sauvegarde de {len(created_contacts)} contact(s) dans la base de données...", "info")
+        await add_import_log(import_id, f"Sauvegarde de {len(created_contacts)} contact(s) dans la base de données...", "info")
         try:
             if created_contacts:
                 await db.commit()
@@ -1367,9 +1399,9 @@ async def import_contacts(
                     else:
                         new_contacts.append(contact)
                 
-                add_import_log(import_id, f"Sauvegarde réussie: {len(new_contacts)} nouveau(x) contact(s), {len(updated_contacts)} contact(s) mis à jour", "success")
+                await add_import_log(import_id, f"Sauvegarde réussie: {len(new_contacts)} nouveau(x) contact(s), {len(updated_contacts)} contact(s) mis à jour", "success")
         except Exception as e:
-            add_import_log(import_id, f"ERREUR lors de la sauvegarde: {str(e)}", "error")
+            await add_import_log(import_id, f"ERREUR lors de la sauvegarde: {str(e)}", "error")
             logger.error(f"Error committing contacts to database: {e}", exc_info=True)
             await db.rollback()
             raise HTTPException(
@@ -1414,16 +1446,14 @@ async def import_contacts(
             total_errors = len(errors) + result.get('invalid_rows', 0)
             photos_count = len([c for c in created_contacts if c.photo_url]) if photos_dict else 0
             
-            add_import_log(import_id, f"✅ Import terminé: {total_valid} contact(s) importé(s), {total_errors} erreur(s)", "success", {
+            await add_import_log(import_id, f"✅ Import terminé: {total_valid} contact(s) importé(s), {total_errors} erreur(s)", "success", {
                 "total_valid": total_valid,
                 "total_errors": total_errors,
                 "new_contacts": len(new_contacts),
                 "updated_contacts": len(updated_contacts),
                 "photos_uploaded": photos_count
             })
-            update_import_status(import_id, "completed", progress=total_rows, total=total_rows)
-            
-            return {
+            response = {
                 'total_rows': result.get('total_rows', 0),
                 'valid_rows': len(created_contacts),
                 'created_rows': len(new_contacts),
@@ -1435,24 +1465,32 @@ async def import_contacts(
                 'data': serialized_contacts,
                 'import_id': import_id  # Return import_id for log tracking
             }
+            # Store the result before announcing completion so job readers never see a gap
+            await import_job_service.set_result(import_id, jsonable_encoder(response))
+            await update_import_status(import_id, "completed", progress=total_rows, total=total_rows)
+            
+            return response
         except Exception as e:
-            add_import_log(import_id, f"ERREUR lors de la sérialisation: {str(e)}", "error")
-            update_import_status(import_id, "failed")
+            await add_import_log(import_id, f"ERREUR lors de la sérialisation: {str(e)}", "error")
+            await update_import_status(import_id, "failed")
             logger.error(f"Error serializing response: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing import results: {str(e)}"
             )
-    except HTTPException:
+    except HTTPException as e:
         # Re-raise HTTP exceptions as-is
         if import_id:
-            update_import_status(import_id, "failed")
+            await import_job_service.set_result(import_id, {"import_id": import_id, "error": e.detail})
+            await update_import_status(import_id, "failed")
         raise
     except Exception as e:
         # Catch any other unexpected errors that weren't caught above
+        detail = f"An unexpected error occurred during import: {str(e)}"
         if import_id:
-            add_import_log(import_id, f"ERREUR inattendue: {str(e)}", "error")
-            update_import_status(import_id, "failed")
+            await add_import_log(import_id, f"ERREUR inattendue: {str(e)}", "error")
+            await import_job_service.set_result(import_id, {"import_id": import_id, "error": detail})
+            await update_import_status(import_id, "failed")
         logger.error(f"Unexpected error in import_contacts: {e}", exc_info=True)
         try:
             await db.rollback()
@@ -1460,51 +1498,72 @@ async def import_contacts(
             pass  # Ignore rollback errors
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred during import: {str(e)}"
+            detail=detail
         )
 
 
+async def get_owned_import_status(import_id: str, current_user: User) -> Dict[str, Any]:
+    """Status of an import job started by the current user (404 otherwise)"""
+    status_info = await import_job_service.get_status(import_id)
+    if status_info is None or status_info.get("owner_id") != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return status_info
+
+
+@router.get("/import/{import_id}")
+async def get_import_job(
+    import_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the status of an import job, and its result once it has finished
+    """
+    status_info = await get_owned_import_status(import_id, current_user)
+    result = None
+    if status_info.get("status") in TERMINAL_STATUSES:
+        result = await import_job_service.get_result(import_id)
+    return {"import_id": import_id, "status": status_info, "result": result}
+
+
 @router.get("/import/{import_id}/logs")
 async def stream_import_logs(
     import_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """
     Stream import logs via Server-Sent Events (SSE)
+    
+    Blocks on the import job stream, so events are pushed as soon as any worker
+    appends them. Reconnecting clients resume from the Last-Event-ID header.
     """
+    # Checked before streaming: a resumed or trimmed stream may start with log events
+    await get_owned_import_status(import_id, current_user)
+    
     async def event_generator():
-        last_index = 0
+        last_id = request.headers.get("last-event-id") or "0"
         
         while True:
-            # Check if import is complete
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                    # Send final logs
-                    if import_id in import_logs:
-                        logs = import_logs[import_id]
-                        for log in logs[last_index:]:
-                            yield f"data: {json.dumps(log)}\n\n"
-                    
-                    # Send final status
-                    yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            events = await import_job_service.read_events(import_id, last_id, block_ms=15000)
+            if not events:
+                if await request.is_disconnected():
                     break
+                # Keep the connection alive through proxies while the job is idle
+                yield ": keepalive\n\n"
+                continue
             
-            # Send new logs
-            if import_id in import_logs:
-                logs = import_logs[import_id]
-                if len(logs) > last_index:
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                    last_index = len(logs)
-            
-            # Send status update
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-            
-            await asyncio.sleep(0.5)  # Check every 500ms
+            for event_id, event in events:
+                last_id = event_id
+                if event.get("type") == "status":
+                    yield f"id: {event_id}\ndata: {json.dumps(event, default=str)}\n\n"
+                    if event["data"].get("status") in TERMINAL_STATUSES:
+                        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                        return
+                else:
+                    yield f"id: {event_id}\ndata: {json.dumps(event, default=str)}\n\n"
     
     return StreamingResponse(
         event_generator(),
@@ -1533,83 +1592,22 @@ async def export_contacts(
         Excel file with contacts data
     """
     try:
-        # Get all contacts
-        result = await db.execute(
-            select(Contact)
-            .options(
-                selectinload(Contact.company),
-                selectinload(Contact.employee)
-            )
-            .order_by(Contact.created_at.desc())
-        )
-        contacts = result.scalars().all()
-        
-        # Convert to dict format for export
-        export_data = []
-        for contact in contacts:
-            try:
-                # Safely handle all fields that might be None
-                employee_name = ''
-                if contact.employee:
-                    first_name = contact.employee.first_name or ''
-                    last_name = contact.employee.last_name or ''
-                    employee_name = f"{first_name} {last_name}".strip()
-                
-                birthday_str = ''
-                if contact.birthday:
-                    try:
-                        birthday_str = contact.birthday.isoformat()
-                    except Exception:
-                        birthday_str = str(contact.birthday)
-                
-                export_data.append({
-                    'Prénom': contact.first_name or '',
-                    'Nom': contact.last_name or '',
-                    'Entreprise': contact.company.name if contact.company and contact.company.name else '',
-                    'Poste': contact.position or '',
-                    'Cercle': contact.circle or '',
-                    'LinkedIn': contact.linkedin or '',
-                    'Photo URL': contact.photo_url or '',
-                    'Courriel': contact.email or '',
-                    'Téléphone': contact.phone or '',
-                    'Ville': contact.city or '',
-                    'Pays': contact.country or '',
-                    'Anniversaire': birthday_str,
-                    'Langue': contact.language or '',
-                    'Employé': employee_name,
-                })
-            except Exception as e:
-                logger.error(f"Error processing contact {contact.id} for export: {e}")
-                continue
+        # Stream rows from a server-side cursor into a write-only workbook,
+        # without loading contacts or their relationships into memory
+        stmt, columns = get_export_entity("contacts").build(columns=list(CONTACT_EXPORT_LABELS))
         
-        # Handle empty data case
-        if not export_data:
-            export_data = [{
-                'Prénom': '',
-                'Nom': '',
-                'Entreprise': '',
-                'Poste': '',
-                'Cercle': '',
-                'LinkedIn': '',
-                'Photo URL': '',
-                'Courriel': '',
-                'Téléphone': '',
-                'Ville': '',
-                'Pays': '',
-                'Anniversaire': '',
-                'Langue': '',
-                'Employé': '',
-            }]
+        async def labelled_rows():
+            async for row in stream_entity_rows(stmt):
+                yield {label: row[column] for column, label in CONTACT_EXPORT_LABELS.items()}
         
-        # Export to Excel
-        from datetime import datetime
-        buffer, filename = ExportService.export_to_excel(
-            data=export_data,
-            filename=f"contacts_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        xlsx_file = await ExportService.write_xlsx(
+            labelled_rows(),
+            headers=list(CONTACT_EXPORT_LABELS.values()),
         )
+        filename = f"contacts_export_{dt.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
         return StreamingResponse(
-            buffer,
+            ExportService.iter_file(xlsx_file),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
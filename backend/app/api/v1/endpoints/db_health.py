@@ -5,11 +5,13 @@ Comprehensive database health check for monitoring
 
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import text
 
 from app.core.database import AsyncSessionLocal
 from app.core.config import settings
+from app.core.query_instrumentation import query_metrics
+from app.dependencies import require_superadmin
 
 router = APIRouter()
 
@@ -221,3 +223,22 @@ async def database_health_check() -> Dict[str, Any]:
         
         return health_status
 
+
+
+@router.get("/queries", response_model=Dict[str, Any])
+async def query_metrics_snapshot(
+    limit: int = Query(20, ge=1, le=200, description="Maximum statements and routes returned"),
+    _: None = Depends(require_superadmin),
+) -> Dict[str, Any]:
+    """
+    Aggregated query metrics since process start
+    
+    Returns:
+        Statement fingerprints by total DB time, and per-route query counts,
+        DB time and detected N+1 patterns
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "n_plus_one_threshold": settings.QUERY_N_PLUS_ONE_THRESHOLD,
+        **query_metrics.snapshot(limit),
+    }
@@ -43,6 +43,12 @@ class TemplateRender(BaseModel):
     variables: dict = Field(..., description="Template variables")
 
 
+class TemplateBatchRender(BaseModel):
+    variables: List[dict] = Field(
+        ..., min_length=1, max_length=1000, description="One set of variables per rendered email"
+    )
+
+
 class TemplateResponse(BaseModel):
     id: int
     key: str
@@ -161,6 +167,25 @@ async def render_template(
     return rendered
 
 
+@router.post("/email-templates/{key}/render/batch", tags=["email-templates"])
+async def render_template_batch(
+    key: str,
+    render_data: TemplateBatchRender = Body(...),
+    language: str = Query('en'),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Render an email template once per set of variables (e.g. mass mailings)"""
+    service = EmailTemplateService(db)
+    rendered = await service.render_many(key, render_data.variables, language=language)
+    if rendered is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found or inactive"
+        )
+    return {"rendered": rendered}
+
+
 @router.put("/email-templates/{template_id}", response_model=TemplateResponse, tags=["email-templates"])
 async def update_template(
     template_id: int,
@@ -2,12 +2,19 @@
 Data Export API Endpoints
 """
 
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.services.export_service import ExportService
+from app.services.entity_export_service import (
+    EXPORT_ENTITIES,
+    STREAMING_EXPORT_FORMATS,
+    get_export_entity,
+    stream_entity_rows,
+)
 from app.models.user import User
 from app.dependencies import get_current_user
 from app.core.logging import logger
@@ -28,6 +35,15 @@ class ExportRequest(BaseModel):
     title: Optional[str] = Field(None, description="Title for PDF exports")
 
 
+class EntityExportRequest(BaseModel):
+    """Server-side export request model"""
+    entity: str = Field(..., description="Entity to export: contacts, companies, projects")
+    format: str = Field("csv", description="Export format: csv, jsonl, excel")
+    filters: Dict[str, Any] = Field(default_factory=dict, description="Equality/IN filters and *_after/*_before date bounds")
+    columns: Optional[List[str]] = Field(None, description="Columns to include (default: all)")
+    filename: Optional[str] = Field(None, description="Custom filename (optional)")
+
+
 @router.post("/export", tags=["exports"])
 async def export_data(
     http_request: Request,
@@ -129,6 +145,102 @@ async def export_data(
         )
 
 
+@router.post("/stream", tags=["exports"])
+async def export_entity(
+    http_request: Request,
+    request: EntityExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Export an entity straight from the database (CSV, JSONL, Excel)
+    
+    Rows are read with a server-side cursor and written incrementally, so
+    memory stays constant regardless of the number of rows exported.
+    """
+    if request.format not in STREAMING_EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format '{request.format}' not available. Available formats: {', '.join(STREAMING_EXPORT_FORMATS)}"
+        )
+    
+    try:
+        entity = get_export_entity(request.entity)
+        stmt, columns = entity.build(
+            filters=request.filters,
+            columns=request.columns,
+            owner_id=current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    media_type, extension = STREAMING_EXPORT_FORMATS[request.format]
+    filename = request.filename or f"{entity.name}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    rows = stream_entity_rows(stmt)
+    
+    if request.format == 'csv':
+        body = ExportService.stream_csv(rows, columns)
+    elif request.format == 'jsonl':
+        body = ExportService.stream_jsonl(rows, columns)
+    else:
+        try:
+            xlsx_file = await ExportService.write_xlsx(rows, columns, sheet_name=entity.name)
+        except ImportError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e)
+            )
+        body = ExportService.iter_file(xlsx_file)
+    
+    logger.info(f"User {current_user.id} started {request.format} export of {entity.name}")
+    
+    # Log data export
+    try:
+        await SecurityAuditLogger.log_event(
+            db=db,
+            event_type=SecurityEventType.DATA_EXPORTED,
+            description=f"{entity.name} exported as {request.format}",
+            user_id=current_user.id,
+            user_email=current_user.email,
+            ip_address=http_request.client.host if http_request.client else None,
+            user_agent=http_request.headers.get("user-agent"),
+            request_method=http_request.method,
+            request_path=str(http_request.url.path),
+            severity="info",
+            success="success",
+            metadata={"format": request.format, "entity": entity.name, "filters": request.filters, "filename": filename}
+        )
+    except Exception:
+        pass  # Don't fail request if audit logging fails
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
+@router.get("/entities", tags=["exports"])
+async def get_export_entities(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get entities available for server-side export, with their columns and filters
+    """
+    return {
+        "formats": list(STREAMING_EXPORT_FORMATS),
+        "entities": {
+            name: {"columns": entity.columns, "filters": sorted(entity.filters)}
+            for name, entity in EXPORT_ENTITIES.items()
+        }
+    }
+
+
 @router.get("/formats", tags=["exports"])
 async def get_export_formats(
     current_user: User = Depends(get_current_user),
@@ -150,6 +150,29 @@ async def get_feature_flags(
     return [FeatureFlagResponse.model_validate(f) for f in flags]
 
 
+@router.get("/feature-flags/evaluate", tags=["feature-flags"])
+async def evaluate_feature_flags(
+    team_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Evaluate every feature flag for the current user/team.
+    
+    Meant for the frontend bootstrap: one request instead of one check per flag.
+    
+    Args:
+        team_id: Optional team ID for team-based targeting
+        current_user: Authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Enabled status and variant for each flag key
+    """
+    service = FeatureFlagService(db)
+    return await service.evaluate_all(user_id=current_user.id, team_id=team_id)
+
+
 @router.get("/feature-flags/{key}", response_model=FeatureFlagResponse, tags=["feature-flags"])
 async def get_feature_flag(
     key: str,
@@ -207,10 +230,9 @@ async def check_feature_flag(
         HTTPException: 404 if feature flag not found
     """
     service = FeatureFlagService(db)
-    is_enabled = await service.is_enabled(key, user_id=current_user.id, team_id=team_id)
-    variant = None
-    if is_enabled:
-        variant = await service.get_variant(key, user_id=current_user.id)
+    evaluation = await service.evaluate(key, user_id=current_user.id, team_id=team_id)
+    is_enabled = evaluation.enabled
+    variant = evaluation.variant
     
     logger.debug(
         f"Feature flag checked: {key} for user {current_user.id}",
@@ -13,7 +13,9 @@ from app.models.form import Form, FormSubmission
 from app.models.user import User
 from app.dependencies import get_current_user, get_db, is_superadmin
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
+from app.services.activity_service import ActivityService
 from app.core.tenancy_helpers import apply_tenant_scope
+from app.services.form_statistics_service import FormStatisticsService
 from fastapi import Request
 
 router = APIRouter()
@@ -136,6 +138,8 @@ async def create_form(
     await db.commit()
     await db.refresh(form)
     
+    await ActivityService(db).record(current_user.id, "created", "form", form.id, {"name": form.name})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -189,6 +193,8 @@ async def update_form(
         form.description = form_data.description
     if form_data.fields is not None:
         form.fields = [field.model_dump() for field in form_data.fields]
+        # Field definitions changed: rollups are rebuilt on the next statistics read
+        await FormStatisticsService(db).invalidate_rollups(form.id)
     if form_data.submit_button_text is not None:
         form.submit_button_text = form_data.submit_button_text
     if form_data.success_message is not None:
@@ -197,6 +203,8 @@ async def update_form(
     await db.commit()
     await db.refresh(form)
     
+    await ActivityService(db).record(current_user.id, "updated", "form", form.id, {"name": form.name})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -247,6 +255,8 @@ async def delete_form(
     await db.delete(form)
     await db.commit()
     
+    await ActivityService(db).record(current_user.id, "deleted", "form", form_id, {"name": form_name})
+    
     # Log data deletion
     try:
         await SecurityAuditLogger.log_event(
@@ -303,6 +313,7 @@ async def create_submission(
     )
     
     db.add(submission)
+    await FormStatisticsService(db).record_submission(form, submission_data.data)
     await db.commit()
     await db.refresh(submission)
     
@@ -375,12 +386,14 @@ async def delete_submission(
         )
     
     await db.delete(submission)
+    await FormStatisticsService(db).invalidate_rollups(submission.form_id)
     await db.commit()
 
 
 @router.get("/forms/{form_id}/statistics", tags=["forms"])
 async def get_form_statistics(
     form_id: int,
+    source: str = Query('auto', pattern='^(auto|live)$', description="'auto' reads incremental rollups, 'live' aggregates submissions"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -395,62 +408,14 @@ async def get_form_statistics(
             detail="Form not found"
         )
     
-    # Get submission count
-    count_result = await db.execute(
-        select(func.count(FormSubmission.id)).where(FormSubmission.form_id == form_id)
-    )
-    total_submissions = count_result.scalar_one() or 0
-    
-    # Get submissions
-    submissions_result = await db.execute(
-        select(FormSubmission).where(FormSubmission.form_id == form_id)
-    )
-    submissions = submissions_result.scalars().all()
-    
-    # Calculate statistics per field
-    field_stats = {}
-    for field in form.fields:
-        field_name = field.get('name', '')
-        if not field_name:
-            continue
-        
-        field_type = field.get('type', '')
-        values = [sub.data.get(field_name) for sub in submissions if sub.data.get(field_name) is not None]
-        
-        if field_type in ['scale', 'rating', 'nps', 'number']:
-            # Numeric statistics
-            numeric_values = [float(v) for v in values if v is not None and str(v).replace('.', '').isdigit()]
-            if numeric_values:
-                field_stats[field_name] = {
-                    'type': 'numeric',
-                    'average': sum(numeric_values) / len(numeric_values),
-                    'min': min(numeric_values),
-                    'max': max(numeric_values),
-                    'count': len(numeric_values),
-                    'distribution': {},
-                }
-                # Distribution
-                for val in numeric_values:
-                    rounded = round(val)
-                    field_stats[field_name]['distribution'][rounded] = field_stats[field_name]['distribution'].get(rounded, 0) + 1
-        else:
-            # Categorical statistics
-            distribution = {}
-            for val in values:
-                str_val = str(val)
-                distribution[str_val] = distribution.get(str_val, 0) + 1
-            
-            field_stats[field_name] = {
-                'type': 'categorical',
-                'count': len(values),
-                'distribution': distribution,
-            }
+    # Aggregated in the database (served from incremental rollups on Postgres)
+    statistics = await FormStatisticsService(db).get_statistics(form, source=source)
     
     return {
         'form_id': form_id,
         'form_name': form.name,
-        'total_submissions': total_submissions,
-        'field_statistics': field_stats,
+        'total_submissions': statistics['total_submissions'],
+        'field_statistics': statistics['field_statistics'],
     }
 
 
@@ -7,14 +7,13 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from datetime import datetime, timedelta
 
 from app.models.user import User
-from app.models.project import Project
+from app.models.project import ProjectStatus
 from app.dependencies import get_current_user, get_db
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
-from app.core.tenancy_helpers import apply_tenant_scope
+from app.services.project_rollup_service import DayRange, ProjectRollupService
 from fastapi import Request
 
 router = APIRouter()
@@ -47,31 +46,28 @@ async def get_insights(
 ):
     """Get dashboard insights including metrics, trends, and user growth"""
     
-    # Calculate metrics from projects and activities
-    projects_query = select(Project).where(Project.user_id == current_user.id)
-    projects_query = apply_tenant_scope(projects_query, Project)
+    # 30-day windows of creation days, oldest first; the last one ends today
+    now = datetime.utcnow()
+    today = now.date()
+    months = [now - timedelta(days=30 * (6 - i)) for i in range(6)]
+    window_ends = [today - timedelta(days=30 * (5 - i)) for i in range(6)]
     
-    result = await db.execute(projects_query)
-    projects = result.scalars().all()
+    ranges = {
+        "total": DayRange(),
+        "active": DayRange(status=ProjectStatus.ACTIVE),
+        "prev_total": DayRange(today - timedelta(days=59), today - timedelta(days=30)),
+    }
+    for i, window_end in enumerate(window_ends):
+        ranges[f"month_{i}"] = DayRange(window_end - timedelta(days=29), window_end)
+        ranges[f"cumulative_{i}"] = DayRange(last=window_end)
     
-    # Calculate project metrics
-    total_projects = len(projects)
-    active_projects = len([p for p in projects if p.status == 'active'])
-    
-    # Calculate previous period for comparison (30 days ago)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    sixty_days_ago = datetime.utcnow() - timedelta(days=60)
+    # Every count in one query over the user's daily project rollups
+    counts = await ProjectRollupService(db).count_projects(current_user.id, ranges)
     
-    # Get projects from previous period
-    prev_projects_query = select(Project).where(
-        Project.user_id == current_user.id,
-        Project.created_at >= sixty_days_ago,
-        Project.created_at < thirty_days_ago
-    )
-    prev_projects_query = apply_tenant_scope(prev_projects_query, Project)
-    prev_result = await db.execute(prev_projects_query)
-    prev_projects = prev_result.scalars().all()
-    prev_total = len(prev_projects)
+    # Calculate project metrics
+    total_projects = counts["total"]
+    active_projects = counts["active"]
+    prev_total = counts["prev_total"]
     
     # Calculate growth percentage
     project_growth = 0.0
@@ -80,44 +76,17 @@ async def get_insights(
     elif total_projects > 0:
         project_growth = 100.0
     
-    # Generate trend data (last 6 months)
-    trend_data = []
-    for i in range(6):
-        month_start = datetime.utcnow() - timedelta(days=30 * (6 - i))
-        month_end = month_start + timedelta(days=30)
-        
-        month_projects_query = select(func.count(Project.id)).where(
-            Project.user_id == current_user.id,
-            Project.created_at >= month_start,
-            Project.created_at < month_end
-        )
-        month_projects_query = apply_tenant_scope(month_projects_query, Project)
-        month_result = await db.execute(month_projects_query)
-        month_count = month_result.scalar() or 0
-        
-        trend_data.append(ChartDataPoint(
-            label=month_start.strftime('%b'),
-            value=float(month_count)
-        ))
+    # Trend data (projects created per month, last 6 months)
+    trend_data = [
+        ChartDataPoint(label=month_start.strftime('%b'), value=float(counts[f"month_{i}"]))
+        for i, month_start in enumerate(months)
+    ]
     
-    # Generate user growth data (simplified - using project counts as proxy)
-    user_growth_data = []
-    for i in range(6):
-        month_start = datetime.utcnow() - timedelta(days=30 * (6 - i))
-        month_end = month_start + timedelta(days=30)
-        
-        month_projects_query = select(func.count(Project.id)).where(
-            Project.user_id == current_user.id,
-            Project.created_at < month_end
-        )
-        month_projects_query = apply_tenant_scope(month_projects_query, Project)
-        month_result = await db.execute(month_projects_query)
-        cumulative_count = month_result.scalar() or 0
-        
-        user_growth_data.append(ChartDataPoint(
-            label=month_start.strftime('%b'),
-            value=float(cumulative_count)
-        ))
+    # User growth data (simplified - cumulative project counts as proxy)
+    user_growth_data = [
+        ChartDataPoint(label=month_start.strftime('%b'), value=float(counts[f"cumulative_{i}"]))
+        for i, month_start in enumerate(months)
+    ]
     
     # Build metrics
     metrics = [
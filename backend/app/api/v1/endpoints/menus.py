@@ -13,6 +13,7 @@ from app.models.menu import Menu
 from app.models.user import User
 from app.dependencies import get_current_user, get_db, is_superadmin
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
+from app.services.activity_service import ActivityService
 from app.core.tenancy_helpers import apply_tenant_scope
 from fastapi import Request
 
@@ -109,6 +110,8 @@ async def create_menu(
     await db.commit()
     await db.refresh(menu)
     
+    await ActivityService(db).record(current_user.id, "created", "menu", menu.id, {"name": menu.name})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -163,6 +166,8 @@ async def update_menu(
     await db.commit()
     await db.refresh(menu)
     
+    await ActivityService(db).record(current_user.id, "updated", "menu", menu.id, {"name": menu.name})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -212,6 +217,8 @@ async def delete_menu(
     await db.delete(menu)
     await db.commit()
     
+    await ActivityService(db).record(current_user.id, "deleted", "menu", menu_id, {"name": menu_name})
+    
     # Log data deletion
     try:
         await SecurityAuditLogger.log_event(
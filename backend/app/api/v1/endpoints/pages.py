@@ -3,7 +3,7 @@ Pages API Endpoints
 CMS pages management
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +13,7 @@ from app.models.page import Page
 from app.models.user import User
 from app.dependencies import get_current_user, get_db, is_superadmin
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
+from app.services.activity_service import ActivityService
 from app.core.tenancy_helpers import apply_tenant_scope
 from fastapi import Request
 
@@ -71,17 +72,46 @@ class PageResponse(BaseModel):
         from_attributes = True
 
 
+# Columns of a page response; content, content_html and sections can be left out of listings
+PAGE_COLUMNS = (
+    Page.id, Page.title, Page.slug, Page.status, Page.meta_title, Page.meta_description, Page.meta_keywords,
+    Page.user_id, Page.created_at, Page.updated_at, Page.published_at,
+)
+CONTENT_COLUMNS = (Page.content, Page.content_html, Page.sections)
+
+
+def _page_dict(row) -> Dict[str, Any]:
+    """PageResponse fields of a PAGE_COLUMNS (+ CONTENT_COLUMNS) row"""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "slug": row.slug,
+        "content": getattr(row, "content", None),
+        "content_html": getattr(row, "content_html", None),
+        "sections": getattr(row, "sections", None),
+        "status": row.status,
+        "meta_title": row.meta_title,
+        "meta_description": row.meta_description,
+        "meta_keywords": row.meta_keywords,
+        "user_id": row.user_id,
+        "created_at": row.created_at.isoformat(),
+        "updated_at": row.updated_at.isoformat(),
+        "published_at": row.published_at.isoformat() if row.published_at else None,
+    }
+
+
 @router.get("/pages", response_model=List[PageResponse], tags=["pages"])
 async def list_pages(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = Query(None),
+    exclude_content: bool = Query(False, description="Leave content, content_html and sections out of the pages"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """List all pages"""
-    query = select(Page)
+    query = select(*(PAGE_COLUMNS if exclude_content else PAGE_COLUMNS + CONTENT_COLUMNS))
     if status:
         query = query.where(Page.status == status)
     # Apply tenant scoping if tenancy is enabled
@@ -89,7 +119,7 @@ async def list_pages(
     query = query.order_by(Page.created_at.desc()).offset(skip).limit(limit)
     
     result = await db.execute(query)
-    pages = result.scalars().all()
+    pages = result.all()
     
     # Log data access
     try:
@@ -110,7 +140,7 @@ async def list_pages(
     except Exception:
         pass  # Don't fail request if audit logging fails
     
-    return [PageResponse.model_validate(page) for page in pages]
+    return [_page_dict(page) for page in pages]
 
 
 @router.get("/pages/{slug}", response_model=PageResponse, tags=["pages"])
@@ -173,6 +203,8 @@ async def create_page(
     await db.commit()
     await db.refresh(page)
     
+    await ActivityService(db).record(current_user.id, "created", "page", page.id, {"title": page.title, "slug": page.slug})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -254,6 +286,8 @@ async def update_page(
     await db.commit()
     await db.refresh(page)
     
+    await ActivityService(db).record(current_user.id, "updated", "page", page.id, {"title": page.title, "slug": page.slug})
+    
     # Log data modification
     try:
         await SecurityAuditLogger.log_event(
@@ -304,6 +338,8 @@ async def delete_page(
     await db.delete(page)
     await db.commit()
     
+    await ActivityService(db).record(current_user.id, "deleted", "page", page_id, {"title": page_title, "slug": slug})
+    
     # Log data deletion
     try:
         await SecurityAuditLogger.log_event(
@@ -352,6 +388,8 @@ async def delete_page_by_id(
     await db.delete(page)
     await db.commit()
     
+    await ActivityService(db).record(current_user.id, "deleted", "page", page_id, {"title": page_title, "slug": page_slug})
+    
     # Log deletion
     try:
         await SecurityAuditLogger.log_event(
@@ -3,7 +3,7 @@ Posts API Endpoints
 Blog posts management
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,7 +14,10 @@ from app.models.user import User
 from app.models.tag import Category
 from app.dependencies import get_current_user, get_db
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
+from app.services.activity_service import ActivityService
+from app.core.tenancy import TenancyConfig, get_current_tenant
 from app.core.tenancy_helpers import apply_tenant_scope
+from app.services.post_listing_cache import post_listing_cache
 from fastapi import Request
 
 router = APIRouter()
@@ -53,7 +56,7 @@ class PostResponse(BaseModel):
     title: str
     slug: str
     excerpt: Optional[str] = None
-    content: str
+    content: Optional[str] = None  # None in listings requested with exclude_content
     content_html: Optional[str] = None
     status: str
     author_id: Optional[int] = None
@@ -72,6 +75,53 @@ class PostResponse(BaseModel):
         from_attributes = True
 
 
+# Columns of a post response; content and content_html can be left out of listings
+POST_COLUMNS = (
+    Post.id, Post.title, Post.slug, Post.excerpt, Post.status, Post.author_id, Post.category_id, Post.tags,
+    Post.meta_title, Post.meta_description, Post.meta_keywords, Post.published_at, Post.created_at,
+    Post.updated_at,
+)
+CONTENT_COLUMNS = (Post.content, Post.content_html)
+
+
+def _post_query(exclude_content: bool = False):
+    """Post columns with the author and category names, in one statement"""
+    columns = POST_COLUMNS if exclude_content else POST_COLUMNS + CONTENT_COLUMNS
+    return (
+        select(
+            *columns,
+            User.first_name.label("author_first_name"),
+            User.last_name.label("author_last_name"),
+            User.email.label("author_email"),
+            Category.name.label("category_name"),
+        )
+        .outerjoin(User, User.id == Post.author_id)
+        .outerjoin(Category, Category.id == Post.category_id)
+    )
+
+
+def _post_dict(row) -> Dict[str, Any]:
+    """PostResponse fields of a _post_query row"""
+    post = row._asdict()
+    first_name, last_name, email = post.pop("author_first_name"), post.pop("author_last_name"), post.pop("author_email")
+    post["author_name"] = None
+    if email is not None:
+        post["author_name"] = f"{first_name or ''} {last_name or ''}".strip() or email
+    post.setdefault("content", None)
+    post.setdefault("content_html", None)
+    if not isinstance(post["tags"], list):
+        post["tags"] = None
+    published_at = post["published_at"]
+    post["published_at"] = published_at.isoformat() if published_at else None
+    post["created_at"] = post["created_at"].isoformat()
+    post["updated_at"] = post["updated_at"].isoformat()
+    return post
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @router.get("/posts", response_model=List[PostResponse], tags=["posts"])
 async def list_posts(
     request: Request,
@@ -84,117 +134,79 @@ async def list_posts(
     author_id: Optional[int] = Query(None, description="Filter by author ID"),
     author_slug: Optional[str] = Query(None, description="Filter by author slug/name"),
     year: Optional[int] = Query(None, description="Filter by publication year"),
+    exclude_content: bool = Query(False, description="Leave content and content_html out of the posts"),
     current_user: Optional[User] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """List all posts"""
-    query = select(Post)
-    
-    # Filter by status
-    if status:
-        query = query.where(Post.status == status)
-    else:
-        # If not authenticated or not admin, only show published posts
-        if not current_user:
+    # Published listings are the same for every reader: serve them from the cache
+    published_only = status == 'published' or (not status and not current_user)
+    listing_key = None
+    posts = None
+    if published_only:
+        listing_key = await post_listing_cache.listing_key({
+            "skip": skip, "limit": limit, "category_id": category_id, "category_slug": category_slug,
+            "tag": tag, "author_id": author_id, "author_slug": author_slug, "year": year,
+            "exclude_content": exclude_content,
+            "tenant": get_current_tenant() if TenancyConfig.is_enabled() else None,
+        })
+        posts = await post_listing_cache.get(listing_key)
+    
+    if posts is None:
+        query = _post_query(exclude_content)
+        
+        if published_only:
             query = query.where(Post.status == 'published')
-    
-    # Filter by category ID
-    if category_id:
-        query = query.where(Post.category_id == category_id)
-    
-    # Filter by category slug
-    if category_slug:
-        category_query = select(Category).where(Category.slug == category_slug)
-        category_result = await db.execute(category_query)
-        category = category_result.scalar_one_or_none()
-        if category:
-            query = query.where(Post.category_id == category.id)
-        else:
-            # No matching category, return empty result
-            query = query.where(Post.id == -1)  # Impossible condition
-    
-    # Filter by author ID
-    if author_id:
-        query = query.where(Post.author_id == author_id)
-    
-    # Filter by author slug/name
-    if author_slug:
-        # Find user by name or email
-        user_query = select(User).where(
-            or_(
-                User.email.ilike(f"%{author_slug}%"),
-                User.first_name.ilike(f"%{author_slug}%"),
-                User.last_name.ilike(f"%{author_slug}%")
+        elif status:
+            query = query.where(Post.status == status)
+        
+        # Filter by category ID
+        if category_id:
+            query = query.where(Post.category_id == category_id)
+        
+        # Filter by category slug
+        if category_slug:
+            query = query.where(Post.category_id.in_(select(Category.id).where(Category.slug == category_slug)))
+        
+        # Filter by author ID
+        if author_id:
+            query = query.where(Post.author_id == author_id)
+        
+        # Filter by author slug/name (matching users are resolved in the same statement)
+        if author_slug:
+            pattern = f"%{_escape_like(author_slug)}%"
+            query = query.where(Post.author_id.in_(
+                select(User.id).where(
+                    or_(
+                        User.email.ilike(pattern, escape="\\"),
+                        User.first_name.ilike(pattern, escape="\\"),
+                        User.last_name.ilike(pattern, escape="\\"),
+                    )
+                )
+            ))
+        
+        # Filter by tag (if tags JSON contains the tag)
+        if tag:
+            # This is a simplified tag filter - in production, you might want a proper tag relationship
+            query = query.where(Post.tags.contains([tag]))
+        
+        # Filter by year
+        if year:
+            from datetime import datetime
+            year_start = datetime(year, 1, 1)
+            year_end = datetime(year + 1, 1, 1)
+            query = query.where(
+                Post.published_at >= year_start,
+                Post.published_at < year_end
             )
-        )
-        user_result = await db.execute(user_query)
-        users = user_result.scalars().all()
-        if users:
-            user_ids = [u.id for u in users]
-            query = query.where(Post.author_id.in_(user_ids))
-        else:
-            # No matching users, return empty result
-            query = query.where(Post.id == -1)  # Impossible condition
-    
-    # Filter by tag (if tags JSON contains the tag)
-    if tag:
-        # This is a simplified tag filter - in production, you might want a proper tag relationship
-        query = query.where(Post.tags.contains([tag]))
-    
-    # Filter by year
-    if year:
-        from datetime import datetime
-        year_start = datetime(year, 1, 1)
-        year_end = datetime(year + 1, 1, 1)
-        query = query.where(
-            Post.published_at >= year_start,
-            Post.published_at < year_end
-        )
-    
-    # Apply tenant scoping if tenancy is enabled
-    query = apply_tenant_scope(query, Post)
-    query = query.order_by(Post.created_at.desc()).offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    posts = result.scalars().all()
-    
-    # Load author and category names
-    post_responses = []
-    for post in posts:
-        author_name = None
-        if post.author_id:
-            author_result = await db.execute(select(User).where(User.id == post.author_id))
-            author = author_result.scalar_one_or_none()
-            if author:
-                author_name = f"{author.first_name or ''} {author.last_name or ''}".strip() or author.email
         
-        category_name = None
-        if post.category_id:
-            category_result = await db.execute(select(Category).where(Category.id == post.category_id))
-            category = category_result.scalar_one_or_none()
-            if category:
-                category_name = category.name
+        # Apply tenant scoping if tenancy is enabled
+        query = apply_tenant_scope(query, Post)
+        query = query.order_by(Post.created_at.desc()).offset(skip).limit(limit)
         
-        post_responses.append(PostResponse(
-            id=post.id,
-            title=post.title,
-            slug=post.slug,
-            excerpt=post.excerpt,
-            content=post.content,
-            content_html=post.content_html,
-            status=post.status,
-            author_id=post.author_id,
-            author_name=author_name,
-            category_id=post.category_id,
-            category_name=category_name,
-            tags=post.tags if isinstance(post.tags, list) else None,
-            meta_title=post.meta_title,
-            meta_description=post.meta_description,
-            meta_keywords=post.meta_keywords,
-            published_at=post.published_at.isoformat() if post.published_at else None,
-            created_at=post.created_at.isoformat(),
-            updated_at=post.updated_at.isoformat(),
-        ))
+        result = await db.execute(query)
+        posts = [_post_dict(row) for row in result]
+        await post_listing_cache.set(listing_key, posts)
     
     # Log data access
     if current_user:
@@ -209,7 +221,7 @@ async def list_posts(
         except Exception:
             pass
     
-    return post_responses
+    return posts
 
 
 @router.get("/posts/{slug}", response_model=PostResponse, tags=["posts"])
@@ -220,7 +232,7 @@ async def get_post_by_slug(
     db: AsyncSession = Depends(get_db),
 ):
     """Get a post by slug"""
-    query = select(Post).where(Post.slug == slug)
+    query = _post_query().where(Post.slug == slug)
     
     # If not authenticated or not admin, only show published posts
     if not current_user:
@@ -229,29 +241,14 @@ async def get_post_by_slug(
     query = apply_tenant_scope(query, Post)
     
     result = await db.execute(query)
-    post = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if not post:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    # Load author and category names
-    author_name = None
-    if post.author_id:
-        author_result = await db.execute(select(User).where(User.id == post.author_id))
-        author = author_result.scalar_one_or_none()
-        if author:
-            author_name = f"{author.first_name or ''} {author.last_name or ''}".strip() or author.email
-    
-    category_name = None
-    if post.category_id:
-        category_result = await db.execute(select(Category).where(Category.id == post.category_id))
-        category = category_result.scalar_one_or_none()
-        if category:
-            category_name = category.name
-    
     # Log data access
     if current_user:
         try:
@@ -265,26 +262,7 @@ async def get_post_by_slug(
         except Exception:
             pass
     
-    return PostResponse(
-        id=post.id,
-        title=post.title,
-        slug=post.slug,
-        excerpt=post.excerpt,
-        content=post.content,
-        content_html=post.content_html,
-        status=post.status,
-        author_id=post.author_id,
-        author_name=author_name,
-        category_id=post.category_id,
-        category_name=category_name,
-        tags=post.tags if isinstance(post.tags, list) else None,
-        meta_title=post.meta_title,
-        meta_description=post.meta_description,
-        meta_keywords=post.meta_keywords,
-        published_at=post.published_at.isoformat() if post.published_at else None,
-        created_at=post.created_at.isoformat(),
-        updated_at=post.updated_at.isoformat(),
-    )
+    return PostResponse(**_post_dict(row))
 
 
 @router.post("/posts", response_model=PostResponse, status_code=status.HTTP_201_CREATED, tags=["posts"])
@@ -328,6 +306,9 @@ async def create_post(
     await db.commit()
     await db.refresh(post)
     
+    await post_listing_cache.invalidate()
+    await ActivityService(db).record(current_user.id, "created", "post", post.id, {"title": post.title, "slug": post.slug})
+    
     # Load author and category names
     author_name = f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or current_user.email
     
@@ -442,6 +423,9 @@ async def update_post(
     await db.commit()
     await db.refresh(post)
     
+    await post_listing_cache.invalidate()
+    await ActivityService(db).record(current_user.id, "updated", "post", post.id, {"title": post.title, "slug": post.slug})
+    
     # Load author and category names
     author_name = None
     if post.author_id:
@@ -523,6 +507,9 @@ async def delete_post(
     await db.delete(post)
     await db.commit()
     
+    await post_listing_cache.invalidate()
+    await ActivityService(db).record(current_user.id, "deleted", "post", post_id)
+    
     # Log deletion
     try:
         await SecurityAuditLogger.log_event(
@@ -17,6 +17,7 @@ from app.dependencies import get_current_user
 from app.models.project import Project, ProjectStatus
 from app.models.user import User
 from app.schemas.project import Project as ProjectSchema, ProjectCreate, ProjectUpdate
+from app.services.activity_service import ActivityService
 
 router = APIRouter()
 
@@ -134,6 +135,8 @@ async def create_project(
     await db.commit()
     await db.refresh(project)
     
+    await ActivityService(db).record(current_user.id, "created", "project", project.id, {"name": project.name})
+    
     return project
 
 
@@ -184,6 +187,8 @@ async def update_project(
     await db.commit()
     await db.refresh(project)
     
+    await ActivityService(db).record(current_user.id, "updated", "project", project.id, {"name": project.name})
+    
     return project
 
 
@@ -223,4 +228,6 @@ async def delete_project(
     
     await db.delete(project)
     await db.commit()
+    
+    await ActivityService(db).record(current_user.id, "deleted", "project", project_id)
 
@@ -121,6 +121,7 @@ async def delete_contact(
 async def import_contacts(
     file: UploadFile = File(...),
     import_id: Optional[str] = Query(None, description="Optional import ID for tracking logs"),
+    background: bool = Query(False, description="Run the import in a background job and return its ID immediately"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -128,6 +129,7 @@ async def import_contacts(
     return await commercial_contacts.import_contacts(
         file=file,
         import_id=import_id,
+        background=background,
         db=db,
         current_user=current_user,
     )
@@ -143,13 +145,26 @@ async def export_contacts(
         current_user=current_user,
     )
 
+@router.get("/import/{import_id}")
+async def get_import_job(
+    import_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Get import job status and result for network module"""
+    return await commercial_contacts.get_import_job(
+        import_id=import_id,
+        current_user=current_user,
+    )
+
 @router.get("/import/{import_id}/logs")
 async def stream_import_logs(
     import_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
     """Stream import logs via Server-Sent Events (SSE) for network module"""
     return await commercial_contacts.stream_import_logs(
         import_id=import_id,
+        request=request,
         current_user=current_user,
     )
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 
 from app.services.scheduled_task_service import ScheduledTaskService
+from app.services.task_executor import task_executor, validate_recurrence
 from app.models.user import User
 from app.models.scheduled_task import TaskType, TaskStatus
 from app.dependencies import get_current_user
@@ -75,16 +76,22 @@ async def create_task(
 ):
     """Create a new scheduled task"""
     service = ScheduledTaskService(db)
-    task = await service.create_task(
-        name=task_data.name,
-        description=task_data.description,
-        task_type=task_data.task_type,
-        scheduled_at=task_data.scheduled_at,
-        recurrence=task_data.recurrence,
-        recurrence_config=task_data.recurrence_config,
-        task_data=task_data.task_data,
-        user_id=current_user.id
-    )
+    try:
+        task = await service.create_task(
+            name=task_data.name,
+            description=task_data.description,
+            task_type=task_data.task_type,
+            scheduled_at=task_data.scheduled_at,
+            recurrence=task_data.recurrence,
+            recurrence_config=task_data.recurrence_config,
+            task_data=task_data.task_data,
+            user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     return TaskResponse.model_validate(task)
 
 
@@ -105,6 +112,26 @@ async def get_tasks(
     return [TaskResponse.model_validate(t) for t in tasks]
 
 
+@router.get("/scheduled-tasks/metrics", tags=["scheduled-tasks"])
+async def get_task_executor_metrics(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Scheduled task backlog and lag, and execution metrics for this worker (admin only)"""
+    from app.dependencies import is_admin_or_superadmin
+    
+    if not await is_admin_or_superadmin(current_user, db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return {
+        "backlog": await task_executor.backlog(db),
+        **task_executor.metrics.snapshot(),
+    }
+
+
 @router.get("/scheduled-tasks/{task_id}", response_model=TaskResponse, tags=["scheduled-tasks"])
 async def get_task(
     task_id: int,
@@ -171,6 +198,16 @@ async def update_task(
     
     # Update task fields
     updates = task_data.model_dump(exclude_unset=True)
+    try:
+        validate_recurrence(
+            updates.get("recurrence") or task.recurrence,
+            updates.get("recurrence_config") or task.recurrence_config,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     for key, value in updates.items():
         if hasattr(task, key) and value is not None:
             setattr(task, key, value)
@@ -13,10 +13,13 @@ from app.dependencies import (
     get_current_user,
     get_subscription_service,
     get_stripe_service,
+    require_superadmin,
 )
 from app.models import User
 from app.services.subscription_service import SubscriptionService
 from app.services.stripe_service import StripeService
+from app.services.stripe_client import stripe_metrics
+from app.services.stripe_webhook_queue import stripe_webhook_queue
 from app.schemas.subscription import (
     PlanResponse,
     PlanListResponse,
@@ -207,3 +210,23 @@ async def upgrade_subscription(
     
     return SubscriptionResponse.model_validate(updated_subscription)
 
+
+
+@router.get("/stripe/metrics")
+async def get_stripe_metrics(
+    _: None = Depends(require_superadmin),
+):
+    """Stripe API latency histograms, errors and retries for this worker (superadmin only)"""
+    return stripe_metrics.snapshot()
+
+
+@router.get("/stripe/webhooks/metrics")
+async def get_stripe_webhook_metrics(
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(require_superadmin),
+):
+    """Stripe webhook queue backlog, and throughput and latency for this worker (superadmin only)"""
+    return {
+        "backlog": await stripe_webhook_queue.backlog(db),
+        **stripe_webhook_queue.metrics.snapshot(),
+    }
@@ -61,6 +61,12 @@ class TemplateRenderRequest(BaseModel):
     variables: dict = Field(..., description="Variables to substitute in template")
 
 
+class TemplateBatchRenderRequest(BaseModel):
+    variables: List[dict] = Field(
+        ..., min_length=1, max_length=1000, description="One set of variables per rendered document"
+    )
+
+
 @router.post("/templates", response_model=TemplateResponse, status_code=status.HTTP_201_CREATED, tags=["templates"])
 async def create_template(
     template_data: TemplateCreate,
@@ -152,6 +158,29 @@ async def render_template(
         )
 
 
+@router.post("/templates/{template_id}/render/batch", tags=["templates"])
+async def render_template_batch(
+    template_id: int,
+    render_data: TemplateBatchRenderRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Render a template once per set of variables (e.g. mass mailings)"""
+    try:
+        service = TemplateService(db)
+        rendered = await service.render_many(
+            template_id=template_id,
+            variables_list=render_data.variables,
+            user_id=current_user.id
+        )
+        return {"rendered": rendered}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.put("/templates/{template_id}", response_model=TemplateResponse, tags=["templates"])
 async def update_template(
     template_id: int,
@@ -4,36 +4,96 @@ Supports real-time notifications, live updates, and chat functionality.
 """
 
 from typing import Dict, List, Set
+import asyncio
 import json
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status
 from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.dependencies import get_current_user
 from app.core.logging import logger
+from app.core.metrics import record_websocket_connections
 from app.models.user import User
+from app.services.websocket_broker import (
+    BROADCAST_CHANNEL,
+    ROOM_CHANNEL,
+    USER_CHANNEL,
+    create_broker,
+    room_channel,
+    user_channel,
+)
+from app.services.websocket_writer import (
+    SLOW_CONSUMER_CLOSE_CODE,
+    ConnectionWriter,
+    WriterMetrics,
+    encode_message,
+)
 from typing import Optional
 
 router = APIRouter()
 
 
 class ConnectionManager:
-    """Manages WebSocket connections."""
+    """
+    Manages WebSocket connections.
+
+    Sockets are tracked per process; messages go through a broker
+    (app.services.websocket_broker) so users and rooms connected to other
+    workers or nodes receive them too. Each message is encoded once and
+    queued on every recipient's bounded send queue (app.services.websocket_writer),
+    so a slow client never delays the others.
+    """
     
-    def __init__(self):
+    def __init__(self, broker=None, max_queue: Optional[int] = None, slow_consumer_policy: Optional[str] = None):
         # Active connections: {user_id: [WebSocket, ...]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
         # Room connections: {room_id: Set[WebSocket]}
         self.rooms: Dict[str, Set[WebSocket]] = {}
+        self.max_queue = max_queue or settings.WEBSOCKET_SEND_QUEUE_SIZE
+        self.slow_consumer_policy = slow_consumer_policy or settings.WEBSOCKET_SLOW_CONSUMER_POLICY
+        self.metrics = WriterMetrics()
+        self._writers: Dict[WebSocket, ConnectionWriter] = {}
+        self._broker = broker
+        self._broker_started = False
+        self._start_lock = asyncio.Lock()
+    
+    @property
+    def broker(self):
+        if self._broker is None:
+            self._broker = create_broker()
+        return self._broker
+    
+    async def _ensure_broker(self):
+        if self._broker_started:
+            return self.broker
+        async with self._start_lock:
+            if not self._broker_started:
+                await self.broker.start(self._on_broker_message)
+                self._broker_started = True
+        return self.broker
     
     async def connect(self, websocket: WebSocket, user_id: str = None):
         """Accept a WebSocket connection."""
         await websocket.accept()
+        broker = await self._ensure_broker()
+        self._writers[websocket] = ConnectionWriter(
+            websocket,
+            max_queue=self.max_queue,
+            policy=self.slow_consumer_policy,
+            metrics=self.metrics,
+            on_lost=self._connection_lost,
+            user_id=user_id,
+        )
+        record_websocket_connections(1)
         
         if user_id:
             if user_id not in self.active_connections:
                 self.active_connections[user_id] = []
+                await broker.subscribe(user_channel(user_id))
             self.active_connections[user_id].append(websocket)
+            await broker.presence_incr(f"user:{user_id}", 1)
             logger.info(f"WebSocket connected: user_id={user_id}, total={len(self.active_connections.get(user_id, []))}")
         else:
             # Anonymous connection
@@ -41,92 +101,156 @@ class ConnectionManager:
                 self.active_connections["anonymous"] = []
             self.active_connections["anonymous"].append(websocket)
     
-    def disconnect(self, websocket: WebSocket, user_id: str = None):
-        """Remove a WebSocket connection."""
-        if user_id and user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
+    async def disconnect(self, websocket: WebSocket, user_id: str = None):
+        """Remove a WebSocket connection (safe to call more than once)."""
+        writer = self._writers.pop(websocket, None)
+        if writer is not None:
+            record_websocket_connections(-1)
+            await writer.close()
+        key = user_id or "anonymous"
+        connections = self.active_connections.get(key)
+        if not connections or websocket not in connections:
+            return
+        connections.remove(websocket)
+        if not connections:
+            del self.active_connections[key]
+        if user_id:
+            if key not in self.active_connections:
+                await self.broker.unsubscribe(user_channel(user_id))
+            await self.broker.presence_incr(f"user:{user_id}", -1)
             logger.info(f"WebSocket disconnected: user_id={user_id}")
+    
+    async def send(self, websocket: WebSocket, message: dict):
+        """Send a message to one socket through its send queue."""
+        writer = self._writers.get(websocket)
+        if writer is None:
+            await websocket.send_json(message)
         else:
-            # Remove from anonymous
-            if "anonymous" in self.active_connections and websocket in self.active_connections["anonymous"]:
-                self.active_connections["anonymous"].remove(websocket)
+            writer.enqueue(encode_message(message))
     
     async def send_personal_message(self, message: dict, user_id: str):
-        """Send a message to a specific user."""
-        if user_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to {user_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.active_connections[user_id].remove(conn)
+        """Send a message to a specific user (on any worker)."""
+        await self._publish(user_channel(user_id), {"text": encode_message(message)})
     
     async def broadcast(self, message: dict, exclude_user_id: str = None):
-        """Broadcast a message to all connected users."""
-        disconnected_users = []
-        
-        for user_id, connections in self.active_connections.items():
-            if exclude_user_id and user_id == exclude_user_id:
-                continue
-            
-            disconnected = []
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {user_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                connections.remove(conn)
-            
-            if not connections:
-                disconnected_users.append(user_id)
-        
-        # Clean up empty user connections
-        for user_id in disconnected_users:
-            del self.active_connections[user_id]
+        """Broadcast a message to all connected users (on every worker)."""
+        await self._publish(BROADCAST_CHANNEL, {"text": encode_message(message), "exclude_user_id": exclude_user_id})
     
     async def join_room(self, websocket: WebSocket, room_id: str):
         """Join a WebSocket to a room."""
+        broker = await self._ensure_broker()
         if room_id not in self.rooms:
             self.rooms[room_id] = set()
+            await broker.subscribe(room_channel(room_id))
+        elif websocket in self.rooms[room_id]:
+            return
         self.rooms[room_id].add(websocket)
+        writer = self._writers.get(websocket)
+        if writer is not None:
+            writer.rooms.add(room_id)
+        await broker.presence_incr(f"room:{room_id}", 1)
         logger.info(f"WebSocket joined room: {room_id}, total={len(self.rooms[room_id])}")
     
-    def leave_room(self, websocket: WebSocket, room_id: str):
-        """Remove a WebSocket from a room."""
-        if room_id in self.rooms:
-            self.rooms[room_id].discard(websocket)
-            if not self.rooms[room_id]:
-                del self.rooms[room_id]
-            logger.info(f"WebSocket left room: {room_id}")
+    async def leave_room(self, websocket: WebSocket, room_id: str):
+        """Remove a WebSocket from a room (safe to call more than once)."""
+        room = self.rooms.get(room_id)
+        if not room or websocket not in room:
+            return
+        room.discard(websocket)
+        writer = self._writers.get(websocket)
+        if writer is not None:
+            writer.rooms.discard(room_id)
+        if not room:
+            del self.rooms[room_id]
+            await self.broker.unsubscribe(room_channel(room_id))
+        await self.broker.presence_incr(f"room:{room_id}", -1)
+        logger.info(f"WebSocket left room: {room_id}")
     
     async def send_to_room(self, message: dict, room_id: str, exclude_websocket: WebSocket = None):
-        """Send a message to all WebSockets in a room."""
-        if room_id in self.rooms:
-            disconnected = []
-            for websocket in self.rooms[room_id]:
-                if websocket == exclude_websocket:
+        """Send a message to all WebSockets in a room (on every worker)."""
+        await self._publish(room_channel(room_id), {"text": encode_message(message)}, exclude_websocket)
+    
+    async def get_user_presence(self, user_id: str) -> int:
+        """Number of open connections for a user across the cluster."""
+        return await (await self._ensure_broker()).presence(f"user:{user_id}")
+    
+    async def get_room_presence(self, room_id: str) -> int:
+        """Number of sockets in a room across the cluster."""
+        return await (await self._ensure_broker()).presence(f"room:{room_id}")
+    
+    def get_metrics(self) -> dict:
+        """Send queue metrics for this process."""
+        writers = list(self._writers.values())
+        return {
+            "connections": len(writers),
+            "queued_messages": sum(writer.queued for writer in writers),
+            "max_queue_size": self.max_queue,
+            "slow_consumer_policy": self.slow_consumer_policy,
+            "current_queue_high_water": max((writer.high_water for writer in writers), default=0),
+            "queue_high_water": self.metrics.queue_high_water,
+            "messages_sent": self.metrics.messages_sent,
+            "messages_dropped": self.metrics.messages_dropped,
+            "slow_consumers_disconnected": self.metrics.slow_consumers_disconnected,
+            "send_errors": self.metrics.send_errors,
+        }
+    
+    async def _publish(self, channel: str, envelope: dict, exclude_websocket: WebSocket = None):
+        broker = await self._ensure_broker()
+        envelope["origin"] = broker.node_id
+        # Local sockets first, then the other processes through the broker
+        self._dispatch(channel, envelope, exclude_websocket)
+        if broker.distributed:
+            try:
+                await broker.publish(channel, envelope)
+            except Exception as e:
+                logger.error(f"Error publishing WebSocket message to {channel}: {e}")
+    
+    async def _on_broker_message(self, channel: str, envelope: dict):
+        self._dispatch(channel, envelope)
+    
+    def _dispatch(self, channel: str, envelope: dict, exclude_websocket: WebSocket = None):
+        """Queue an encoded message on the sockets of this process (never blocks)."""
+        text = envelope["text"]
+        writers = self._writers
+        if channel == BROADCAST_CHANNEL:
+            exclude_user_id = envelope.get("exclude_user_id")
+            for user_id, connections in self.active_connections.items():
+                if exclude_user_id and user_id == exclude_user_id:
                     continue
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending to room {room_id}: {e}")
-                    disconnected.append(websocket)
-            
-            # Remove disconnected websockets
-            for ws in disconnected:
-                self.rooms[room_id].discard(ws)
+                for connection in connections:
+                    writer = writers.get(connection)
+                    if writer is not None:
+                        writer.enqueue(text)
+        elif channel.startswith(USER_CHANNEL):
+            for connection in self.active_connections.get(channel[len(USER_CHANNEL):], ()):
+                writer = writers.get(connection)
+                if writer is not None:
+                    writer.enqueue(text)
+        elif channel.startswith(ROOM_CHANNEL):
+            for connection in self.rooms.get(channel[len(ROOM_CHANNEL):], ()):
+                if connection is exclude_websocket:
+                    continue
+                writer = writers.get(connection)
+                if writer is not None:
+                    writer.enqueue(text)
+    
+    async def _connection_lost(self, writer: ConnectionWriter, slow: bool):
+        """Clean up after a failed send or a slow consumer."""
+        websocket = writer.websocket
+        for room_id in list(writer.rooms):
+            await self.leave_room(websocket, room_id)
+        await self.disconnect(websocket, writer.user_id)
+        await writer.close(code=SLOW_CONSUMER_CLOSE_CODE if slow else None)
+    
+    async def shutdown(self):
+        """Stop the writers and close the broker connection (application shutdown)."""
+        for writer in list(self._writers.values()):
+            await writer.close()
+        record_websocket_connections(-len(self._writers))
+        self._writers.clear()
+        if self._broker_started:
+            await self._broker.close()
+            self._broker_started = False
 
 
 # Global connection manager instance
@@ -152,28 +276,28 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Echo back or handle different message types
                 if message_type == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": message.get("timestamp")})
+                    await manager.send(websocket, {"type": "pong", "timestamp": message.get("timestamp")})
                 elif message_type == "message":
                     # Echo the message back
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "echo",
                         "data": message.get("data", ""),
                         "timestamp": message.get("timestamp")
                     })
                 else:
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "error",
                         "message": f"Unknown message type: {message_type}"
                     })
                     
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        await manager.disconnect(websocket)
         logger.info("WebSocket disconnected")
 
 
@@ -231,7 +355,7 @@ async def websocket_notifications(websocket: WebSocket):
     
     try:
         # Send welcome message
-        await websocket.send_json({
+        await manager.send(websocket, {
             "type": "connected",
             "message": "Connected to notifications",
             "user_id": user_id
@@ -246,23 +370,23 @@ async def websocket_notifications(websocket: WebSocket):
                 message_type = message.get("type", "ping")
                 
                 if message_type == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await manager.send(websocket, {"type": "pong"})
                 elif message_type == "subscribe":
                     # Handle subscription to notification types
                     notification_types = message.get("types", [])
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "subscribed",
                         "notification_types": notification_types
                     })
                     
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        await manager.disconnect(websocket, user_id)
         logger.info(f"Notification WebSocket disconnected: user_id={user_id}")
 
 
@@ -307,14 +431,14 @@ async def websocket_room(
                     }, room_id, exclude_websocket=websocket)
                     
                 except json.JSONDecodeError:
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "error",
                         "message": "Invalid JSON format"
                     })
                     
         except WebSocketDisconnect:
-            manager.leave_room(websocket, room_id)
-            manager.disconnect(websocket, str(current_user.id) if current_user else None)
+            await manager.leave_room(websocket, room_id)
+            await manager.disconnect(websocket, str(current_user.id) if current_user else None)
             
             # Notify others in the room
             await manager.send_to_room({
@@ -324,6 +448,23 @@ async def websocket_room(
             }, room_id)
 
 
+@router.get("/ws/room/{room_id}/presence")
+async def get_room_presence(
+    room_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Number of sockets connected to a room across all workers."""
+    return {"room_id": room_id, "connections": await manager.get_room_presence(room_id)}
+
+
+@router.get("/ws/metrics")
+async def get_websocket_metrics(
+    current_user: User = Depends(get_current_user),
+):
+    """WebSocket send queue metrics for this worker."""
+    return manager.get_metrics()
+
+
 # Helper function to send notifications via WebSocket
 async def send_notification_websocket(user_id: str, notification: dict):
     """Send a notification to a user via WebSocket."""
@@ -1,12 +1,17 @@
 """
 API v1 router registration.
+
+Route groups registered with lazy_route_groups are imported on the first
+request under their prefix (see app.core.lazy_routes); keep the routes most
+workers serve included eagerly.
 """
 from fastapi import APIRouter
-from app.api.v1.endpoints import themes, theme_fonts, projects, websocket, admin, auth, two_factor, api_keys, users, health, db_health, newsletter, exports, imports, search, tags, activities, comments, favorites, templates, versions, shares, feature_flags, user_preferences, announcements, feedback, onboarding, documentation, scheduled_tasks, backups, email_templates, audit_trail, integrations, api_settings, organization_settings, general_settings, pages, forms, menus, support_tickets, seo, teams, invitations, rbac, notifications, api_connection_check, reports, media, insights, analytics, posts, subscriptions, masterclass, bookings
+from app.api.v1.endpoints import themes, projects, websocket, auth, two_factor, users, health, user_preferences, pages, forms, menus, support_tickets, seo, teams, invitations, rbac, notifications, api_connection_check, reports, media, insights, analytics, posts, subscriptions
 from app.api.v1.endpoints.reseau import contacts as reseau_contacts
 from app.api.v1.endpoints.client import invoices_router, projects_router, tickets_router, dashboard_router
 from app.api.v1.endpoints.erp import invoices_router as erp_invoices_router, clients_router, orders_router, inventory_router, reports_router, dashboard_router as erp_dashboard_router
 from app.api import ai as ai_router
+from app.core.lazy_routes import lazy_route_groups
 
 api_router = APIRouter()
 
@@ -25,11 +30,7 @@ api_router.include_router(
 )
 
 # Register API key endpoints
-api_router.include_router(
-    api_keys.router,
-    prefix="/api-keys",
-    tags=["api-keys"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.api_keys", prefix="/api-keys", tags=["api-keys"])
 
 # Register user preferences endpoints (MUST be before /users/{user_id} route)
 api_router.include_router(
@@ -65,11 +66,7 @@ api_router.include_router(
 )
 
 # Register theme font endpoints
-api_router.include_router(
-    theme_fonts.router,
-    prefix="/theme-fonts",
-    tags=["theme-fonts"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.theme_fonts", prefix="/theme-fonts", tags=["theme-fonts"])
 
 # Register project endpoints
 api_router.include_router(
@@ -85,11 +82,7 @@ api_router.include_router(
 )
 
 # Register admin endpoints
-api_router.include_router(
-    admin.router,
-    prefix="/admin",
-    tags=["admin"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.admin", prefix="/admin", tags=["admin"])
 
 # Register RBAC endpoints
 api_router.include_router(
@@ -105,11 +98,7 @@ api_router.include_router(
 )
 
 # Register database health check endpoints
-api_router.include_router(
-    db_health.router,
-    prefix="/db-health",
-    tags=["database-health"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.db_health", prefix="/db-health", tags=["database-health"])
 
 # Register AI endpoints
 api_router.include_router(
@@ -118,11 +107,7 @@ api_router.include_router(
 )
 
 # Register newsletter endpoints
-api_router.include_router(
-    newsletter.router,
-    prefix="/newsletter",
-    tags=["newsletter"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.newsletter", prefix="/newsletter", tags=["newsletter"])
 
 # Register subscription endpoints
 api_router.include_router(
@@ -131,88 +116,40 @@ api_router.include_router(
 )
 
 # Register export endpoints
-api_router.include_router(
-    exports.router,
-    prefix="/exports",
-    tags=["exports"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.exports", prefix="/exports", tags=["exports"])
 
 # Register import endpoints
-api_router.include_router(
-    imports.router,
-    prefix="/imports",
-    tags=["imports"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.imports", prefix="/imports", tags=["imports"])
 
 # Register search endpoints
-api_router.include_router(
-    search.router,
-    prefix="/search",
-    tags=["search"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.search", prefix="/search", tags=["search"])
 
 # Register tags and categories endpoints
-api_router.include_router(
-    tags.router,
-    prefix="/tags",
-    tags=["tags", "categories"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.tags", prefix="/tags", tags=["tags", "categories"])
 
 # Register activity endpoints
-api_router.include_router(
-    activities.router,
-    prefix="/activities",
-    tags=["activities"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.activities", prefix="/activities", tags=["activities"])
 
 # Register comments endpoints
-api_router.include_router(
-    comments.router,
-    prefix="/comments",
-    tags=["comments"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.comments", prefix="/comments", tags=["comments"])
 
 # Register favorites endpoints
-api_router.include_router(
-    favorites.router,
-    prefix="/favorites",
-    tags=["favorites"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.favorites", prefix="/favorites", tags=["favorites"])
 
 # Register templates endpoints
-api_router.include_router(
-    templates.router,
-    prefix="/templates",
-    tags=["templates"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.templates", prefix="/templates", tags=["templates"])
 
 # Register versions endpoints
-api_router.include_router(
-    versions.router,
-    prefix="/versions",
-    tags=["versions"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.versions", prefix="/versions", tags=["versions"])
 
 # Register shares endpoints
-api_router.include_router(
-    shares.router,
-    prefix="/shares",
-    tags=["shares"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.shares", prefix="/shares", tags=["shares"])
 
 # Register feature flags endpoints
-api_router.include_router(
-    feature_flags.router,
-    prefix="/feature-flags",
-    tags=["feature-flags"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.feature_flags", prefix="/feature-flags", tags=["feature-flags"])
 
 # Register announcements endpoints
-api_router.include_router(
-    announcements.router,
-    prefix="/announcements",
-    tags=["announcements"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.announcements", prefix="/announcements", tags=["announcements"])
 
 # Register notifications endpoints
 api_router.include_router(
@@ -221,81 +158,37 @@ api_router.include_router(
 )
 
 # Register feedback endpoints
-api_router.include_router(
-    feedback.router,
-    prefix="/feedback",
-    tags=["feedback"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.feedback", prefix="/feedback", tags=["feedback"])
 
 # Register onboarding endpoints
-api_router.include_router(
-    onboarding.router,
-    prefix="/onboarding",
-    tags=["onboarding"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.onboarding", prefix="/onboarding", tags=["onboarding"])
 
 # Register documentation endpoints
-api_router.include_router(
-    documentation.router,
-    prefix="/documentation",
-    tags=["documentation"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.documentation", prefix="/documentation", tags=["documentation"])
 
 # Register scheduled tasks endpoints
-api_router.include_router(
-    scheduled_tasks.router,
-    prefix="/scheduled-tasks",
-    tags=["scheduled-tasks"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.scheduled_tasks", prefix="/scheduled-tasks", tags=["scheduled-tasks"])
 
 # Register backups endpoints
-api_router.include_router(
-    backups.router,
-    prefix="/backups",
-    tags=["backups"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.backups", prefix="/backups", tags=["backups"])
 
 # Register email templates endpoints
-api_router.include_router(
-    email_templates.router,
-    prefix="/email-templates",
-    tags=["email-templates"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.email_templates", prefix="/email-templates", tags=["email-templates"])
 
 # Register audit trail endpoints
-api_router.include_router(
-    audit_trail.router,
-    prefix="/audit-trail",
-    tags=["audit-trail"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.audit_trail", prefix="/audit-trail", tags=["audit-trail"])
 
 # Register integrations endpoints
-api_router.include_router(
-    integrations.router,
-    prefix="/integrations",
-    tags=["integrations"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.integrations", prefix="/integrations", tags=["integrations"])
 
 # Register API settings endpoints
-api_router.include_router(
-    api_settings.router,
-    prefix="/api-settings",
-    tags=["api-settings"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.api_settings", prefix="/api-settings", tags=["api-settings"])
 
 # Register organization settings endpoints
-api_router.include_router(
-    organization_settings.router,
-    prefix="/settings/organization",
-    tags=["organization-settings"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.organization_settings", prefix="/settings/organization", tags=["organization-settings"])
 
 # Register general settings endpoints
-api_router.include_router(
-    general_settings.router,
-    prefix="/settings/general",
-    tags=["general-settings"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.general_settings", prefix="/settings/general", tags=["general-settings"])
 
 # Register pages endpoints
 api_router.include_router(
@@ -422,15 +315,7 @@ api_router.include_router(
 )
 
 # Register masterclass endpoints
-api_router.include_router(
-    masterclass.router,
-    prefix="/masterclass",
-    tags=["masterclass"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.masterclass", prefix="/masterclass", tags=["masterclass"])
 
 # Register booking endpoints
-api_router.include_router(
-    bookings.router,
-    prefix="/bookings",
-    tags=["bookings"]
-)
+lazy_route_groups.add("app.api.v1.endpoints.bookings", prefix="/bookings", tags=["bookings"])
@@ -7,12 +7,13 @@ from fastapi import APIRouter, Request, HTTPException, status, Header, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 from sqlalchemy import select
-import stripe
 # Note: In recent Stripe versions, exceptions are directly in stripe module, not stripe.error
 import os
 
 from app.core.database import get_db
 from app.services.stripe_service import StripeService
+from app.services.stripe_client import stripe, stripe_gateway
+from app.services.stripe_webhook_queue import stripe_webhook_queue
 from app.services.subscription_service import SubscriptionService
 from app.services.invoice_service import InvoiceService
 from app.services.email_service import EmailService
@@ -20,104 +21,29 @@ from app.services.email_templates import EmailTemplates
 from app.services.booking_service import BookingService
 from app.utils.stripe_helpers import map_stripe_status, parse_timestamp
 from app.core.logging import logger
-from app.models import Subscription, WebhookEvent, User
+from app.models import Subscription, User
 from app.models.invoice import InvoiceStatus
 from app.models.booking import Booking, BookingStatus, PaymentStatus
 
 router = APIRouter(prefix="/webhooks/stripe", tags=["webhooks"])
 
 
-async def check_event_processed(event_id: str, db: AsyncSession) -> bool:
-    """Check if webhook event has already been processed (idempotency)"""
-    if not event_id:
-        return False
-    
-    result = await db.execute(
-        select(WebhookEvent).where(WebhookEvent.stripe_event_id == event_id)
-    )
-    return result.scalar_one_or_none() is not None
-
-
-async def mark_event_processed(
-    event_id: str,
-    event_type: str,
-    event_data: dict,
-    db: AsyncSession
-) -> None:
-    """Mark webhook event as processed"""
-    if not event_id:
-        return
-    
-    import json
-    
-    webhook_event = WebhookEvent(
-        stripe_event_id=event_id,
-        event_type=event_type,
-        event_data=json.dumps(event_data) if event_data else None,
-    )
-    db.add(webhook_event)
-    await db.commit()
-
-
 @router.post("")
 async def stripe_webhook(
     request: Request,
     stripe_signature: str = Header(..., alias="stripe-signature"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Handle Stripe webhook events"""
+    """
+    Receive a Stripe webhook event
+
+    The event is verified and queued (once per Stripe event id); it is
+    processed by the webhook queue workers, see process_stripe_event.
+    """
     payload = await request.body()
     
-    stripe_service = StripeService(db)
-    subscription_service = SubscriptionService(db)
-    invoice_service = InvoiceService(db)
-    
     try:
-        event_data = await stripe_service.handle_webhook(payload, stripe_signature)
-        event_type = event_data["type"]
-        event_object = event_data["data"]["object"]
-        event_id = event_data.get("id")  # Stripe event ID for idempotency
-        
-        logger.info(f"Stripe webhook received: {event_type} (event_id: {event_id})")
-        
-        # Idempotency check: prevent duplicate processing
-        if await check_event_processed(event_id, db):
-            logger.info(f"Event {event_id} already processed, skipping")
-            return {"status": "success", "message": "Event already processed"}
-        
-        # Handle different event types
-        if event_type == "checkout.session.completed":
-            await handle_checkout_completed(event_object, db, subscription_service)
-        
-        elif event_type == "customer.subscription.created":
-            await handle_subscription_created(event_object, db, subscription_service)
-        
-        elif event_type == "customer.subscription.updated":
-            await handle_subscription_updated(event_object, db, subscription_service)
-        
-        elif event_type == "customer.subscription.deleted":
-            await handle_subscription_deleted(event_object, db, subscription_service)
-        
-        elif event_type == "invoice.paid":
-            await handle_invoice_paid(event_object, db, invoice_service, subscription_service)
-        
-        elif event_type == "invoice.payment_failed":
-            await handle_invoice_payment_failed(event_object, db, invoice_service, subscription_service)
-        
-        elif event_type == "payment_intent.succeeded":
-            await handle_payment_intent_succeeded(event_object, db)
-        
-        elif event_type == "payment_intent.payment_failed":
-            await handle_payment_intent_failed(event_object, db)
-        
-        else:
-            logger.debug(f"Unhandled webhook event type: {event_type}")
-        
-        # Mark event as processed after successful handling
-        await mark_event_processed(event_id, event_type, event_data, db)
-        
-        return {"status": "success"}
-    
+        event = await StripeService(db).handle_webhook(payload, stripe_signature)
     except ValueError as e:
         logger.error(f"Invalid webhook payload: {e}")
         raise HTTPException(
@@ -130,18 +56,68 @@ async def stripe_webhook(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid signature"
         )
+    
+    event_id = event.get("id")
+    if not event_id or not event.get("type"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid payload: missing event id or type"
+        )
+    
+    try:
+        queued = await stripe_webhook_queue.enqueue(db, event, payload.decode("utf-8"))
     except Exception as e:
-        logger.error(f"Error handling Stripe webhook: {e}", exc_info=True)
+        # Not stored: let Stripe deliver it again
+        logger.error(f"Error queueing Stripe webhook {event_id}: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Webhook processing error: {str(e)}"
+            detail="Webhook could not be stored"
         )
+    
+    logger.info(f"Stripe webhook received: {event['type']} (event_id: {event_id}, queued: {queued})")
+    if not queued:
+        return {"status": "success", "message": "Event already received"}
+    return {"status": "success"}
+
+
+async def process_stripe_event(event: dict, db: AsyncSession) -> None:
+    """Process a queued Stripe event (raising makes the queue retry it)"""
+    event_type = event["type"]
+    event_object = event["data"]["object"]
+    
+    subscription_service = SubscriptionService(db)
+    invoice_service = InvoiceService(db)
+    
+    if event_type == "checkout.session.completed":
+        await handle_checkout_completed(event_object, db, subscription_service)
+    
+    elif event_type == "customer.subscription.created":
+        await handle_subscription_created(event_object, db, subscription_service)
+    
+    elif event_type == "customer.subscription.updated":
+        await handle_subscription_updated(event_object, db, subscription_service)
+    
+    elif event_type == "customer.subscription.deleted":
+        await handle_subscription_deleted(event_object, db, subscription_service)
+    
+    elif event_type == "invoice.paid":
+        await handle_invoice_paid(event_object, db, invoice_service, subscription_service)
+    
+    elif event_type == "invoice.payment_failed":
+        await handle_invoice_payment_failed(event_object, db, invoice_service, subscription_service)
+    
+    elif event_type == "payment_intent.succeeded":
+        await handle_payment_intent_succeeded(event_object, db)
+    
+    elif event_type == "payment_intent.payment_failed":
+        await handle_payment_intent_failed(event_object, db)
+    
+    else:
+        logger.debug(f"Unhandled webhook event type: {event_type}")
 
 
 async def handle_checkout_completed(event_object: dict, db: AsyncSession, subscription_service: SubscriptionService):
     """Handle checkout.session.completed event"""
-    from app.core.config import settings
-    
     customer_id = event_object.get("customer")
     subscription_id = event_object.get("subscription")
     metadata = event_object.get("metadata", {})
@@ -189,11 +165,7 @@ async def handle_checkout_completed(event_object: dict, db: AsyncSession, subscr
     
     if subscription_id:
         try:
-            # Initialize Stripe if needed
-            if not stripe.api_key and hasattr(settings, 'STRIPE_SECRET_KEY') and settings.STRIPE_SECRET_KEY:
-                stripe.api_key = settings.STRIPE_SECRET_KEY
-            
-            stripe_subscription = stripe.Subscription.retrieve(subscription_id)
+            stripe_subscription = await stripe_gateway.retrieve_subscription(subscription_id)
             
             if stripe_subscription.trial_end:
                 trial_end = datetime.fromtimestamp(stripe_subscription.trial_end, tz=timezone.utc)
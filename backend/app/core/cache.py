@@ -26,6 +26,7 @@ except ImportError:
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import record_cache_lookup
 
 
 class CacheBackend:
@@ -57,7 +58,9 @@ class CacheBackend:
         try:
             value = await self.redis_client.get(key)
             if not value:
+                record_cache_lookup(key, "miss")
                 return None
+            record_cache_lookup(key, "hit")
             
             # Vérifier si compressé (préfixe binaire)
             if value.startswith(b"zlib:"):
@@ -76,6 +79,7 @@ class CacheBackend:
                 else:
                     return json.loads(value.decode('utf-8'))
         except Exception as e:
+            record_cache_lookup(key, "error")
             logger.error(f"Cache get error: {e}")
         return None
     
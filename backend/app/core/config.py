@@ -176,6 +176,248 @@ class Settings(BaseSettings):
         description="Redis connection URL for caching",
     )
 
+    # Import jobs
+    IMPORT_JOB_RETENTION_SECONDS: int = Field(
+        default=86400,
+        ge=60,
+        description="How long import job logs, status and results are kept (seconds)",
+    )
+    IMPORT_JOB_MAX_EVENTS: int = Field(
+        default=1000,
+        ge=10,
+        description="Maximum number of log/status events kept per import job",
+    )
+    IMPORT_JOB_CONCURRENCY: int = Field(
+        default=2,
+        ge=1,
+        le=20,
+        description="Maximum number of import jobs running concurrently per worker",
+    )
+
+    # Rate limiting
+    RATE_LIMIT_LEASE_MAX: int = Field(
+        default=20,
+        ge=1,
+        le=1000,
+        description="Maximum tokens a worker reserves at once from a Redis rate limit bucket",
+    )
+    RATE_LIMIT_LEASE_TTL: float = Field(
+        default=1.0,
+        gt=0,
+        le=60,
+        description="Seconds a worker may serve reserved rate limit tokens locally",
+    )
+    RATE_LIMIT_IDENTITY_TTL: int = Field(
+        default=300,
+        ge=1,
+        description="Seconds a worker caches the user and throttle tier behind a bearer token or API key",
+    )
+    TRUSTED_PROXY_HOPS: int = Field(
+        default=1,
+        ge=0,
+        le=10,
+        description="Reverse proxies in front of the app; anonymous clients are rate limited on the "
+        "X-Forwarded-For address the outermost one saw (0 = use the socket peer address)",
+    )
+
+    # WebSockets
+    WEBSOCKET_SEND_QUEUE_SIZE: int = Field(
+        default=256,
+        ge=1,
+        le=100000,
+        description="Maximum messages queued per WebSocket connection before the slow consumer policy applies",
+    )
+    WEBSOCKET_SLOW_CONSUMER_POLICY: str = Field(
+        default="disconnect",
+        pattern="^(disconnect|drop)$",
+        description="What to do when a WebSocket send queue is full: 'disconnect' the client or 'drop' the oldest message",
+    )
+    ACTIVITY_FEED_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Cache home activity feeds in Redis, updated on write (requires REDIS_URL)",
+    )
+    ACTIVITY_FEED_CACHE_SIZE: int = Field(
+        default=200,
+        ge=10,
+        le=10000,
+        description="Maximum number of activities kept in each cached home feed",
+    )
+    SECURITY_AUDIT_RETENTION_MONTHS: int = Field(
+        default=12,
+        ge=0,
+        le=1200,
+        description="Full months of raw security audit logs kept besides the current month (0 = keep forever); daily rollups are kept",
+    )
+    SECURITY_AUDIT_PARTITIONS_AHEAD: int = Field(
+        default=3,
+        ge=1,
+        le=24,
+        description="Monthly security audit log partitions created in advance",
+    )
+    SECURITY_AUDIT_MAINTENANCE_INTERVAL: int = Field(
+        default=3600,
+        ge=0,
+        description="Seconds between security audit partition/rollup maintenance runs (0 disables the background loop)",
+    )
+    ANNOUNCEMENT_CACHE_TTL: int = Field(
+        default=60,
+        ge=1,
+        description="Seconds a worker keeps its compiled active announcements (changes invalidate it sooner through Redis)",
+    )
+    POST_LISTING_CACHE_TTL: int = Field(
+        default=60,
+        ge=0,
+        description="Seconds published post listings stay cached in Redis (0 disables; post writes invalidate them sooner)",
+    )
+    FEATURE_FLAG_CACHE_TTL: int = Field(
+        default=300,
+        ge=1,
+        description="Seconds a worker keeps its feature flag snapshot before reloading it",
+    )
+    FEATURE_FLAG_VERSION_CHECK_INTERVAL: float = Field(
+        default=1.0,
+        ge=0,
+        description="Seconds between checks of the shared feature flag version in Redis",
+    )
+    FEATURE_FLAG_LOG_SAMPLE_RATE: float = Field(
+        default=0.01,
+        ge=0,
+        le=1,
+        description="Fraction of feature flag evaluations written to feature_flag_logs (all are counted)",
+    )
+    SCHEDULED_TASK_CONCURRENCY: int = Field(
+        default=4,
+        ge=0,
+        le=100,
+        description="Scheduled tasks run concurrently by each process (0 = this process runs none)",
+    )
+    SCHEDULED_TASK_POLL_INTERVAL: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between checks for due scheduled tasks when idle",
+    )
+    SCHEDULED_TASK_LEASE_SECONDS: int = Field(
+        default=60,
+        ge=5,
+        description="Lease on a running scheduled task, renewed every third of it; a task is claimable again once its lease expires",
+    )
+    SCHEDULED_TASK_MAX_ATTEMPTS: int = Field(
+        default=3,
+        ge=1,
+        description="Attempts per occurrence of a scheduled task before it is marked failed",
+    )
+    SCHEDULED_TASK_RETRY_BASE: float = Field(
+        default=30.0,
+        gt=0,
+        description="Delay in seconds before the first retry of a scheduled task, doubled for each further attempt",
+    )
+    SCHEDULED_TASK_TIMEOUT: float = Field(
+        default=900.0,
+        gt=0,
+        description="Seconds after which a running scheduled task is cancelled and counted as failed",
+    )
+    DOCS_INDEX_PATH: Optional[str] = Field(
+        default=None,
+        description="Documentation search index snapshot file (defaults to a file in the temp directory)",
+    )
+    DOCS_INDEX_CHECK_INTERVAL: float = Field(
+        default=5.0,
+        ge=0,
+        description="Seconds between checks of documentation file modification times",
+    )
+    DOCS_CONTEXT_TOP_K: int = Field(
+        default=8,
+        ge=1,
+        le=50,
+        description="Documentation chunks put into the template chat prompt",
+    )
+    DOCS_CONTEXT_MAX_CHARS: int = Field(
+        default=12000,
+        ge=1000,
+        description="Maximum characters of documentation put into the template chat prompt",
+    )
+    AI_MAX_CONCURRENCY: int = Field(
+        default=16,
+        ge=1,
+        le=1000,
+        description="Concurrent requests to each AI provider per process; further requests wait",
+    )
+    AI_MAX_CONNECTIONS: int = Field(
+        default=32,
+        ge=1,
+        description="Pooled keep-alive connections to each AI provider per process",
+    )
+    AI_TIMEOUT: float = Field(
+        default=120.0,
+        gt=0,
+        description="Seconds before an AI provider request times out (connecting is limited to 10 seconds)",
+    )
+    AI_RESPONSE_CACHE_TTL: int = Field(
+        default=3600,
+        ge=0,
+        description="Seconds completions requested with temperature 0 are cached in Redis (0 disables the cache)",
+    )
+    QUERY_N_PLUS_ONE_THRESHOLD: int = Field(
+        default=5,
+        ge=2,
+        description="A SELECT fingerprint executed more often than this within one request is reported as an N+1 pattern",
+    )
+    QUERY_METRICS_MAX_FINGERPRINTS: int = Field(
+        default=500,
+        ge=10,
+        description="Distinct statement fingerprints kept in the aggregated query metrics",
+    )
+    DASHBOARD_QUERY_MODE: str = Field(
+        default="fused",
+        pattern="^(fused|concurrent|sequential)$",
+        description="How dashboard aggregates run: 'fused' (one CTE statement), 'concurrent' (one pooled "
+                    "connection per aggregate) or 'sequential'",
+    )
+    ANALYTICS_ROLLUPS: bool = Field(
+        default=True,
+        description="Serve the insights and analytics project counts from daily rollups (PostgreSQL)",
+    )
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Record Prometheus metrics and serve them on /metrics (requires prometheus-client)",
+    )
+    METRICS_TOKEN: Optional[str] = Field(
+        default=None,
+        description="Bearer token required to read /metrics (not served when unset)",
+    )
+    METRICS_CELERY_QUEUES: str = Field(
+        default="celery",
+        description="Comma-separated Celery broker queues whose length is reported on /metrics",
+    )
+    LOG_REQUEST_SAMPLE_RATE: float = Field(
+        default=0.1,
+        ge=0,
+        le=1,
+        description="Fraction of successful (< 400) requests logged; errors and slow requests are always logged",
+    )
+    LOG_REQUEST_SAMPLE_RATES: str = Field(
+        default="/health=0,/api/v1/health=0,/metrics=0",
+        description="Per-route sample rates as 'route prefix=rate' pairs, comma separated (longest prefix wins)",
+    )
+    LOG_SLOW_REQUEST_THRESHOLD: float = Field(
+        default=1.0,
+        ge=0,
+        description="Requests slower than this (seconds) are always logged",
+    )
+    SCHEMA_INIT_ON_STARTUP: bool = Field(
+        default=True,
+        description="Let the first worker of a deploy create tables, indexes and the default theme "
+                    "(false when a release step runs python -m app.core.startup)",
+    )
+    LAZY_ROUTES: bool = Field(
+        default=True,
+        description="Import rarely used API route groups on their first request instead of at startup",
+    )
+    LAZY_ROUTES_WARMUP: bool = Field(
+        default=False,
+        description="Load the lazy route groups in the background once startup is complete",
+    )
+
     # SendGrid Email Configuration
     SENDGRID_API_KEY: str = Field(
         default="",
@@ -273,6 +515,47 @@ class Settings(BaseSettings):
         default="",
         description="Stripe webhook secret for signature verification",
     )
+    STRIPE_API_BASE: str = Field(
+        default="",
+        description="Stripe API base URL override (e.g. a local stripe-mock or fake server); empty uses api.stripe.com",
+    )
+    STRIPE_TIMEOUT: float = Field(
+        default=10.0,
+        gt=0,
+        description="Timeout in seconds for each Stripe API attempt",
+    )
+    STRIPE_MAX_RETRIES: int = Field(
+        default=2,
+        ge=0,
+        le=10,
+        description="Retries (with jittered backoff) for Stripe connection errors, timeouts, 429 and 5xx",
+    )
+    STRIPE_WEBHOOK_WORKERS: int = Field(
+        default=2,
+        ge=0,
+        le=32,
+        description="Webhook queue workers per process (0 = this process only accepts webhooks)",
+    )
+    STRIPE_WEBHOOK_MAX_ATTEMPTS: int = Field(
+        default=8,
+        ge=1,
+        description="Processing attempts before a webhook event is marked failed",
+    )
+    STRIPE_WEBHOOK_RETRY_BASE: float = Field(
+        default=5.0,
+        gt=0,
+        description="Delay in seconds before the first webhook retry, doubled for each further attempt (capped at 1 hour)",
+    )
+    STRIPE_WEBHOOK_LEASE_SECONDS: int = Field(
+        default=300,
+        ge=10,
+        description="Seconds after which an event claimed by a worker that never finished is claimable again",
+    )
+    STRIPE_WEBHOOK_POLL_INTERVAL: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between webhook queue polls when idle (events received by this process wake workers at once)",
+    )
 
     # Google OAuth Configuration
     GOOGLE_CLIENT_ID: str = Field(
@@ -0,0 +1,108 @@
+"""
+Dashboard Queries
+Independent aggregate queries run in one round trip or in parallel
+
+Dashboard endpoints compute several unrelated aggregates (invoice totals,
+project counts, open tickets...). Executed one after another on the request
+session, their latency adds up. run_aggregates() takes them by name:
+
+    stats = await run_aggregates(db, {
+        "invoices": select(func.count(Invoice.id).label("total")),
+        "projects": select(func.count(Project.id).label("total")),
+    })
+    stats["invoices"].total
+
+Every query must be an aggregate without GROUP BY, i.e. return exactly one
+row with labelled columns. DASHBOARD_QUERY_MODE selects the execution:
+
+- fused: one statement, each query a CTE, the single-row CTEs cross joined
+  (one round trip on the request session)
+- concurrent: each query on its own pooled connection, awaited together
+  (latency of the slowest query; reads committed data only, outside the
+  request transaction). Falls back to fused on SQLite or when the session
+  is bound to a connection.
+- sequential: one query after another on the request session
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, Mapping, Optional
+
+from sqlalchemy import select, true
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+
+QUERY_MODES = ("fused", "concurrent", "sequential")
+
+_SEPARATOR = "__"
+
+
+def _row(mapping: Mapping) -> SimpleNamespace:
+    return SimpleNamespace(**dict(mapping))
+
+
+def fuse_aggregates(queries: Mapping[str, Select]) -> Select:
+    """Single statement selecting every query's columns as '<name>__<column>'"""
+    ctes = [(name, query.cte(f"{name}_agg")) for name, query in queries.items()]
+    columns = [cte.c[key].label(f"{name}{_SEPARATOR}{key}") for name, cte in ctes for key in cte.c.keys()]
+    from_clause = ctes[0][1]
+    for _, cte in ctes[1:]:
+        from_clause = from_clause.join(cte, true())
+    return select(*columns).select_from(from_clause)
+
+
+def _split(row: Mapping, names) -> Dict[str, SimpleNamespace]:
+    values: Dict[str, dict] = {name: {} for name in names}
+    for label, value in row.items():
+        name, key = label.split(_SEPARATOR, 1)
+        values[name][key] = value
+    return {name: SimpleNamespace(**columns) for name, columns in values.items()}
+
+
+async def _execute_one(engine: AsyncEngine, query: Select) -> SimpleNamespace:
+    async with AsyncSession(bind=engine) as session:
+        return _row((await session.execute(query)).mappings().one())
+
+
+def _resolve_mode(db: AsyncSession, mode: Optional[str]) -> str:
+    mode = mode or settings.DASHBOARD_QUERY_MODE
+    if mode not in QUERY_MODES:
+        raise ValueError(f"Unknown dashboard query mode: {mode}")
+    if mode == "concurrent":
+        bind = db.bind
+        if not isinstance(bind, AsyncEngine) or bind.dialect.name == "sqlite":
+            return "fused"
+    return mode
+
+
+async def run_aggregates(
+    db: AsyncSession,
+    queries: Mapping[str, Select],
+    mode: Optional[str] = None,
+) -> Dict[str, SimpleNamespace]:
+    """
+    Execute independent single-row aggregate queries
+
+    Args:
+        db: Request session
+        queries: Aggregate queries by name (names must be valid identifiers)
+        mode: 'fused', 'concurrent' or 'sequential' (default DASHBOARD_QUERY_MODE)
+
+    Returns:
+        Each query's row by name, columns as attributes
+    """
+    if not queries:
+        return {}
+    mode = _resolve_mode(db, mode)
+
+    if mode == "concurrent" and len(queries) > 1:
+        rows = await asyncio.gather(*(_execute_one(db.bind, query) for query in queries.values()))
+        return dict(zip(queries.keys(), rows, strict=True))
+
+    if mode == "fused" and len(queries) > 1:
+        result = await db.execute(fuse_aggregates(queries))
+        return _split(result.mappings().one(), queries.keys())
+
+    return {name: _row((await db.execute(query)).mappings().one()) for name, query in queries.items()}
@@ -7,6 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.core.metrics import TimedAsyncAdaptedQueuePool, instrument_pool
+from app.core.query_instrumentation import instrument_engine
 
 # Create async engine with optimized connection pooling
 # Enhanced pool configuration for better performance
@@ -15,6 +17,7 @@ engine = create_async_engine(
     echo=settings.DEBUG,
     future=True,
     # Connection pool optimization
+    poolclass=TimedAsyncAdaptedQueuePool,  # Records checkout time in db_pool_checkout_seconds
     pool_pre_ping=True,  # Verify connections before use (prevents stale connections)
     pool_size=settings.DB_POOL_SIZE,  # Base pool size
     max_overflow=settings.DB_MAX_OVERFLOW,  # Maximum overflow connections
@@ -36,6 +39,11 @@ engine = create_async_engine(
     },
 )
 
+# Per-request query counts, DB time and N+1 detection
+instrument_engine(engine)
+# Connections in use (db_pool_connections_in_use)
+instrument_pool(engine)
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -0,0 +1,73 @@
+"""
+Lazy Imports
+Heavy optional dependencies loaded on first use
+
+The AI SDKs, pandas, reportlab, openpyxl, boto3, stripe and sendgrid add
+seconds and tens of MB to every worker when imported with the endpoint
+modules, although most processes never call them. Modules bind them as
+lazy modules instead, imported on first attribute access:
+
+    pd = lazy_import("pandas")
+    PANDAS_AVAILABLE = is_available("pandas")
+
+    def to_frame(rows):
+        return pd.DataFrame(rows)   # pandas is imported here
+
+is_available() looks the package up without importing it. Use
+`sdk.Name` at call time rather than `from sdk import Name`, which imports
+immediately.
+"""
+
+import importlib
+import importlib.util
+import sys
+import types
+from typing import Any, List
+
+
+def is_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # A missing parent package (find_spec("a.b") without "a")
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy importing the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            # The import lock makes concurrent first uses import once
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Module `name`, imported on first attribute access
+
+    Returns the module itself if it is already imported. A missing module
+    raises ImportError on first use; check is_available() first.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,135 @@
+"""
+Lazy Route Groups
+Endpoint modules imported on the first request to their prefix
+
+Importing an endpoint module builds every route, dependency and response
+model it declares. Most workers serve a handful of route groups, so the
+rarely used ones are registered by module name and path prefix instead:
+
+    lazy_route_groups.add("app.api.v1.endpoints.exports", prefix="/exports", tags=["exports"])
+
+bind() records where the groups are included (the FastAPI app and the API
+prefix). LazyRouteMiddleware imports a group's module in a thread on the
+first request under its prefix and includes its router, before routing
+runs. warmup() loads every group (LAZY_ROUTES_WARMUP), load_all() does so
+synchronously (OpenAPI schema). With LAZY_ROUTES=false, bind() includes all
+groups immediately, as before.
+
+A group's prefix must not be shared with eagerly included routers: its
+routes are appended after them.
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.logging import logger
+
+
+@dataclass
+class LazyRouteGroup:
+    """An endpoint module's router, included on first use"""
+
+    module: str
+    prefix: str
+    tags: List[str] = field(default_factory=list)
+    attribute: str = "router"
+    loaded: bool = False
+
+    def import_router(self) -> APIRouter:
+        return getattr(importlib.import_module(self.module), self.attribute)
+
+
+class LazyRouteGroups:
+    """Registry of lazily included route groups"""
+
+    def __init__(self):
+        self.groups: List[LazyRouteGroup] = []
+        self._app: Optional[FastAPI] = None
+        self._prefix = ""
+        # (full path prefix, group) for groups not loaded yet
+        self._pending: Tuple[Tuple[str, LazyRouteGroup], ...] = ()
+        self._lock = threading.Lock()
+
+    def add(self, module: str, prefix: str, tags: Optional[List[str]] = None, attribute: str = "router") -> None:
+        assert prefix.startswith("/") and not prefix.endswith("/"), "A lazy group needs a path prefix"
+        self.groups.append(LazyRouteGroup(module=module, prefix=prefix, tags=list(tags or []), attribute=attribute))
+
+    def bind(self, app: FastAPI, prefix: str = "", lazy: bool = True) -> None:
+        """Include the groups in `app` under `prefix`, now (lazy=False) or on first use"""
+        self._app = app
+        self._prefix = prefix
+        self._pending = tuple((prefix + group.prefix, group) for group in self.groups if not group.loaded)
+        if not lazy:
+            self.load_all()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def group_for(self, path: str) -> Optional[LazyRouteGroup]:
+        """Group not loaded yet whose prefix contains `path`"""
+        for full_prefix, group in self._pending:
+            if path.startswith(full_prefix) and (len(path) == len(full_prefix) or path[len(full_prefix)] == "/"):
+                return group
+        return None
+
+    def _include(self, group: LazyRouteGroup, router: APIRouter) -> None:
+        with self._lock:
+            if group.loaded:
+                return
+            self._app.include_router(router, prefix=self._prefix + group.prefix, tags=group.tags)
+            group.loaded = True
+            self._pending = tuple(item for item in self._pending if item[1] is not group)
+            # Regenerate the OpenAPI schema with the new routes
+            self._app.openapi_schema = None
+
+    def load(self, group: LazyRouteGroup) -> None:
+        if not group.loaded:
+            self._include(group, group.import_router())
+
+    async def load_async(self, group: LazyRouteGroup) -> None:
+        """Import the group's module off the event loop, then include its router"""
+        if group.loaded:
+            return
+        start_time = time.perf_counter()
+        router = await asyncio.to_thread(group.import_router)
+        self._include(group, router)
+        logger.debug(
+            "Loaded route group %s in %.3fs", group.module, time.perf_counter() - start_time,
+            context={"prefix": group.prefix},
+        )
+
+    def load_all(self) -> None:
+        for _, group in self._pending:
+            self.load(group)
+
+    async def warmup(self) -> None:
+        """Load every group (import in a thread, one module at a time)"""
+        for _, group in self._pending:
+            await self.load_async(group)
+
+
+class LazyRouteMiddleware:
+    """ASGI middleware loading the route group of a request before routing"""
+
+    def __init__(self, app: ASGIApp, groups: "LazyRouteGroups"):
+        self.app = app
+        self.groups = groups
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.groups.pending and scope["type"] in ("http", "websocket"):
+            group = self.groups.group_for(scope["path"])
+            if group is not None:
+                await self.groups.load_async(group)
+        await self.app(scope, receive, send)
+
+
+# Route groups of the v1 API, registered in app/api/v1/router.py
+lazy_route_groups = LazyRouteGroups()
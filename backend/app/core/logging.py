@@ -1,94 +1,195 @@
 """
 Structured Logging for Backend
 Provides consistent logging with levels and context
+
+Records are put on an in-memory queue by the calling code (QueueHandler) and
+formatted and written to stdout by a background thread (QueueListener), so
+request handlers never wait on log I/O. Messages support lazy %-formatting:
+
+    logger.info("Imported %s rows for %s", count, user_id)
+
+is only formatted if the record is written, on the listener thread. Pass
+immutable values as arguments (they are read when the record is written).
+
+Environment:
+    LOG_LEVEL: minimum level written (default DEBUG)
+    LOG_ASYNC: "false" writes synchronously from the calling thread
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from typing import Any, Dict, Optional
-
-from pythonjsonlogger import jsonlogger
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# LogRecord attributes that are not user supplied `extra` fields
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: asctime, name, levelname, message, pathname,
+    lineno, then any `extra` fields and the exception traceback
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "asctime": self.formatTime(record),
+            "name": record.name,
+            "levelname": record.levelname,
+            "message": record.getMessage(),
+            "pathname": record.pathname,
+            "lineno": record.lineno,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(payload, default=str).decode()
+        return json.dumps(payload, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default prepare() formats the message in the calling thread
+        return record
 
 
 class StructuredLogger:
     """Structured logger with JSON output"""
 
-    def __init__(self, name: str = "app"):
+    def __init__(self, name: str = "app", stream=None, asynchronous: Optional[bool] = None):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(os.getenv("LOG_LEVEL", "DEBUG").upper())
 
         # Remove existing handlers
         self.logger.handlers = []
 
-        # Create console handler with JSON formatter
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = jsonlogger.JsonFormatter(
-            "%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d"
-        )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        # Console handler with JSON formatter, fed through a queue unless LOG_ASYNC=false
+        self.handler = logging.StreamHandler(stream or sys.stdout)
+        self.handler.setFormatter(JsonFormatter())
+        if asynchronous is None:
+            asynchronous = os.getenv("LOG_ASYNC", "true").lower() != "false"
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        if asynchronous:
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self.logger.addHandler(_DeferredQueueHandler(log_queue))
+            self._listener = logging.handlers.QueueListener(log_queue, self.handler, respect_handler_level=True)
+            self._listener.start()
+            atexit.register(self.shutdown)
+        else:
+            self.logger.addHandler(self.handler)
+
+    def flush(self) -> None:
+        """Wait until every queued record has been written"""
+        if self._listener is not None and self._listener._thread is not None:
+            self._listener.stop()
+            self._listener.start()
+        self.handler.flush()
+
+    def shutdown(self) -> None:
+        """
+        Write the queued records and stop the listener thread (application
+        shutdown). Records logged afterwards are written synchronously.
+        """
+        if self._listener is not None and self._listener._thread is not None:
+            self.logger.handlers = [self.handler]
+            self._listener.stop()
+        try:
+            self.handler.flush()
+        except (OSError, ValueError):
+            # stdout already closed at interpreter exit, as in logging.shutdown()
+            pass
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
 
     def _log(
         self,
         level: int,
         message: str,
+        args: tuple = (),
         context: Optional[Dict[str, Any]] = None,
-        exc_info: Optional[Exception] = None,
+        exc_info: Optional[Union[Exception, bool]] = None,
     ) -> None:
         """Internal logging method. context must be a dict or None."""
-        extra = context if isinstance(context, dict) else {}
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = dict(context) if isinstance(context, dict) else {}
+        if exc_info is True:
+            exc_info = sys.exc_info()[1]
         if exc_info:
             extra["exception"] = {
                 "type": type(exc_info).__name__,
                 "message": str(exc_info),
             }
-        self.logger.log(level, message, extra=extra)
+        # stacklevel 3: pathname/lineno of the code calling info(), error(), ...
+        self.logger.log(level, message, *args, extra=extra, exc_info=exc_info or None, stacklevel=3)
 
-    def debug(self, message: str, context: Optional[Dict[str, Any]] = None) -> None:
+    def debug(self, message: str, *args: Any, context: Optional[Dict[str, Any]] = None) -> None:
         """Log debug message"""
-        self._log(logging.DEBUG, message, context)
+        self._log(logging.DEBUG, message, args, context)
 
-    def info(self, message: str, context: Optional[Dict[str, Any]] = None) -> None:
+    def info(self, message: str, *args: Any, context: Optional[Dict[str, Any]] = None) -> None:
         """Log info message"""
-        self._log(logging.INFO, message, context)
+        self._log(logging.INFO, message, args, context)
 
     def warning(
         self,
         message: str,
+        *args: Any,
         context: Optional[Dict[str, Any]] = None,
-        exc_info: Optional[Exception] = None,
+        exc_info: Optional[Union[Exception, bool]] = None,
     ) -> None:
         """Log warning message"""
-        self._log(logging.WARNING, message, context, exc_info)
+        self._log(logging.WARNING, message, args, context, exc_info)
 
     def error(
         self,
         message: str,
+        *args: Any,
         context: Optional[Dict[str, Any]] = None,
-        exc_info: Optional[Exception] = None,
+        exc_info: Optional[Union[Exception, bool]] = None,
     ) -> None:
         """Log error message"""
-        self._log(logging.ERROR, message, context, exc_info)
+        self._log(logging.ERROR, message, args, context, exc_info)
 
     def critical(
         self,
         message: str,
+        *args: Any,
         context: Optional[Dict[str, Any]] = None,
-        exc_info: Optional[Exception] = None,
+        exc_info: Optional[Union[Exception, bool]] = None,
     ) -> None:
         """Log critical message"""
-        self._log(logging.CRITICAL, message, context, exc_info)
+        self._log(logging.CRITICAL, message, args, context, exc_info)
 
     def exception(
         self,
         message: str,
+        *args: Any,
         context: Optional[Dict[str, Any]] = None,
     ) -> None:
         """Log error with current exception info (use inside except block)."""
         exc_info = sys.exc_info()[1] if sys.exc_info()[0] else None
-        self._log(logging.ERROR, message, context, exc_info)
+        self._log(logging.ERROR, message, args, context, exc_info)
 
 
 # Create default logger instance
 logger = StructuredLogger("app")
-
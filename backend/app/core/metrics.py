@@ -0,0 +1,264 @@
+"""
+Prometheus Metrics
+In-process metrics registry exposed in the Prometheus text format
+
+Covers the hot paths:
+- http_request_duration_seconds: request latency per method, route template
+  and status class (MetricsMiddleware)
+- db_pool_checkout_seconds / db_pool_connections_in_use: time spent getting
+  a connection from the pool and connections currently checked out
+  (TimedAsyncAdaptedQueuePool + instrument_pool)
+- cache_requests_total: cache lookups per key prefix and result, for hit
+  ratios (CacheBackend.get)
+- websocket_connections: open WebSocket connections (ConnectionManager)
+- celery_queue_length: messages waiting in the Celery broker queues, read
+  from Redis when /metrics is scraped
+
+Multiprocess mode: with several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR
+to an empty directory shared by the workers (before the application starts).
+Each worker then writes its values to memory-mapped files and /metrics, served
+by any worker, aggregates all of them. Without prometheus_client installed,
+recording functions are no-ops and /metrics is unavailable.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+from app.core.config import settings
+from app.core.logging import logger
+
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_ENABLED = PROMETHEUS_AVAILABLE and settings.METRICS_ENABLED
+
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATUS_CLASSES = {1: "1xx", 2: "2xx", 3: "3xx", 4: "4xx", 5: "5xx"}
+
+# Scrape-time values (celery queue lengths), refreshed by refresh_scrape_time_metrics()
+_queue_lengths: Dict[str, int] = {}
+
+if PROMETHEUS_AVAILABLE:
+    registry = CollectorRegistry()
+
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ["method", "route", "status"],
+        buckets=REQUEST_LATENCY_BUCKETS,
+        registry=registry,
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        "http_requests_in_progress",
+        "HTTP requests being handled",
+        ["method"],
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    DB_POOL_CHECKOUT = Histogram(
+        "db_pool_checkout_seconds",
+        "Time to get a connection from the database pool (waiting and connecting)",
+        buckets=POOL_CHECKOUT_BUCKETS,
+        registry=registry,
+    )
+    DB_POOL_IN_USE = Gauge(
+        "db_pool_connections_in_use",
+        "Database connections checked out of the pool",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+    CACHE_REQUESTS = Counter(
+        "cache_requests",
+        "Cache lookups by key prefix and result (hit, miss, error)",
+        ["prefix", "result"],
+        registry=registry,
+    )
+    WEBSOCKET_CONNECTIONS = Gauge(
+        "websocket_connections",
+        "Open WebSocket connections",
+        multiprocess_mode="livesum",
+        registry=registry,
+    )
+
+    class _ScrapeTimeCollector:
+        """Values read when /metrics is scraped rather than recorded on the hot path"""
+
+        def collect(self):
+            queue_length = GaugeMetricFamily(
+                "celery_queue_length", "Messages waiting in the Celery broker queue", labels=["queue"]
+            )
+            for queue, length in sorted(_queue_lengths.items()):
+                queue_length.add_metric([queue], length)
+            yield queue_length
+
+    _scrape_time_collector = _ScrapeTimeCollector()
+    registry.register(_scrape_time_collector)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that handled a request (/api/v1/posts/{slug})
+
+    FastAPI resolves included routers lazily and keeps the full template in
+    the effective route context; scope["route"].path is then relative to the
+    innermost router. Unmatched requests share one label.
+    """
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "<unmatched>"
+
+
+def status_class(status_code: int) -> str:
+    return STATUS_CLASSES.get(status_code // 100, "other")
+
+
+def cache_key_prefix(key: str) -> str:
+    """Label for a cache key: its first ':' separated segment"""
+    prefix, separator, _ = key.partition(":")
+    return prefix if separator and prefix else "other"
+
+
+def record_cache_lookup(key: str, result: str) -> None:
+    """Count a cache lookup ('hit', 'miss' or 'error')"""
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.labels(cache_key_prefix(key), result).inc()
+
+
+def record_websocket_connections(delta: int) -> None:
+    if METRICS_ENABLED and delta:
+        WEBSOCKET_CONNECTIONS.inc(delta)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording how long each checkout takes"""
+
+    # Log under sqlalchemy.pool like the default pool, not as a child of the "app" logger
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def connect(self):
+        if not METRICS_ENABLED:
+            return super().connect()
+        start_time = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - start_time)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    DB_POOL_IN_USE.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    DB_POOL_IN_USE.dec()
+
+
+def instrument_pool(engine) -> None:
+    """Track connections in use for an engine's pool (sync or async engine)"""
+    if not METRICS_ENABLED:
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "checkout", _on_checkout):
+        return
+    event.listen(sync_engine, "checkout", _on_checkout)
+    event.listen(sync_engine, "checkin", _on_checkin)
+
+
+async def refresh_scrape_time_metrics() -> None:
+    """Read the Celery queue lengths from the broker (Redis)"""
+    from app.core.cache import cache_backend
+
+    redis_client = cache_backend.redis_client
+    if redis_client is None:
+        return
+    for queue in [name.strip() for name in settings.METRICS_CELERY_QUEUES.split(",") if name.strip()]:
+        try:
+            _queue_lengths[queue] = await redis_client.llen(queue)
+        except Exception as e:
+            logger.debug(f"Could not read Celery queue length for {queue}: {e}")
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Metrics in the Prometheus text format
+
+    Returns:
+        (body, content type)
+    """
+    if MULTIPROCESS_DIR:
+        # Aggregate the values written by every worker
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        collector_registry.register(_scrape_time_collector)
+        return generate_latest(collector_registry), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate (worker shutdown)"""
+    if MULTIPROCESS_DIR and PROMETHEUS_AVAILABLE:
+        multiprocess.mark_process_dead(pid or os.getpid(), MULTIPROCESS_DIR)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency
+
+    Requests are labelled with the matched route template (route_template),
+    not the raw path, so series stay bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Labelled children by label values (labels() takes a lock on every call)
+        self._latency: Dict[Tuple[str, str, str], Any] = {}
+        self._in_progress: Dict[str, Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            labels = (method, route_template(scope), status_class(status_code))
+            latency = self._latency.get(labels)
+            if latency is None:
+                latency = self._latency[labels] = REQUEST_LATENCY.labels(*labels)
+            latency.observe(time.perf_counter() - start_time)
@@ -0,0 +1,290 @@
+"""
+Query Instrumentation
+Automatic SQL statement accounting through SQLAlchemy engine events
+
+Every statement executed by an instrumented engine is timed and normalised
+into a fingerprint (literals, bind parameters and IN lists replaced by
+placeholders). The statement is recorded:
+
+- in the QueryStats of the current request or test (a contextvar set by
+  track_queries), giving the query count, DB time and repeated fingerprints
+  that point at N+1 patterns;
+- in the process-wide query_metrics aggregate, exposed to superadmins.
+
+QueryInstrumentationMiddleware tracks each HTTP request, logs N+1 patterns
+and, in debug mode, reports the numbers in X-DB-* response headers.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import route_template
+from app.core.slow_query_logger import SLOW_QUERY_THRESHOLD
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+|\?|__\[POSTCOMPILE_\w+\]")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Normalise a SQL statement so executions that differ only by their
+    parameters share one fingerprint. Compiled statements repeat, so results
+    are cached by statement text.
+
+    Args:
+        statement: SQL as sent to the driver
+
+    Returns:
+        Statement with literals and parameters replaced by '?'
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _BIND_PARAMETER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?)", normalized)
+    return _VALUES_ROWS.sub(r"\1", normalized)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed within one tracked scope (a request or a test)"""
+
+    count: int = 0
+    total_time: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = field(default=None, repr=False)
+
+    def record(self, statement_fingerprint: str, elapsed: float) -> None:
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.fingerprints[statement_fingerprint] += 1
+            stats = stats.parent
+
+    def n_plus_one(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        SELECT fingerprints executed more than `threshold` times
+
+        Returns:
+            (fingerprint, executions) pairs, most repeated first
+        """
+        threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [
+            (statement, executions)
+            for statement, executions in self.fingerprints.most_common()
+            if executions > threshold and statement.upper().startswith(("SELECT", "WITH"))
+        ]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """QueryStats of the innermost track_queries() scope, if any"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count statements executed in this context
+
+    Scopes nest: statements are also counted by every enclosing scope.
+
+    Example:
+        with track_queries() as stats:
+            await db.execute(...)
+        print(stats.count, stats.total_time)
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryMetrics:
+    """Process-wide statement and per-route aggregates"""
+
+    def __init__(self, max_fingerprints: Optional[int] = None):
+        self.max_fingerprints = max_fingerprints or settings.QUERY_METRICS_MAX_FINGERPRINTS
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements: Dict[str, List[float]] = {}
+            self._routes: Dict[str, Dict[str, Any]] = {}
+            self.untracked_fingerprints = 0
+
+    def record_query(self, statement_fingerprint: str, elapsed: float) -> None:
+        with self._lock:
+            entry = self._statements.get(statement_fingerprint)
+            if entry is None:
+                if len(self._statements) >= self.max_fingerprints:
+                    self.untracked_fingerprints += 1
+                    return
+                # [calls, total time, max time]
+                entry = self._statements[statement_fingerprint] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+    def record_request(self, route: str, stats: QueryStats, n_plus_one: List[Tuple[str, int]]) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "db_time": 0.0, "max_queries": 0,
+                "n_plus_one_requests": 0, "n_plus_one": {},
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["db_time"] += stats.total_time
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            if n_plus_one:
+                entry["n_plus_one_requests"] += 1
+                for statement, executions in n_plus_one:
+                    entry["n_plus_one"][statement] = max(entry["n_plus_one"].get(statement, 0), executions)
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Aggregated metrics, heaviest statements and routes first
+
+        Args:
+            limit: Maximum statements and routes returned
+        """
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)
+            routes = sorted(self._routes.items(), key=lambda item: item[1]["db_time"], reverse=True)
+            return {
+                "statements": [
+                    {
+                        "fingerprint": statement,
+                        "calls": calls,
+                        "total_time": round(total_time, 6),
+                        "mean_time": round(total_time / calls, 6),
+                        "max_time": round(max_time, 6),
+                    }
+                    for statement, (calls, total_time, max_time) in statements[:limit]
+                ],
+                "routes": [
+                    {
+                        "route": route,
+                        "requests": entry["requests"],
+                        "mean_queries": round(entry["queries"] / entry["requests"], 2),
+                        "max_queries": entry["max_queries"],
+                        "mean_db_time": round(entry["db_time"] / entry["requests"], 6),
+                        "n_plus_one_requests": entry["n_plus_one_requests"],
+                        "n_plus_one": [
+                            {"fingerprint": statement, "executions": executions}
+                            for statement, executions in sorted(
+                                entry["n_plus_one"].items(), key=lambda item: item[1], reverse=True
+                            )
+                        ],
+                    }
+                    for route, entry in routes[:limit]
+                ],
+                "tracked_fingerprints": len(self._statements),
+                "untracked_fingerprints": self.untracked_fingerprints,
+            }
+
+
+query_metrics = QueryMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    statement_fingerprint = fingerprint(statement)
+    query_metrics.record_query(statement_fingerprint, elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement_fingerprint, elapsed)
+    if elapsed > SLOW_QUERY_THRESHOLD:
+        logger.warning(f"Slow query ({elapsed:.3f}s > {SLOW_QUERY_THRESHOLD}s): {statement_fingerprint[:500]}")
+
+
+def _handle_error(exception_context) -> None:
+    # Failed statements never reach after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """
+    Register the statement timing events on an engine (sync or async).
+    Calling it again for the same engine is a no-op.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    ASGI middleware tracking the statements executed by each request
+
+    Records per-route aggregates in query_metrics (keyed by route template,
+    not the raw path), logs repeated SELECT fingerprints as N+1 patterns and,
+    when debug headers are enabled (DEBUG by default), adds
+    X-DB-Query-Count, X-DB-Query-Time and X-DB-N-Plus-One to responses.
+    """
+
+    def __init__(self, app: ASGIApp, debug_headers: Optional[bool] = None):
+        self.app = app
+        self.debug_headers = settings.DEBUG if debug_headers is None else debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_headers(message) -> None:
+                if message["type"] == "http.response.start" and self.debug_headers:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-query-count", str(stats.count).encode("latin-1")),
+                        (b"x-db-query-time", f"{stats.total_time * 1000:.1f}ms".encode("latin-1")),
+                        (b"x-db-n-plus-one", str(len(stats.n_plus_one())).encode("latin-1")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                label = f"{scope['method']} {route_template(scope)}"
+                n_plus_one = stats.n_plus_one()
+                query_metrics.record_request(label, stats, n_plus_one)
+                for statement, executions in n_plus_one:
+                    logger.warning(
+                        f"Possible N+1 query on {label}: executed {executions} times "
+                        f"({stats.count} queries in request): {statement[:300]}"
+                    )
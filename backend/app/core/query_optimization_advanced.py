@@ -9,6 +9,7 @@ from sqlalchemy import text, inspect
 from sqlalchemy.engine import Result
 from app.core.logging import logger
 from app.core.cache_enhanced import cache_query
+from app.core.query_instrumentation import QueryStats, fingerprint
 
 
 class QueryAnalyzer:
@@ -166,28 +167,29 @@ class QueryOptimizer:
         """
         Detect potential N+1 query patterns
         
+        Queries are grouped by fingerprint, so lookups that differ only by
+        their parameters count as the same statement. Requests are checked
+        automatically by QueryInstrumentationMiddleware.
+        
         Args:
             queries: List of query strings
             
         Returns:
             List of detected N+1 patterns
         """
-        n_plus_one_patterns = []
-        
-        # Simple pattern detection
-        for i, query in enumerate(queries):
-            # Look for queries in loops (simplified detection)
-            if "SELECT" in query.upper() and "WHERE" in query.upper():
-                # Check if this query pattern appears multiple times
-                count = queries.count(query)
-                if count > 5:  # Threshold for N+1 detection
-                    n_plus_one_patterns.append({
-                        "query": query[:100],
-                        "occurrences": count,
-                        "suggestion": "Consider using JOIN or eager loading",
-                    })
+        stats = QueryStats()
+        for query in queries:
+            stats.record(fingerprint(query), 0.0)
         
-        return n_plus_one_patterns
+        return [
+            {
+                "query": statement[:100],
+                "occurrences": occurrences,
+                "suggestion": "Consider using JOIN or eager loading",
+            }
+            for statement, occurrences in stats.n_plus_one()
+            if "WHERE" in statement.upper()
+        ]
     
     @staticmethod
     async def suggest_indexes(session: AsyncSession, table_name: str, column_name: str) -> List[str]:
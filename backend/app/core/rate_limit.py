@@ -4,61 +4,63 @@ Comprehensive protection against abuse and denial-of-service attacks.
 
 Features:
 - Per-endpoint rate limiting with configurable limits
-- User-based rate limiting for authenticated users
+- User-based rate limiting for authenticated users (tiered limits)
 - IP-based rate limiting for anonymous users
-- Redis-backed storage for distributed rate limiting
+- Redis-backed storage for distributed rate limiting (GCRA Lua script)
 - Memory fallback when Redis is unavailable
 - Automatic rate limit headers in responses
 - Configurable limits per endpoint category
 
+Checks run on the async engine in app.core.rate_limiter: no blocking Redis
+call on the event loop, and most allowed requests are decided locally.
+
 @example
 ```python
 from app.core.rate_limit import rate_limit_decorator
 
 @router.post("/api/v1/auth/login")
 @rate_limit_decorator("5/minute")
-async def login():
+async def login(request: Request):
     # Endpoint protected with 5 requests per minute limit
     pass
 ```
 """
 
-from typing import Callable, Optional, Dict, Any
-from fastapi import Request, HTTPException, status, Response
+import asyncio
+import inspect
+from functools import lru_cache, wraps
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from datetime import datetime, timedelta
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.core.config import settings
 from app.core.logging import logger
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
 from app.core.database import AsyncSessionLocal
+from app.core.rate_limiter import (
+    Rate,
+    RateLimiter,
+    RateLimitResult,
+    limiter,
+    parse_rate,
+)
+from app.core.rate_limit_identity import client_ip, resolve_rate_limit_user
+from app.core.user_throttle import get_user_throttle_limit
+
+# Paths never rate limited by the middleware (health checks, docs)
+EXEMPT_PATHS = ("/docs", "/redoc", "/openapi.json", "/metrics")
 
-# Rate limit storage configuration
-def get_storage_uri() -> str:
-    """
-    Get storage URI for rate limiter.
-    
-    Prioritizes Redis for distributed rate limiting across multiple instances.
-    Falls back to in-memory storage if Redis is unavailable.
-    
-    @returns Storage URI string (Redis URL or "memory://")
-    """
-    if settings.REDIS_URL:
-        try:
-            # Verify Redis is available
-            import redis
-            redis_client = redis.from_url(settings.REDIS_URL)
-            redis_client.ping()
-            logger.info("Using Redis for distributed rate limiting")
-            return settings.REDIS_URL
-        except Exception as e:
-            logger.warning(f"Redis not available for rate limiting, using memory: {e}")
-            return "memory://"
-    logger.info("Using in-memory rate limiting (Redis not configured)")
-    return "memory://"
+
+class RateLimitExceeded(Exception):
+    """Raised when a request exceeds its rate limit"""
+
+    def __init__(self, limit: str, result: RateLimitResult):
+        super().__init__(f"Rate limit exceeded: {limit}")
+        self.limit = limit
+        self.result = result
+        self.remaining = result.remaining
+        self.retry_after = max(1, int(result.retry_after + 0.999))
 
 
 def get_rate_limit_key(request: Request) -> str:
@@ -66,7 +68,7 @@ def get_rate_limit_key(request: Request) -> str:
     Get rate limit key for identifying rate limit buckets.
     
     Uses user ID for authenticated users (more accurate per-user limits).
-    Falls back to IP address for anonymous users.
+    Falls back to the client IP (see client_ip) for anonymous users.
     
     @param request - FastAPI request object
     @returns Rate limit key string (e.g., "user:123" or "ip:192.168.1.1")
@@ -80,23 +82,13 @@ def get_rate_limit_key(request: Request) -> str:
     key = get_rate_limit_key(request)  # "ip:192.168.1.1"
     ```
     """
-    # Try to get user from request state (set by auth middleware)
+    # Try to get user from request state (set by RateLimitMiddleware)
     user = getattr(request.state, 'user', None)
     if user and hasattr(user, 'id'):
         return f"user:{user.id}"
     
     # Fallback to IP address
-    ip_address = get_remote_address(request)
-    return f"ip:{ip_address}"
-
-
-# Initialize rate limiter with enhanced key function
-limiter = Limiter(
-    key_func=get_rate_limit_key,
-    default_limits=["1000/hour"],  # Default limit: 1000 requests per hour
-    storage_uri=get_storage_uri(),  # Redis if available, otherwise memory
-    headers_enabled=True,  # Enable rate limit headers in responses
-)
+    return f"ip:{client_ip(request)}"
 
 # Comprehensive rate limits by endpoint category
 RATE_LIMITS: Dict[str, Dict[str, str]] = {
@@ -142,12 +134,52 @@ RATE_LIMITS: Dict[str, Dict[str, str]] = {
 }
 
 
+def _compile_rate_limits(
+    rate_limits: Dict[str, Any],
+) -> Tuple[Dict[str, str], List[Tuple[str, str, str]], str]:
+    """
+    Compile RATE_LIMITS into an exact-path table and an ordered prefix list
+
+    A pattern with a path parameter ("/api/v1/users/{user_id}") matches every
+    path starting with the part before the parameter.
+    """
+    exact: Dict[str, str] = {}
+    prefixes: List[Tuple[str, str, str]] = []
+    for category, limits in rate_limits.items():
+        if category == "default":
+            continue
+        for pattern, limit in limits.items():
+            parse_rate(limit)  # Fail at import time on a typo
+            if "{" in pattern:
+                prefixes.append((pattern[:pattern.index("{")], pattern, limit))
+            else:
+                exact.setdefault(pattern, limit)
+    return exact, prefixes, rate_limits["default"]
+
+
+_EXACT_LIMITS, _PREFIX_LIMITS, _DEFAULT_LIMIT = _compile_rate_limits(RATE_LIMITS)
+
+
+@lru_cache(maxsize=4096)
+def _match_rate_limit(path: str) -> Tuple[str, str]:
+    """Resolve a path to (matched pattern, limit) using the compiled table"""
+    limit = _EXACT_LIMITS.get(path)
+    if limit is not None:
+        return path, limit
+    for prefix, pattern, prefix_limit in _PREFIX_LIMITS:
+        if path.startswith(prefix):
+            return pattern, prefix_limit
+    return "default", _DEFAULT_LIMIT
+
+
 def get_rate_limit(path: str) -> str:
     """
     Get rate limit for a given path.
     
     Checks endpoint-specific limits first, then falls back to default.
-    Supports path pattern matching with wildcards.
+    Supports path pattern matching with wildcards. Lookups use the table
+    compiled from RATE_LIMITS at import time (call reload_rate_limits()
+    after changing RATE_LIMITS at runtime).
     
     @param path - API endpoint path (e.g., "/api/v1/auth/login")
     @returns Rate limit string (e.g., "5/minute")
@@ -159,29 +191,138 @@ def get_rate_limit(path: str) -> str:
     limit = get_rate_limit("/api/v1/unknown")    # "1000/hour" (default)
     ```
     """
-    # Check specific endpoint limits
-    for category, limits in RATE_LIMITS.items():
-        if category == "default":
-            continue
+    return _match_rate_limit(path)[1]
+
+
+def reload_rate_limits() -> None:
+    """Recompile the route table after RATE_LIMITS was modified"""
+    global _EXACT_LIMITS, _PREFIX_LIMITS, _DEFAULT_LIMIT
+    _EXACT_LIMITS, _PREFIX_LIMITS, _DEFAULT_LIMIT = _compile_rate_limits(RATE_LIMITS)
+    _match_rate_limit.cache_clear()
+
+
+def _rate_limit_headers(limit: Rate, result: RateLimitResult) -> Dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(limit.limit),
+        "X-RateLimit-Remaining": str(max(result.remaining, 0)),
+        "X-RateLimit-Reset": str(int(result.reset_after + 0.999)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, int(result.retry_after + 0.999)))
+    return headers
+
+
+async def _log_rate_limit_exceeded(request: Request, limit: str, result: RateLimitResult) -> None:
+    """Audit a rate limit violation (once per blocking period and key)"""
+    if result.local:
+        # Already logged when the backend first denied this key
+        return
+    try:
+        # Get user from request state if available
+        user = getattr(request.state, 'user', None)
+        user_id = user.id if user and hasattr(user, 'id') else None
+        user_email = user.email if user and hasattr(user, 'email') else None
         
-        for pattern, limit in limits.items():
-            # Exact match
-            if pattern == path:
-                return limit
-            
-            # Pattern matching (e.g., "/api/v1/users/{user_id}")
-            if "{user_id}" in pattern:
-                pattern_base = pattern.replace("{user_id}", "")
-                if path.startswith(pattern_base):
-                    return limit
-            
-            if "{project_id}" in pattern:
-                pattern_base = pattern.replace("{project_id}", "")
-                if path.startswith(pattern_base):
-                    return limit
-    
-    # Return default limit
-    return RATE_LIMITS["default"]
+        # Create a separate session for audit logging
+        db = AsyncSessionLocal()
+        try:
+            await SecurityAuditLogger.log_event(
+                db=db,
+                event_type=SecurityEventType.RATE_LIMIT_EXCEEDED,
+                description=f"Rate limit exceeded for endpoint: {request.url.path}",
+                user_id=user_id,
+                user_email=user_email,
+                ip_address=client_ip(request),
+                user_agent=request.headers.get("user-agent"),
+                request_method=request.method,
+                request_path=str(request.url.path),
+                severity="warning",
+                success="failure",
+                metadata={
+                    "limit": limit,
+                    "remaining": str(result.remaining),
+                    "retry_after": str(max(1, int(result.retry_after + 0.999))),
+                }
+            )
+        finally:
+            await db.close()
+    except Exception as e:
+        # Don't fail the request if audit logging fails
+        logger.warning(f"Failed to log rate limit exceeded event: {e}")
+
+
+def _rate_limit_response(limit: str, result: RateLimitResult) -> JSONResponse:
+    retry_after = max(1, int(result.retry_after + 0.999))
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "error": "rate_limit_exceeded",
+            "message": "Too many requests. Please try again later.",
+            "retry_after": retry_after,
+        },
+        headers=_rate_limit_headers(parse_rate(limit), result),
+    )
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing the route table (RATE_LIMITS)
+
+    Endpoint-specific limits apply per user (or IP). The caller is resolved
+    from the bearer token or API key (app.core.rate_limit_identity) and
+    stored in request.state.user. Authenticated users get their tier limit
+    from USER_THROTTLE_LIMITS instead of the default limit. Rate limit
+    headers are added to responses.
+    """
+
+    def __init__(self, app: ASGIApp, engine: Optional[RateLimiter] = None):
+        self.app = app
+        self.engine = engine or limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if path.startswith(EXEMPT_PATHS) or path.endswith("/health"):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        user = await resolve_rate_limit_user(request)
+        if user is not None:
+            request.state.user = user
+        client_key = get_rate_limit_key(request)
+        pattern, route_limit = _match_rate_limit(path)
+        checks = []
+        if user is not None:
+            # Tiered limit replaces the default limit for authenticated users
+            checks.append((f"tier:{client_key}", get_user_throttle_limit(user.tier)))
+        if not checks or pattern != "default":
+            checks.append((f"route:{pattern}:{client_key}", route_limit))
+
+        reported = None
+        for key, limit in checks:
+            rate = parse_rate(limit)
+            result = await self.engine.hit(key, rate)
+            if not result.allowed:
+                await _log_rate_limit_exceeded(request, limit, result)
+                await _rate_limit_response(limit, result)(scope, receive, send)
+                return
+            if reported is None or result.remaining < reported[1].remaining:
+                reported = (rate, result)
+
+        headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in _rate_limit_headers(*reported).items()
+        ]
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 def setup_rate_limiting(app) -> Any:
@@ -204,6 +345,7 @@ def setup_rate_limiting(app) -> Any:
     ```
     """
     app.state.limiter = limiter
+    app.add_middleware(RateLimitMiddleware)
     
     # Add custom exception handler with detailed error messages
     @app.exception_handler(RateLimitExceeded)
@@ -213,64 +355,30 @@ def setup_rate_limiting(app) -> Any:
         
         Returns 429 Too Many Requests with rate limit information in headers.
         """
-        # Log rate limit exceeded event
-        try:
-            # Get user from request state if available
-            user = getattr(request.state, 'user', None)
-            user_id = user.id if user and hasattr(user, 'id') else None
-            user_email = user.email if user and hasattr(user, 'email') else None
-            
-            # Create a separate session for audit logging
-            db = AsyncSessionLocal()
-            try:
-                await SecurityAuditLogger.log_event(
-                    db=db,
-                    event_type=SecurityEventType.RATE_LIMIT_EXCEEDED,
-                    description=f"Rate limit exceeded for endpoint: {request.url.path}",
-                    user_id=user_id,
-                    user_email=user_email,
-                    ip_address=request.client.host if request.client else None,
-                    user_agent=request.headers.get("user-agent"),
-                    request_method=request.method,
-                    request_path=str(request.url.path),
-                    severity="warning",
-                    success="failure",
-                    metadata={
-                        "limit": str(getattr(exc, "limit", "unknown")),
-                        "remaining": str(getattr(exc, "remaining", 0)),
-                        "retry_after": str(getattr(exc, "retry_after", 60)),
-                    }
-                )
-            finally:
-                await db.close()
-        except Exception as e:
-            # Don't fail the request if audit logging fails
-            logger.warning(f"Failed to log rate limit exceeded event: {e}")
-        
-        response = JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={
-                "error": "rate_limit_exceeded",
-                "message": "Too many requests. Please try again later.",
-                "retry_after": getattr(exc, "retry_after", None),
-            },
-        )
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(getattr(exc, "limit", "unknown"))
-        response.headers["X-RateLimit-Remaining"] = str(getattr(exc, "remaining", 0))
-        response.headers["Retry-After"] = str(getattr(exc, "retry_after", 60))
-        
-        return response
+        await _log_rate_limit_exceeded(request, exc.limit, exc.result)
+        return _rate_limit_response(exc.limit, exc.result)
     
-    logger.info("Rate limiting configured with comprehensive endpoint limits")
+    logger.info(f"Rate limiting configured with comprehensive endpoint limits (storage: {limiter.storage})")
     return app
 
 
+def _find_request(args: tuple, kwargs: Dict[str, Any]) -> Optional[Request]:
+    for value in kwargs.values():
+        if isinstance(value, Request):
+            return value
+    for value in args:
+        if isinstance(value, Request):
+            return value
+    return None
+
+
 def rate_limit_decorator(limit: str):
     """
     Decorator to apply rate limiting to an endpoint.
     
+    The endpoint must take a `request: Request` parameter; the limit is
+    tracked per endpoint and per user (or IP).
+    
     @param limit - Rate limit string (e.g., "5/minute", "100/hour")
     @returns Decorator function
     
@@ -280,19 +388,43 @@ def rate_limit_decorator(limit: str):
     
     @router.post("/api/v1/auth/login")
     @rate_limit_decorator("5/minute")
-    async def login(credentials: LoginSchema):
+    async def login(request: Request, credentials: LoginSchema):
         # This endpoint is limited to 5 requests per minute
         pass
     ```
     """
-    return limiter.limit(limit)
+    rate = parse_rate(limit)
+
+    def decorator(func: Callable) -> Callable:
+        scope = f"{func.__module__}.{func.__qualname__}"
+        if not any(
+            parameter.annotation is Request or parameter.name == "request"
+            for parameter in inspect.signature(func).parameters.values()
+        ):
+            logger.warning(f"{scope} has no 'request' parameter: rate limit {limit} cannot be applied")
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = _find_request(args, kwargs)
+            if request is not None:
+                result = await limiter.hit(f"endpoint:{scope}:{get_rate_limit_key(request)}", rate)
+                if not result.allowed:
+                    raise RateLimitExceeded(limit, result)
+            if asyncio.iscoroutinefunction(func):
+                return await func(*args, **kwargs)
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 def get_rate_limit_info(request: Request) -> Dict[str, Any]:
     """
     Get current rate limit information for a request.
     
-    Useful for displaying rate limit status to users.
+    Useful for displaying rate limit status to users. Reports the route
+    limit for the request's path and client.
     
     @param request - FastAPI request object
     @returns Dictionary with rate limit information
@@ -302,16 +434,13 @@ def get_rate_limit_info(request: Request) -> Dict[str, Any]:
     info = get_rate_limit_info(request)
     # {
     #   "limit": "100/hour",
-    #   "remaining": 95,
-    #   "reset": "2025-01-25T12:00:00Z"
+    #   "key": "ip:192.168.1.1",
+    #   "storage": "redis",
     # }
     ```
     """
-    # This would require accessing the limiter's internal state
-    # Implementation depends on slowapi's internal API
     return {
-        "limit": "unknown",
-        "remaining": "unknown",
-        "reset": "unknown",
+        "limit": get_rate_limit(request.url.path),
+        "key": get_rate_limit_key(request),
+        "storage": limiter.storage,
     }
-
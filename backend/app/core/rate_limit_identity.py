@@ -0,0 +1,155 @@
+"""
+Rate Limit Identity
+Who a request is rate limited as: an authenticated user with their throttle
+tier, or the client IP
+
+RateLimitMiddleware runs before the auth dependencies, so it resolves the
+caller itself. A bearer token is decoded locally; an API key is looked up by
+hash. The user and tier are cached per token subject or key hash for
+RATE_LIMIT_IDENTITY_TTL seconds, so the database is read at most once per
+caller and interval (invalid credentials are cached too).
+
+The tier comes from the plan of the user's active (or trialing)
+subscription: "rate_limit_tier" in the plan features JSON, else the plan name
+when it names a USER_THROTTLE_LIMITS tier. Other users get the default tier.
+
+Anonymous clients are keyed on their IP. Behind TRUSTED_PROXY_HOPS proxies,
+that is the X-Forwarded-For entry appended by the outermost trusted proxy:
+entries further left are set by the client and can be forged.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import select
+
+from app.core.api_key import API_KEY_HEADER_NAME, API_KEY_QUERY_NAME, hash_api_key
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.core.user_throttle import USER_THROTTLE_LIMITS
+from app.models.api_key import APIKey
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.user import User
+
+# Cached identities per worker before the cache is cleared
+MAX_CACHED_IDENTITIES = 10000
+
+TIERED_STATUSES = (SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING)
+
+
+@dataclass(frozen=True)
+class RateLimitUser:
+    """The authenticated caller of a request, as far as rate limiting is concerned"""
+
+    id: int
+    email: str
+    tier: str
+
+
+_identities: Dict[str, Tuple[float, Optional[RateLimitUser]]] = {}
+
+
+def client_ip(request: Request) -> str:
+    """Client address, read from X-Forwarded-For behind TRUSTED_PROXY_HOPS proxies"""
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded_for = request.headers.get("x-forwarded-for") if hops else None
+    if forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(",") if address.strip()]
+        if addresses:
+            return addresses[-min(hops, len(addresses))]
+    return request.client.host if request.client else "127.0.0.1"
+
+
+def plan_tier(name: Optional[str], features: Optional[str]) -> str:
+    """Throttle tier of a subscription plan"""
+    try:
+        tier = (json.loads(features) or {}).get("rate_limit_tier") if features else None
+    except (ValueError, AttributeError):
+        tier = None
+    if tier in USER_THROTTLE_LIMITS:
+        return tier
+    name = (name or "").strip().lower()
+    return name if name in USER_THROTTLE_LIMITS else "default"
+
+
+def _credentials(request: Request) -> Optional[Tuple[str, str]]:
+    """(kind, value) of the request credentials: a token subject or an API key hash"""
+    authorization = request.headers.get("authorization")
+    if authorization and authorization[:7].lower() == "bearer ":
+        try:
+            payload = jwt.decode(authorization[7:].strip(), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        subject = payload.get("sub")
+        if payload.get("type") != "access" or not subject:
+            return None
+        return "sub", subject
+    api_key = request.headers.get(API_KEY_HEADER_NAME) or request.query_params.get(API_KEY_QUERY_NAME)
+    if api_key:
+        return "key", hash_api_key(api_key)
+    return None
+
+
+async def _load_user(kind: str, value: str) -> Optional[RateLimitUser]:
+    async with AsyncSessionLocal() as db:
+        if kind == "sub":
+            user = (await db.execute(
+                select(User.id, User.email).where(User.email == value, User.is_active == True)
+            )).one_or_none()
+        else:
+            api_key = (await db.execute(
+                select(APIKey).where(APIKey.key_hash == value, APIKey.is_active == True)
+            )).scalar_one_or_none()
+            if api_key is None or not api_key.is_valid():
+                return None
+            user = (await db.execute(
+                select(User.id, User.email).where(User.id == api_key.user_id, User.is_active == True)
+            )).one_or_none()
+        if user is None:
+            return None
+        plan = (await db.execute(
+            select(Plan.name, Plan.features)
+            .join(Subscription, Subscription.plan_id == Plan.id)
+            .where(Subscription.user_id == user.id, Subscription.status.in_(TIERED_STATUSES))
+            .order_by(Subscription.created_at.desc())
+            .limit(1)
+        )).one_or_none()
+    tier = plan_tier(plan.name, plan.features) if plan else "default"
+    return RateLimitUser(id=user.id, email=user.email, tier=tier)
+
+
+async def resolve_rate_limit_user(request: Request) -> Optional[RateLimitUser]:
+    """
+    Authenticated caller of the request, or None for anonymous requests
+
+    Invalid or expired credentials count as anonymous: the endpoint's auth
+    dependency rejects them.
+    """
+    credentials = _credentials(request)
+    if credentials is None:
+        return None
+    cache_key = ":".join(credentials)
+    now = time.monotonic()
+    cached = _identities.get(cache_key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    try:
+        user = await _load_user(*credentials)
+    except Exception as e:
+        logger.warning(f"Failed to resolve the rate limit identity: {e}")
+        return None
+    if len(_identities) >= MAX_CACHED_IDENTITIES:
+        _identities.clear()
+    _identities[cache_key] = (now + settings.RATE_LIMIT_IDENTITY_TTL, user)
+    return user
+
+
+def clear_identity_cache() -> None:
+    """Forget cached identities (tests, tier changes)"""
+    _identities.clear()
@@ -0,0 +1,336 @@
+"""
+Async Rate Limiter (GCRA)
+Native asyncio rate limiting engine used by app.core.rate_limit and
+app.core.user_throttle.
+
+Limits are enforced with the Generic Cell Rate Algorithm: each bucket stores a
+single "theoretical arrival time" (TAT). A limit of N per period allows bursts
+of N requests, then one request every period / N.
+
+Backends:
+- RedisRateLimitBackend: one Lua script call per check (atomic, distributed)
+- MemoryRateLimitBackend: same algorithm in process (single worker / fallback)
+
+With Redis, a local pre-filter avoids a round trip for most allowed requests:
+a worker reserves a small lease of tokens from the shared bucket and serves
+them locally; denials are cached locally until the retry time. Leases start at
+one token and only grow for keys that use them up quickly, so quiet keys never
+waste quota.
+"""
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+from app.core.config import settings
+from app.core.logging import logger
+
+RATE_PATTERN = re.compile(
+    r'^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$',
+    re.IGNORECASE,
+)
+PERIOD_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Retry the Redis backend this long after a failure (seconds)
+REDIS_RETRY_INTERVAL = 30.0
+
+# Sweep expired local state once the tables reach this size
+LOCAL_STATE_SWEEP_SIZE = 10_000
+
+# KEYS[1]: bucket; ARGV: emission interval (ms), period (ms), tokens requested.
+# Grants as many of the requested tokens as fit (at least one, or none).
+# Returns {granted, remaining, retry_after_ms, reset_after_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local granted = math.min(requested, math.floor((now + period - tat) / interval + 1e-9))
+if granted <= 0 then
+    return {0, 0, math.ceil(tat + interval - period - now), math.ceil(tat - now)}
+end
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+return {granted, math.floor((now + period - tat) / interval + 1e-9), 0, math.ceil(tat - now)}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    """Parsed rate limit ("5/minute" -> Rate(5, 60.0))"""
+
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        """Emission interval: seconds between two requests at the steady rate"""
+        return self.period / self.limit
+
+    def __str__(self) -> str:
+        return f"{self.limit}/{self.period:g}s"
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+    reset_after: float = 0.0
+    # True when decided from local state, without asking the backend
+    local: bool = False
+
+
+_rate_cache: Dict[str, Rate] = {}
+
+
+def parse_rate(value: str) -> Rate:
+    """
+    Parse a rate limit string
+
+    Accepts "5/minute", "100/hour", "10 per second", "30/5 minutes".
+
+    Raises:
+        ValueError: If the string is not a valid rate
+    """
+    rate = _rate_cache.get(value)
+    if rate is not None:
+        return rate
+    match = RATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    limit = int(match.group(1))
+    multiplier = int(match.group(2) or 1)
+    if limit <= 0 or multiplier <= 0:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    rate = Rate(limit=limit, period=float(PERIOD_SECONDS[match.group(3).lower()] * multiplier))
+    _rate_cache[value] = rate
+    return rate
+
+
+class MemoryRateLimitBackend:
+    """In-process GCRA buckets"""
+
+    distributed = False
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._sweep_size = LOCAL_STATE_SWEEP_SIZE
+
+    async def acquire(self, key: str, rate: Rate, requested: int = 1) -> Tuple[int, RateLimitResult]:
+        return self.acquire_now(key, rate, requested, time.monotonic())
+
+    def acquire_now(self, key: str, rate: Rate, requested: int, now: float) -> Tuple[int, RateLimitResult]:
+        interval = rate.interval
+        tat = max(self._tats.get(key, now), now)
+        granted = min(requested, math.floor((now + rate.period - tat) / interval + 1e-9))
+        if granted <= 0:
+            return 0, RateLimitResult(
+                allowed=False,
+                limit=rate.limit,
+                remaining=0,
+                retry_after=tat + interval - rate.period - now,
+                reset_after=tat - now,
+            )
+        tat += granted * interval
+        self._tats[key] = tat
+        if len(self._tats) > self._sweep_size:
+            self._sweep(now)
+        return granted, RateLimitResult(
+            allowed=True,
+            limit=rate.limit,
+            remaining=math.floor((now + rate.period - tat) / interval + 1e-9),
+            reset_after=tat - now,
+        )
+
+    def _sweep(self, now: float) -> None:
+        # A bucket whose TAT is in the past is full again: no need to keep it
+        for key in [k for k, tat in self._tats.items() if tat <= now]:
+            del self._tats[key]
+        # Avoid sweeping on every call when most buckets are still active
+        self._sweep_size = max(LOCAL_STATE_SWEEP_SIZE, 2 * len(self._tats))
+
+    async def reset(self) -> None:
+        self._tats.clear()
+
+
+class RedisRateLimitBackend:
+    """GCRA buckets in Redis, one atomic Lua script call per check"""
+
+    distributed = True
+
+    def __init__(self, redis_url: str, prefix: str = "ratelimit:"):
+        self.redis_client = redis.from_url(redis_url)
+        self.prefix = prefix
+        self._script = self.redis_client.register_script(GCRA_SCRIPT)
+
+    async def acquire(self, key: str, rate: Rate, requested: int = 1) -> Tuple[int, RateLimitResult]:
+        granted, remaining, retry_after_ms, reset_after_ms = await self._script(
+            keys=[self.prefix + key],
+            args=[rate.interval * 1000, rate.period * 1000, requested],
+        )
+        granted = int(granted)
+        return granted, RateLimitResult(
+            allowed=granted > 0,
+            limit=rate.limit,
+            remaining=int(remaining),
+            retry_after=int(retry_after_ms) / 1000,
+            reset_after=int(reset_after_ms) / 1000,
+        )
+
+    async def reset(self) -> None:
+        async for key in self.redis_client.scan_iter(match=f"{self.prefix}*", count=1000):
+            await self.redis_client.delete(key)
+
+    async def close(self) -> None:
+        await self.redis_client.close()
+
+
+class _LocalState:
+    """Per-key pre-filter state for a distributed backend"""
+
+    __slots__ = ('tokens', 'expires_at', 'blocked_until', 'lease', 'remaining', 'reset_at')
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.blocked_until = 0.0
+        self.lease = 1
+        self.remaining = 0
+        self.reset_at = 0.0
+
+
+class RateLimiter:
+    """
+    Async rate limiting engine
+
+    `hit(key, rate)` consumes one request from the bucket and returns a
+    RateLimitResult. Redis is used when configured (distributed limits across
+    workers), with the in-memory backend as fallback when it is unavailable.
+    """
+
+    def __init__(
+        self,
+        default_limit: str = "1000/hour",
+        redis_url: Optional[str] = None,
+        lease_max: Optional[int] = None,
+        lease_ttl: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.default_limit = default_limit
+        self.enabled = enabled
+        self.lease_max = lease_max if lease_max is not None else settings.RATE_LIMIT_LEASE_MAX
+        self.lease_ttl = lease_ttl if lease_ttl is not None else settings.RATE_LIMIT_LEASE_TTL
+        self.memory = MemoryRateLimitBackend()
+        self.backend = self.memory
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self.backend = RedisRateLimitBackend(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis not available for rate limiting, using memory: {e}")
+        self._local: Dict[str, _LocalState] = {}
+        self._local_sweep_size = LOCAL_STATE_SWEEP_SIZE
+        self._redis_down_until = 0.0
+
+    @property
+    def storage(self) -> str:
+        return "redis" if self.backend.distributed else "memory"
+
+    async def hit(self, key: str, rate: Rate) -> RateLimitResult:
+        """Consume one request for `key` under `rate`"""
+        if not self.enabled:
+            return RateLimitResult(allowed=True, limit=rate.limit, remaining=rate.limit)
+
+        now = time.monotonic()
+        if not self.backend.distributed or now < self._redis_down_until:
+            _, result = self.memory.acquire_now(key, rate, 1, now)
+            return result
+
+        state = self._local.get(key)
+        if state is None:
+            if len(self._local) > self._local_sweep_size:
+                self._sweep_local(now)
+            state = self._local[key] = _LocalState()
+        elif now < state.blocked_until:
+            return RateLimitResult(
+                allowed=False,
+                limit=rate.limit,
+                remaining=0,
+                retry_after=state.blocked_until - now,
+                reset_after=state.reset_at - now,
+                local=True,
+            )
+        elif state.tokens > 0 and now < state.expires_at:
+            state.tokens -= 1
+            return RateLimitResult(
+                allowed=True,
+                limit=rate.limit,
+                remaining=state.remaining,
+                reset_after=max(state.reset_at - now, 0.0),
+                local=True,
+            )
+
+        # Grow the lease only when the previous one was used up before expiring
+        lease_cap = max(1, min(self.lease_max, rate.limit // 10))
+        if state.tokens == 0 and now < state.expires_at:
+            state.lease = min(state.lease * 2, lease_cap)
+        else:
+            state.lease = 1
+
+        try:
+            granted, result = await self.backend.acquire(key, rate, state.lease)
+        except Exception as e:
+            logger.warning(f"Redis rate limiting failed, using memory for {REDIS_RETRY_INTERVAL:.0f}s: {e}")
+            self._redis_down_until = now + REDIS_RETRY_INTERVAL
+            _, result = self.memory.acquire_now(key, rate, 1, now)
+            return result
+
+        if granted:
+            state.tokens = granted - 1
+            state.expires_at = now + self.lease_ttl
+            state.remaining = result.remaining
+        else:
+            state.tokens = 0
+            state.blocked_until = now + result.retry_after
+        state.reset_at = now + result.reset_after
+        return result
+
+    def _sweep_local(self, now: float) -> None:
+        for key in [
+            k for k, s in self._local.items()
+            if s.expires_at <= now and s.blocked_until <= now
+        ]:
+            del self._local[key]
+        self._local_sweep_size = max(LOCAL_STATE_SWEEP_SIZE, 2 * len(self._local))
+
+    async def reset(self) -> None:
+        """Clear all buckets (tests, admin tooling)"""
+        self._local.clear()
+        await self.memory.reset()
+        if self.backend is not self.memory:
+            await self.backend.reset()
+
+    async def close(self) -> None:
+        if isinstance(self.backend, RedisRateLimitBackend):
+            await self.backend.close()
+
+
+# Global rate limiting engine
+limiter = RateLimiter(redis_url=settings.REDIS_URL or None)
@@ -1,53 +1,112 @@
 """
 Request Size Limits Middleware
 Prevents DoS attacks by limiting request body size
+
+Limits are enforced on the bytes actually received, not only on the
+Content-Length header, so chunked uploads cannot bypass them. A request is
+aborted with 413 as soon as it crosses its limit, before the rest of the body
+is read.
 """
 
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestBodyTooLarge(HTTPException):
+    """Raised from the receive channel once a request body exceeds its limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB",
+        )
+        self.limit = limit
 
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware to limit request body size"""
-    
+def _too_large_response(exc: RequestBodyTooLarge) -> JSONResponse:
+    # Same envelope as app.core.error_handler.http_exception_handler
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "success": False,
+            "error": {
+                "code": f"HTTP_{exc.status_code}",
+                "message": exc.detail,
+                "details": None,
+            },
+            "timestamp": None,
+        },
+        headers={"Connection": "close"},
+    )
+
+
+class RequestSizeLimitMiddleware:
+    """ASGI middleware to limit request body size"""
+
     # Default limits (in bytes)
     DEFAULT_LIMIT = 10 * 1024 * 1024  # 10 MB
     JSON_LIMIT = 1 * 1024 * 1024  # 1 MB for JSON
     FILE_UPLOAD_LIMIT = 50 * 1024 * 1024  # 50 MB for file uploads
-    
-    def __init__(self, app, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None):
-        super().__init__(app)
+
+    def __init__(self, app: ASGIApp, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None):
+        self.app = app
         self.default_limit = default_limit or self.DEFAULT_LIMIT
         self.json_limit = json_limit or self.JSON_LIMIT
         self.file_upload_limit = file_upload_limit or self.FILE_UPLOAD_LIMIT
-    
-    async def dispatch(self, request: Request, call_next):
-        """Check request size before processing"""
-        
-        content_length = request.headers.get("content-length")
-        
+
+    def limit_for(self, content_type: str) -> int:
+        """Body limit for a Content-Type header value"""
+        content_type = content_type.lower()
+        if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
+            return self.file_upload_limit
+        if "application/json" in content_type:
+            return self.json_limit
+        return self.default_limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        limit = self.limit_for(headers.get("content-type", ""))
+
+        # Reject up front when the client declares an oversized body
+        content_length = headers.get("content-length")
         if content_length:
             try:
-                size = int(content_length)
-                content_type = request.headers.get("content-type", "").lower()
-                
-                # Determine limit based on content type
-                if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
-                    limit = self.file_upload_limit
-                elif "application/json" in content_type:
-                    limit = self.json_limit
-                else:
-                    limit = self.default_limit
-                
-                if size > limit:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB"
-                    )
+                if int(content_length) > limit:
+                    await _too_large_response(RequestBodyTooLarge(limit))(scope, receive, send)
+                    return
             except ValueError:
-                # Invalid content-length header, continue
+                # Invalid content-length header, the streamed count still applies
                 pass
-        
-        response = await call_next(request)
-        return response
 
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestBodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestBodyTooLarge as exc:
+            # Normally turned into a 413 by the exception handlers; this covers
+            # bodies read outside the router (e.g. by other middleware)
+            if response_started:
+                raise
+            await _too_large_response(exc)(scope, receive, send)
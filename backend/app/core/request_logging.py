@@ -0,0 +1,116 @@
+"""
+Request Logging
+One structured log line per request, sampled per route
+
+Successful requests (status < 400) are logged with the sample rate of their
+route (LOG_REQUEST_SAMPLE_RATES, falling back to LOG_REQUEST_SAMPLE_RATE).
+Client and server errors, unhandled exceptions and requests slower than
+LOG_SLOW_REQUEST_THRESHOLD are always logged.
+"""
+
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import route_template
+
+
+def parse_sample_rates(value: str) -> List[Tuple[str, float]]:
+    """
+    Parse 'route prefix=rate' pairs
+
+    Returns:
+        (prefix, rate) pairs, longest prefix first
+    """
+    rates = []
+    for item in value.split(","):
+        prefix, separator, rate = item.strip().rpartition("=")
+        if not separator or not prefix:
+            continue
+        try:
+            rates.append((prefix.strip(), min(1.0, max(0.0, float(rate)))))
+        except ValueError:
+            logger.warning("Ignoring invalid request log sample rate %r", item)
+    return sorted(rates, key=lambda item: len(item[0]), reverse=True)
+
+
+class RequestLoggingMiddleware:
+    """ASGI middleware logging completed requests with per-route sampling"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: Optional[float] = None,
+        route_sample_rates: Optional[str] = None,
+        slow_threshold: Optional[float] = None,
+    ):
+        self.app = app
+        self.sample_rate = settings.LOG_REQUEST_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.route_sample_rates = parse_sample_rates(
+            settings.LOG_REQUEST_SAMPLE_RATES if route_sample_rates is None else route_sample_rates
+        )
+        self.slow_threshold = settings.LOG_SLOW_REQUEST_THRESHOLD if slow_threshold is None else slow_threshold
+        self._rates: Dict[str, float] = {}
+
+    def rate_for(self, route: str) -> float:
+        rate = self._rates.get(route)
+        if rate is None:
+            rate = next(
+                (prefix_rate for prefix, prefix_rate in self.route_sample_rates if route.startswith(prefix)),
+                self.sample_rate,
+            )
+            self._rates[route] = rate
+        return rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            logger.error(
+                "Request failed: %s %s (%.4fs)",
+                scope["method"], scope["path"], time.perf_counter() - start_time,
+                context=self._context(scope, 500),
+                exc_info=True,
+            )
+            # Re-raise so the outer middleware (CORS, error handlers) still see the exception
+            raise
+
+        process_time = time.perf_counter() - start_time
+        if status_code < 400 and process_time < self.slow_threshold:
+            rate = self.rate_for(route_template(scope))
+            if rate <= 0 or (rate < 1 and random.random() >= rate):
+                return
+        logger.info(
+            "Request completed: %s %s - %s (%.4fs)",
+            scope["method"], scope["path"], status_code, process_time,
+            context=self._context(scope, status_code, process_time),
+        )
+
+    @staticmethod
+    def _context(scope: Scope, status_code: int, process_time: Optional[float] = None) -> dict:
+        client = scope.get("client")
+        context = {
+            "route": route_template(scope),
+            "status_code": status_code,
+            "client": client[0] if client else "unknown",
+        }
+        if process_time is not None:
+            context["duration_ms"] = round(process_time * 1000, 2)
+        return context
@@ -3,10 +3,10 @@ Security Audit Logging
 Comprehensive security event logging for audit trails
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 from enum import Enum
-from sqlalchemy import Column, DateTime, Integer, String, Text, JSON, Index, func
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, String, Text, JSON, Index, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import Base, AsyncSessionLocal
@@ -54,29 +54,35 @@ class SecurityEventType(str, Enum):
 
 
 class SecurityAuditLog(Base):
-    """Security audit log model"""
+    """
+    Security audit log model
+    
+    On PostgreSQL the table is range partitioned by month on timestamp (see
+    migration 032 and app.services.audit_log_maintenance): the primary key is
+    (id, timestamp) and every index below exists on each partition.
+    """
     __tablename__ = "security_audit_logs"
     __table_args__ = (
-        Index("idx_security_audit_user_id", "user_id"),
-        Index("idx_security_audit_event_type", "event_type"),
+        Index("idx_security_audit_user_timestamp", "user_id", "timestamp"),
+        Index("idx_security_audit_event_type_timestamp", "event_type", "timestamp"),
         Index("idx_security_audit_timestamp", "timestamp"),
         Index("idx_security_audit_ip_address", "ip_address"),
     )
     
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Event details
-    event_type = Column(String(50), nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
     severity = Column(String(20), default="info", nullable=False)  # info, warning, error, critical
     
     # User context
-    user_id = Column(Integer, nullable=True, index=True)
+    user_id = Column(Integer, nullable=True)
     user_email = Column(String(255), nullable=True)  # Denormalized for audit trail
     api_key_id = Column(Integer, nullable=True)  # If event was via API key
     
     # Request context
-    ip_address = Column(String(45), nullable=True, index=True)  # IPv4 or IPv6
+    ip_address = Column(String(45), nullable=True)  # IPv4 or IPv6
     user_agent = Column(String(500), nullable=True)
     request_method = Column(String(10), nullable=True)
     request_path = Column(String(500), nullable=True)
@@ -92,6 +98,29 @@ class SecurityAuditLog(Base):
         return f"<SecurityAuditLog(id={self.id}, event_type={self.event_type}, user_id={self.user_id}, timestamp={self.timestamp})>"
 
 
+class SecurityAuditDailyStat(Base):
+    """
+    Daily rollup of security audit logs
+    
+    One row per (UTC day, user, event type, severity), built from complete
+    days by AuditLogMaintenance. Events without a user are counted under
+    user_id 0. Rollups are kept after the raw partitions are dropped.
+    """
+    __tablename__ = "security_audit_daily_stats"
+    __table_args__ = (
+        Index("idx_security_audit_daily_stats_user_day", "user_id", "day"),
+    )
+    
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True, default=0)
+    event_type = Column(String(50), primary_key=True)
+    severity = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<SecurityAuditDailyStat(day={self.day}, user_id={self.user_id}, event_type={self.event_type}, count={self.count})>"
+
+
 class SecurityAuditLogger:
     """Security audit logger"""
     
@@ -152,13 +181,14 @@ class SecurityAuditLogger:
                 severity=severity,
                 success=success,
                 event_metadata=metadata or {},
+                # Set here rather than by the server so no refresh is needed after the insert
+                timestamp=datetime.now(timezone.utc),
             )
             
             db.add(audit_log)
             # Commit immediately to ensure the audit log is saved
             # This is critical for security audit logs - they must be persisted
             await db.commit()
-            await db.refresh(audit_log)
             
             # Also log to application logger
             log_context = {
@@ -0,0 +1,180 @@
+"""
+Startup Schema Initialization
+Schema and seed work run once per deploy instead of in every worker
+
+create_all, the column auto-migrations, the default theme, the recommended
+indexes and ANALYZE used to run in every worker process on every boot. They
+now run in one worker: the one that takes a Postgres advisory lock. The
+leader records the schema version it brought the database to in the
+app_schema_state table. Every other worker (and every later boot with the
+same version) reads that marker with one query and skips the work.
+
+The version is a hash of the model metadata and SCHEMA_INIT_REVISION; bump
+the revision when a step changes without changing the models (a new
+recommended index, another auto-migration).
+
+Run from a release step instead of the workers (SCHEMA_INIT_ON_STARTUP=false):
+    python -m app.core.startup [--force]
+"""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.database import AsyncSessionLocal, Base, engine as default_engine
+from app.core.logging import logger
+
+# Bump when a startup step changes without a model change
+SCHEMA_INIT_REVISION = 1
+
+# pg_try_advisory_lock key electing the worker that runs the initialization
+SCHEMA_INIT_LOCK_ID = 7_250_046_001
+
+MARKER_TABLE = "app_schema_state"
+MARKER_NAME = "startup"
+
+
+def schema_version() -> str:
+    """Hash of the model tables, columns and indexes plus SCHEMA_INIT_REVISION"""
+    digest = hashlib.sha256(f"revision:{SCHEMA_INIT_REVISION}".encode())
+    for table in sorted(Base.metadata.tables.values(), key=lambda table: table.fullname):
+        digest.update(f"|table:{table.fullname}".encode())
+        for column in table.columns:
+            try:
+                column_type = str(column.type)
+            except Exception:
+                column_type = type(column.type).__name__
+            digest.update(f"|{column.name}:{column_type}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(f"|index:{index.name}".encode())
+    return digest.hexdigest()[:16]
+
+
+async def read_marker(bind: AsyncEngine) -> Optional[str]:
+    """Schema version recorded by the last initialization (None if never run)"""
+    try:
+        async with bind.connect() as conn:
+            return (await conn.execute(
+                text(f"SELECT version FROM {MARKER_TABLE} WHERE name = :name"), {"name": MARKER_NAME}
+            )).scalar()
+    except Exception:
+        # Table not created yet
+        return None
+
+
+async def write_marker(bind: AsyncEngine, version: str) -> None:
+    async with bind.begin() as conn:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} ("
+            "name VARCHAR(64) PRIMARY KEY, version VARCHAR(64) NOT NULL, "
+            "updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        await conn.execute(text(f"DELETE FROM {MARKER_TABLE} WHERE name = :name"), {"name": MARKER_NAME})
+        await conn.execute(
+            text(f"INSERT INTO {MARKER_TABLE} (name, version) VALUES (:name, :version)"),
+            {"name": MARKER_NAME, "version": version},
+        )
+
+
+async def initialize_schema(bind: AsyncEngine) -> Dict[str, Any]:
+    """
+    Tables, column auto-migrations, default theme, indexes and statistics
+
+    Raises if the tables or the default theme could not be created, so the
+    marker is not written and the next boot tries again. Index and ANALYZE
+    failures are logged only (tables such as projects may not exist).
+    """
+    from app.api.v1.endpoints.themes import ensure_default_theme
+    from app.core.database_indexes import analyze_tables, create_recommended_indexes
+    from app.core.migrations import ensure_avatar_column, ensure_theme_preference_column
+
+    async with bind.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("Database tables created")
+
+    # Both log and swallow their own errors
+    await ensure_theme_preference_column()
+    await ensure_avatar_column()
+
+    async with AsyncSessionLocal() as session:
+        theme = await ensure_default_theme(session, created_by=1)
+        logger.info(f"Default theme ensured: {theme.name} (ID: {theme.id}, Active: {theme.is_active})")
+
+    results: Dict[str, Any] = {}
+    try:
+        async with AsyncSessionLocal() as session:
+            index_results = await create_recommended_indexes(session)
+            results["indexes_created"] = len(index_results.get("created", []))
+            if index_results.get("errors"):
+                logger.warning(f"Failed to create {len(index_results['errors'])} indexes")
+            results["analyzed"] = await analyze_tables(session)
+    except Exception as e:
+        logger.warning(f"Index creation/analysis skipped: {e}")
+    return results
+
+
+async def run_schema_init(bind: Optional[AsyncEngine] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Initialize the schema unless it is current or another worker is doing it
+
+    Returns:
+        {"status": "current" | "locked" | "initialized", "version": ..., "duration": ...}
+    """
+    bind = bind or default_engine
+    start_time = time.perf_counter()
+    version = schema_version()
+
+    def result(status: str, **extra: Any) -> Dict[str, Any]:
+        return {"status": status, "version": version, "duration": time.perf_counter() - start_time, **extra}
+
+    if not force and await read_marker(bind) == version:
+        return result("current")
+
+    if bind.dialect.name != "postgresql":
+        # Single process databases (SQLite in development): nothing to elect
+        details = await initialize_schema(bind)
+        await write_marker(bind, version)
+        return result("initialized", **details)
+
+    async with bind.connect() as lock_conn:
+        locked = (await lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": SCHEMA_INIT_LOCK_ID}
+        )).scalar()
+        await lock_conn.commit()
+        if not locked:
+            # Another worker is initializing; this one serves requests right away
+            return result("locked")
+        try:
+            # The previous leader may have finished between the check and the lock
+            if not force and await read_marker(bind) == version:
+                return result("current")
+            details = await initialize_schema(bind)
+            await write_marker(bind, version)
+            return result("initialized", **details)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_INIT_LOCK_ID})
+            await lock_conn.commit()
+
+
+async def _main(force: bool) -> None:
+    # Register the same models as the workers, so the version matches theirs
+    import app.main  # noqa: F401
+
+    try:
+        outcome = await run_schema_init(force=force)
+        print(f"Schema initialization: {outcome['status']} (version {outcome['version']}, "
+              f"{outcome['duration']:.2f}s)")
+    finally:
+        await default_engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Run the startup schema initialization once")
+    parser.add_argument("--force", action="store_true", help="Run even if the recorded version is current")
+    asyncio.run(_main(parser.parse_args().force))
@@ -3,38 +3,25 @@ User-Based Request Throttling
 Implements per-user request throttling (separate from IP-based rate limiting)
 """
 
-from typing import Optional
+from functools import wraps
+from typing import Callable, Optional
 from fastapi import Request, HTTPException, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 
-from app.core.config import settings
 from app.core.logging import logger
+from app.core.rate_limiter import limiter, parse_rate
 
 
 def get_user_throttle_key(request: Request) -> str:
     """Get throttle key for user-based throttling"""
-    # Try to get user from request state (set by auth middleware)
+    from app.core.rate_limit_identity import client_ip
+
+    # Try to get user from request state (set by RateLimitMiddleware)
     user = getattr(request.state, 'user', None)
     if user and hasattr(user, 'id'):
         return f"user_throttle:{user.id}"
     
     # Fallback to IP if no user
-    return f"ip_throttle:{get_remote_address(request)}"
-
-
-# User-based throttler (separate from IP-based rate limiter)
-user_throttler = Limiter(
-    key_func=get_user_throttle_key,
-    default_limits=["1000/hour"],  # Default: 1000 requests per hour per user
-    storage_uri=settings.REDIS_URL if settings.REDIS_URL else "memory://",
-)
-
-
-def user_throttle_decorator(limit: str):
-    """Decorator for user-based throttling"""
-    return user_throttler.limit(limit)
+    return f"ip_throttle:{client_ip(request)}"
 
 
 # Per-user throttle limits
@@ -45,6 +32,10 @@ USER_THROTTLE_LIMITS = {
     "enterprise": "50000/hour",  # Enterprise: 50000 requests per hour
 }
 
+# Fail at import time on a typo
+for _limit in USER_THROTTLE_LIMITS.values():
+    parse_rate(_limit)
+
 
 def get_user_throttle_limit(user_tier: Optional[str] = None) -> str:
     """Get throttle limit based on user tier"""
@@ -54,7 +45,7 @@ def get_user_throttle_limit(user_tier: Optional[str] = None) -> str:
 
 
 async def check_user_throttle(request: Request, limit: Optional[str] = None) -> bool:
-    """Check if user has exceeded throttle limit"""
+    """Check if user has exceeded throttle limit (consumes one request)"""
     # Get user from request state
     user = getattr(request.state, 'user', None)
     
@@ -63,12 +54,36 @@ async def check_user_throttle(request: Request, limit: Optional[str] = None) ->
         user_tier = getattr(user, 'tier', None) if user else None
         limit = get_user_throttle_limit(user_tier)
     
-    # Check throttle
-    try:
-        # This would be called by the decorator, but we can also check manually
-        key = get_user_throttle_key(request)
-        # The actual checking is done by slowapi's Limiter
-        return True
-    except RateLimitExceeded:
-        return False
+    result = await limiter.hit(get_user_throttle_key(request), parse_rate(limit))
+    if not result.allowed:
+        logger.debug(f"User throttle {limit} exceeded for {get_user_throttle_key(request)}")
+    return result.allowed
+
+
+def user_throttle_decorator(limit: Optional[str] = None):
+    """
+    Decorator for user-based throttling
+
+    Without an explicit limit, the user's tier limit from USER_THROTTLE_LIMITS
+    applies. The endpoint must take a `request: Request` parameter.
+    """
+    if limit:
+        parse_rate(limit)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = next(
+                (value for value in (*kwargs.values(), *args) if isinstance(value, Request)),
+                None,
+            )
+            if request is not None and not await check_user_throttle(request, limit):
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests. Please try again later.",
+                )
+            return await func(*args, **kwargs)
+
+        return wrapper
 
+    return decorator
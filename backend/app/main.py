@@ -15,9 +15,8 @@ from pydantic import ValidationError as PydanticValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.config import settings
-from app.core.database import init_db, close_db
+from app.core.database import close_db
 from app.core.cache import init_cache, close_cache
-from app.core.migrations import ensure_theme_preference_column, ensure_avatar_column
 from app.core.exceptions import AppException
 from app.core.error_handler import (
     app_exception_handler,
@@ -31,14 +30,20 @@ from app.core.compression import CompressionMiddleware
 from app.core.cache_headers import CacheHeadersMiddleware
 from app.core.csrf import CSRFMiddleware
 from app.core.request_limits import RequestSizeLimitMiddleware
+from app.core.query_instrumentation import QueryInstrumentationMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.request_logging import RequestLoggingMiddleware
+from app.core.lazy_routes import LazyRouteMiddleware, lazy_route_groups
 from app.core.cors import setup_cors
 from app.core.api_versioning import setup_api_versioning
 from app.core.ip_whitelist import setup_ip_whitelist
 from app.core.request_signing import RequestSigningMiddleware
 from app.api.v1.router import api_router
+from app.services.project_rollup_service import register_project_rollup_hooks
 from app.api import email as email_router
 from app.api.webhooks import stripe as stripe_webhook_router
 from app.api import upload as upload_router
+from app.api import metrics as metrics_router
 
 
 @asynccontextmanager
@@ -77,6 +82,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     print("  Health endpoint available at: /api/v1/health", file=sys.stderr)
     print("=" * 50, file=sys.stderr)
     
+    # Periodic background jobs started once initialization is done
+    periodic_tasks = []
+    
     # Background initialization tasks - these run after the app has started serving requests
     # This allows healthchecks to succeed even if initialization takes time
     async def background_init():
@@ -86,25 +94,32 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         except:
             logger = None
         
-        # Startup - make database initialization resilient
-        try:
-            await init_db()
-            if logger:
-                logger.info("Database initialized successfully")
-            print("✓ Database initialized", file=sys.stderr)
-        except (ConnectionError, TimeoutError) as e:
-            error_msg = f"Database connection failed: {e}. App will continue but database features may be unavailable."
-            if logger:
-                logger.error(error_msg)
-                logger.warning("The app will start, but database operations will fail until connection is established.")
-            print(f"⚠ {error_msg}", file=sys.stderr)
-        except Exception as e:
-            # Keep generic Exception for unexpected database errors
-            error_msg = f"Database initialization failed: {e}. App will continue but database features may be unavailable."
-            if logger:
-                logger.error(error_msg, exc_info=True)
-                logger.warning("The app will start, but database operations will fail until connection is established.")
-            print(f"⚠ {error_msg}", file=sys.stderr)
+        # Tables, column auto-migrations, default theme, indexes and ANALYZE:
+        # run by one worker per schema version (advisory lock + app_schema_state marker)
+        if settings.SCHEMA_INIT_ON_STARTUP:
+            try:
+                from app.core.startup import run_schema_init
+                outcome = await run_schema_init()
+                if logger:
+                    logger.info(
+                        f"Schema initialization: {outcome['status']} ({outcome['duration']:.2f}s)",
+                        context={"schema_version": outcome["version"]},
+                    )
+                print(f"✓ Schema initialization: {outcome['status']}", file=sys.stderr)
+            except (ConnectionError, TimeoutError) as e:
+                error_msg = f"Database connection failed: {e}. App will continue but database features may be unavailable."
+                if logger:
+                    logger.error(error_msg)
+                    logger.warning("The app will start, but database operations will fail until connection is established.")
+                print(f"⚠ {error_msg}", file=sys.stderr)
+            except Exception as e:
+                # Keep generic Exception for unexpected database errors
+                error_msg = f"Database initialization failed: {e}. App will continue but database features may be unavailable."
+                if logger:
+                    logger.error(error_msg, exc_info=True)
+                    logger.warning("The app will start, but database operations will fail until connection is established.")
+                print(f"⚠ {error_msg}", file=sys.stderr)
+                print("   The default theme will be created on the first /api/v1/themes/active call.", file=sys.stderr)
         
         try:
             await init_cache()
@@ -123,80 +138,45 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
                 logger.warning(warning_msg, exc_info=True)
             print(f"⚠ {warning_msg}", file=sys.stderr)
         
-        # Ensure required columns exist (auto-migration) - only if DB is available
-        try:
-            await ensure_theme_preference_column()
-        except (ConnectionError, TimeoutError) as e:
-            if logger:
-                logger.warning(f"Theme preference column migration skipped (connection error): {e}")
-        except Exception as e:
-            # Keep generic Exception for migration errors
-            if logger:
-                logger.warning(f"Theme preference column migration skipped: {e}", exc_info=True)
+        # Security audit log partitions, retention and daily rollups
+        if settings.SECURITY_AUDIT_MAINTENANCE_INTERVAL > 0:
+            from app.services.audit_log_service import run_audit_log_maintenance_loop
+            periodic_tasks.append(asyncio.create_task(
+                run_audit_log_maintenance_loop(settings.SECURITY_AUDIT_MAINTENANCE_INTERVAL)
+            ))
         
-        # Ensure avatar column exists
+        # Scheduled task executor
         try:
-            await ensure_avatar_column()
-        except (ConnectionError, TimeoutError) as e:
-            if logger:
-                logger.warning(f"Avatar column migration skipped (connection error): {e}")
+            from app.services.task_executor import task_executor
+            task_executor.start()
         except Exception as e:
             if logger:
-                logger.warning(f"Avatar column migration skipped: {e}", exc_info=True)
+                logger.warning(f"Scheduled task executor not started: {e}")
         
-        # Ensure default theme exists - CRITICAL for template functionality
-        # This must succeed for the application to work properly
-        theme_created = False
+        # Stripe webhook queue workers
         try:
-            from app.core.database import get_db
-            from app.api.v1.endpoints.themes import ensure_default_theme
-            async for db in get_db():
-                try:
-                    theme = await ensure_default_theme(db, created_by=1)
-                    theme_created = True
-                    if logger:
-                        logger.info(f"Default theme ensured: {theme.name} (ID: {theme.id}, Active: {theme.is_active})")
-                    print(f"✓ Default theme ensured: {theme.name} (ID: {theme.id}, Active: {theme.is_active})", file=sys.stderr)
-                except Exception as e:
-                    if logger:
-                        logger.error(f"CRITICAL: Default theme creation failed: {e}", exc_info=True)
-                    print(f"❌ CRITICAL ERROR: Default theme creation failed: {e}", file=sys.stderr)
-                    print("   The application may not function correctly without a theme.", file=sys.stderr)
-                    # Don't break startup, but log the error prominently
-                break
+            from app.api.webhooks.stripe import process_stripe_event
+            from app.services.stripe_webhook_queue import stripe_webhook_queue
+            stripe_webhook_queue.start(process_stripe_event)
         except Exception as e:
             if logger:
-                logger.error(f"CRITICAL: Default theme initialization failed: {e}", exc_info=True)
-            print(f"❌ CRITICAL ERROR: Default theme initialization failed: {e}", file=sys.stderr)
-            print("   Database connection may be unavailable. Theme will be created on first API call.", file=sys.stderr)
-        
-        if not theme_created:
-            print("⚠️  WARNING: TemplateTheme was not created during startup.", file=sys.stderr)
-            print("   It will be created automatically when /api/v1/themes/active is first called.", file=sys.stderr)
-        
-        # Create recommended indexes (non-blocking, runs after app starts)
-        # This runs in the background after the app has started serving requests
+                logger.warning(f"Stripe webhook workers not started: {e}")
+
+        # Documentation search index (loaded from its snapshot or built off the event loop)
         try:
-            from app.core.database_indexes import create_recommended_indexes, analyze_tables
-            from app.core.database import AsyncSessionLocal
-            
-            async with AsyncSessionLocal() as session:
-                index_results = await create_recommended_indexes(session)
-                if index_results.get("created"):
-                    if logger:
-                        logger.info(f"Created {len(index_results['created'])} indexes")
-                if index_results.get("errors"):
-                    if logger:
-                        logger.warning(f"Failed to create {len(index_results['errors'])} indexes")
-                
-                # Analyze tables to update statistics
-                await analyze_tables(session)
-                if logger:
-                    logger.info("Index creation/analysis completed")
+            from app.services.documentation_service import get_documentation_service
+            await asyncio.to_thread(get_documentation_service().index.ensure_fresh)
         except Exception as e:
             if logger:
-                logger.warning(f"Index creation/analysis skipped: {e}")
-        
+                logger.warning(f"Documentation index not loaded: {e}")
+
+        if settings.LAZY_ROUTES_WARMUP:
+            try:
+                await lazy_route_groups.warmup()
+            except Exception as e:
+                if logger:
+                    logger.warning(f"Route group warmup failed: {e}", exc_info=True)
+
         if logger:
             logger.info("Application startup complete")
     
@@ -224,6 +204,58 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Shutdown
     print("Shutting down application...", file=sys.stderr)
+    for task in periodic_tasks:
+        task.cancel()
+    if periodic_tasks:
+        await asyncio.gather(*periodic_tasks, return_exceptions=True)
+    try:
+        from app.services.import_job_service import import_job_service
+        await import_job_service.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Import jobs shutdown error: {e}")
+    try:
+        from app.api.v1.endpoints.websocket import manager as websocket_manager
+        await websocket_manager.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"WebSocket broker shutdown error: {e}")
+    try:
+        from app.services.template_renderer import usage_counter
+        await usage_counter.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Template usage counters flush error: {e}")
+    try:
+        from app.services.feature_flag_evaluator import evaluation_counter
+        await evaluation_counter.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Feature flag counters flush error: {e}")
+    try:
+        from app.services.task_executor import task_executor
+        await task_executor.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Scheduled task executor shutdown error: {e}")
+    try:
+        from app.services.stripe_webhook_queue import stripe_webhook_queue
+        await stripe_webhook_queue.shutdown()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Stripe webhook workers shutdown error: {e}")
+    try:
+        from app.services.stripe_client import stripe_gateway
+        await stripe_gateway.close()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Stripe client shutdown error: {e}")
+    try:
+        from app.services.ai_service import ai_clients
+        await ai_clients.close()
+    except Exception as e:
+        if logger:
+            logger.warning(f"AI clients shutdown error: {e}")
     try:
         await close_cache()
     except Exception as e:
@@ -234,6 +266,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         if logger:
             logger.warning(f"Database shutdown error: {e}")
+    try:
+        from app.core.metrics import mark_process_dead
+        mark_process_dead()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Metrics shutdown error: {e}")
+    if logger:
+        # Write the queued log records before the process exits
+        logger.shutdown()
 
 
 def create_app() -> FastAPI:
@@ -265,32 +306,15 @@ def create_app() -> FastAPI:
     # Using enhanced CORS configuration with tightened security
     setup_cors(app)
 
+    # Lazy route groups: import a group's endpoint module before routing its first request
+    app.add_middleware(LazyRouteMiddleware, groups=lazy_route_groups)
+
     # Request logging middleware (after CORS to log all requests)
     # Note: FastAPI executes middlewares in reverse order of addition
     # So this middleware runs BEFORE CORS middleware (which was added first)
-    # We need to let errors propagate to CORS middleware so it can add headers
-    @app.middleware("http")
-    async def log_requests_middleware(request: Request, call_next):
-        from app.core.logging import logger
-        from starlette.responses import Response
-        import time
-        start_time = time.time()
-        logger.info(f"Incoming request: {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            # Ensure response is a Response instance before accessing status_code
-            if isinstance(response, Response):
-                logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code} ({process_time:.4f}s)")
-            else:
-                logger.info(f"Request completed: {request.method} {request.url.path} ({process_time:.4f}s)")
-            return response
-        except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(f"Request failed: {request.method} {request.url.path} - {str(e)} ({process_time:.4f}s)", exc_info=True)
-            # Re-raise the exception so CORS middleware can catch it and add headers
-            # The CORS middleware will handle the error response with proper headers
-            raise
+    # Errors propagate to CORS middleware so it can add headers
+    # One line per request; successful requests are sampled per route (LOG_REQUEST_SAMPLE_RATE[S])
+    app.add_middleware(RequestLoggingMiddleware)
 
     # Compression Middleware (after CORS)
     # Enhanced compression with Brotli support
@@ -304,6 +328,13 @@ def create_app() -> FastAPI:
     # Cache Headers Middleware
     app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
 
+    # Query Instrumentation Middleware (query count/DB time per route, N+1 warnings,
+    # X-DB-* response headers in debug mode)
+    app.add_middleware(QueryInstrumentationMiddleware)
+
+    # Metrics Middleware (request latency histograms per route template, served on /metrics)
+    app.add_middleware(MetricsMiddleware)
+
     # Request Size Limits Middleware (before CSRF to prevent large request processing)
     app.add_middleware(
         RequestSizeLimitMiddleware,
@@ -362,8 +393,13 @@ def create_app() -> FastAPI:
     else:
         logger.warning("Rate limiting is DISABLED - not recommended for production")
 
+    # Keep the insights/analytics project rollups up to date with project writes
+    register_project_rollup_hooks()
+
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
+    # Rarely used v1 route groups: imported on their first request (LazyRouteMiddleware)
+    lazy_route_groups.bind(app, prefix=settings.API_V1_STR, lazy=settings.LAZY_ROUTES)
     
     # Include upload router (separate from v1)
     app.include_router(upload_router.router)
@@ -371,6 +407,9 @@ def create_app() -> FastAPI:
     # Include email router (separate from v1)
     app.include_router(email_router.router)
     
+    # Include Prometheus metrics (/metrics, no prefix)
+    app.include_router(metrics_router.router)
+    
     # Include webhooks (no prefix, no auth)
     app.include_router(stripe_webhook_router.router)
 
@@ -449,6 +488,8 @@ def create_app() -> FastAPI:
         if app.openapi_schema:
             return app.openapi_schema
 
+        # The schema documents every route, including the lazy route groups
+        lazy_route_groups.load_all()
         openapi_schema = get_openapi(
             title=settings.PROJECT_NAME,
             version=settings.VERSION,
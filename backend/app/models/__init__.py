@@ -10,15 +10,16 @@ from app.models.invitation import Invitation
 from app.models.plan import Plan, PlanInterval, PlanStatus
 from app.models.subscription import Subscription, SubscriptionStatus
 from app.models.invoice import Invoice, InvoiceStatus
-from app.models.webhook_event import WebhookEvent
+from app.models.webhook_event import WebhookEvent, WebhookEventStatus
 from app.models.api_key import APIKey
 from app.models.tag import Tag, Category, EntityTag
 from app.models.comment import Comment, CommentReaction
 from app.models.favorite import Favorite
+from app.models.activity import Activity
 from app.models.template import Template, TemplateVariable
 from app.models.version import Version
 from app.models.share import Share, ShareAccessLog, PermissionLevel
-from app.models.feature_flag import FeatureFlag, FeatureFlagLog
+from app.models.feature_flag import FeatureFlag, FeatureFlagLog, FeatureFlagEvaluationCount
 from app.models.user_preference import UserPreference
 from app.models.integration import Integration
 from app.models.announcement import Announcement, AnnouncementDismissal, AnnouncementType, AnnouncementPriority
@@ -29,7 +30,7 @@ from app.models.scheduled_task import ScheduledTask, TaskExecutionLog, TaskStatu
 from app.models.backup import Backup, RestoreOperation, BackupType, BackupStatus
 from app.models.email_template import EmailTemplate, EmailTemplateVersion
 from app.models.page import Page
-from app.models.form import Form, FormSubmission
+from app.models.form import Form, FormSubmission, FormFieldRollup
 from app.models.menu import Menu
 from app.models.support_ticket import SupportTicket, TicketMessage, TicketStatus, TicketPriority
 from app.models.theme import Theme
@@ -66,6 +67,7 @@ __all__ = [
     "Invoice",
     "InvoiceStatus",
     "WebhookEvent",
+    "WebhookEventStatus",
     "APIKey",
     "Tag",
     "Category",
@@ -73,6 +75,7 @@ __all__ = [
     "Comment",
     "CommentReaction",
     "Favorite",
+    "Activity",
     "Template",
     "TemplateVariable",
     "Version",
@@ -81,6 +84,7 @@ __all__ = [
     "PermissionLevel",
     "FeatureFlag",
     "FeatureFlagLog",
+    "FeatureFlagEvaluationCount",
     "UserPreference",
     "Integration",
     "Announcement",
@@ -109,6 +113,7 @@ __all__ = [
     "Page",
     "Form",
     "FormSubmission",
+    "FormFieldRollup",
     "Menu",
     "SupportTicket",
     "TicketMessage",
@@ -0,0 +1,50 @@
+"""
+Activity Model
+Append-only activity stream (who did what on which entity)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON, func
+
+from app.core.database import Base
+
+
+class Activity(Base):
+    """
+    Activity stream entry
+    
+    Rows are only ever inserted. Feeds are read newest first with keyset
+    cursors on (created_at, id), so every feed index ends with those columns.
+    """
+    
+    __tablename__ = "activities"
+    __table_args__ = (
+        # Per-entity feed
+        Index(
+            "idx_activities_entity_feed", "entity_type", "entity_id", "created_at", "id",
+            postgresql_include=["actor_id", "verb"],
+        ),
+        # Per-user feed
+        Index(
+            "idx_activities_actor_feed", "actor_id", "created_at", "id",
+            postgresql_include=["entity_type", "entity_id", "verb"],
+        ),
+        # Global feed
+        Index("idx_activities_created_at", "created_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    
+    # User who performed the action (kept as NULL if the user is deleted)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    
+    # Polymorphic target - e.g. ('post', 42)
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    
+    verb = Column(String(50), nullable=False)  # e.g., 'created', 'updated', 'deleted', 'commented'
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    event_metadata = Column("metadata", JSON, nullable=True)  # DB column name: metadata
+    
+    def __repr__(self) -> str:
+        return f"<Activity(id={self.id}, actor_id={self.actor_id}, verb={self.verb}, entity_type={self.entity_type}, entity_id={self.entity_id})>"
@@ -4,7 +4,7 @@ Feature flags for gradual rollouts and A/B testing
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func, Boolean, JSON, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Index, func, Boolean, JSON, Float
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -81,3 +81,17 @@ class FeatureFlagLog(Base):
     def __repr__(self) -> str:
         return f"<FeatureFlagLog(id={self.id}, flag_id={self.flag_id}, user_id={self.user_id}, enabled={self.enabled})>"
 
+
+class FeatureFlagEvaluationCount(Base):
+    """Daily evaluation counters per flag, outcome and variant"""
+    
+    __tablename__ = "feature_flag_evaluation_counts"
+    
+    flag_id = Column(Integer, ForeignKey("feature_flags.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    enabled = Column(Boolean, primary_key=True)
+    variant = Column(String(50), primary_key=True, default="")  # '' when no variant
+    count = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<FeatureFlagEvaluationCount(flag_id={self.flag_id}, day={self.day}, enabled={self.enabled}, count={self.count})>"
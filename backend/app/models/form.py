@@ -4,7 +4,7 @@ Dynamic forms and submissions
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func, Boolean, JSON, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -78,3 +78,40 @@ class FormSubmission(Base):
         return f"<FormSubmission(id={self.id}, form_id={self.form_id}, submitted_at={self.submitted_at})>"
 
 
+
+
+class FormFieldRollup(Base):
+    """
+    Incremental per-field statistics for a form
+    
+    One row per (form, field, bucket). The bucket is the answer value (rounded
+    for numeric fields); the row with an empty bucket holds the field totals.
+    The row with an empty field name and bucket holds the submission count and
+    marks the form's rollups as initialized.
+    """
+    
+    __tablename__ = "form_field_rollups"
+    __table_args__ = (
+        UniqueConstraint("form_id", "field_name", "bucket", name="uq_form_field_rollups_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False)
+    field_name = Column(String(200), nullable=False, default='')
+    bucket = Column(String(255), nullable=False, default='')
+    count = Column(Integer, nullable=False, default=0)
+    
+    # Numeric aggregates (field totals row of numeric fields only)
+    value_sum = Column(Float, nullable=True)
+    value_min = Column(Float, nullable=True)
+    value_max = Column(Float, nullable=True)
+    
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<FormFieldRollup(form_id={self.form_id}, field={self.field_name}, bucket={self.bucket}, count={self.count})>"
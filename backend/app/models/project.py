@@ -6,7 +6,7 @@ SQLAlchemy model for projects
 from datetime import datetime
 from enum import Enum as PyEnum
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, ForeignKey, func, Index, Enum
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, String, Text, ForeignKey, func, Index, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -50,3 +50,34 @@ class Project(Base):
         return f"<Project(id={self.id}, name={self.name}, status={self.status})>"
 
 
+class ProjectDailyRollup(Base):
+    """
+    Projects created per user, day and current status
+    
+    One row per (user, UTC creation day, status), kept up to date with the
+    project writes (see app/services/project_rollup_service.py). A user's rows
+    are only maintained once a ProjectRollupState row exists for the user.
+    """
+    
+    __tablename__ = "project_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "status", name="uq_project_daily_rollups_day"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    status = Column(Enum(ProjectStatus), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<ProjectDailyRollup(user_id={self.user_id}, day={self.day}, status={self.status}, count={self.count})>"
+
+
+class ProjectRollupState(Base):
+    """Marks a user's project rollups as built"""
+    
+    __tablename__ = "project_rollup_state"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    rebuilt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -39,6 +39,7 @@ class ScheduledTask(Base):
         Index("idx_scheduled_tasks_type", "task_type"),
         Index("idx_scheduled_tasks_scheduled_at", "scheduled_at"),
         Index("idx_scheduled_tasks_user", "user_id"),
+        Index("idx_scheduled_tasks_due", "status", "scheduled_at"),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -48,8 +49,8 @@ class ScheduledTask(Base):
     
     # Scheduling
     scheduled_at = Column(DateTime(timezone=True), nullable=False, index=True)
-    recurrence = Column(String(50), nullable=True)  # 'daily', 'weekly', 'monthly', 'cron', null for one-time
-    recurrence_config = Column(JSON, nullable=True)  # Additional recurrence configuration
+    recurrence = Column(String(50), nullable=True)  # 'hourly', 'daily', 'weekly', 'monthly', 'cron', null for one-time
+    recurrence_config = Column(JSON, nullable=True)  # e.g. {"expression": "*/15 * * * *", "timezone": "Europe/Paris"} for cron
     
     # Execution
     status = Column(SQLEnum(TaskStatus), default=TaskStatus.PENDING, nullable=False, index=True)
@@ -57,6 +58,12 @@ class ScheduledTask(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
     
+    # Executor state: attempts at the current occurrence, retry time and lease
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String(100), nullable=True)  # executor instance holding the lease
+    
     # Task configuration
     task_data = Column(JSON, nullable=True)  # Task-specific configuration
     result_data = Column(JSON, nullable=True)  # Task execution results
@@ -1,34 +1,54 @@
 """
 Webhook Event Model
-SQLAlchemy model for tracking processed webhook events (idempotency)
+SQLAlchemy model for received webhook events (idempotency and processing queue)
 """
 
+import enum
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String, Text, Index, func
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text, Index, func
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 
+class WebhookEventStatus(str, enum.Enum):
+    """Processing states of a queued webhook event"""
+    PENDING = "pending"        # waiting for a worker (or for its next retry)
+    PROCESSING = "processing"  # claimed by a worker until locked_at + lease
+    PROCESSED = "processed"
+    FAILED = "failed"          # gave up after the maximum number of attempts
+
+
 class WebhookEvent(Base):
-    """Webhook event model for idempotency"""
+    """Webhook event model: one row per Stripe event id, processed by background workers"""
     __tablename__ = "webhook_events"
     __table_args__ = (
         Index("idx_webhook_events_stripe_id", "stripe_event_id", unique=True),
         Index("idx_webhook_events_type", "event_type"),
         Index("idx_webhook_events_processed_at", "processed_at"),
+        Index("idx_webhook_events_queue", "status", "next_attempt_at"),
+        Index("idx_webhook_events_ordering", "ordering_key", "stripe_created", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     stripe_event_id = Column(String(255), unique=True, nullable=False, index=True)
     event_type = Column(String(100), nullable=False, index=True)
-    processed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
-    
-    # Store event data for debugging/auditing (optional, can be large)
+    processed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # Full event payload, processed by the queue workers
     event_data = Column(Text, nullable=True)  # JSON string
-    
+
+    # Queue state
+    status = Column(String(20), default=WebhookEventStatus.PENDING.value, nullable=False)
+    # Events sharing a key (the Stripe customer, else the object id) are processed in stripe_created order
+    ordering_key = Column(String(255), nullable=True)
+    stripe_created = Column(BigInteger, nullable=True)  # Stripe event "created" timestamp
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     def __repr__(self) -> str:
         return f"<WebhookEvent(id={self.id}, stripe_event_id={self.stripe_event_id}, event_type={self.event_type})>"
-
@@ -0,0 +1,323 @@
+"""
+Activity Service
+Records and reads the activity stream
+
+Feeds are read newest first with keyset cursors on (created_at, id): each page
+is an index range scan, whatever its depth, instead of an OFFSET over the
+whole table.
+
+Home feeds (own activity plus activity on favorited entities) can be cached in
+Redis: each new activity is pushed to the cached feeds of the actor and of the
+users who favorited the entity (fan-out on write). Feeds are only cached once
+read, and reads fall back to SQL past the cached window.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import desc, or_, select, true, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.activity import Activity
+from app.models.favorite import Favorite
+
+HOME_FEED_KEY = "activity:home:"
+# Cached home feeds expire when not read for this long (seconds)
+HOME_FEED_TTL = 86400
+
+# KEYS: home feeds; ARGV: encoded activity, feed size, ttl.
+# Only feeds already cached are updated: a missing feed is rebuilt from SQL.
+FANOUT_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('LPUSH', key, ARGV[1])
+        redis.call('LTRIM', key, 0, tonumber(ARGV[2]) - 1)
+        redis.call('EXPIRE', key, tonumber(ARGV[3]))
+    end
+end
+return 0
+"""
+
+FANOUT_BATCH_SIZE = 500
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Databases without time zone support return naive UTC datetimes
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(created_at: datetime, activity_id: int) -> str:
+    """Opaque cursor pointing after the given activity"""
+    raw = f"{_as_utc(created_at).isoformat()}|{activity_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, activity_id = raw.rsplit("|", 1)
+        return _as_utc(datetime.fromisoformat(created_at)), int(activity_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def activity_to_dict(activity: Activity) -> Dict[str, Any]:
+    return {
+        "id": activity.id,
+        "action": activity.verb,
+        "entity_type": activity.entity_type,
+        "entity_id": str(activity.entity_id),
+        "user_id": activity.actor_id or 0,
+        "timestamp": _as_utc(activity.created_at).isoformat() if activity.created_at else "",
+        "event_metadata": activity.event_metadata,
+    }
+
+
+@dataclass
+class ActivityPage:
+    """One page of a feed"""
+
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class ActivityService:
+    """Service for activity stream operations"""
+
+    _fanout_script = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(
+        self,
+        actor_id: Optional[int],
+        verb: str,
+        entity_type: str,
+        entity_id: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Activity]:
+        """
+        Append an activity
+
+        Commits immediately (like audit logs, after the change itself). Never
+        raises: a failure is logged and None is returned, so callers don't
+        fail the request because of the activity stream.
+        """
+        try:
+            activity = Activity(
+                actor_id=actor_id,
+                verb=verb,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                created_at=datetime.now(timezone.utc),
+                event_metadata=metadata,
+            )
+            self.db.add(activity)
+            await self.db.commit()
+        except Exception as e:
+            try:
+                await self.db.rollback()
+            except Exception:
+                pass
+            logger.warning(f"Failed to record activity {entity_type}:{entity_id} {verb}: {e}")
+            return None
+
+        if self._home_cache_enabled():
+            try:
+                await self._fanout(activity)
+            except Exception as e:
+                logger.warning(f"Failed to fan out activity {activity.id}: {e}")
+        return activity
+
+    async def list_activities(
+        self,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        actor_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> ActivityPage:
+        """
+        Read a feed, newest first
+
+        Filtering on (entity_type, entity_id) or actor_id uses the matching
+        feed index. Raises ValueError for an invalid cursor.
+        """
+        query = select(Activity)
+        if entity_type is not None:
+            query = query.where(Activity.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.where(Activity.entity_id == entity_id)
+        if actor_id is not None:
+            query = query.where(Activity.actor_id == actor_id)
+        query = self._after_cursor(query, cursor)
+        query = query.order_by(Activity.created_at.desc(), Activity.id.desc())
+        if offset:
+            query = query.offset(offset)
+        result = await self.db.execute(query.limit(limit + 1))
+        return self._page(result.scalars().all(), limit)
+
+    async def get_entity_feed(
+        self, entity_type: str, entity_id: int, cursor: Optional[str] = None, limit: int = 50
+    ) -> ActivityPage:
+        return await self.list_activities(entity_type=entity_type, entity_id=entity_id, cursor=cursor, limit=limit)
+
+    async def get_user_feed(self, user_id: int, cursor: Optional[str] = None, limit: int = 50) -> ActivityPage:
+        return await self.list_activities(actor_id=user_id, cursor=cursor, limit=limit)
+
+    async def get_home_feed(self, user_id: int, cursor: Optional[str] = None, limit: int = 50) -> ActivityPage:
+        """Own activity plus activity on entities the user favorited"""
+        position = decode_cursor(cursor) if cursor else None
+        if self._home_cache_enabled():
+            try:
+                page = await self._cached_home_feed(user_id, position, limit)
+                if page is not None:
+                    return page
+            except Exception as e:
+                logger.warning(f"Home feed cache read failed for user {user_id}: {e}")
+        return await self._home_feed_from_db(user_id, cursor, limit)
+
+    async def _home_feed_from_db(self, user_id: int, cursor: Optional[str], limit: int) -> ActivityPage:
+        # Keyset ranges for own activity and for favorited entities, merged
+        own = self._after_cursor(
+            select(Activity.id, Activity.created_at).where(Activity.actor_id == user_id), cursor
+        ).order_by(Activity.created_at.desc(), Activity.id.desc()).limit(limit + 1).subquery()
+        favorites = select(Favorite.entity_type, Favorite.entity_id).where(Favorite.user_id == user_id).subquery()
+        by_favorite = self._after_cursor(
+            select(Activity.id, Activity.created_at).where(
+                Activity.entity_type == favorites.c.entity_type,
+                Activity.entity_id == favorites.c.entity_id,
+                or_(Activity.actor_id.is_(None), Activity.actor_id != user_id),
+            ),
+            cursor,
+        )
+        if self._is_postgres():
+            # At most one page per favorite, read from the entity feed index
+            by_favorite = by_favorite.order_by(
+                Activity.created_at.desc(), Activity.id.desc()
+            ).limit(limit + 1).lateral()
+            followed = select(by_favorite.c.id, by_favorite.c.created_at).select_from(
+                favorites.join(by_favorite, true())
+            )
+        else:
+            followed = by_favorite
+        followed = followed.order_by(desc("created_at"), desc("id")).limit(limit + 1).subquery()
+        candidates = union_all(select(own.c.id), select(followed.c.id)).subquery()
+
+        result = await self.db.execute(
+            select(Activity)
+            .where(Activity.id.in_(select(candidates.c.id)))
+            .order_by(Activity.created_at.desc(), Activity.id.desc())
+            .limit(limit + 1)
+        )
+        return self._page(result.scalars().all(), limit)
+
+    async def _cached_home_feed(
+        self, user_id: int, position: Optional[Tuple[datetime, int]], limit: int
+    ) -> Optional[ActivityPage]:
+        redis_client = cache_backend.redis_client
+        key = f"{HOME_FEED_KEY}{user_id}"
+        size = settings.ACTIVITY_FEED_CACHE_SIZE
+
+        raw_items = await redis_client.lrange(key, 0, -1)
+        if not raw_items:
+            if position is not None:
+                return None
+            # Build the cached window from SQL
+            page = await self._home_feed_from_db(user_id, None, size)
+            if page.items:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.delete(key)
+                    pipe.rpush(key, *[json.dumps(item) for item in page.items])
+                    pipe.expire(key, HOME_FEED_TTL)
+                    await pipe.execute()
+            return self._page_from_items(page.items, None, limit, complete=page.next_cursor is None)
+
+        await redis_client.expire(key, HOME_FEED_TTL)
+        items = [json.loads(item) for item in raw_items]
+        # Concurrent fan-outs may push slightly out of order
+        items.sort(key=lambda item: (datetime.fromisoformat(item["timestamp"]), item["id"]), reverse=True)
+        return self._page_from_items(items, position, limit, complete=len(raw_items) < size)
+
+    def _page_from_items(
+        self,
+        items: List[Dict[str, Any]],
+        position: Optional[Tuple[datetime, int]],
+        limit: int,
+        complete: bool,
+    ) -> Optional[ActivityPage]:
+        if position is not None:
+            items = [
+                item for item in items
+                if (datetime.fromisoformat(item["timestamp"]), item["id"]) < position
+            ]
+        if len(items) <= limit and not complete:
+            # The page goes past the cached window
+            return None
+        page_items = items[:limit]
+        next_cursor = None
+        if len(items) > limit:
+            last = page_items[-1]
+            next_cursor = encode_cursor(datetime.fromisoformat(last["timestamp"]), last["id"])
+        return ActivityPage(items=page_items, next_cursor=next_cursor)
+
+    async def _fanout(self, activity: Activity) -> None:
+        result = await self.db.execute(
+            select(Favorite.user_id).where(
+                Favorite.entity_type == activity.entity_type,
+                Favorite.entity_id == activity.entity_id,
+            )
+        )
+        recipients = set(result.scalars().all())
+        if activity.actor_id is not None:
+            recipients.add(activity.actor_id)
+        if not recipients:
+            return
+
+        if ActivityService._fanout_script is None:
+            ActivityService._fanout_script = cache_backend.redis_client.register_script(FANOUT_SCRIPT)
+        encoded = json.dumps(activity_to_dict(activity))
+        keys = [f"{HOME_FEED_KEY}{user_id}" for user_id in sorted(recipients)]
+        for start in range(0, len(keys), FANOUT_BATCH_SIZE):
+            await ActivityService._fanout_script(
+                keys=keys[start:start + FANOUT_BATCH_SIZE],
+                args=[encoded, settings.ACTIVITY_FEED_CACHE_SIZE, HOME_FEED_TTL],
+            )
+
+    def _is_postgres(self) -> bool:
+        return self.db.bind.dialect.name == 'postgresql'
+
+    @staticmethod
+    def _home_cache_enabled() -> bool:
+        return settings.ACTIVITY_FEED_CACHE_ENABLED and cache_backend.redis_client is not None
+
+    @staticmethod
+    def _after_cursor(query, cursor: Optional[str]):
+        if not cursor:
+            return query
+        created_at, activity_id = decode_cursor(cursor)
+        return query.where(tuple_(Activity.created_at, Activity.id) < tuple_(created_at, activity_id))
+
+    @staticmethod
+    def _page(activities: List[Activity], limit: int) -> ActivityPage:
+        next_cursor = None
+        if len(activities) > limit:
+            activities = activities[:limit]
+            last = activities[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return ActivityPage(items=[activity_to_dict(a) for a in activities], next_cursor=next_cursor)
@@ -1,27 +1,48 @@
 """
 Unified AI Service
 Supports both OpenAI and Anthropic (Claude) APIs
+
+Provider clients are shared by the whole process (see ai_clients): one
+keep-alive connection pool per provider and API key, and a semaphore per
+provider bounding concurrent requests (AI_MAX_CONCURRENCY). Completions can
+be streamed token by token with stream_chat_completion. Completions requested
+with temperature 0 are cached in Redis under a hash of the request for
+AI_RESPONSE_CACHE_TTL seconds.
 """
 
+import asyncio
+import hashlib
+import inspect
+import json
 import os
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal, Tuple
 from enum import Enum
+from functools import lru_cache
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.lazy_imports import is_available, lazy_import
+from app.core.logging import logger
 
-try:
-    from openai import AsyncOpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    AsyncOpenAI = None
+# Imported on first use: the SDKs take seconds to import
+openai = lazy_import("openai")
+anthropic = lazy_import("anthropic")
+OPENAI_AVAILABLE = is_available("openai")
+ANTHROPIC_AVAILABLE = is_available("anthropic")
 
-try:
-    from anthropic import AsyncAnthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-    AsyncAnthropic = None
+CACHE_KEY_PREFIX = "ai:completion:"
 
-from app.core.logging import logger
+
+@lru_cache(maxsize=1)
+def _anthropic_temperature_keyword() -> bool:
+    """Newer Anthropic SDKs no longer take temperature as a keyword; it then goes in the request body"""
+    return "temperature" in inspect.signature(anthropic.resources.messages.AsyncMessages.create).parameters
+
+
+def _anthropic_sampling(temperature: float) -> Dict[str, Any]:
+    if _anthropic_temperature_keyword():
+        return {"temperature": temperature}
+    return {"extra_body": {"temperature": temperature}}
 
 
 class AIProvider(str, Enum):
@@ -31,6 +52,70 @@ class AIProvider(str, Enum):
     AUTO = "auto"  # Auto-select based on availability
 
 
+class AIClientPool:
+    """Process-wide provider clients and per-provider concurrency limits"""
+    
+    def __init__(self):
+        self._clients: Dict[Tuple[AIProvider, str, Optional[str]], Any] = {}
+        self._semaphores: Dict[AIProvider, asyncio.Semaphore] = {}
+    
+    def client(self, provider: AIProvider, api_key: str, base_url: Optional[str] = None) -> Any:
+        """SDK client on a pooled keep-alive HTTP client, created on first use"""
+        key = (provider, api_key, base_url)
+        client = self._clients.get(key)
+        if client is None:
+            sdk, client_class = (openai, openai.AsyncOpenAI) if provider == AIProvider.OPENAI else (anthropic, anthropic.AsyncAnthropic)
+            # Each SDK pins its own HTTP library version, so build the pool from its exports
+            limits = type(sdk.DEFAULT_CONNECTION_LIMITS)(
+                max_connections=settings.AI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_MAX_CONNECTIONS,
+            )
+            http_client = sdk.DefaultAsyncHttpxClient(
+                limits=limits,
+                timeout=sdk.Timeout(settings.AI_TIMEOUT, connect=10.0),
+            )
+            client = client_class(api_key=api_key, base_url=base_url, http_client=http_client)
+            self._clients[key] = client
+        return client
+    
+    def semaphore(self, provider: AIProvider) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        return semaphore
+    
+    async def close(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._semaphores.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing AI client: {e}")
+
+
+ai_clients = AIClientPool()
+
+
+def completion_cache_key(provider: AIProvider, model: str, messages: List[Dict[str, str]],
+                         system_prompt: Optional[str], max_tokens: int) -> str:
+    """Content-addressed cache key of a deterministic completion request"""
+    payload = json.dumps(
+        {
+            "provider": provider.value,
+            "model": model,
+            "system": system_prompt,
+            "messages": [[msg.get("role"), msg.get("content")] for msg in messages],
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return CACHE_KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class AIService:
     """Unified AI service supporting OpenAI and Anthropic"""
     
@@ -73,7 +158,9 @@ class AIService:
             if not self._is_openai_configured():
                 raise ValueError("OPENAI_API_KEY is not configured")
             
-            self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = ai_clients.client(
+                AIProvider.OPENAI, os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_BASE_URL") or None
+            )
             self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
             self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "1000"))
             self.temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
@@ -84,13 +171,41 @@ class AIService:
             if not self._is_anthropic_configured():
                 raise ValueError("ANTHROPIC_API_KEY is not configured")
             
-            self.client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.client = ai_clients.client(
+                AIProvider.ANTHROPIC, os.getenv("ANTHROPIC_API_KEY"), os.getenv("ANTHROPIC_BASE_URL") or None
+            )
             self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
             self.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "1024"))
             self.temperature = float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7"))
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    def _request_params(
+        self,
+        model: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> Tuple[str, float, int]:
+        # An explicit temperature of 0 must not fall back to the default
+        return (
+            model or self.model,
+            temperature if temperature is not None else self.temperature,
+            max_tokens or self.max_tokens,
+        )
+    
+    def _cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+    ) -> Optional[str]:
+        """Cache key for deterministic requests, None when the request is not cacheable"""
+        if temperature != 0 or settings.AI_RESPONSE_CACHE_TTL <= 0:
+            return None
+        return completion_cache_key(self.provider, model, messages, system_prompt, max_tokens)
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -112,16 +227,108 @@ class AIService:
         Returns:
             Response dict with 'content', 'model', 'usage', 'finish_reason', 'provider'
         """
+        model, temperature, max_tokens = self._request_params(model, temperature, max_tokens)
+        cache_key = self._cache_key(messages, model, temperature, max_tokens, system_prompt)
+        if cache_key:
+            cached = await cache_backend.get(cache_key)
+            if cached:
+                return cached
+        
+        async with ai_clients.semaphore(self.provider):
+            if self.provider == AIProvider.OPENAI:
+                response = await self._openai_chat_completion(
+                    messages, model, temperature, max_tokens, system_prompt
+                )
+            elif self.provider == AIProvider.ANTHROPIC:
+                response = await self._anthropic_chat_completion(
+                    messages, model, temperature, max_tokens, system_prompt
+                )
+            else:
+                raise ValueError(f"Unsupported provider: {self.provider}")
+        
+        if cache_key:
+            await cache_backend.set(cache_key, response, expire=settings.AI_RESPONSE_CACHE_TTL)
+        return response
+    
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion (same arguments as chat_completion).
+        
+        Yields:
+            {'type': 'delta', 'content': text} for each piece of the response, then
+            {'type': 'done', 'model', 'usage', 'finish_reason', 'provider'}
+        """
+        model, temperature, max_tokens = self._request_params(model, temperature, max_tokens)
+        cache_key = self._cache_key(messages, model, temperature, max_tokens, system_prompt)
+        if cache_key:
+            cached = await cache_backend.get(cache_key)
+            if cached:
+                yield {"type": "delta", "content": cached["content"]}
+                yield {"type": "done", **{k: v for k, v in cached.items() if k != "content"}}
+                return
+        
         if self.provider == AIProvider.OPENAI:
-            return await self._openai_chat_completion(
-                messages, model, temperature, max_tokens, system_prompt
-            )
+            events = self._openai_stream(messages, model, temperature, max_tokens, system_prompt)
         elif self.provider == AIProvider.ANTHROPIC:
-            return await self._anthropic_chat_completion(
-                messages, model, temperature, max_tokens, system_prompt
-            )
+            events = self._anthropic_stream(messages, model, temperature, max_tokens, system_prompt)
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
+        
+        content = []
+        async with ai_clients.semaphore(self.provider):
+            async for event in events:
+                if event["type"] == "delta":
+                    content.append(event["content"])
+                else:
+                    done = event
+                yield event
+        
+        if cache_key:
+            response = {"content": "".join(content), **{k: v for k, v in done.items() if k != "type"}}
+            await cache_backend.set(cache_key, response, expire=settings.AI_RESPONSE_CACHE_TTL)
+    
+    @staticmethod
+    def _openai_messages(messages: List[Dict[str, str]], system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        """Messages with the system prompt first (unless the conversation has one)"""
+        if system_prompt and (not messages or messages[0].get("role") != "system"):
+            return [{"role": "system", "content": system_prompt}] + list(messages)
+        return list(messages)
+    
+    @staticmethod
+    def _anthropic_messages(
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+    ) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Anthropic messages and system prompt"""
+        # Anthropic uses 'user' and 'assistant' roles, and system is separate
+        anthropic_messages = []
+        
+        for msg in messages:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            
+            # Skip system messages (handled separately)
+            if role == "system":
+                if not system_prompt:
+                    system_prompt = content
+                continue
+            
+            # Convert to Anthropic format
+            if role in ["user", "assistant"]:
+                anthropic_messages.append({
+                    "role": role,
+                    "content": content,
+                })
+        
+        # Use system prompt parameter or the one from messages
+        return anthropic_messages, system_prompt or None
     
     async def _openai_chat_completion(
         self,
@@ -132,17 +339,11 @@ class AIService:
         system_prompt: Optional[str],
     ) -> Dict[str, Any]:
         """OpenAI chat completion"""
-        # Add system prompt if provided
-        if system_prompt:
-            # Check if first message is already a system message
-            if not messages or messages[0].get("role") != "system":
-                messages.insert(0, {"role": "system", "content": system_prompt})
-        
         response = await self.client.chat.completions.create(
-            model=model or self.model,
-            messages=messages,
-            temperature=temperature or self.temperature,
-            max_tokens=max_tokens or self.max_tokens,
+            model=model,
+            messages=self._openai_messages(messages, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
         )
         
         return {
@@ -166,36 +367,14 @@ class AIService:
         system_prompt: Optional[str],
     ) -> Dict[str, Any]:
         """Anthropic (Claude) chat completion"""
-        # Convert messages format for Anthropic
-        # Anthropic uses 'user' and 'assistant' roles, and system is separate
-        anthropic_messages = []
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            # Skip system messages (handled separately)
-            if role == "system":
-                if not system_prompt:
-                    system_prompt = content
-                continue
-            
-            # Convert to Anthropic format
-            if role in ["user", "assistant"]:
-                anthropic_messages.append({
-                    "role": role,
-                    "content": content,
-                })
-        
-        # Use system prompt parameter or the one from messages
-        system = system_prompt or None
+        anthropic_messages, system = self._anthropic_messages(messages, system_prompt)
         
         response = await self.client.messages.create(
-            model=model or self.model,
-            max_tokens=max_tokens or self.max_tokens,
-            temperature=temperature or self.temperature,
+            model=model,
+            max_tokens=max_tokens,
             system=system,
             messages=anthropic_messages,
+            **_anthropic_sampling(temperature),
         )
         
         # Extract content (Anthropic returns content as a list)
@@ -217,6 +396,90 @@ class AIService:
             "provider": "anthropic",
         }
     
+    async def _openai_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """OpenAI streamed chat completion"""
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=self._openai_messages(messages, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        response_model, finish_reason, usage = model, None, {}
+        async with stream:
+            async for chunk in stream:
+                response_model = chunk.model or response_model
+                if chunk.usage:
+                    usage = {
+                        "prompt_tokens": chunk.usage.prompt_tokens,
+                        "completion_tokens": chunk.usage.completion_tokens,
+                        "total_tokens": chunk.usage.total_tokens,
+                    }
+                for choice in chunk.choices:
+                    if choice.delta and choice.delta.content:
+                        yield {"type": "delta", "content": choice.delta.content}
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+        
+        yield {
+            "type": "done",
+            "model": response_model,
+            "usage": usage,
+            "finish_reason": finish_reason,
+            "provider": "openai",
+        }
+    
+    async def _anthropic_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Anthropic (Claude) streamed chat completion"""
+        anthropic_messages, system = self._anthropic_messages(messages, system_prompt)
+        kwargs = {"system": system} if system else {}
+        stream = await self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=anthropic_messages,
+            stream=True,
+            **kwargs,
+            **_anthropic_sampling(temperature),
+        )
+        response_model, finish_reason, input_tokens, output_tokens = model, None, 0, 0
+        async with stream:
+            async for event in stream:
+                if event.type == "message_start":
+                    response_model = event.message.model
+                    input_tokens = event.message.usage.input_tokens
+                elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield {"type": "delta", "content": event.delta.text}
+                elif event.type == "message_delta":
+                    finish_reason = event.delta.stop_reason
+                    output_tokens = event.usage.output_tokens
+        
+        yield {
+            "type": "done",
+            "model": response_model,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            "finish_reason": finish_reason,
+            "provider": "anthropic",
+        }
+    
     async def simple_chat(
         self,
         user_message: str,
@@ -0,0 +1,295 @@
+"""
+Announcement Cache
+Compiled active announcement set and per-user dismissal sets
+
+Active announcements are loaded once per worker and compiled into entries
+holding frozensets of target users, teams and roles, so matching a user is a
+few set lookups instead of parsing JSON for every announcement on every page
+load. Workers share a version token in Redis: any change to an announcement
+replaces the token and every worker recompiles on its next read. Without
+Redis the compiled set is only invalidated locally and expires after
+ANNOUNCEMENT_CACHE_TTL seconds.
+
+Dismissals are kept in a Redis set per user, loaded from the database on
+first read. A sentinel member (0) marks a loaded set, so users without
+dismissals are not reloaded on every request. New dismissals are always added
+to the set: one recorded while the set is being loaded is merged into it
+rather than lost, and a set without the sentinel is loaded (merged) again.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.announcement import Announcement, AnnouncementDismissal, AnnouncementPriority
+
+VERSION_KEY = "announcements:version"
+DISMISSED_KEY = "announcements:dismissed:"
+# Dismissal sets expire when not read for this long (seconds)
+DISMISSED_TTL = 7 * 86400
+DISMISSED_SENTINEL = 0
+
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(AnnouncementPriority)}
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Databases without time zone support return naive UTC datetimes
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _target_set(raw: Optional[str]) -> Optional[FrozenSet]:
+    """Parse a JSON target list; None means no targeting on this dimension"""
+    if not raw:
+        return None
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        logger.warning(f"Ignoring malformed announcement targeting: {raw!r}")
+        return frozenset()
+    return frozenset(values or ()) or None
+
+
+@dataclass(frozen=True)
+class CompiledAnnouncement:
+    """An announcement with its targeting parsed"""
+
+    id: int
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    show_on_login: bool
+    show_in_app: bool
+    target_users: Optional[FrozenSet[int]]
+    target_teams: Optional[FrozenSet[int]]
+    target_roles: Optional[FrozenSet[str]]
+    data: Dict[str, Any]
+
+    def matches(
+        self,
+        now: datetime,
+        user_id: Optional[int],
+        user_team_id: Optional[int],
+        user_roles: FrozenSet[str],
+        show_on_login: Optional[bool],
+    ) -> bool:
+        if self.start_date is not None and self.start_date > now:
+            return False
+        if self.end_date is not None and self.end_date < now:
+            return False
+        if show_on_login is not None:
+            if self.show_on_login != show_on_login:
+                return False
+        elif not self.show_in_app:
+            return False
+        if self.target_users is not None and user_id not in self.target_users:
+            return False
+        if self.target_teams is not None and user_team_id not in self.target_teams:
+            return False
+        if self.target_roles is not None and self.target_roles.isdisjoint(user_roles):
+            return False
+        return True
+
+
+def compile_announcement(announcement: Announcement) -> CompiledAnnouncement:
+    return CompiledAnnouncement(
+        id=announcement.id,
+        start_date=_as_utc(announcement.start_date),
+        end_date=_as_utc(announcement.end_date),
+        show_on_login=announcement.show_on_login,
+        show_in_app=announcement.show_in_app,
+        target_users=_target_set(announcement.target_users),
+        target_teams=_target_set(announcement.target_teams),
+        target_roles=_target_set(announcement.target_roles),
+        data={
+            "id": announcement.id,
+            "title": announcement.title,
+            "message": announcement.message,
+            "type": announcement.type.value,
+            "priority": announcement.priority.value,
+            "is_active": announcement.is_active,
+            "is_dismissible": announcement.is_dismissible,
+            "show_on_login": announcement.show_on_login,
+            "show_in_app": announcement.show_in_app,
+            "start_date": announcement.start_date,
+            "end_date": announcement.end_date,
+            "action_label": announcement.action_label,
+            "action_url": announcement.action_url,
+            "created_at": _as_utc(announcement.created_at).isoformat() if announcement.created_at else "",
+            "updated_at": _as_utc(announcement.updated_at).isoformat() if announcement.updated_at else "",
+        },
+    )
+
+
+@dataclass
+class ActiveAnnouncementSet:
+    """Active and scheduled announcements, highest priority and newest first"""
+
+    announcements: List[CompiledAnnouncement] = field(default_factory=list)
+    version: Optional[str] = None
+    loaded_at: float = 0.0
+
+    @property
+    def targets_teams(self) -> bool:
+        """Whether matching needs the user's team"""
+        return any(a.target_teams is not None for a in self.announcements)
+
+    @property
+    def targets_roles(self) -> bool:
+        """Whether matching needs the user's roles"""
+        return any(a.target_roles is not None for a in self.announcements)
+
+    def for_user(
+        self,
+        user_id: Optional[int] = None,
+        user_team_id: Optional[int] = None,
+        user_roles: Optional[Iterable[str]] = None,
+        show_on_login: Optional[bool] = None,
+        dismissed: Optional[Set[int]] = None,
+        now: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        now = now or datetime.now(timezone.utc)
+        roles = frozenset(user_roles or ())
+        dismissed = dismissed or set()
+        return [
+            a.data for a in self.announcements
+            if a.id not in dismissed and a.matches(now, user_id, user_team_id, roles, show_on_login)
+        ]
+
+
+class AnnouncementCache:
+    """Per-worker compiled announcement set, invalidated through Redis"""
+
+    def __init__(self):
+        self._active: Optional[ActiveAnnouncementSet] = None
+        self._lock = asyncio.Lock()
+
+    async def get_active_set(self, db: AsyncSession) -> ActiveAnnouncementSet:
+        """Compiled active set, reloaded when stale (one Redis read when fresh)"""
+        version = await self._read_version()
+        if self._is_fresh(self._active, version):
+            return self._active
+        async with self._lock:
+            if self._is_fresh(self._active, version):
+                return self._active
+            self._active = await self._load(db, version)
+            return self._active
+
+    async def invalidate(self) -> None:
+        """Drop the compiled set in every worker"""
+        self._active = None
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return
+        try:
+            await redis_client.set(VERSION_KEY, uuid.uuid4().hex)
+        except Exception as e:
+            logger.warning(f"Failed to publish announcement cache invalidation: {e}")
+
+    async def get_dismissed(self, db: AsyncSession, user_id: int) -> Set[int]:
+        """Ids of announcements the user dismissed"""
+        redis_client = cache_backend.redis_client
+        if redis_client is not None:
+            key = f"{DISMISSED_KEY}{user_id}"
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.smembers(key)
+                    pipe.expire(key, DISMISSED_TTL)
+                    members, _ = await pipe.execute()
+                cached = {int(member) for member in members}
+                if DISMISSED_SENTINEL in cached:
+                    return cached - {DISMISSED_SENTINEL}
+                # Not loaded yet: members are dismissals added since, kept by the merge
+                dismissed = await self._load_dismissed(db, user_id)
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.sadd(key, DISMISSED_SENTINEL, *dismissed)
+                    pipe.expire(key, DISMISSED_TTL)
+                    await pipe.execute()
+                return dismissed | cached
+            except Exception as e:
+                logger.warning(f"Announcement dismissal cache read failed for user {user_id}: {e}")
+        return await self._load_dismissed(db, user_id)
+
+    async def add_dismissal(self, user_id: int, announcement_id: int) -> None:
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return
+        key = f"{DISMISSED_KEY}{user_id}"
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.sadd(key, announcement_id)
+                pipe.expire(key, DISMISSED_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to cache dismissal of announcement {announcement_id}: {e}")
+            try:
+                await redis_client.delete(key)
+            except Exception:
+                pass
+
+    def clear(self) -> None:
+        """Drop the local compiled set (tests, shutdown)"""
+        self._active = None
+
+    @staticmethod
+    def _is_fresh(active: Optional[ActiveAnnouncementSet], version: Optional[str]) -> bool:
+        if active is None or active.version != version:
+            return False
+        return time.monotonic() - active.loaded_at < settings.ANNOUNCEMENT_CACHE_TTL
+
+    @staticmethod
+    async def _read_version() -> Optional[str]:
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return None
+        try:
+            version = await redis_client.get(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read announcement cache version: {e}")
+            return None
+        return version.decode() if isinstance(version, bytes) else version
+
+    @staticmethod
+    async def _load(db: AsyncSession, version: Optional[str]) -> ActiveAnnouncementSet:
+        # Scheduled announcements are included: the time window is checked
+        # per request, so they show up without a reload
+        result = await db.execute(
+            select(Announcement).where(
+                Announcement.is_active == True,
+                or_(Announcement.end_date == None, Announcement.end_date >= datetime.now(timezone.utc)),
+            )
+        )
+        announcements = sorted(
+            result.scalars().all(),
+            key=lambda a: (
+                PRIORITY_RANK[a.priority],
+                _as_utc(a.created_at) or datetime.min.replace(tzinfo=timezone.utc),
+                a.id,
+            ),
+            reverse=True,
+        )
+        return ActiveAnnouncementSet(
+            announcements=[compile_announcement(a) for a in announcements],
+            version=version,
+            loaded_at=time.monotonic(),
+        )
+
+    @staticmethod
+    async def _load_dismissed(db: AsyncSession, user_id: int) -> Set[int]:
+        result = await db.execute(
+            select(AnnouncementDismissal.announcement_id).where(AnnouncementDismissal.user_id == user_id)
+        )
+        return set(result.scalars().all())
+
+
+announcement_cache = AnnouncementCache()
@@ -5,11 +5,12 @@ Manages announcements and banners
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from sqlalchemy import select, and_, or_, desc
+from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
 from app.models.announcement import Announcement, AnnouncementDismissal, AnnouncementType, AnnouncementPriority
+from app.services.announcement_cache import ActiveAnnouncementSet, announcement_cache
 from app.core.logging import logger
 
 
@@ -61,6 +62,7 @@ class AnnouncementService:
         self.db.add(announcement)
         await self.db.commit()
         await self.db.refresh(announcement)
+        await announcement_cache.invalidate()
         
         return announcement
 
@@ -68,76 +70,35 @@ class AnnouncementService:
         """Get an announcement by ID"""
         return await self.db.get(Announcement, announcement_id)
 
+    async def get_active_set(self) -> ActiveAnnouncementSet:
+        """Compiled active announcements (cached per worker)"""
+        return await announcement_cache.get_active_set(self.db)
+
     async def get_active_announcements(
         self,
         user_id: Optional[int] = None,
         user_team_id: Optional[int] = None,
         user_roles: Optional[List[str]] = None,
-        show_on_login: Optional[bool] = None
-    ) -> List[Announcement]:
-        """Get active announcements for a user"""
-        now = datetime.utcnow()
-        
-        query = select(Announcement).where(
-            and_(
-                Announcement.is_active == True,
-                or_(
-                    Announcement.start_date == None,
-                    Announcement.start_date <= now
-                ),
-                or_(
-                    Announcement.end_date == None,
-                    Announcement.end_date >= now
-                )
-            )
+        show_on_login: Optional[bool] = None,
+        active_set: Optional[ActiveAnnouncementSet] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get active announcements for a user
+
+        Matching runs against the cached compiled set and the user's cached
+        dismissals; pass active_set when it was already read (e.g. to check
+        whether team or role targeting is in use).
+        """
+        if active_set is None:
+            active_set = await self.get_active_set()
+        dismissed = await announcement_cache.get_dismissed(self.db, user_id) if user_id else set()
+        return active_set.for_user(
+            user_id=user_id,
+            user_team_id=user_team_id,
+            user_roles=user_roles,
+            show_on_login=show_on_login,
+            dismissed=dismissed,
         )
-        
-        if show_on_login is not None:
-            query = query.where(Announcement.show_on_login == show_on_login)
-        else:
-            query = query.where(Announcement.show_in_app == True)
-        
-        # Filter by targeting
-        if user_id:
-            # Check if user has dismissed this announcement
-            dismissed_result = await self.db.execute(
-                select(AnnouncementDismissal.announcement_id).where(
-                    AnnouncementDismissal.user_id == user_id
-                )
-            )
-            dismissed_ids = set(dismissed_result.scalars().all())
-        
-        result = await self.db.execute(query.order_by(desc(Announcement.priority), desc(Announcement.created_at)))
-        announcements = list(result.scalars().all())
-        
-        # Filter by user targeting
-        filtered = []
-        for ann in announcements:
-            # Skip if dismissed
-            if user_id and ann.id in dismissed_ids:
-                continue
-            
-            # Check user targeting
-            if ann.target_users:
-                target_users = json.loads(ann.target_users)
-                if user_id not in target_users:
-                    continue
-            
-            # Check team targeting
-            if ann.target_teams:
-                target_teams = json.loads(ann.target_teams)
-                if user_team_id not in target_teams:
-                    continue
-            
-            # Check role targeting
-            if ann.target_roles:
-                target_roles = json.loads(ann.target_roles)
-                if not user_roles or not any(role in target_roles for role in user_roles):
-                    continue
-            
-            filtered.append(ann)
-        
-        return filtered
 
     async def dismiss_announcement(
         self,
@@ -167,6 +128,7 @@ class AnnouncementService:
         self.db.add(dismissal)
         await self.db.commit()
         await self.db.refresh(dismissal)
+        await announcement_cache.add_dismissal(user_id, announcement_id)
         
         return dismissal
 
@@ -189,6 +151,7 @@ class AnnouncementService:
         
         await self.db.commit()
         await self.db.refresh(announcement)
+        await announcement_cache.invalidate()
         
         return announcement
 
@@ -200,6 +163,7 @@ class AnnouncementService:
         
         await self.db.delete(announcement)
         await self.db.commit()
+        await announcement_cache.invalidate()
         
         return True
 
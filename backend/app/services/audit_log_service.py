@@ -0,0 +1,338 @@
+"""
+Security Audit Log Service
+Partition maintenance, retention and daily rollups for security_audit_logs
+
+On PostgreSQL the table is range partitioned by month on timestamp, so an
+insert only touches the indexes of the current month and a time-bounded query
+only scans the matching months. Maintenance (run at startup and then
+periodically, by one worker at a time):
+- creates the partitions for the coming months ahead of time
+- drops partitions older than the retention period (a cheap DROP TABLE
+  instead of a large DELETE)
+- rolls complete days up into security_audit_daily_stats
+
+Audit statistics read the rollups for complete days and only count raw rows
+for the days not rolled up yet.
+"""
+
+import asyncio
+import re
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.security_audit import SecurityAuditDailyStat, SecurityAuditLog
+
+PARENT_TABLE = "security_audit_logs"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# pg_try_advisory_lock key serializing maintenance across workers
+MAINTENANCE_LOCK_ID = 7_250_031_034
+
+# Partition DDL waits at most this long for its lock, so it never queues
+# (and blocks inserts) behind a long running query
+DDL_LOCK_TIMEOUT = "5s"
+
+# A day is rolled up once it ended this long ago (late commits)
+ROLLUP_DELAY = timedelta(minutes=10)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Query parameters without an offset are taken as UTC
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+class AuditLogMaintenance:
+    """Partition management and daily rollups for security audit logs"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _is_postgres(self) -> bool:
+        return self.db.bind.dialect.name == 'postgresql'
+
+    async def is_partitioned(self) -> bool:
+        if not self._is_postgres():
+            return False
+        result = await self.db.execute(
+            text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": PARENT_TABLE},
+        )
+        return result.scalar() == 'p'
+
+    async def list_partitions(self) -> Dict[date, str]:
+        """Monthly partitions by first day of the month"""
+        result = await self.db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ), {"table": PARENT_TABLE})
+        partitions = {}
+        for (name,) in result.all():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return partitions
+
+    async def ensure_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """Create the partitions of the current month and the months ahead"""
+        now = now or datetime.now(timezone.utc)
+        existing = await self.list_partitions()
+        current = month_start(now.date())
+        created = []
+        for offset in range(settings.SECURITY_AUDIT_PARTITIONS_AHEAD + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                await self._create_partition(month)
+                created.append(partition_name(month))
+        if created:
+            logger.info(f"Created security audit partitions: {', '.join(created)}")
+        return created
+
+    async def _create_partition(self, month: date) -> None:
+        name = partition_name(month)
+        start, end = _bound(month), _bound(add_months(month, 1))
+        await self.db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+        has_default = (await self.db.execute(
+            text("SELECT to_regclass(:table) IS NOT NULL"), {"table": DEFAULT_PARTITION}
+        )).scalar()
+        in_default = has_default and (await self.db.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            f"WHERE timestamp >= {start} AND timestamp < {end})"
+        ))).scalar()
+        if in_default:
+            # Rows landed in the default partition (maintenance did not run in
+            # time): move them, the range cannot be attached otherwise
+            await self.db.execute(text(
+                f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            await self.db.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE timestamp >= {start} AND timestamp < {end} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ))
+            await self.db.execute(text(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"
+            ))
+        else:
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ({start}) TO ({end})"
+            ))
+        await self.db.commit()
+
+    async def drop_expired_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """Drop the partitions entirely older than the retention period"""
+        retention = settings.SECURITY_AUDIT_RETENTION_MONTHS
+        if not retention:
+            return []
+        now = now or datetime.now(timezone.utc)
+        cutoff = add_months(month_start(now.date()), -retention)
+        dropped = []
+        for month, name in sorted((await self.list_partitions()).items()):
+            if month >= cutoff:
+                break
+            await self.db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+            await self.db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            await self.db.commit()
+            dropped.append(name)
+        if dropped:
+            logger.info(f"Dropped expired security audit partitions: {', '.join(dropped)}")
+        return dropped
+
+    async def rollup_daily_stats(self, now: Optional[datetime] = None, max_days: Optional[int] = None) -> int:
+        """
+        Roll complete days up into security_audit_daily_stats
+
+        Starts again from the last rolled up day (re-rolled, in case of late
+        inserts). Returns the number of days rolled up.
+        """
+        now = now or datetime.now(timezone.utc)
+        last_complete = (now - ROLLUP_DELAY).date() - timedelta(days=1)
+
+        last_rolled = (await self.db.execute(select(func.max(SecurityAuditDailyStat.day)))).scalar()
+        if last_rolled is not None:
+            day = last_rolled
+        else:
+            first = (await self.db.execute(select(func.min(SecurityAuditLog.timestamp)))).scalar()
+            if first is None:
+                return 0
+            day = _utc(first).date()
+
+        rolled = 0
+        while day <= last_complete and (max_days is None or rolled < max_days):
+            await self._rollup_day(day)
+            await self.db.commit()
+            rolled += 1
+            day += timedelta(days=1)
+        return rolled
+
+    async def _rollup_day(self, day: date) -> None:
+        start, end = _day_start(day), _day_start(day + timedelta(days=1))
+        user_id = func.coalesce(SecurityAuditLog.user_id, 0)
+        await self.db.execute(delete(SecurityAuditDailyStat).where(SecurityAuditDailyStat.day == day))
+        await self.db.execute(
+            insert(SecurityAuditDailyStat).from_select(
+                ["day", "user_id", "event_type", "severity", "count"],
+                select(
+                    literal(day, SecurityAuditDailyStat.day.type),
+                    user_id,
+                    SecurityAuditLog.event_type,
+                    SecurityAuditLog.severity,
+                    func.count(),
+                )
+                .where(SecurityAuditLog.timestamp >= start, SecurityAuditLog.timestamp < end)
+                .group_by(user_id, SecurityAuditLog.event_type, SecurityAuditLog.severity)
+            )
+        )
+
+    async def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Run every maintenance step (skipped if another worker is running it)"""
+        if not self._is_postgres():
+            return {"rolled_up_days": await self.rollup_daily_stats(now)}
+
+        # The steps commit as they go, which hands the session's connection
+        # back to the pool: the session-level lock is held (and released) on a
+        # connection of its own for the whole run
+        async with self.db.bind.connect() as lock_conn:
+            locked = (await lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+            )).scalar()
+            await lock_conn.commit()
+            if not locked:
+                return {"skipped": True}
+            try:
+                results: Dict[str, Any] = {"created": [], "dropped": []}
+                if await self.is_partitioned():
+                    results["created"] = await self.ensure_partitions(now)
+                    results["dropped"] = await self.drop_expired_partitions(now)
+                results["rolled_up_days"] = await self.rollup_daily_stats(now)
+                return results
+            except Exception:
+                await self.db.rollback()
+                raise
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+                await lock_conn.commit()
+
+
+class AuditStatsService:
+    """Audit statistics from the daily rollups and the not yet rolled up rows"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_stats(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """Event counts by type and by severity between start_date and end_date (inclusive)"""
+        start_date, end_date = _utc(start_date), _utc(end_date)
+        counts: Counter = Counter()
+
+        # Raw segments as (from, to, to_inclusive); None is unbounded
+        raw_segments: List[Tuple[Optional[datetime], Optional[datetime], bool]] = [(start_date, end_date, True)]
+        last_rolled = (await self.db.execute(select(func.max(SecurityAuditDailyStat.day)))).scalar()
+        if last_rolled is not None:
+            rolled_end = last_rolled + timedelta(days=1)
+            first_day = None
+            if start_date is not None:
+                first_day = start_date.date()
+                if start_date != _day_start(first_day):
+                    first_day += timedelta(days=1)
+            end_day = rolled_end if end_date is None else min(end_date.date(), rolled_end)
+            if first_day is None or first_day < end_day:
+                query = select(
+                    SecurityAuditDailyStat.event_type,
+                    SecurityAuditDailyStat.severity,
+                    func.sum(SecurityAuditDailyStat.count),
+                ).where(
+                    SecurityAuditDailyStat.user_id == user_id,
+                    SecurityAuditDailyStat.day < end_day,
+                ).group_by(SecurityAuditDailyStat.event_type, SecurityAuditDailyStat.severity)
+                if first_day is not None:
+                    query = query.where(SecurityAuditDailyStat.day >= first_day)
+                for event_type, severity, count in (await self.db.execute(query)).all():
+                    counts[(event_type, severity)] += int(count)
+
+                raw_segments = []
+                if first_day is not None and start_date < _day_start(first_day):
+                    raw_segments.append((start_date, _day_start(first_day), False))
+                if end_date is None or end_date >= _day_start(end_day):
+                    raw_segments.append((_day_start(end_day), end_date, True))
+
+        for segment_start, segment_end, inclusive in raw_segments:
+            query = select(
+                SecurityAuditLog.event_type,
+                SecurityAuditLog.severity,
+                func.count(),
+            ).where(SecurityAuditLog.user_id == user_id).group_by(
+                SecurityAuditLog.event_type, SecurityAuditLog.severity
+            )
+            if segment_start is not None:
+                query = query.where(SecurityAuditLog.timestamp >= segment_start)
+            if segment_end is not None:
+                query = query.where(
+                    SecurityAuditLog.timestamp <= segment_end if inclusive
+                    else SecurityAuditLog.timestamp < segment_end
+                )
+            for event_type, severity, count in (await self.db.execute(query)).all():
+                counts[(event_type, severity)] += count
+
+        event_type_counts: Counter = Counter()
+        severity_counts: Counter = Counter()
+        for (event_type, severity), count in counts.items():
+            event_type_counts[event_type] += count
+            severity_counts[severity] += count
+        return {
+            'event_type_counts': dict(event_type_counts),
+            'severity_counts': dict(severity_counts),
+        }
+
+
+async def run_audit_log_maintenance_loop(interval: float) -> None:
+    """Run AuditLogMaintenance now and then every `interval` seconds"""
+    from app.core.database import AsyncSessionLocal
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                results = await AuditLogMaintenance(db).run()
+                if results.get("rolled_up_days"):
+                    logger.info(f"Rolled up {results['rolled_up_days']} days of security audit logs")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Security audit log maintenance failed: {e}")
+        await asyncio.sleep(interval)
@@ -7,13 +7,14 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, case
 from sqlalchemy.orm import selectinload
 
 from app.models.user import User
-from app.models.invoice import Invoice
-from app.models.project import Project
-from app.models.support_ticket import SupportTicket
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.project import Project, ProjectStatus
+from app.models.support_ticket import SupportTicket, TicketStatus
+from app.core.dashboard_queries import run_aggregates
 from app.core.tenancy_helpers import apply_tenant_scope
 
 
@@ -323,44 +324,48 @@ class ClientService:
         
         start_time = time.time()
         
-        # Get invoice stats
+        # Invoice stats
         invoice_query = select(
             func.count(Invoice.id).label("total"),
-            func.sum(Invoice.amount).label("total_amount"),
+            func.sum(Invoice.amount_due).label("total_amount"),
             func.sum(
-                func.case((Invoice.status == "pending", Invoice.amount), else_=0)
+                case((Invoice.status == InvoiceStatus.OPEN, Invoice.amount_due), else_=0)
             ).label("pending_amount"),
+            func.count(
+                case((Invoice.status == InvoiceStatus.PAID, 1), else_=None)
+            ).label("paid_count"),
+            func.count(
+                case((Invoice.status == InvoiceStatus.OPEN, 1), else_=None)
+            ).label("pending_count"),
         ).where(Invoice.user_id == user_id)
         
-        invoice_query = apply_tenant_scope(invoice_query, Invoice)
-        invoice_result = await self.db.execute(invoice_query)
-        invoice_stats = invoice_result.first()
-        
-        # Get project stats
+        # Project stats
         project_query = select(
             func.count(Project.id).label("total"),
             func.count(
-                func.case((Project.status == "active", 1), else_=None)
+                case((Project.status == ProjectStatus.ACTIVE, 1), else_=None)
             ).label("active"),
         ).where(Project.user_id == user_id)
         
-        project_query = apply_tenant_scope(project_query, Project)
-        project_result = await self.db.execute(project_query)
-        project_stats = project_result.first()
-        
-        # Get ticket stats
+        # Ticket stats
         ticket_query = select(
-            func.count(SupportTicket.id).label("open"),
+            func.count(SupportTicket.id).label("open_count"),
         ).where(
             and_(
                 SupportTicket.user_id == user_id,
-                SupportTicket.status == "open",
+                SupportTicket.status == TicketStatus.OPEN.value,
             )
         )
         
-        ticket_query = apply_tenant_scope(ticket_query, SupportTicket)
-        ticket_result = await self.db.execute(ticket_query)
-        ticket_stats = ticket_result.first()
+        # Independent aggregates: one round trip (or in parallel, DASHBOARD_QUERY_MODE)
+        stats = await run_aggregates(self.db, {
+            "invoices": apply_tenant_scope(invoice_query, Invoice),
+            "projects": apply_tenant_scope(project_query, Project),
+            "tickets": apply_tenant_scope(ticket_query, SupportTicket),
+        })
+        invoice_stats = stats["invoices"]
+        project_stats = stats["projects"]
+        ticket_stats = stats["tickets"]
         
         # Log slow query if threshold exceeded
         execution_time = time.time() - start_time
@@ -373,11 +378,11 @@ class ClientService:
         
         return {
             "total_invoices": invoice_stats.total or 0,
-            "pending_invoices": 0,  # Will be calculated from status
-            "paid_invoices": 0,  # Will be calculated from status
+            "pending_invoices": invoice_stats.pending_count or 0,
+            "paid_invoices": invoice_stats.paid_count or 0,
             "total_projects": project_stats.total or 0,
             "active_projects": project_stats.active or 0,
-            "open_tickets": ticket_stats.open or 0,
+            "open_tickets": ticket_stats.open_count or 0,
             "total_spent": Decimal(str(invoice_stats.total_amount or 0)),
             "pending_amount": Decimal(str(invoice_stats.pending_amount or 0)),
         }
@@ -0,0 +1,320 @@
+"""
+Documentation Index
+In-memory BM25 index over chunked markdown documentation
+
+Markdown files are split into chunks along headings (packed up to
+CHUNK_SIZE characters), and an inverted index maps each term to the chunks
+containing it, so a query scores only the chunks sharing a term with it
+instead of reading every file. The index is built once per process and
+checked against file modification times at most every
+DOCS_INDEX_CHECK_INTERVAL seconds; only changed files are re-chunked.
+
+The index is saved to a gzipped JSON snapshot, so a new process whose
+documentation has not changed loads it instead of re-reading and
+re-tokenizing every file.
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+
+SNAPSHOT_VERSION = 1
+# Characters per chunk; a section longer than this is split on paragraphs
+CHUNK_SIZE = 1500
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_]*")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in into is it its of on or that the "
+    "their then there these this to was what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords and single characters"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class DocChunk:
+    """A piece of a documentation file under its heading path"""
+
+    file: str
+    heading: str
+    text: str
+
+
+def _pack(file: str, heading: str, body: str, chunk_size: int) -> List[DocChunk]:
+    """Split a section into chunks of whole paragraphs where possible"""
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", body):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        while len(paragraph) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_size])
+            paragraph = paragraph[chunk_size:]
+        if current and len(current) + len(paragraph) + 2 > chunk_size:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return [DocChunk(file=file, heading=heading, text=text) for text in chunks]
+
+
+def chunk_markdown(file: str, content: str, chunk_size: int = CHUNK_SIZE) -> List[DocChunk]:
+    """
+    Split a markdown document into chunks along its headings.
+
+    Each chunk carries the path of headings it sits under
+    ("Setup > Database"). Lines in fenced code blocks are never treated as
+    headings.
+    """
+    chunks = []
+    headings: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    in_fence = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            chunks.extend(_pack(file, " > ".join(title for _, title in headings), body, chunk_size))
+        lines.clear()
+
+    for line in content.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_RE.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, match.group(2)))
+            continue
+        lines.append(line)
+    flush()
+    return chunks
+
+
+@dataclass
+class _IndexState:
+    """Immutable once published; a rebuild replaces the whole state"""
+
+    manifest: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    file_chunks: Dict[str, List[DocChunk]] = field(default_factory=dict)
+    chunks: List[DocChunk] = field(default_factory=list)
+    # term -> [(chunk index, term frequency), ...]
+    postings: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)
+    lengths: List[int] = field(default_factory=list)
+    avg_length: float = 0.0
+
+
+def _build_state(manifest: Dict[str, Tuple[int, int]], file_chunks: Dict[str, List[DocChunk]]) -> _IndexState:
+    chunks = [chunk for file in sorted(file_chunks) for chunk in file_chunks[file]]
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths = []
+    for index, chunk in enumerate(chunks):
+        # Headings are part of what a chunk is about
+        terms = tokenize(f"{chunk.heading}\n{chunk.text}")
+        lengths.append(len(terms))
+        for term, frequency in Counter(terms).items():
+            postings.setdefault(term, []).append((index, frequency))
+    return _IndexState(
+        manifest=manifest,
+        file_chunks=file_chunks,
+        chunks=chunks,
+        postings=postings,
+        lengths=lengths,
+        avg_length=(sum(lengths) / len(lengths)) if lengths else 0.0,
+    )
+
+
+def default_snapshot_path(docs_path: Path) -> Path:
+    """Snapshot file for a documentation directory (DOCS_INDEX_PATH or the temp dir)"""
+    if settings.DOCS_INDEX_PATH:
+        return Path(settings.DOCS_INDEX_PATH)
+    digest = hashlib.sha1(str(docs_path.resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"documentation_index_{digest}.json.gz"
+
+
+class DocumentationIndex:
+    """BM25 search over the markdown files of a directory"""
+
+    def __init__(
+        self,
+        docs_path: Optional[Path],
+        snapshot_path: Optional[Path] = None,
+        check_interval: Optional[float] = None,
+    ):
+        self.docs_path = docs_path
+        self.snapshot_path = snapshot_path or (default_snapshot_path(docs_path) if docs_path else None)
+        self.check_interval = settings.DOCS_INDEX_CHECK_INTERVAL if check_interval is None else check_interval
+        self.builds = 0
+        self._state = _IndexState()
+        self._loaded = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Relative path -> (mtime_ns, size) for every markdown file"""
+        manifest = {}
+        if not self.docs_path or not self.docs_path.exists():
+            return manifest
+        for md_file in self.docs_path.glob("**/*.md"):
+            try:
+                stat = md_file.stat()
+            except OSError:
+                continue
+            manifest[md_file.relative_to(self.docs_path).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+        return manifest
+
+    def ensure_fresh(self, force: bool = False) -> None:
+        """Load or rebuild the index if files changed (checked at most every check_interval)"""
+        now = time.monotonic()
+        if not force and self._loaded and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and self._loaded and now - self._checked_at < self.check_interval:
+                return
+            manifest = self._scan()
+            if not self._loaded:
+                self._load_snapshot()
+            if manifest != self._state.manifest:
+                self._rebuild(manifest)
+            self._loaded = True
+            self._checked_at = time.monotonic()
+
+    def _rebuild(self, manifest: Dict[str, Tuple[int, int]]) -> None:
+        previous = self._state
+        file_chunks = {}
+        changed = 0
+        for file, signature in manifest.items():
+            if previous.manifest.get(file) == signature and file in previous.file_chunks:
+                file_chunks[file] = previous.file_chunks[file]
+                continue
+            try:
+                content = (self.docs_path / file).read_text(encoding="utf-8")
+            except Exception as e:
+                logger.error(f"Error reading documentation file {file}: {e}")
+                continue
+            file_chunks[file] = chunk_markdown(file, content)
+            changed += 1
+
+        self._state = _build_state(manifest, file_chunks)
+        self.builds += 1
+        logger.info(
+            f"Documentation index built: {len(manifest)} files ({changed} re-read), "
+            f"{len(self._state.chunks)} chunks, {len(self._state.postings)} terms"
+        )
+        self._save_snapshot()
+
+    def _load_snapshot(self) -> None:
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return
+        try:
+            with gzip.open(self.snapshot_path, "rt", encoding="utf-8") as snapshot:
+                data = json.load(snapshot)
+            if data.get("version") != SNAPSHOT_VERSION or data.get("docs_path") != str(self.docs_path):
+                return
+            manifest = {file: tuple(entry["signature"]) for file, entry in data["files"].items()}
+            file_chunks = {
+                file: [DocChunk(file=file, heading=heading, text=text) for heading, text in entry["chunks"]]
+                for file, entry in data["files"].items()
+            }
+            chunks = [chunk for file in sorted(file_chunks) for chunk in file_chunks[file]]
+            postings = {
+                term: list(zip(flat[::2], flat[1::2], strict=True))
+                for term, flat in data["postings"].items()
+            }
+            lengths = data["lengths"]
+            if len(lengths) != len(chunks):
+                return
+            self._state = _IndexState(
+                manifest=manifest,
+                file_chunks=file_chunks,
+                chunks=chunks,
+                postings=postings,
+                lengths=lengths,
+                avg_length=(sum(lengths) / len(lengths)) if lengths else 0.0,
+            )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable documentation index snapshot {self.snapshot_path}: {e}")
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        state = self._state
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "docs_path": str(self.docs_path),
+            "files": {
+                file: {
+                    "signature": list(state.manifest[file]),
+                    "chunks": [[chunk.heading, chunk.text] for chunk in chunks],
+                }
+                for file, chunks in state.file_chunks.items()
+            },
+            # Flattened (chunk, tf) pairs
+            "postings": {
+                term: [value for posting in postings for value in posting]
+                for term, postings in state.postings.items()
+            },
+            "lengths": state.lengths,
+        }
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as snapshot:
+                json.dump(data, snapshot, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Could not save documentation index snapshot {self.snapshot_path}: {e}")
+
+    def files(self) -> List[str]:
+        """Indexed documentation files"""
+        self.ensure_fresh()
+        return sorted(self._state.manifest)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[DocChunk, float]]:
+        """Top chunks for a query by BM25 score, best first"""
+        self.ensure_fresh()
+        state = self._state
+        if not state.chunks:
+            return []
+
+        total = len(state.chunks)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = state.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, frequency in postings:
+                length_norm = 1 - B + B * state.lengths[index] / state.avg_length
+                scores[index] = scores.get(index, 0.0) + idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(state.chunks[index], score) for index, score in best]
@@ -6,7 +6,9 @@ Loads and processes documentation files for AI context
 import os
 from pathlib import Path
 from typing import List, Dict, Optional
+from app.core.config import settings
 from app.core.logging import logger
+from app.services.documentation_index import DocumentationIndex
 
 
 class DocumentationService:
@@ -32,6 +34,8 @@ class DocumentationService:
         if not self.docs_path.exists():
             logger.warning(f"Documentation path does not exist: {self.docs_path}")
             self.docs_path = None
+        
+        self.index = DocumentationIndex(self.docs_path)
     
     def load_all_documentation(self, max_size_per_file: int = 50000) -> Dict[str, str]:
         """
@@ -88,9 +92,8 @@ class DocumentationService:
             return "No documentation available"
         
         try:
-            md_files = list(self.docs_path.glob("**/*.md"))
-            file_list = [str(f.relative_to(self.docs_path)) for f in md_files]
-            return f"Available documentation files ({len(file_list)}):\n" + "\n".join(f"- {f}" for f in sorted(file_list))
+            file_list = self.index.files()
+            return f"Available documentation files ({len(file_list)}):\n" + "\n".join(f"- {f}" for f in file_list)
         except Exception as e:
             logger.error(f"Error getting documentation summary: {e}")
             return "Error loading documentation summary"
@@ -130,62 +133,73 @@ class DocumentationService:
         
         return "".join(formatted)
     
+    def format_relevant_documentation(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        max_total_size: Optional[int] = None,
+    ) -> str:
+        """
+        Format the documentation chunks most relevant to a query for AI context.
+        
+        Args:
+            query: Text to match (e.g. the latest user messages)
+            top_k: Maximum number of chunks (default: DOCS_CONTEXT_TOP_K)
+            max_total_size: Maximum total size in characters (default: DOCS_CONTEXT_MAX_CHARS)
+            
+        Returns:
+            Formatted documentation excerpts, best match first
+        """
+        top_k = top_k or settings.DOCS_CONTEXT_TOP_K
+        max_total_size = max_total_size or settings.DOCS_CONTEXT_MAX_CHARS
+        
+        try:
+            matches = self.index.search(query, top_k=top_k)
+        except Exception as e:
+            logger.error(f"Error searching documentation: {e}")
+            matches = []
+        
+        if not matches:
+            return "No relevant documentation found."
+        
+        formatted = []
+        total_size = 0
+        for chunk, _ in matches:
+            title = f"{chunk.file} > {chunk.heading}" if chunk.heading else chunk.file
+            section = f"\n\n=== {title} ===\n{chunk.text}\n"
+            if total_size + len(section) > max_total_size:
+                continue
+            formatted.append(section)
+            total_size += len(section)
+        
+        return "".join(formatted)
+    
     def search_documentation(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
         """
-        Simple text search in documentation files.
+        Ranked search in documentation files (BM25 over indexed chunks).
         
         Args:
             query: Search query
             max_results: Maximum number of results
             
         Returns:
-            List of dicts with 'file' and 'content' keys
+            List of dicts with 'file', 'heading', 'content' and 'relevance' keys, best first
         """
-        if not self.docs_path or not self.docs_path.exists():
-            return []
-        
-        query_lower = query.lower()
-        results = []
-        
         try:
-            md_files = list(self.docs_path.glob("**/*.md"))
-            
-            for md_file in md_files:
-                try:
-                    content = md_file.read_text(encoding='utf-8')
-                    
-                    # Simple text search
-                    if query_lower in content.lower():
-                        # Extract relevant snippet (around the match)
-                        content_lower = content.lower()
-                        index = content_lower.find(query_lower)
-                        
-                        if index >= 0:
-                            # Extract context around match (500 chars before and after)
-                            start = max(0, index - 500)
-                            end = min(len(content), index + len(query) + 500)
-                            snippet = content[start:end]
-                            
-                            results.append({
-                                'file': str(md_file.relative_to(self.docs_path)),
-                                'content': snippet,
-                                'relevance': content_lower.count(query_lower)  # Simple relevance score
-                            })
-                            
-                            if len(results) >= max_results:
-                                break
-                                
-                except Exception as e:
-                    logger.error(f"Error searching in {md_file}: {e}")
-                    continue
-            
-            # Sort by relevance
-            results.sort(key=lambda x: x['relevance'], reverse=True)
-            
+            matches = self.index.search(query, top_k=max_results)
         except Exception as e:
             logger.error(f"Error searching documentation: {e}")
+            return []
         
-        return results[:max_results]
+        return [
+            {
+                'file': chunk.file,
+                'heading': chunk.heading,
+                'content': chunk.text,
+                'relevance': round(score, 4),
+            }
+            for chunk, score in matches
+        ]
 
 
 # Singleton instance
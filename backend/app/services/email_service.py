@@ -2,11 +2,13 @@
 
 import os
 from typing import List, Optional, Dict, Any
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
-from sendgrid.helpers.mail.exceptions import SendGridException
+from app.core.lazy_imports import lazy_import
 from app.services.email_templates import EmailTemplates
 
+# Imported when the first email is built
+sendgrid = lazy_import("sendgrid")
+sendgrid_mail = lazy_import("sendgrid.helpers.mail")
+
 
 class EmailService:
     """Service for sending emails via SendGrid."""
@@ -20,7 +22,7 @@ class EmailService:
             self.client = None
             print("Warning: SENDGRID_API_KEY is not configured. Email sending will be disabled.")
         else:
-            self.client = SendGridAPIClient(api_key=self.api_key)
+            self.client = sendgrid.SendGridAPIClient(api_key=self.api_key)
 
     def is_configured(self) -> bool:
         """Check if SendGrid is configured."""
@@ -66,28 +68,28 @@ class EmailService:
         from_name = from_name or self.from_name
 
         # Create email message
-        message = Mail(
-            from_email=Email(from_email, from_name),
-            to_emails=To(to_email),
+        message = sendgrid_mail.Mail(
+            from_email=sendgrid_mail.Email(from_email, from_name),
+            to_emails=sendgrid_mail.To(to_email),
             subject=subject,
-            html_content=Content("text/html", html_content),
+            html_content=sendgrid_mail.Content("text/html", html_content),
         )
 
         # Add text content if provided
         if text_content:
-            message.plain_text_content = Content("text/plain", text_content)
+            message.plain_text_content = sendgrid_mail.Content("text/plain", text_content)
 
         # Add reply-to if provided
         if reply_to:
-            message.reply_to = Email(reply_to)
+            message.reply_to = sendgrid_mail.Email(reply_to)
 
         # Add CC if provided
         if cc:
-            message.cc = [To(email) for email in cc]
+            message.cc = [sendgrid_mail.To(email) for email in cc]
 
         # Add BCC if provided
         if bcc:
-            message.bcc = [To(email) for email in bcc]
+            message.bcc = [sendgrid_mail.To(email) for email in bcc]
 
         try:
             response = self.client.send(message)
@@ -104,7 +106,7 @@ class EmailService:
                 # SendGrid returned an error status code
                 error_body = getattr(response, 'body', 'Unknown error')
                 raise RuntimeError(f"SendGrid API returned status {response.status_code}: {error_body}")
-        except SendGridException as e:
+        except sendgrid_mail.SendGridException as e:
             raise RuntimeError(f"Failed to send email via SendGrid: {str(e)}")
         except Exception as e:
             # Catch any other unexpected exceptions
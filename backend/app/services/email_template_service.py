@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
 from app.models.email_template import EmailTemplate, EmailTemplateVersion
+from app.services.template_renderer import plan_cache
 from app.core.logging import logger
 
 
@@ -173,26 +174,44 @@ class EmailTemplateService:
         language: str = 'en'
     ) -> Optional[Dict[str, str]]:
         """Render a template with variables"""
+        rendered = await self.render_many(key, [variables], language)
+        return rendered[0] if rendered is not None else None
+
+    async def render_many(
+        self,
+        key: str,
+        variables_list: List[Dict[str, Any]],
+        language: str = 'en'
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        Render a template once per set of variables (mass mailings)
+
+        Subject and bodies are compiled once (cached until the template's
+        updated_at changes) and {{variable}} placeholders are substituted in
+        a single pass.
+        """
         template = await self.get_template(key, language)
         if not template or not template.is_active:
             return None
-        
-        subject = template.subject
-        html_body = template.html_body
-        text_body = template.text_body or ''
-        
-        # Replace variables
-        for var_name, var_value in variables.items():
-            placeholder = f"{{{{{var_name}}}}}"
-            subject = subject.replace(placeholder, str(var_value))
-            html_body = html_body.replace(placeholder, str(var_value))
-            text_body = text_body.replace(placeholder, str(var_value))
-        
-        return {
-            'subject': subject,
-            'html_body': html_body,
-            'text_body': text_body
-        }
+
+        plans = [
+            plan_cache.get(('email', template.id, part), template.updated_at, source, double_brace_only=True)
+            for part, source in (
+                ('subject', template.subject),
+                ('html_body', template.html_body),
+                ('text_body', template.text_body),
+            )
+        ]
+        subject, html_body, text_body = plans
+
+        return [
+            {
+                'subject': subject.render(variables),
+                'html_body': html_body.render(variables),
+                'text_body': text_body.render(variables),
+            }
+            for variables in variables_list
+        ]
 
     async def delete_template(self, template_id: int) -> bool:
         """Delete a template"""
@@ -205,6 +224,7 @@ class EmailTemplateService:
         
         await self.db.delete(template)
         await self.db.commit()
+        plan_cache.invalidate('email', template_id)
         
         return True
 
@@ -0,0 +1,227 @@
+"""
+Entity Export Service
+Server-side exports that stream rows straight from the database
+
+Each exportable entity declares the columns it exposes and the filters it
+accepts. Rows are read with a server-side cursor (yield_per) and handed to the
+streaming writers in ExportService, so memory stays constant whatever the
+number of rows.
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import aliased
+
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.project import Project
+from app.models.user import User
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_YIELD_PER = 1000
+
+STREAMING_EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+class ExportEntity:
+    """Definition of an exportable entity"""
+
+    def __init__(
+        self,
+        name: str,
+        build_query: Callable[[], Tuple[Select, Dict[str, Any]]],
+        filters: Dict[str, Any],
+        order_by: Callable[[], List[Any]],
+        owner_column: Optional[Any] = None,
+    ):
+        self.name = name
+        self._build_query = build_query
+        self.filters = filters
+        self._order_by = order_by
+        self.owner_column = owner_column
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._build_query()[1].keys())
+
+    def build(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        owner_id: Optional[int] = None,
+    ) -> Tuple[Select, List[str]]:
+        """
+        Build the export statement
+
+        Raises:
+            ValueError: If a filter or column is not supported for this entity
+        """
+        base, available = self._build_query()
+        selected = columns or list(available.keys())
+        unknown_columns = [c for c in selected if c not in available]
+        if unknown_columns:
+            raise ValueError(f"Unknown columns for {self.name}: {', '.join(unknown_columns)}")
+
+        stmt = base.with_only_columns(*(available[c].label(c) for c in selected))
+        for key, value in (filters or {}).items():
+            column = self.filters.get(key)
+            if column is None:
+                raise ValueError(
+                    f"Unsupported filter '{key}' for {self.name}. Supported: {', '.join(sorted(self.filters))}"
+                )
+            if key.endswith("_after"):
+                stmt = stmt.where(column >= _parse_datetime(value))
+            elif key.endswith("_before"):
+                stmt = stmt.where(column < _parse_datetime(value))
+            elif isinstance(value, list):
+                stmt = stmt.where(column.in_(value))
+            else:
+                stmt = stmt.where(column == value)
+
+        if self.owner_column is not None and owner_id is not None:
+            stmt = stmt.where(self.owner_column == owner_id)
+
+        return stmt.order_by(*self._order_by()), selected
+
+
+def _parse_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {value}") from e
+
+
+def _contacts_query() -> Tuple[Select, Dict[str, Any]]:
+    employee = aliased(User)
+    columns = {
+        "id": Contact.id,
+        "first_name": Contact.first_name,
+        "last_name": Contact.last_name,
+        "company_name": Company.name,
+        "position": Contact.position,
+        "circle": Contact.circle,
+        "linkedin": Contact.linkedin,
+        "photo_url": Contact.photo_url,
+        "email": Contact.email,
+        "phone": Contact.phone,
+        "city": Contact.city,
+        "country": Contact.country,
+        "birthday": Contact.birthday,
+        "language": Contact.language,
+        "employee_name": func.trim(
+            func.concat(func.coalesce(employee.first_name, ""), " ", func.coalesce(employee.last_name, ""))
+        ),
+        "created_at": Contact.created_at,
+    }
+    query = (
+        select(Contact.id)
+        .select_from(Contact)
+        .outerjoin(Company, Contact.company_id == Company.id)
+        .outerjoin(employee, Contact.employee_id == employee.id)
+    )
+    return query, columns
+
+
+def _companies_query() -> Tuple[Select, Dict[str, Any]]:
+    columns = {
+        "id": Company.id,
+        "name": Company.name,
+        "description": Company.description,
+        "website": Company.website,
+        "email": Company.email,
+        "phone": Company.phone,
+        "address": Company.address,
+        "city": Company.city,
+        "country": Company.country,
+        "is_client": Company.is_client,
+        "linkedin": Company.linkedin,
+        "created_at": Company.created_at,
+    }
+    return select(Company.id).select_from(Company), columns
+
+
+def _projects_query() -> Tuple[Select, Dict[str, Any]]:
+    columns = {
+        "id": Project.id,
+        "name": Project.name,
+        "description": Project.description,
+        "status": Project.status,
+        "created_at": Project.created_at,
+        "updated_at": Project.updated_at,
+    }
+    return select(Project.id).select_from(Project), columns
+
+
+EXPORT_ENTITIES: Dict[str, ExportEntity] = {
+    "contacts": ExportEntity(
+        name="contacts",
+        build_query=_contacts_query,
+        filters={
+            "circle": Contact.circle,
+            "company_id": Contact.company_id,
+            "employee_id": Contact.employee_id,
+            "country": Contact.country,
+            "language": Contact.language,
+            "created_after": Contact.created_at,
+            "created_before": Contact.created_at,
+        },
+        order_by=lambda: [Contact.created_at.desc(), Contact.id.desc()],
+    ),
+    "companies": ExportEntity(
+        name="companies",
+        build_query=_companies_query,
+        filters={
+            "is_client": Company.is_client,
+            "country": Company.country,
+            "parent_company_id": Company.parent_company_id,
+            "created_after": Company.created_at,
+            "created_before": Company.created_at,
+        },
+        order_by=lambda: [Company.name.asc(), Company.id.asc()],
+    ),
+    "projects": ExportEntity(
+        name="projects",
+        build_query=_projects_query,
+        filters={
+            "status": Project.status,
+            "created_after": Project.created_at,
+            "created_before": Project.created_at,
+        },
+        order_by=lambda: [Project.created_at.desc(), Project.id.desc()],
+        owner_column=Project.user_id,
+    ),
+}
+
+
+def get_export_entity(name: str) -> ExportEntity:
+    """Get an export entity definition by name (ValueError if unknown)"""
+    entity = EXPORT_ENTITIES.get(name)
+    if entity is None:
+        raise ValueError(f"Unknown export entity '{name}'. Available: {', '.join(sorted(EXPORT_ENTITIES))}")
+    return entity
+
+
+async def stream_entity_rows(stmt: Select) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream statement rows as dictionaries using a server-side cursor
+
+    The session is owned by the generator (not the request), because a
+    StreamingResponse body is consumed after request dependencies are closed.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        count = 0
+        async for row in result.mappings():
+            count += 1
+            yield dict(row)
+        logger.debug(f"Streamed {count} rows for export")
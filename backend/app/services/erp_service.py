@@ -12,7 +12,8 @@ from sqlalchemy.orm import selectinload
 
 from app.models.user import User
 from app.models.invoice import Invoice
-from app.models.project import Project
+from app.models.project import Project, ProjectStatus
+from app.core.dashboard_queries import run_aggregates
 from app.core.tenancy_helpers import apply_tenant_scope
 
 
@@ -270,10 +271,6 @@ class ERPService:
             ).label("pending_count"),
         )
         
-        invoice_query = apply_tenant_scope(invoice_query, Invoice)
-        invoice_result = await self.db.execute(invoice_query)
-        invoice_stats = invoice_result.first()
-        
         # Get client stats
         client_query = select(
             func.count(User.id).label("total"),
@@ -282,21 +279,23 @@ class ERPService:
             ).label("active"),
         )
         
-        client_query = apply_tenant_scope(client_query, User)
-        client_result = await self.db.execute(client_query)
-        client_stats = client_result.first()
-        
         # Get project stats
         project_query = select(
             func.count(Project.id).label("total"),
             func.count(
-                case((Project.status == "active", 1), else_=None)
+                case((Project.status == ProjectStatus.ACTIVE, 1), else_=None)
             ).label("active"),
         )
         
-        project_query = apply_tenant_scope(project_query, Project)
-        project_result = await self.db.execute(project_query)
-        project_stats = project_result.first()
+        # Independent aggregates: one round trip (or in parallel, DASHBOARD_QUERY_MODE)
+        stats = await run_aggregates(self.db, {
+            "invoices": apply_tenant_scope(invoice_query, Invoice),
+            "clients": apply_tenant_scope(client_query, User),
+            "projects": apply_tenant_scope(project_query, Project),
+        })
+        invoice_stats = stats["invoices"]
+        client_stats = stats["clients"]
+        project_stats = stats["projects"]
         
         # Log slow query if threshold exceeded
         execution_time = time.time() - start_time
@@ -5,28 +5,64 @@ Supports exporting data to CSV, Excel, JSON, and PDF formats
 
 import csv
 import json
-from typing import List, Dict, Any, Optional
-from io import StringIO, BytesIO
-from datetime import datetime
+import tempfile
+from typing import List, Dict, Any, Optional, AsyncIterable, AsyncIterator, BinaryIO
+from io import StringIO, BytesIO, TextIOWrapper
+from datetime import date, datetime
 from decimal import Decimal
+from enum import Enum
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+from app.core.lazy_imports import is_available, lazy_import
+from app.core.logging import logger
 
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# pandas, reportlab and openpyxl are imported by the first export using them
+pd = lazy_import("pandas")
+PANDAS_AVAILABLE = is_available("pandas")
+REPORTLAB_AVAILABLE = is_available("reportlab")
+OPENPYXL_AVAILABLE = is_available("openpyxl")
 
-from app.core.logging import logger
+# Flush streamed text exports once this many bytes are buffered
+STREAM_CHUNK_SIZE = 64 * 1024
+# XLSX exports are spooled in memory up to this size, then to a temp file
+XLSX_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def _stringify_value(value: Any) -> str:
+    """Convert a cell value to its string form for text exports"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a value to its JSON-serializable form"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='ignore')
+    return value
+
+
+def _excel_value(value: Any) -> Any:
+    """Convert a value to something openpyxl can write"""
+    if value is None or isinstance(value, (str, int, float, bool, Decimal)):
+        return value
+    if isinstance(value, datetime):
+        # Excel has no timezone support
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return value
+    return _stringify_value(value)
 
 
 class ExportService:
@@ -52,7 +88,9 @@ class ExportService:
         if not data:
             raise ValueError("No data to export")
 
-        output = StringIO()
+        # Write encoded output straight into the returned buffer (no intermediate copy)
+        buffer = BytesIO()
+        output = TextIOWrapper(buffer, encoding='utf-8', newline='')
         
         # Get headers from first item if not provided
         if headers is None:
@@ -78,8 +116,9 @@ class ExportService:
                         cleaned_row[key] = str(value)
             writer.writerow(cleaned_row)
         
-        buffer = BytesIO()
-        buffer.write(output.getvalue().encode('utf-8'))
+        output.flush()
+        # Detach so the wrapper does not close the buffer when garbage collected
+        output.detach()
         buffer.seek(0)
         
         if filename is None:
@@ -211,6 +250,12 @@ class ExportService:
         if not data:
             raise ValueError("No data to export")
 
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         story = []
@@ -278,6 +323,108 @@ class ExportService:
         
         return buffer, filename
 
+    @staticmethod
+    async def stream_csv(
+        rows: AsyncIterable[Dict[str, Any]],
+        headers: List[str],
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream rows as CSV, yielding encoded chunks of about STREAM_CHUNK_SIZE bytes
+        
+        Args:
+            rows: Async iterable of row dictionaries
+            headers: Column names (also used as the header row)
+            
+        Yields:
+            UTF-8 encoded CSV chunks
+        """
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        async for row in rows:
+            writer.writerow([_stringify_value(row.get(header)) for header in headers])
+            if output.tell() >= STREAM_CHUNK_SIZE:
+                yield output.getvalue().encode('utf-8')
+                output.seek(0)
+                output.truncate(0)
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+
+    @staticmethod
+    async def stream_jsonl(
+        rows: AsyncIterable[Dict[str, Any]],
+        headers: Optional[List[str]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream rows as JSON Lines (one object per line)
+        
+        Args:
+            rows: Async iterable of row dictionaries
+            headers: Optional subset/order of keys to include
+            
+        Yields:
+            UTF-8 encoded JSONL chunks
+        """
+        output = StringIO()
+        async for row in rows:
+            keys = headers or row.keys()
+            output.write(json.dumps({key: _json_value(row.get(key)) for key in keys}, default=str, ensure_ascii=False))
+            output.write("\n")
+            if output.tell() >= STREAM_CHUNK_SIZE:
+                yield output.getvalue().encode('utf-8')
+                output.seek(0)
+                output.truncate(0)
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+
+    @staticmethod
+    async def write_xlsx(
+        rows: AsyncIterable[Dict[str, Any]],
+        headers: List[str],
+        sheet_name: str = "Sheet1",
+    ) -> BinaryIO:
+        """
+        Write rows to an XLSX file using openpyxl's write-only mode
+        
+        Rows are written as they arrive, so memory stays flat regardless of the
+        row count. The workbook is spooled to a temporary file.
+        
+        Args:
+            rows: Async iterable of row dictionaries
+            headers: Column names (also used as the header row)
+            sheet_name: Excel sheet name
+            
+        Returns:
+            File object positioned at the start of the XLSX content
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxl is required for Excel export. Install with: pip install openpyxl")
+        
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=sheet_name)
+        sheet.append(headers)
+        async for row in rows:
+            sheet.append([_excel_value(row.get(header)) for header in headers])
+        
+        output = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_SIZE)
+        workbook.save(output)
+        output.seek(0)
+        return output
+
+    @staticmethod
+    async def iter_file(file: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yield a file's content in chunks, closing it when done"""
+        try:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            file.close()
+
     @staticmethod
     def get_export_formats() -> List[str]:
         """Get list of available export formats"""
@@ -0,0 +1,310 @@
+"""
+Feature Flag Evaluator
+In-process flag snapshot and buffered evaluation counters
+
+All flags are loaded once per worker into a snapshot of compiled flags
+(frozensets of target users and teams, rollout threshold in basis points,
+variant keys), so an evaluation is a dict lookup and a CRC32 of the user
+bucket instead of a query and an MD5. Workers share a version token in Redis:
+any flag change replaces it, and each worker checks it at most every
+FEATURE_FLAG_VERSION_CHECK_INTERVAL seconds. The snapshot is reloaded after
+FEATURE_FLAG_CACHE_TTL seconds in any case.
+
+Evaluations are counted in memory per flag, day, outcome and variant, and
+flushed with one upsert per counter. Only a sample of evaluations
+(FEATURE_FLAG_LOG_SAMPLE_RATE) is still written to feature_flag_logs.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.feature_flag import FeatureFlag, FeatureFlagEvaluationCount, FeatureFlagLog
+
+VERSION_KEY = "feature_flags:version"
+
+# Rollout buckets: percentages are compared in basis points (0.01 %)
+BUCKETS = 10000
+
+# Counters are flushed when this many evaluations are pending...
+COUNTER_FLUSH_THRESHOLD = 1000
+# ...or when the oldest pending evaluation is older than this (seconds)
+COUNTER_FLUSH_INTERVAL = 30.0
+# Sampled log rows kept in memory at most (the rest are dropped)
+MAX_PENDING_LOGS = 10000
+
+
+def bucket(key: str, user_id: int, salt: str = "") -> int:
+    """Deterministic bucket in [0, BUCKETS) for a user and flag"""
+    return zlib.crc32(f"{key}:{salt}{user_id}".encode()) % BUCKETS
+
+
+class FlagEvaluation(NamedTuple):
+    enabled: bool
+    variant: Optional[str] = None
+
+
+DISABLED = FlagEvaluation(False)
+
+
+@dataclass(frozen=True)
+class CompiledFlag:
+    """A feature flag prepared for evaluation"""
+
+    id: int
+    key: str
+    enabled: bool
+    threshold: int
+    target_users: Optional[FrozenSet[int]]
+    target_teams: Optional[FrozenSet[int]]
+    variants: Tuple[str, ...]
+
+    @classmethod
+    def from_model(cls, flag: FeatureFlag) -> "CompiledFlag":
+        return cls(
+            id=flag.id,
+            key=flag.key,
+            enabled=flag.enabled,
+            threshold=round((flag.rollout_percentage or 0.0) * BUCKETS / 100),
+            target_users=frozenset(flag.target_users) if flag.target_users else None,
+            target_teams=frozenset(flag.target_teams) if flag.target_teams else None,
+            variants=tuple(flag.variants) if flag.is_ab_test and flag.variants else (),
+        )
+
+    def evaluate(self, user_id: Optional[int] = None, team_id: Optional[int] = None) -> FlagEvaluation:
+        if not self.enabled:
+            return DISABLED
+        # Targeting only applies when the user/team is known
+        if self.target_users is not None and user_id and user_id not in self.target_users:
+            return DISABLED
+        if self.target_teams is not None and team_id and team_id not in self.target_teams:
+            return DISABLED
+        if self.threshold < BUCKETS:
+            if user_id:
+                if bucket(self.key, user_id) >= self.threshold:
+                    return DISABLED
+            elif random.random() * BUCKETS >= self.threshold:
+                # Random rollout for anonymous users
+                return DISABLED
+        if self.variants and user_id:
+            return FlagEvaluation(True, self.variants[bucket(self.key, user_id, "variant:") % len(self.variants)])
+        return FlagEvaluation(True)
+
+
+@dataclass
+class FlagSnapshot:
+    """Every flag, by key"""
+
+    flags: Dict[str, CompiledFlag] = field(default_factory=dict)
+    version: Optional[str] = None
+    loaded_at: float = 0.0
+    checked_at: float = 0.0
+
+
+class FeatureFlagStore:
+    """Per-worker flag snapshot, invalidated through Redis"""
+
+    def __init__(self):
+        self._snapshot: Optional[FlagSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    async def get_snapshot(self, db: AsyncSession) -> FlagSnapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - snapshot.loaded_at < settings.FEATURE_FLAG_CACHE_TTL:
+            if now - snapshot.checked_at < settings.FEATURE_FLAG_VERSION_CHECK_INTERVAL:
+                return snapshot
+            version = await self._read_version()
+            if version == snapshot.version:
+                snapshot.checked_at = now
+                return snapshot
+        else:
+            version = await self._read_version()
+
+        async with self._lock:
+            if self._snapshot is not snapshot and self._snapshot is not None:
+                # Reloaded by a concurrent caller
+                return self._snapshot
+            result = await db.execute(select(FeatureFlag))
+            loaded_at = time.monotonic()
+            self._snapshot = FlagSnapshot(
+                flags={flag.key: CompiledFlag.from_model(flag) for flag in result.scalars().all()},
+                version=version,
+                loaded_at=loaded_at,
+                checked_at=loaded_at,
+            )
+            return self._snapshot
+
+    async def invalidate(self) -> None:
+        """Drop the snapshot in this worker now and in the others on their next check"""
+        self._snapshot = None
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return
+        try:
+            await redis_client.set(VERSION_KEY, uuid.uuid4().hex)
+        except Exception as e:
+            logger.warning(f"Failed to publish feature flag invalidation: {e}")
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    @staticmethod
+    async def _read_version() -> Optional[str]:
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return None
+        try:
+            version = await redis_client.get(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read feature flag version: {e}")
+            return None
+        return version.decode() if isinstance(version, bytes) else version
+
+
+class EvaluationCounter:
+    """
+    Buffered evaluation counters and sampled evaluation logs
+
+    Counts still pending when a worker is killed are lost, which is
+    acceptable for usage statistics.
+    """
+
+    def __init__(
+        self,
+        threshold: int = COUNTER_FLUSH_THRESHOLD,
+        interval: float = COUNTER_FLUSH_INTERVAL,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.session_factory = session_factory
+        self._counts: Dict[Tuple[int, date, bool, str], int] = {}
+        self._logs: List[Dict[str, Any]] = []
+        self._pending_total = 0
+        self._first_pending_at: Optional[float] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> Dict[Tuple[int, date, bool, str], int]:
+        return dict(self._counts)
+
+    def record(self, flag_id: int, evaluation: FlagEvaluation, user_id: Optional[int] = None) -> None:
+        """Count an evaluation and schedule a flush when due"""
+        now = datetime.now(timezone.utc)
+        counter_key = (flag_id, now.date(), evaluation.enabled, evaluation.variant or "")
+        self._counts[counter_key] = self._counts.get(counter_key, 0) + 1
+        self._pending_total += 1
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+        sample_rate = settings.FEATURE_FLAG_LOG_SAMPLE_RATE
+        if sample_rate > 0 and len(self._logs) < MAX_PENDING_LOGS and random.random() < sample_rate:
+            self._logs.append({
+                "flag_id": flag_id,
+                "user_id": user_id,
+                "enabled": evaluation.enabled,
+                "variant": evaluation.variant,
+                "timestamp": now,
+            })
+
+        due = (
+            self._pending_total >= self.threshold
+            or time.monotonic() - self._first_pending_at >= self.interval
+        )
+        if due and (self._flush_task is None or self._flush_task.done()):
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                # No running loop (sync caller): the next flush will pick it up
+                pass
+
+    async def flush(self) -> int:
+        """Write pending counters and sampled logs; returns the number of evaluations flushed"""
+        async with self._lock:
+            if not self._counts:
+                return 0
+            counts, self._counts = self._counts, {}
+            logs, self._logs = self._logs, []
+            self._pending_total = 0
+            self._first_pending_at = None
+            try:
+                async with self.session_factory() as session:
+                    # Flags deleted since their evaluation are skipped
+                    result = await session.execute(
+                        select(FeatureFlag.id).where(FeatureFlag.id.in_({k[0] for k in counts}))
+                    )
+                    existing = set(result.scalars().all())
+                    await self._write_counts(session, {k: v for k, v in counts.items() if k[0] in existing})
+                    logs = [log for log in logs if log["flag_id"] in existing]
+                    if logs:
+                        await session.execute(insert(FeatureFlagLog), logs)
+                    await session.commit()
+            except Exception as e:
+                # Put the counts back so they are retried with the next flush
+                for counter_key, count in counts.items():
+                    self._counts[counter_key] = self._counts.get(counter_key, 0) + count
+                    self._pending_total += count
+                if self._first_pending_at is None:
+                    self._first_pending_at = time.monotonic()
+                logger.warning(f"Failed to flush feature flag evaluation counters: {e}")
+                return 0
+            return sum(counts.values())
+
+    async def shutdown(self) -> None:
+        """Flush remaining counters (called on application shutdown)"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+    @staticmethod
+    async def _write_counts(session: AsyncSession, counts: Dict[Tuple[int, date, bool, str], int]) -> None:
+        if not counts:
+            return
+        rows = [
+            {"flag_id": flag_id, "day": day, "enabled": enabled, "variant": variant, "count": count}
+            for (flag_id, day, enabled, variant), count in sorted(counts.items())
+        ]
+        table = FeatureFlagEvaluationCount.__table__
+        dialect = session.bind.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+            stmt = upsert(FeatureFlagEvaluationCount).values(rows)
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.flag_id, table.c.day, table.c.enabled, table.c.variant],
+                set_={"count": table.c.count + stmt.excluded.count},
+            ))
+            return
+        for row in rows:
+            result = await session.execute(
+                update(FeatureFlagEvaluationCount)
+                .where(
+                    FeatureFlagEvaluationCount.flag_id == row["flag_id"],
+                    FeatureFlagEvaluationCount.day == row["day"],
+                    FeatureFlagEvaluationCount.enabled == row["enabled"],
+                    FeatureFlagEvaluationCount.variant == row["variant"],
+                )
+                .values(count=FeatureFlagEvaluationCount.count + row["count"])
+            )
+            if result.rowcount == 0:
+                await session.execute(insert(FeatureFlagEvaluationCount), [row])
+
+
+# Global instances
+flag_store = FeatureFlagStore()
+evaluation_counter = EvaluationCounter()
@@ -4,11 +4,11 @@ Manages feature flags and evaluations
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
-import hashlib
 
-from app.models.feature_flag import FeatureFlag, FeatureFlagLog
+from app.models.feature_flag import FeatureFlag, FeatureFlagLog, FeatureFlagEvaluationCount
+from app.services.feature_flag_evaluator import DISABLED, FlagEvaluation, evaluation_counter, flag_store
 from app.core.logging import logger
 
 
@@ -55,6 +55,7 @@ class FeatureFlagService:
         self.db.add(flag)
         await self.db.commit()
         await self.db.refresh(flag)
+        await flag_store.invalidate()
         
         return flag
 
@@ -75,6 +76,40 @@ class FeatureFlagService:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
+    async def evaluate(
+        self,
+        key: str,
+        user_id: Optional[int] = None,
+        team_id: Optional[int] = None
+    ) -> FlagEvaluation:
+        """
+        Evaluate a feature flag for a user
+
+        Reads the in-process flag snapshot (no query once loaded) and counts
+        the evaluation in the buffered evaluation counters.
+        """
+        snapshot = await flag_store.get_snapshot(self.db)
+        flag = snapshot.flags.get(key)
+        if flag is None:
+            return DISABLED
+        evaluation = flag.evaluate(user_id, team_id)
+        evaluation_counter.record(flag.id, evaluation, user_id)
+        return evaluation
+
+    async def evaluate_all(
+        self,
+        user_id: Optional[int] = None,
+        team_id: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Evaluate every flag for a user (frontend bootstrap)"""
+        snapshot = await flag_store.get_snapshot(self.db)
+        results = {}
+        for key, flag in snapshot.flags.items():
+            evaluation = flag.evaluate(user_id, team_id)
+            evaluation_counter.record(flag.id, evaluation, user_id)
+            results[key] = {"enabled": evaluation.enabled, "variant": evaluation.variant}
+        return results
+
     async def is_enabled(
         self,
         key: str,
@@ -82,63 +117,16 @@ class FeatureFlagService:
         team_id: Optional[int] = None
     ) -> bool:
         """Check if a feature flag is enabled for a user"""
-        flag = await self.get_flag(key)
-        if not flag:
-            return False
-        
-        if not flag.enabled:
-            return False
-        
-        # Check target users
-        if flag.target_users and user_id:
-            if user_id not in flag.target_users:
-                return False
-        
-        # Check target teams
-        if flag.target_teams and team_id:
-            if team_id not in flag.target_teams:
-                return False
-        
-        # Check rollout percentage
-        if flag.rollout_percentage < 100.0:
-            if user_id:
-                # Deterministic rollout based on user ID
-                hash_value = int(hashlib.md5(f"{key}:{user_id}".encode()).hexdigest(), 16)
-                percentage = (hash_value % 100) + 1
-                if percentage > flag.rollout_percentage:
-                    return False
-            else:
-                # Random rollout for anonymous users
-                import random
-                if random.random() * 100 > flag.rollout_percentage:
-                    return False
-        
-        # Log evaluation
-        await self.log_evaluation(flag.id, user_id, True)
-        
-        return True
+        return (await self.evaluate(key, user_id, team_id)).enabled
 
     async def get_variant(
         self,
         key: str,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        team_id: Optional[int] = None
     ) -> Optional[str]:
         """Get A/B test variant for a feature flag"""
-        flag = await self.get_flag(key)
-        if not flag or not flag.is_ab_test or not flag.variants:
-            return None
-        
-        if not await self.is_enabled(key, user_id):
-            return None
-        
-        # Deterministic variant assignment based on user ID
-        if user_id:
-            hash_value = int(hashlib.md5(f"{key}:{user_id}".encode()).hexdigest(), 16)
-            variant_index = hash_value % len(flag.variants)
-            variant_keys = list(flag.variants.keys())
-            return variant_keys[variant_index]
-        
-        return None
+        return (await self.evaluate(key, user_id, team_id)).variant
 
     async def log_evaluation(
         self,
@@ -177,6 +165,7 @@ class FeatureFlagService:
         
         await self.db.commit()
         await self.db.refresh(flag)
+        await flag_store.invalidate()
         
         return flag
 
@@ -188,6 +177,7 @@ class FeatureFlagService:
         
         await self.db.delete(flag)
         await self.db.commit()
+        await flag_store.invalidate()
         
         return True
 
@@ -195,34 +185,36 @@ class FeatureFlagService:
         self,
         flag_id: int
     ) -> Dict[str, Any]:
-        """Get statistics for a feature flag"""
+        """
+        Get statistics for a feature flag
+
+        Read from the daily evaluation counters; evaluations still buffered
+        in a worker are not included yet.
+        """
         from sqlalchemy import func
         
-        # Total evaluations
-        total_result = await self.db.execute(
-            select(func.count(FeatureFlagLog.id)).where(
-                FeatureFlagLog.flag_id == flag_id
-            )
-        )
-        total = total_result.scalar() or 0
-        
-        # Enabled evaluations
-        enabled_result = await self.db.execute(
-            select(func.count(FeatureFlagLog.id)).where(
-                and_(
-                    FeatureFlagLog.flag_id == flag_id,
-                    FeatureFlagLog.enabled == True
-                )
+        result = await self.db.execute(
+            select(
+                FeatureFlagEvaluationCount.enabled,
+                FeatureFlagEvaluationCount.variant,
+                func.sum(FeatureFlagEvaluationCount.count),
             )
+            .where(FeatureFlagEvaluationCount.flag_id == flag_id)
+            .group_by(FeatureFlagEvaluationCount.enabled, FeatureFlagEvaluationCount.variant)
         )
-        enabled_count = enabled_result.scalar() or 0
+        total = 0
+        enabled_count = 0
+        variant_counts: Dict[str, int] = {}
+        for enabled, variant, count in result.all():
+            total += count
+            if enabled:
+                enabled_count += count
+            if variant:
+                variant_counts[variant] = variant_counts.get(variant, 0) + count
         
         return {
             'total_evaluations': total,
             'enabled_count': enabled_count,
-            'enabled_percentage': (enabled_count / total * 100) if total > 0 else 0
+            'enabled_percentage': (enabled_count / total * 100) if total > 0 else 0,
+            'variant_counts': variant_counts
         }
-
-
-
-
@@ -0,0 +1,393 @@
+"""
+Form Statistics Service
+Per-field statistics for form submissions, aggregated in the database
+
+Statistics are computed in Postgres with JSON operators and GROUP BY, and
+kept in the form_field_rollups table, which is updated on each submission.
+Reading statistics from the rollups is O(fields x distinct answers) whatever
+the number of submissions. Other databases fall back to a streamed
+computation in Python.
+"""
+
+import json
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, Numeric, String, cast, case, delete, func, insert, select, tuple_, update, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.form import Form, FormSubmission, FormFieldRollup
+from app.core.logging import logger
+
+NUMERIC_FIELD_TYPES = frozenset({'scale', 'rating', 'nps', 'number'})
+NUMERIC_PATTERN = r'^-?[0-9]+(\.[0-9]+)?$'
+_numeric_re = re.compile(NUMERIC_PATTERN)
+
+# Advisory lock namespace for rollup maintenance ("FORM")
+ROLLUP_LOCK_NAMESPACE = 0x464F524D
+
+# Bucket values longer than this are truncated to fit the rollup column
+MAX_BUCKET_LENGTH = 255
+
+
+def _stat_fields(form: Form) -> List[Tuple[str, bool]]:
+    """(field_name, is_numeric) for every named field of the form"""
+    fields = []
+    seen = set()
+    for field in form.fields or []:
+        field_name = field.get('name', '')
+        if not field_name or field_name in seen:
+            continue
+        seen.add(field_name)
+        fields.append((field_name, field.get('type', '') in NUMERIC_FIELD_TYPES))
+    return fields
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    """Parse a submitted value as a number (None if it is not numeric), like the SQL path"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else None
+    if isinstance(value, str) and _numeric_re.match(value):
+        return float(value)
+    return None
+
+
+def _bucket_for(value: Any) -> str:
+    """Categorical bucket key, matching Postgres' ->> text rendering"""
+    if isinstance(value, bool):
+        bucket = 'true' if value else 'false'
+    elif isinstance(value, (dict, list)):
+        bucket = json.dumps(value, separators=(', ', ': '))
+    else:
+        bucket = str(value)
+    return bucket[:MAX_BUCKET_LENGTH]
+
+
+def _empty_stats(is_numeric: bool) -> Dict[str, Any]:
+    if is_numeric:
+        return {'type': 'numeric', 'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'distribution': {}}
+    return {'type': 'categorical', 'count': 0, 'distribution': {}}
+
+
+def _finalize(field_stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Turn accumulated sums into averages and drop numeric fields without values"""
+    result = {}
+    for field_name, stats in field_stats.items():
+        if stats['type'] == 'numeric':
+            if not stats['count']:
+                continue
+            result[field_name] = {
+                'type': 'numeric',
+                'average': stats['sum'] / stats['count'],
+                'min': stats['min'],
+                'max': stats['max'],
+                'count': stats['count'],
+                'distribution': stats['distribution'],
+            }
+        else:
+            result[field_name] = stats
+    return result
+
+
+class FormStatisticsService:
+    """Service for form statistics"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _is_postgres(self) -> bool:
+        return self.db.bind.dialect.name == 'postgresql'
+
+    async def _lock(self, form_id: int, shared: bool = False) -> None:
+        """Transaction-scoped advisory lock serializing rebuilds with incremental updates"""
+        function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+        await self.db.execute(
+            text(f"SELECT {function}(:namespace, :form_id)"),
+            {"namespace": ROLLUP_LOCK_NAMESPACE, "form_id": form_id},
+        )
+
+    async def get_statistics(self, form: Form, source: str = 'auto') -> Dict[str, Any]:
+        """
+        Get per-field statistics for a form
+
+        Args:
+            form: Form to compute statistics for
+            source: 'auto' (rollups, built on first read) or 'live' (aggregate submissions)
+
+        Returns:
+            Dict with total_submissions and field_statistics
+        """
+        if not self._is_postgres():
+            total, field_stats = await self._compute_in_python(form)
+        elif source == 'live':
+            total, field_stats = await self._compute_in_sql(form)
+        else:
+            rollup = await self._read_rollups(form)
+            if rollup is None:
+                await self.rebuild_rollups(form)
+                await self.db.commit()
+                rollup = await self._read_rollups(form)
+            total, field_stats = rollup or (0, {})
+
+        return {
+            'total_submissions': total,
+            'field_statistics': _finalize(field_stats),
+        }
+
+    async def _compute_in_sql(self, form: Form) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """
+        Aggregate submissions in Postgres in a single scan
+
+        Each row's JSON is parsed once (cast to jsonb), every field is extracted
+        with ->>, and GROUPING SETS produce the totals row plus one
+        distribution per field.
+        """
+        fields = _stat_fields(form)
+        # OFFSET 0 keeps the subquery from being flattened, otherwise the
+        # json -> jsonb cast is repeated for every extracted expression
+        documents = (
+            select(cast(FormSubmission.data, JSONB).label('doc'))
+            .where(FormSubmission.form_id == form.id)
+            .offset(0)
+            .subquery()
+        )
+        data = documents.c.doc
+
+        extracted = []
+        for index, (field_name, is_numeric) in enumerate(fields):
+            raw = data[field_name].astext
+            if is_numeric:
+                value = case((raw.regexp_match(NUMERIC_PATTERN), cast(raw, Float)))
+                # round() on double precision rounds halves to even; on numeric
+                # it rounds them away from zero, like _round_half_away
+                bucket = cast(cast(func.round(cast(value, Numeric)), Integer), String)
+            else:
+                value = raw
+                bucket = func.left(raw, MAX_BUCKET_LENGTH)
+            extracted += [value.label(f'v{index}'), bucket.label(f'b{index}')]
+
+        if not extracted:
+            total = (await self.db.execute(
+                select(func.count(FormSubmission.id)).where(FormSubmission.form_id == form.id)
+            )).scalar_one()
+            return total or 0, {}
+
+        values = select(*extracted).subquery()
+        buckets = [values.c[f'b{index}'] for index in range(len(fields))]
+
+        columns = [func.count().label('count')]
+        for index, (_field_name, is_numeric) in enumerate(fields):
+            value = values.c[f'v{index}']
+            columns += [func.grouping(buckets[index]), buckets[index], func.count(value)]
+            if is_numeric:
+                columns += [func.sum(value), func.min(value), func.max(value)]
+
+        stmt = select(*columns).group_by(func.grouping_sets(tuple_(), *buckets))
+
+        # Column offset of each field's (grouping, bucket, count[, sum, min, max]) block
+        offsets = []
+        position = 1
+        for _field_name, is_numeric in fields:
+            offsets.append(position)
+            position += 6 if is_numeric else 3
+
+        total = 0
+        field_stats = {field_name: _empty_stats(is_numeric) for field_name, is_numeric in fields}
+        for row in await self.db.execute(stmt):
+            grouped = [index for index, offset in enumerate(offsets) if not row[offset]]
+            if grouped:
+                # Distribution row for one field
+                field_name, is_numeric = fields[grouped[0]]
+                bucket = row[offsets[grouped[0]] + 1]
+                if bucket is not None:
+                    field_stats[field_name]['distribution'][_bucket_key(bucket, is_numeric)] = row[0]
+                continue
+            # Totals row (empty grouping set)
+            total = row[0]
+            for (field_name, is_numeric), offset in zip(fields, offsets, strict=True):
+                stats = field_stats[field_name]
+                stats['count'] = row[offset + 2] or 0
+                if is_numeric:
+                    stats['sum'] = row[offset + 3] or 0.0
+                    stats['min'], stats['max'] = row[offset + 4], row[offset + 5]
+
+        return total, field_stats
+
+    async def _compute_in_python(self, form: Form) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """Fallback for databases without JSON operators: stream submission data in batches"""
+        fields = _stat_fields(form)
+        field_stats = {field_name: _empty_stats(is_numeric) for field_name, is_numeric in fields}
+        total = 0
+
+        result = await self.db.stream(
+            select(FormSubmission.data)
+            .where(FormSubmission.form_id == form.id)
+            .execution_options(yield_per=1000)
+        )
+        async for (data,) in result:
+            total += 1
+            for field_name, _is_numeric, bucket, number in _field_values(fields, data or {}):
+                _accumulate(field_stats[field_name], bucket, number)
+
+        return total, field_stats
+
+    async def _read_rollups(self, form: Form) -> Optional[Tuple[int, Dict[str, Dict[str, Any]]]]:
+        """Read statistics from the rollup table (None if the form has not been rolled up yet)"""
+        rows = (await self.db.execute(
+            select(FormFieldRollup).where(FormFieldRollup.form_id == form.id)
+        )).scalars().all()
+
+        total = None
+        fields = dict(_stat_fields(form))
+        field_stats = {field_name: _empty_stats(is_numeric) for field_name, is_numeric in fields.items()}
+        for row in rows:
+            if row.field_name == '':
+                total = row.count
+                continue
+            stats = field_stats.get(row.field_name)
+            if stats is None:
+                continue
+            if row.bucket == '':
+                stats['count'] = row.count
+                if stats['type'] == 'numeric':
+                    stats['sum'] = row.value_sum or 0.0
+                    stats['min'] = row.value_min
+                    stats['max'] = row.value_max
+            else:
+                stats['distribution'][_bucket_key(row.bucket, stats['type'] == 'numeric')] = row.count
+
+        if total is None:
+            return None
+        return total, field_stats
+
+    async def rebuild_rollups(self, form: Form) -> None:
+        """Recompute the form's rollups from its submissions (caller commits)"""
+        await self._lock(form.id)
+        await self.db.execute(delete(FormFieldRollup).where(FormFieldRollup.form_id == form.id))
+
+        total, field_stats = await self._compute_in_sql(form)
+        rows = [{'form_id': form.id, 'field_name': '', 'bucket': '', 'count': total}]
+        for field_name, stats in field_stats.items():
+            numeric = stats['type'] == 'numeric'
+            rows.append({
+                'form_id': form.id,
+                'field_name': field_name,
+                'bucket': '',
+                'count': stats['count'],
+                'value_sum': stats['sum'] if numeric else None,
+                'value_min': stats['min'] if numeric else None,
+                'value_max': stats['max'] if numeric else None,
+            })
+            for key, count in stats['distribution'].items():
+                rows.append({
+                    'form_id': form.id,
+                    'field_name': field_name,
+                    'bucket': str(key),
+                    'count': count,
+                })
+
+        for start in range(0, len(rows), 1000):
+            await self.db.execute(insert(FormFieldRollup), rows[start:start + 1000])
+        logger.info(f"Rebuilt statistics rollups for form {form.id} ({total} submissions)")
+
+    async def record_submission(self, form: Form, data: Dict[str, Any]) -> None:
+        """
+        Add one submission to the form's rollups (caller commits)
+
+        Does nothing if the rollups have not been built yet; they will be built
+        from all submissions on the next statistics read.
+        """
+        if not self._is_postgres():
+            return
+
+        await self._lock(form.id, shared=True)
+        initialized = await self.db.execute(
+            update(FormFieldRollup)
+            .where(
+                FormFieldRollup.form_id == form.id,
+                FormFieldRollup.field_name == '',
+                FormFieldRollup.bucket == '',
+            )
+            .values(count=FormFieldRollup.count + 1)
+            .returning(FormFieldRollup.id)
+        )
+        if initialized.first() is None:
+            return
+
+        deltas: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for field_name, _is_numeric, bucket, number in _field_values(_stat_fields(form), data):
+            totals = {'form_id': form.id, 'field_name': field_name, 'bucket': '', 'count': 1,
+                      'value_sum': number, 'value_min': number, 'value_max': number}
+            deltas[(field_name, '')] = totals
+            deltas[(field_name, bucket)] = {'form_id': form.id, 'field_name': field_name, 'bucket': bucket,
+                                            'count': 1, 'value_sum': None, 'value_min': None, 'value_max': None}
+        if not deltas:
+            return
+
+        stmt = pg_insert(FormFieldRollup).values(list(deltas.values()))
+        table = FormFieldRollup.__table__
+        await self.db.execute(stmt.on_conflict_do_update(
+            constraint='uq_form_field_rollups_bucket',
+            set_={
+                'count': table.c.count + stmt.excluded.count,
+                'value_sum': table.c.value_sum + stmt.excluded.value_sum,
+                'value_min': func.least(table.c.value_min, stmt.excluded.value_min),
+                'value_max': func.greatest(table.c.value_max, stmt.excluded.value_max),
+                'updated_at': func.now(),
+            },
+        ))
+
+    async def invalidate_rollups(self, form_id: int) -> None:
+        """Drop a form's rollups so they are rebuilt on the next read (caller commits)"""
+        if not self._is_postgres():
+            return
+        await self._lock(form_id)
+        await self.db.execute(delete(FormFieldRollup).where(FormFieldRollup.form_id == form_id))
+
+
+def _bucket_key(bucket: str, is_numeric: bool) -> Any:
+    """Distribution key: int for numeric fields (rounded value), text otherwise"""
+    if is_numeric:
+        try:
+            return int(float(bucket))
+        except (TypeError, ValueError):
+            return bucket
+    return bucket
+
+
+def _field_values(
+    fields: Iterable[Tuple[str, bool]], data: Dict[str, Any]
+) -> Iterable[Tuple[str, bool, str, Optional[float]]]:
+    """(field_name, is_numeric, bucket, number) for each field with a usable value in data"""
+    for field_name, is_numeric in fields:
+        value = data.get(field_name)
+        if value is None:
+            continue
+        if is_numeric:
+            number = _parse_number(value)
+            if number is None:
+                continue
+            yield field_name, True, str(_round_half_away(number)), number
+        else:
+            yield field_name, False, _bucket_for(value), None
+
+
+def _round_half_away(number: float) -> int:
+    """Round like Postgres round() on numeric: halves away from zero"""
+    return int(number + 0.5) if number >= 0 else -int(-number + 0.5)
+
+
+def _accumulate(stats: Dict[str, Any], bucket: str, number: Optional[float]) -> None:
+    stats['count'] += 1
+    if stats['type'] == 'numeric':
+        stats['sum'] += number
+        stats['min'] = number if stats['min'] is None else min(stats['min'], number)
+        stats['max'] = number if stats['max'] is None else max(stats['max'], number)
+        key = _bucket_key(bucket, True)
+    else:
+        key = bucket
+    stats['distribution'][key] = stats['distribution'].get(key, 0) + 1
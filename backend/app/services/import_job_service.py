@@ -0,0 +1,312 @@
+"""
+Import Job Service
+Durable storage for import job logs/status and background execution of imports.
+
+Logs and status updates are appended to a per-job event stream. With Redis
+configured the stream is a Redis Stream (shared by every worker and node);
+otherwise an in-process store is used. SSE consumers block on the stream
+instead of polling, and jobs expire after IMPORT_JOB_RETENTION_SECONDS.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Set, Tuple
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# Statuses after which no more events are appended to a job stream
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+ImportEvent = Tuple[str, Dict[str, Any]]
+
+
+class MemoryImportJobStore:
+    """In-process import job store (single worker only, lost on restart)"""
+
+    def __init__(self, retention_seconds: int, max_events: int):
+        self.retention_seconds = retention_seconds
+        self.max_events = max_events
+        self._events: Dict[str, Deque[Tuple[int, Dict[str, Any]]]] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Any] = {}
+        self._touched: Dict[str, float] = {}
+        self._conditions: Dict[str, asyncio.Condition] = {}
+        self._seq = itertools.count(1)
+
+    def _condition(self, job_id: str) -> asyncio.Condition:
+        condition = self._conditions.get(job_id)
+        if condition is None:
+            condition = asyncio.Condition()
+            self._conditions[job_id] = condition
+        return condition
+
+    async def _append(self, job_id: str, event: Dict[str, Any]) -> None:
+        events = self._events.setdefault(job_id, deque(maxlen=self.max_events))
+        events.append((next(self._seq), event))
+        self._touched[job_id] = time.monotonic()
+        condition = self._condition(job_id)
+        async with condition:
+            condition.notify_all()
+
+    async def create_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        await self.cleanup()
+        self._events[job_id] = deque(maxlen=self.max_events)
+        self._results.pop(job_id, None)
+        self._status[job_id] = dict(fields)
+        await self._append(job_id, {"type": "status", "data": dict(fields)})
+
+    async def append_log(self, job_id: str, entry: Dict[str, Any]) -> None:
+        await self._append(job_id, entry)
+
+    async def update_status(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        status_info = self._status.setdefault(job_id, {})
+        status_info.update(fields)
+        await self._append(job_id, {"type": "status", "data": dict(status_info)})
+        return dict(status_info)
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        status_info = self._status.get(job_id)
+        return dict(status_info) if status_info is not None else None
+
+    async def set_result(self, job_id: str, result: Any) -> None:
+        self._results[job_id] = result
+        self._touched[job_id] = time.monotonic()
+
+    async def get_result(self, job_id: str) -> Optional[Any]:
+        return self._results.get(job_id)
+
+    async def read_events(
+        self, job_id: str, last_id: str = "0", block_ms: int = 15000
+    ) -> List[ImportEvent]:
+        """Return events newer than last_id, blocking up to block_ms if none are available"""
+        last_seq = int(last_id) if last_id.isdigit() else 0
+
+        def pending() -> List[ImportEvent]:
+            return [
+                (str(seq), event)
+                for seq, event in self._events.get(job_id, ())
+                if seq > last_seq
+            ]
+
+        events = pending()
+        if events or block_ms <= 0:
+            return events
+
+        condition = self._condition(job_id)
+        async with condition:
+            try:
+                await asyncio.wait_for(condition.wait_for(lambda: bool(pending())), block_ms / 1000)
+            except asyncio.TimeoutError:
+                return []
+        return pending()
+
+    async def cleanup(self) -> int:
+        """Drop jobs that have not been touched within the retention window"""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [job_id for job_id, touched in self._touched.items() if touched < cutoff]
+        for job_id in expired:
+            self._events.pop(job_id, None)
+            self._status.pop(job_id, None)
+            self._results.pop(job_id, None)
+            self._touched.pop(job_id, None)
+            self._conditions.pop(job_id, None)
+        return len(expired)
+
+
+class RedisImportJobStore:
+    """Redis Streams import job store (shared across workers and nodes)"""
+
+    def __init__(self, redis_url: str, retention_seconds: int, max_events: int):
+        self.retention_seconds = retention_seconds
+        self.max_events = max_events
+        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+
+    @staticmethod
+    def _key(job_id: str, suffix: str) -> str:
+        return f"import_job:{job_id}:{suffix}"
+
+    async def _append(self, job_id: str, event: Dict[str, Any]) -> None:
+        stream_key = self._key(job_id, "events")
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.xadd(
+                stream_key,
+                {"event": json.dumps(event, default=str)},
+                maxlen=self.max_events,
+                approximate=True,
+            )
+            pipe.expire(stream_key, self.retention_seconds)
+            pipe.expire(self._key(job_id, "status"), self.retention_seconds)
+            await pipe.execute()
+
+    async def create_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        status_key = self._key(job_id, "status")
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(job_id, "events"), status_key, self._key(job_id, "result"))
+            pipe.hset(status_key, mapping={k: json.dumps(v, default=str) for k, v in fields.items()})
+            pipe.expire(status_key, self.retention_seconds)
+            await pipe.execute()
+        await self._append(job_id, {"type": "status", "data": dict(fields)})
+
+    async def append_log(self, job_id: str, entry: Dict[str, Any]) -> None:
+        await self._append(job_id, entry)
+
+    async def update_status(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        status_key = self._key(job_id, "status")
+        await self.redis_client.hset(
+            status_key, mapping={k: json.dumps(v, default=str) for k, v in fields.items()}
+        )
+        status_info = await self.get_status(job_id) or dict(fields)
+        await self._append(job_id, {"type": "status", "data": status_info})
+        return status_info
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis_client.hgetall(self._key(job_id, "status"))
+        if not raw:
+            return None
+        return {k: json.loads(v) for k, v in raw.items()}
+
+    async def set_result(self, job_id: str, result: Any) -> None:
+        await self.redis_client.set(
+            self._key(job_id, "result"),
+            json.dumps(result, default=str),
+            ex=self.retention_seconds,
+        )
+
+    async def get_result(self, job_id: str) -> Optional[Any]:
+        raw = await self.redis_client.get(self._key(job_id, "result"))
+        return json.loads(raw) if raw else None
+
+    async def read_events(
+        self, job_id: str, last_id: str = "0", block_ms: int = 15000
+    ) -> List[ImportEvent]:
+        """Return events newer than last_id, blocking up to block_ms with XREAD BLOCK"""
+        response = await self.redis_client.xread(
+            {self._key(job_id, "events"): last_id or "0"},
+            block=block_ms if block_ms > 0 else None,
+        )
+        events: List[ImportEvent] = []
+        for _stream, entries in response or []:
+            for entry_id, payload in entries:
+                events.append((entry_id, json.loads(payload["event"])))
+        return events
+
+    async def cleanup(self) -> int:
+        # Keys carry a TTL refreshed on every write; Redis expires them on its own
+        return 0
+
+
+def _create_store():
+    """Pick the Redis store when configured, otherwise fall back to the in-process store"""
+    retention = settings.IMPORT_JOB_RETENTION_SECONDS
+    max_events = settings.IMPORT_JOB_MAX_EVENTS
+    if REDIS_AVAILABLE and settings.REDIS_URL:
+        try:
+            return RedisImportJobStore(settings.REDIS_URL, retention, max_events)
+        except Exception as e:
+            logger.warning(f"Failed to initialize Redis import job store: {e}")
+    logger.info("Using in-memory import job store (Redis not configured)")
+    return MemoryImportJobStore(retention, max_events)
+
+
+class ImportJobService:
+    """Facade used by import endpoints to record progress and run jobs in the background"""
+
+    def __init__(self, store=None, concurrency: Optional[int] = None):
+        self.store = store or _create_store()
+        self._semaphore = asyncio.Semaphore(concurrency or settings.IMPORT_JOB_CONCURRENCY)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def create_job(self, job_id: str, owner_id: Optional[int] = None, **fields: Any) -> None:
+        now = datetime.now().isoformat()
+        await self.store.create_job(job_id, {
+            "status": "started",
+            "progress": 0,
+            "total": 0,
+            "owner_id": owner_id,
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        })
+
+    async def add_log(
+        self, job_id: str, message: str, level: str = "info", data: Optional[Dict] = None
+    ) -> None:
+        await self.store.append_log(job_id, {
+            "timestamp": datetime.now().isoformat(),
+            "level": level,
+            "message": message,
+            "data": data or {},
+        })
+
+    async def update_status(
+        self,
+        job_id: str,
+        status: str,
+        progress: Optional[int] = None,
+        total: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {"status": status, "updated_at": datetime.now().isoformat()}
+        if progress is not None:
+            fields["progress"] = progress
+        if total is not None:
+            fields["total"] = total
+        return await self.store.update_status(job_id, fields)
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get_status(job_id)
+
+    async def set_result(self, job_id: str, result: Any) -> None:
+        await self.store.set_result(job_id, result)
+
+    async def get_result(self, job_id: str) -> Optional[Any]:
+        return await self.store.get_result(job_id)
+
+    async def read_events(
+        self, job_id: str, last_id: str = "0", block_ms: int = 15000
+    ) -> List[ImportEvent]:
+        return await self.store.read_events(job_id, last_id, block_ms)
+
+    def submit(self, job_id: str, job: Awaitable[Any]) -> asyncio.Task:
+        """
+        Run an import coroutine outside the request.
+
+        Concurrency is bounded by IMPORT_JOB_CONCURRENCY; a reference to the task
+        is kept until it finishes so it is not garbage collected mid-run.
+        """
+        async def runner() -> None:
+            async with self._semaphore:
+                try:
+                    await job
+                except Exception as e:
+                    logger.error(f"Import job {job_id} crashed: {e}", exc_info=True)
+                    await self.add_log(job_id, f"ERREUR inattendue: {str(e)}", "error")
+                    await self.update_status(job_id, "failed")
+
+        task = asyncio.create_task(runner(), name=f"import-job-{job_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Wait briefly for running jobs, then cancel the rest"""
+        if not self._tasks:
+            return
+        _done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+
+# Instance globale
+import_job_service = ImportJobService()
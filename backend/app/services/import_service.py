@@ -9,14 +9,12 @@ from typing import List, Dict, Any, Optional, Callable
 from io import BytesIO, StringIO
 from datetime import datetime
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
+from app.core.lazy_imports import is_available, lazy_import
 from app.core.logging import logger
 
+pd = lazy_import("pandas")
+PANDAS_AVAILABLE = is_available("pandas")
+
 
 class ImportService:
     """Service for importing data from various formats"""
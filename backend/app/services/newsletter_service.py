@@ -5,10 +5,12 @@ Manages newsletter subscriptions and contact lists
 
 import os
 from typing import Optional, Dict, Any, List
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail.exceptions import SendGridException
+from app.core.lazy_imports import lazy_import
 from app.core.logging import logger
 
+sendgrid = lazy_import("sendgrid")
+sendgrid_mail = lazy_import("sendgrid.helpers.mail")
+
 
 class NewsletterService:
     """Service for managing newsletter subscriptions via SendGrid"""
@@ -19,7 +21,7 @@ class NewsletterService:
             self.client = None
             logger.warning("SENDGRID_API_KEY is not configured. Newsletter service will be disabled.")
         else:
-            self.client = SendGridAPIClient(api_key=self.api_key)
+            self.client = sendgrid.SendGridAPIClient(api_key=self.api_key)
         
         # Default list ID from environment
         self.default_list_id = os.getenv("SENDGRID_NEWSLETTER_LIST_ID", "")
@@ -95,7 +97,7 @@ class NewsletterService:
                     "error": f"SendGrid API returned status {response.status_code}",
                 }
 
-        except SendGridException as e:
+        except sendgrid_mail.SendGridException as e:
             logger.error(f"SendGrid error subscribing {email}: {e}")
             raise RuntimeError(f"Failed to subscribe to newsletter: {e}")
 
@@ -130,7 +132,7 @@ class NewsletterService:
                     "error": f"SendGrid API returned status {response.status_code}",
                 }
 
-        except SendGridException as e:
+        except sendgrid_mail.SendGridException as e:
             logger.error(f"SendGrid error unsubscribing {email}: {e}")
             raise RuntimeError(f"Failed to unsubscribe from newsletter: {e}")
 
@@ -158,7 +160,7 @@ class NewsletterService:
                     return data["result"][0]
             return None
 
-        except SendGridException as e:
+        except sendgrid_mail.SendGridException as e:
             logger.error(f"SendGrid error getting contact {email}: {e}")
             return None
 
@@ -178,7 +180,7 @@ class NewsletterService:
                 return response.body.get("result", [])
             return []
 
-        except SendGridException as e:
+        except sendgrid_mail.SendGridException as e:
             logger.error(f"SendGrid error getting lists: {e}")
             return []
 
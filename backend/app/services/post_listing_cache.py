@@ -0,0 +1,73 @@
+"""
+Post Listing Cache
+Published post listings cached in Redis under a shared version
+
+A listing restricted to published posts is the same for every reader, so the
+serialized response is cached under a key made of the listing parameters and
+a version token kept in Redis. Any post write (and any category rename or
+deletion) increments the version: older entries are never read again and
+expire after POST_LISTING_CACHE_TTL seconds, so nothing has to be scanned or
+deleted. Author name changes are only picked up when entries expire.
+
+Without Redis, or with POST_LISTING_CACHE_TTL=0, listings are not cached.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.core.cache import cache_backend, cache_key
+from app.core.config import settings
+from app.core.logging import logger
+
+VERSION_KEY = "posts:listing:version"
+LISTING_KEY = "posts:listing:"
+
+
+class PostListingCache:
+    """Version-keyed cache of published post listings"""
+
+    async def listing_key(self, params: Mapping[str, Any]) -> Optional[str]:
+        """
+        Cache key of a listing under the current version
+
+        Read the key before querying the database: a listing stored under it
+        after a concurrent write is keyed by the old version and never served.
+
+        Args:
+            params: Everything the listing depends on (filters, paging, tenant)
+
+        Returns:
+            Cache key, or None when listings are not cached
+        """
+        redis_client = cache_backend.redis_client
+        if redis_client is None or not settings.POST_LISTING_CACHE_TTL:
+            return None
+        try:
+            version = await redis_client.get(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read post listing cache version: {e}")
+            return None
+        version = version.decode() if isinstance(version, bytes) else version
+        return f"{LISTING_KEY}{version or 0}:{cache_key(**params)}"
+
+    async def get(self, key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        if key is None:
+            return None
+        return await cache_backend.get(key)
+
+    async def set(self, key: Optional[str], posts: List[Dict[str, Any]]) -> None:
+        if key is None:
+            return
+        await cache_backend.set(key, posts, expire=settings.POST_LISTING_CACHE_TTL)
+
+    async def invalidate(self) -> None:
+        """Stop serving every cached listing"""
+        redis_client = cache_backend.redis_client
+        if redis_client is None:
+            return
+        try:
+            await redis_client.incr(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate the post listing cache: {e}")
+
+
+post_listing_cache = PostListingCache()
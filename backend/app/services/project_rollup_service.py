@@ -0,0 +1,259 @@
+"""
+Project Rollup Service
+Project counts over day ranges, read from daily rollups
+
+The insights and analytics endpoints count a user's projects over ranges of
+creation days (last 30 days, per month, cumulative, by status). On Postgres
+the counts are read from project_daily_rollups, one row per (user, UTC
+creation day, status), so a dashboard read is O(days with projects)
+whatever the number of projects. A user's rollups are:
+
+- built on the first read, or for every user by
+  scripts/backfill_project_rollups.py (run it periodically to reconcile
+  writes that bypass the ORM, such as bulk UPDATE statements)
+- kept up to date by session flush hooks (register_project_rollup_hooks):
+  the stored (user, day, status) of every project inserted, updated or
+  deleted is read before and after the flush and the difference applied
+  in the same transaction
+
+Other databases, and ANALYTICS_ROLLUPS=false, count the projects table.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+from sqlalchemy import (
+    ARRAY, Date, Integer, and_, any_, bindparam, case, cast, column, delete, event, func, insert, inspect,
+    literal, literal_column, select, text, values,
+)
+from sqlalchemy import Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.tenancy_helpers import apply_tenant_scope
+from app.models.project import Project, ProjectDailyRollup, ProjectRollupState, ProjectStatus
+from app.models.user import User
+
+# Advisory lock namespace for rollup maintenance ("PROJ")
+ROLLUP_LOCK_NAMESPACE = 0x50524F4A
+
+BACKFILL_CHUNK_SIZE = 500
+
+# session.info key of the changes recorded by before_flush
+_PENDING = "project_rollup_pending"
+
+
+class DayRange(NamedTuple):
+    """Inclusive range of UTC creation days (None: unbounded), optionally for one status"""
+
+    first: Optional[date] = None
+    last: Optional[date] = None
+    status: Optional[ProjectStatus] = None
+
+
+def project_day(dialect_name: str):
+    """UTC creation day of a project"""
+    if dialect_name == "postgresql":
+        # Literal time zone: the expression must render identically in SELECT and GROUP BY
+        return cast(func.timezone(literal_column("'UTC'"), Project.created_at), Date)
+    return func.date(Project.created_at, type_=Date)
+
+
+def _range_count(day_range: DayRange, day, status, weight):
+    conditions = []
+    if day_range.first is not None:
+        conditions.append(day >= day_range.first)
+    if day_range.last is not None:
+        conditions.append(day <= day_range.last)
+    if day_range.status is not None:
+        conditions.append(status == day_range.status)
+    value = case((and_(*conditions), weight), else_=0) if conditions else weight
+    return func.coalesce(func.sum(value), 0)
+
+
+def _id_array(ids: Iterable[int]):
+    # One array parameter instead of one parameter per id
+    return any_(bindparam("ids", sorted(set(ids)), type_=ARRAY(Integer)))
+
+
+class ProjectRollupService:
+    """Service for project count rollups"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _is_postgres(self) -> bool:
+        return self.db.bind.dialect.name == "postgresql"
+
+    def uses_rollups(self) -> bool:
+        return settings.ANALYTICS_ROLLUPS and self._is_postgres()
+
+    async def _lock(self, user_id: int) -> None:
+        """Transaction-scoped advisory lock serializing rebuilds with the flush hooks"""
+        await self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :user_id)"),
+            {"namespace": ROLLUP_LOCK_NAMESPACE, "user_id": user_id},
+        )
+
+    async def count_projects(self, user_id: int, ranges: Mapping[str, DayRange]) -> Dict[str, int]:
+        """
+        Count the user's projects in each day range
+
+        Args:
+            user_id: Project owner
+            ranges: Day ranges by name
+
+        Returns:
+            Project count by range name
+        """
+        if self.uses_rollups():
+            await self.ensure_rollups(user_id)
+            day, status, weight = ProjectDailyRollup.day, ProjectDailyRollup.status, ProjectDailyRollup.count
+            query = select(*[
+                _range_count(day_range, day, status, weight).label(name) for name, day_range in ranges.items()
+            ]).where(ProjectDailyRollup.user_id == user_id)
+        else:
+            day, status, weight = project_day(self.db.bind.dialect.name), Project.status, literal(1)
+            query = select(*[
+                _range_count(day_range, day, status, weight).label(name) for name, day_range in ranges.items()
+            ]).where(Project.user_id == user_id)
+            query = apply_tenant_scope(query, Project)
+
+        row = (await self.db.execute(query)).mappings().one()
+        return {name: int(row[name]) for name in ranges}
+
+    async def ensure_rollups(self, user_id: int) -> None:
+        """Build the user's rollups if they have not been built yet"""
+        built = await self.db.scalar(
+            select(ProjectRollupState.user_id).where(ProjectRollupState.user_id == user_id)
+        )
+        if built is None:
+            await self.rebuild([user_id])
+            await self.db.commit()
+
+    async def rebuild(self, user_ids: Sequence[int]) -> int:
+        """Recompute the users' rollups from their projects (caller commits); returns the rows written"""
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return 0
+        for user_id in user_ids:
+            await self._lock(user_id)
+        await self.db.execute(delete(ProjectDailyRollup).where(ProjectDailyRollup.user_id == _id_array(user_ids)))
+
+        day = project_day("postgresql")
+        result = await self.db.execute(
+            insert(ProjectDailyRollup).from_select(
+                ["user_id", "day", "status", "count"],
+                select(Project.user_id, day, Project.status, func.count())
+                .where(Project.user_id == _id_array(user_ids))
+                .group_by(Project.user_id, day, Project.status),
+            )
+        )
+        stmt = pg_insert(ProjectRollupState).values([{"user_id": user_id} for user_id in user_ids])
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[ProjectRollupState.user_id], set_={"rebuilt_at": func.now()},
+        ))
+        return result.rowcount
+
+    async def backfill(self, chunk_size: int = BACKFILL_CHUNK_SIZE) -> Dict[str, int]:
+        """Rebuild the rollups of every user, committing one chunk of users at a time"""
+        users = rows = 0
+        last_id = 0
+        while True:
+            user_ids = (await self.db.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+            )).scalars().all()
+            if not user_ids:
+                break
+            rows += await self.rebuild(user_ids)
+            await self.db.commit()
+            users += len(user_ids)
+            last_id = user_ids[-1]
+        logger.info(f"Rebuilt project rollups for {users} users ({rows} rollup rows)")
+        return {"users": users, "rows": rows}
+
+
+# Flush hooks
+
+def _rollup_key_changed(project: Project) -> bool:
+    attrs = inspect(project).attrs
+    return any(attrs[name].history.has_changes() for name in ("user_id", "status", "created_at"))
+
+
+def _stored_rows(connection, ids: List[int], lock: bool = False):
+    query = select(Project.user_id, project_day("postgresql").label("day"), Project.status).where(
+        Project.id == _id_array(ids)
+    )
+    if lock:
+        # Lock the rows so the state read is the one this transaction overwrites
+        query = query.with_for_update()
+    return connection.execute(query).all()
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    new = [obj for obj in session.new if isinstance(obj, Project)]
+    existing = [
+        obj for obj in session.dirty
+        if isinstance(obj, Project) and _rollup_key_changed(obj)
+    ] + [obj for obj in session.deleted if isinstance(obj, Project)]
+    session.info.pop(_PENDING, None)
+    if not new and not existing:
+        return
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+
+    existing_ids = [inspect(obj).identity[0] for obj in existing]
+    deltas = Counter()
+    if existing_ids:
+        for row in _stored_rows(connection, existing_ids, lock=True):
+            deltas[tuple(row)] -= 1
+    deleted = set(session.deleted)
+    session.info[_PENDING] = (deltas, new + [obj for obj in existing if obj not in deleted])
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if pending is None:
+        return
+    deltas, projects = pending
+    connection = session.connection()
+    ids = [obj.id for obj in projects if obj.id is not None]
+    if ids:
+        for row in _stored_rows(connection, ids):
+            deltas[tuple(row)] += 1
+    deltas = {key: count for key, count in deltas.items() if count}
+    if not deltas:
+        return
+
+    for user_id in sorted({key[0] for key in deltas}):
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock_shared(:namespace, :user_id)"),
+            {"namespace": ROLLUP_LOCK_NAMESPACE, "user_id": user_id},
+        )
+    changes = values(
+        column("user_id", Integer), column("day", Date), column("status", SQLEnum(ProjectStatus)),
+        column("count", Integer), name="changes",
+    ).data([(user_id, day, status, count) for (user_id, day, status), count in deltas.items()])
+    table = ProjectDailyRollup.__table__
+    # Only users whose rollups have been built; the others are built on their next read
+    stmt = pg_insert(ProjectDailyRollup).from_select(
+        ["user_id", "day", "status", "count"],
+        select(changes.c.user_id, changes.c.day, cast(changes.c.status, table.c.status.type), changes.c.count)
+        .join(ProjectRollupState, ProjectRollupState.user_id == changes.c.user_id),
+    )
+    connection.execute(stmt.on_conflict_do_update(
+        constraint="uq_project_daily_rollups_day",
+        set_={"count": table.c.count + stmt.excluded.count},
+    ))
+
+
+def register_project_rollup_hooks(session_class=Session) -> None:
+    """Maintain the project rollups on every flush of `session_class` sessions"""
+    if not event.contains(session_class, "before_flush", _before_flush):
+        event.listen(session_class, "before_flush", _before_flush)
+        event.listen(session_class, "after_flush", _after_flush)
@@ -5,10 +5,15 @@ import uuid
 from typing import Optional
 from datetime import datetime, timedelta, timezone
 
-import boto3
-from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
+from app.core.lazy_imports import lazy_import
+
+# boto3 is imported with the client, on first use
+boto3 = lazy_import("boto3")
+boto3_exceptions = lazy_import("boto3.exceptions")
+botocore_exceptions = lazy_import("botocore.exceptions")
+
 # AWS S3 configuration
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -16,16 +21,21 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET")
 AWS_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL")  # For S3-compatible services like DigitalOcean Spaces
 
-# Initialize S3 client
-s3_client = None
-if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION,
-        endpoint_url=AWS_S3_ENDPOINT_URL,
-    )
+_s3_client = None
+
+
+def get_s3_client():
+    """S3 client, created on first use (None without AWS credentials)"""
+    global _s3_client
+    if _s3_client is None and AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
+        _s3_client = boto3.client(
+            's3',
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            region_name=AWS_REGION,
+            endpoint_url=AWS_S3_ENDPOINT_URL,
+        )
+    return _s3_client
 
 
 class S3Service:
@@ -33,7 +43,7 @@ class S3Service:
 
     def __init__(self):
         """Initialize S3 service."""
-        if not s3_client:
+        if not get_s3_client():
             raise ValueError("S3 client not configured. Please set AWS credentials.")
 
     def upload_file(
@@ -61,21 +71,25 @@ class S3Service:
         file_id = str(uuid.uuid4())
         file_key = f"{folder}/{user_id}/{file_id}{file_extension}" if user_id else f"{folder}/{file_id}{file_extension}"
 
-        # Read file content
-        file_content = file.file.read()
-        file_size = len(file_content)
+        # Size from the current position, without reading the file into memory
+        start = file.file.tell()
+        file.file.seek(0, os.SEEK_END)
+        file_size = file.file.tell() - start
+        file.file.seek(start)
 
-        # Upload to S3
+        # Upload to S3 (streamed in parts for large files)
         try:
-            s3_client.put_object(
-                Bucket=AWS_S3_BUCKET,
-                Key=file_key,
-                Body=file_content,
-                ContentType=file.content_type or "application/octet-stream",
-                Metadata={
-                    "original_filename": file.filename or "",
-                    "uploaded_at": datetime.now(timezone.utc).isoformat(),
-                    "user_id": user_id or "",
+            get_s3_client().upload_fileobj(
+                file.file,
+                AWS_S3_BUCKET,
+                file_key,
+                ExtraArgs={
+                    "ContentType": file.content_type or "application/octet-stream",
+                    "Metadata": {
+                        "original_filename": file.filename or "",
+                        "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                        "user_id": user_id or "",
+                    },
                 },
             )
 
@@ -89,7 +103,7 @@ class S3Service:
                 "content_type": file.content_type or "application/octet-stream",
                 "filename": file.filename,
             }
-        except ClientError as e:
+        except (botocore_exceptions.ClientError, boto3_exceptions.S3UploadFailedError) as e:
             raise ValueError(f"Failed to upload file to S3: {str(e)}")
 
     def delete_file(self, file_key: str) -> bool:
@@ -106,9 +120,9 @@ class S3Service:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            s3_client.delete_object(Bucket=AWS_S3_BUCKET, Key=file_key)
+            get_s3_client().delete_object(Bucket=AWS_S3_BUCKET, Key=file_key)
             return True
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             raise ValueError(f"Failed to delete file from S3: {str(e)}")
 
     def generate_presigned_url(
@@ -130,13 +144,13 @@ class S3Service:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            url = s3_client.generate_presigned_url(
+            url = get_s3_client().generate_presigned_url(
                 'get_object',
                 Params={'Bucket': AWS_S3_BUCKET, 'Key': file_key},
                 ExpiresIn=expiration,
             )
             return url
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             raise ValueError(f"Failed to generate presigned URL: {str(e)}")
 
     def get_file_metadata(self, file_key: str) -> dict:
@@ -153,14 +167,14 @@ class S3Service:
             raise ValueError("AWS_S3_BUCKET is not configured")
 
         try:
-            response = s3_client.head_object(Bucket=AWS_S3_BUCKET, Key=file_key)
+            response = get_s3_client().head_object(Bucket=AWS_S3_BUCKET, Key=file_key)
             return {
                 "size": response.get("ContentLength", 0),
                 "content_type": response.get("ContentType", ""),
                 "last_modified": response.get("LastModified"),
                 "metadata": response.get("Metadata", {}),
             }
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             raise ValueError(f"Failed to get file metadata: {str(e)}")
 
     @staticmethod
@@ -170,6 +184,5 @@ class S3Service:
             AWS_ACCESS_KEY_ID
             and AWS_SECRET_ACCESS_KEY
             and AWS_S3_BUCKET
-            and s3_client
         )
 
@@ -1,15 +1,16 @@
 """
 Scheduled Task Service
-Manages scheduled tasks and background jobs
+Manages scheduled tasks and background jobs (executed by app.services.task_executor)
 """
 
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from sqlalchemy import select, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.scheduled_task import ScheduledTask, TaskExecutionLog, TaskStatus, TaskType
 from app.core.logging import logger
+from app.services.task_executor import next_occurrence, validate_recurrence
 
 
 class ScheduledTaskService:
@@ -29,7 +30,8 @@ class ScheduledTaskService:
         task_data: Optional[Dict[str, Any]] = None,
         user_id: Optional[int] = None
     ) -> ScheduledTask:
-        """Create a new scheduled task"""
+        """Create a new scheduled task (raises ValueError for an unsupported recurrence)"""
+        validate_recurrence(recurrence, recurrence_config)
         task = ScheduledTask(
             name=name,
             description=description,
@@ -52,13 +54,14 @@ class ScheduledTaskService:
         return await self.db.get(ScheduledTask, task_id)
 
     async def get_pending_tasks(self, limit: int = 100) -> List[ScheduledTask]:
-        """Get pending tasks that are due"""
-        now = datetime.utcnow()
+        """Get pending tasks that are due (and not waiting for a retry)"""
+        now = datetime.now(timezone.utc)
         result = await self.db.execute(
             select(ScheduledTask).where(
                 and_(
                     ScheduledTask.status == TaskStatus.PENDING,
-                    ScheduledTask.scheduled_at <= now
+                    ScheduledTask.scheduled_at <= now,
+                    or_(ScheduledTask.next_attempt_at.is_(None), ScheduledTask.next_attempt_at <= now),
                 )
             ).order_by(ScheduledTask.scheduled_at).limit(limit)
         )
@@ -115,48 +118,18 @@ class ScheduledTaskService:
         return task
 
     async def _schedule_next_occurrence(self, task: ScheduledTask) -> None:
-        """Schedule the next occurrence of a recurring task"""
-        if not task.recurrence:
-            return
-        
-        next_scheduled = None
-        
-        if task.recurrence == 'daily':
-            next_scheduled = task.scheduled_at + timedelta(days=1)
-        elif task.recurrence == 'weekly':
-            next_scheduled = task.scheduled_at + timedelta(weeks=1)
-        elif task.recurrence == 'monthly':
-            # Simple monthly: add 30 days
-            next_scheduled = task.scheduled_at + timedelta(days=30)
-        elif task.recurrence == 'cron':
-            # Handle cron expressions
-            # NOTE: To fully implement cron expressions, install croniter:
-            # pip install croniter
-            # Then use: from croniter import croniter
-            # cron = croniter(task.recurrence_config.get('expression', '0 0 * * *'), task.scheduled_at)
-            # next_scheduled = cron.get_next(datetime)
-            # For now, we'll log a warning and skip scheduling
-            logger.warning(
-                f"Cron expressions not yet fully implemented for task {task.id}. "
-                "Install croniter and update this code to parse cron expressions."
-            )
-            # Fallback: don't schedule next occurrence
+        """Reschedule a recurring task (the same row) to its next occurrence"""
+        try:
+            next_scheduled = next_occurrence(task.recurrence, task.recurrence_config, task.scheduled_at)
+        except ValueError as e:
+            logger.error(f"Invalid recurrence for task {task.id}: {e}")
             return
         
         if next_scheduled:
-            # Create new task instance for next occurrence
-            new_task = ScheduledTask(
-                name=task.name,
-                description=task.description,
-                task_type=task.task_type,
-                scheduled_at=next_scheduled,
-                recurrence=task.recurrence,
-                recurrence_config=task.recurrence_config,
-                task_data=task.task_data,
-                user_id=task.user_id
-            )
-            self.db.add(new_task)
-            await self.db.commit()
+            task.scheduled_at = next_scheduled
+            task.status = TaskStatus.PENDING
+            task.attempts = 0
+            task.next_attempt_at = None
 
     async def log_execution(
         self,
@@ -0,0 +1,257 @@
+"""
+Stripe Client
+Async Stripe API access shared by the Stripe integration
+
+Calls go through the SDK's async methods on a StripeClient backed by one
+pooled, keep-alive httpx.AsyncClient per worker, so a Stripe round trip no
+longer blocks the event loop. Every call gets:
+
+- a per-attempt timeout (STRIPE_TIMEOUT seconds);
+- retries with exponential backoff and full jitter on connection errors,
+  timeouts, 429 and 5xx responses (STRIPE_MAX_RETRIES). Creates and updates
+  send one idempotency key for all attempts, so a retry never charges or
+  creates twice;
+- a latency histogram per operation, see stripe_metrics.
+
+Errors are the SDK's stripe.StripeError subclasses; a timeout is raised as
+stripe.APIConnectionError.
+"""
+
+import asyncio
+import bisect
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+from app.core.config import settings
+from app.core.lazy_imports import lazy_import
+from app.core.logging import logger
+
+stripe = lazy_import("stripe")
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Backoff before retry n (0-based): uniform in [0, min(cap, base * 2 ** n)]
+RETRY_BACKOFF_BASE = 0.25
+RETRY_BACKOFF_CAP = 4.0
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram for one operation"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.retries = 0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if above the last bucket)"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        # The last count (above the last bucket) is only part of +Inf
+        for bound, count in zip(self.buckets, self.counts[:-1], strict=True):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.total
+        return {
+            "count": self.total,
+            "sum": round(self.sum, 6),
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class StripeMetrics:
+    """Latency histograms by operation (e.g. 'customers.create')"""
+
+    def __init__(self):
+        self.operations: Dict[str, LatencyHistogram] = {}
+
+    def histogram(self, operation: str) -> LatencyHistogram:
+        histogram = self.operations.get(operation)
+        if histogram is None:
+            histogram = self.operations[operation] = LatencyHistogram()
+        return histogram
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {operation: h.snapshot() for operation, h in sorted(self.operations.items())}
+
+    def reset(self) -> None:
+        self.operations.clear()
+
+
+stripe_metrics = StripeMetrics()
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if not isinstance(error, stripe.StripeError):
+        return False
+    should_retry = (error.headers or {}).get("stripe-should-retry")
+    if should_retry is not None:
+        return should_retry == "true"
+    if isinstance(error, (stripe.APIConnectionError, stripe.RateLimitError)):
+        return True
+    return isinstance(error, stripe.APIError) and (error.http_status or 0) >= 500
+
+
+class StripeGateway:
+    """Async Stripe API calls with timeouts, retries and latency metrics"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        metrics: StripeMetrics = stripe_metrics,
+    ):
+        self._api_key = api_key
+        self._api_base = api_base
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self.metrics = metrics
+        self._client: Optional[stripe.StripeClient] = None
+        self._http_client: Optional[stripe.HTTPXClient] = None
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout if self._timeout is not None else settings.STRIPE_TIMEOUT
+
+    @property
+    def max_retries(self) -> int:
+        return self._max_retries if self._max_retries is not None else settings.STRIPE_MAX_RETRIES
+
+    @property
+    def client(self) -> "stripe.StripeClient":
+        """StripeClient on a pooled async HTTP client, created on first use"""
+        if self._client is None:
+            api_key = self._api_key or settings.STRIPE_SECRET_KEY
+            if not api_key:
+                raise stripe.AuthenticationError("STRIPE_SECRET_KEY not configured")
+            api_base = self._api_base if self._api_base is not None else settings.STRIPE_API_BASE
+            self._http_client = stripe.HTTPXClient(timeout=self.timeout)
+            self._client = stripe.StripeClient(
+                api_key,
+                http_client=self._http_client,
+                # Retries are handled here, with jitter and metrics
+                max_network_retries=0,
+                base_addresses={"api": api_base} if api_base else None,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        if self._http_client is not None:
+            try:
+                await self._http_client.close_async()
+            finally:
+                self._http_client = None
+                self._client = None
+
+    async def call(
+        self,
+        operation: str,
+        method: Callable[..., Awaitable[Any]],
+        *args: Any,
+        params: Optional[Dict[str, Any]] = None,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Call an async StripeClient method
+
+        Args:
+            operation: Name used for metrics and logs, e.g. 'customers.create'
+            method: Bound *_async method of a StripeClient service
+            params: Request parameters
+            idempotent: Send an idempotency key (for POST requests), reused by retries
+            timeout: Per-attempt timeout in seconds (default STRIPE_TIMEOUT)
+        """
+        options = {"idempotency_key": uuid.uuid4().hex} if idempotent else None
+        timeout = timeout if timeout is not None else self.timeout
+        histogram = self.metrics.histogram(operation)
+        attempt = 0
+        while True:
+            start_time = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(method(*args, params=params, options=options), timeout)
+            except Exception as e:
+                histogram.observe(time.perf_counter() - start_time, error=True)
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise stripe.APIConnectionError(
+                            f"Stripe {operation} timed out after {timeout:.1f}s"
+                        ) from e
+                    raise
+                delay = random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+                attempt += 1
+                histogram.retries += 1
+                logger.warning(f"Stripe {operation} failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            histogram.observe(time.perf_counter() - start_time)
+            return result
+
+    # Operations used by the Stripe integration
+
+    async def create_customer(self, params: Dict[str, Any]) -> Any:
+        return await self.call("customers.create", self.client.v1.customers.create_async,
+                               params=params, idempotent=True)
+
+    async def list_customers(self, params: Dict[str, Any]) -> Any:
+        return await self.call("customers.list", self.client.v1.customers.list_async, params=params)
+
+    async def create_checkout_session(self, params: Dict[str, Any]) -> Any:
+        return await self.call("checkout.sessions.create", self.client.v1.checkout.sessions.create_async,
+                               params=params, idempotent=True)
+
+    async def create_portal_session(self, params: Dict[str, Any]) -> Any:
+        return await self.call("billing_portal.sessions.create", self.client.v1.billing_portal.sessions.create_async,
+                               params=params, idempotent=True)
+
+    async def retrieve_subscription(self, subscription_id: str) -> Any:
+        return await self.call("subscriptions.retrieve", self.client.v1.subscriptions.retrieve_async,
+                               subscription_id)
+
+    async def update_subscription(self, subscription_id: str, params: Dict[str, Any]) -> Any:
+        return await self.call("subscriptions.update", self.client.v1.subscriptions.update_async,
+                               subscription_id, params=params, idempotent=True)
+
+    async def create_payment_intent(self, params: Dict[str, Any]) -> Any:
+        return await self.call("payment_intents.create", self.client.v1.payment_intents.create_async,
+                               params=params, idempotent=True)
+
+    async def retrieve_payment_intent(self, payment_intent_id: str) -> Any:
+        return await self.call("payment_intents.retrieve", self.client.v1.payment_intents.retrieve_async,
+                               payment_intent_id)
+
+
+stripe_gateway = StripeGateway()
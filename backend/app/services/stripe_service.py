@@ -3,8 +3,8 @@ Stripe Service
 Service for handling Stripe payment operations
 """
 
+import json
 from typing import Optional, Dict, Any
-import stripe
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -13,10 +13,11 @@ from app.core.logging import logger
 from app.models import User, Plan, Subscription
 from app.models.subscription import SubscriptionStatus
 from app.models.booking import Booking
+from app.services.stripe_client import StripeGateway, stripe, stripe_gateway
 from decimal import Decimal
 
-# Configure Stripe timeout (handled automatically in recent versions)
-# Stripe SDK handles timeouts internally
+# API calls go through StripeGateway (async, pooled connections, timeouts and
+# retries); only webhook signature verification uses the stripe module directly.
 # 
 # IMPORTANT: In recent Stripe versions, exceptions are directly in stripe module, not stripe.error
 # Always import exceptions from 'stripe' module, e.g., from stripe import StripeError
@@ -25,18 +26,9 @@ from decimal import Decimal
 class StripeService:
     """Service for Stripe operations"""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, gateway: Optional[StripeGateway] = None):
         self.db = db
-        self._ensure_stripe_initialized()
-
-    def _ensure_stripe_initialized(self) -> None:
-        """Ensure Stripe API key is initialized"""
-        if not stripe.api_key:
-            stripe_key = getattr(settings, 'STRIPE_SECRET_KEY', None)
-            if stripe_key:
-                stripe.api_key = stripe_key
-            else:
-                logger.warning("STRIPE_SECRET_KEY not configured")
+        self.gateway = gateway or stripe_gateway
 
     async def get_or_create_customer(self, user: User) -> str:
         """Get existing Stripe customer ID or create new one for user"""
@@ -47,11 +39,11 @@ class StripeService:
 
         # Create new Stripe customer
         try:
-            customer = stripe.Customer.create(
-                email=user.email,
-                name=self._format_user_name(user),
-                metadata={"user_id": str(user.id)},
-            )
+            customer = await self.gateway.create_customer({
+                "email": user.email,
+                "name": self._format_user_name(user),
+                "metadata": {"user_id": str(user.id)},
+            })
             logger.info(f"Created Stripe customer {customer.id} for user {user.id}")
             return customer.id
         except stripe.StripeError as e:
@@ -110,7 +102,7 @@ class StripeService:
                     "trial_period_days": trial_days,
                 }
 
-            session = stripe.checkout.Session.create(**session_params)
+            session = await self.gateway.create_checkout_session(session_params)
             return {
                 "session_id": session.id,
                 "url": session.url,
@@ -127,10 +119,10 @@ class StripeService:
             raise ValueError("User has no Stripe customer ID")
 
         try:
-            session = stripe.billing_portal.Session.create(
-                customer=customer_id,
-                return_url=return_url,
-            )
+            session = await self.gateway.create_portal_session({
+                "customer": customer_id,
+                "return_url": return_url,
+            })
             return {"url": session.url}
         except stripe.StripeError as e:
             logger.error(f"Stripe error creating portal session for user {user.id}: {e}")
@@ -156,9 +148,9 @@ class StripeService:
             if not subscription.stripe_subscription_id:
                 return False
 
-            stripe_subscription = stripe.Subscription.modify(
+            await self.gateway.update_subscription(
                 subscription.stripe_subscription_id,
-                cancel_at_period_end=True,
+                {"cancel_at_period_end": True},
             )
 
             return True
@@ -183,30 +175,34 @@ class StripeService:
 
         try:
             # Get current subscription to find subscription item ID
-            stripe_subscription = stripe.Subscription.retrieve(subscription.stripe_subscription_id)
+            stripe_subscription = await self.gateway.retrieve_subscription(subscription.stripe_subscription_id)
+            # "items" is also a dict method on Stripe objects: use item access
+            subscription_items = stripe_subscription["items"]["data"]
             
-            if not stripe_subscription.items.data:
+            if not subscription_items:
                 logger.error(f"No subscription items found for {subscription.stripe_subscription_id}")
                 return False
 
             # Get the subscription item ID (should be only one for our use case)
-            subscription_item_id = stripe_subscription.items.data[0].id
+            subscription_item_id = subscription_items[0]["id"]
             
             # If there are multiple items, log a warning but use the first one
-            if len(stripe_subscription.items.data) > 1:
+            if len(subscription_items) > 1:
                 logger.warning(
                     f"Subscription {subscription.stripe_subscription_id} has multiple items, "
                     f"updating first item {subscription_item_id}"
                 )
 
             # Update subscription with new price
-            stripe.Subscription.modify(
+            await self.gateway.update_subscription(
                 subscription.stripe_subscription_id,
-                items=[{
-                    "id": subscription_item_id,  # Use subscription item ID, not subscription ID
-                    "price": new_plan.stripe_price_id,
-                }],
-                proration_behavior="always_invoice",
+                {
+                    "items": [{
+                        "id": subscription_item_id,  # Use subscription item ID, not subscription ID
+                        "price": new_plan.stripe_price_id,
+                    }],
+                    "proration_behavior": "always_invoice",
+                },
             )
             logger.info(f"Updated subscription {subscription.id} to plan {new_plan.id}")
             return True
@@ -216,17 +212,14 @@ class StripeService:
             return False
 
     async def handle_webhook(self, payload: bytes, sig_header: str) -> Dict[str, Any]:
-        """Handle Stripe webhook"""
+        """Verify a Stripe webhook and return the event (id, type, created, data) as plain JSON"""
         try:
             webhook_secret = getattr(settings, 'STRIPE_WEBHOOK_SECRET', '')
-            event = stripe.Webhook.construct_event(
+            stripe.Webhook.construct_event(
                 payload, sig_header, webhook_secret
             )
 
-            return {
-                "type": event["type"],
-                "data": event["data"],
-            }
+            return json.loads(payload)
 
         except ValueError as e:
             logger.error(f"Invalid payload: {e}")
@@ -259,19 +252,19 @@ class StripeService:
             customer = None
             try:
                 # Try to find existing customer by email
-                customers = stripe.Customer.list(email=booking.attendee_email, limit=1)
+                customers = await self.gateway.list_customers({"email": booking.attendee_email, "limit": 1})
                 if customers.data:
                     customer = customers.data[0]
                 else:
                     # Create new customer
-                    customer = stripe.Customer.create(
-                        email=booking.attendee_email,
-                        name=booking.attendee_name,
-                        metadata={
+                    customer = await self.gateway.create_customer({
+                        "email": booking.attendee_email,
+                        "name": booking.attendee_name,
+                        "metadata": {
                             "booking_id": str(booking.id),
                             "booking_reference": booking.booking_reference,
                         },
-                    )
+                    })
                     logger.info(f"Created Stripe customer {customer.id} for booking {booking.id}")
             except stripe.StripeError as e:
                 logger.error(f"Error managing customer for booking {booking.id}: {e}")
@@ -293,7 +286,7 @@ class StripeService:
             if customer:
                 payment_intent_params["customer"] = customer.id
             
-            payment_intent = stripe.PaymentIntent.create(**payment_intent_params)
+            payment_intent = await self.gateway.create_payment_intent(payment_intent_params)
             
             logger.info(
                 f"Created PaymentIntent {payment_intent.id} for booking {booking.id} "
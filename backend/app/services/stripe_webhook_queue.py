@@ -0,0 +1,320 @@
+"""
+Stripe Webhook Queue
+Durable processing queue for Stripe webhook events, stored in webhook_events
+
+The webhook endpoint only verifies the signature and inserts the event with
+ON CONFLICT DO NOTHING on the Stripe event id, so concurrent deliveries of the
+same event are stored (and processed) once, and Stripe gets its 200 without
+waiting for the handlers.
+
+Background workers (STRIPE_WEBHOOK_WORKERS per process) claim events with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers across processes
+share the queue without blocking each other:
+- events sharing an ordering key (the Stripe customer, else the object id)
+  are processed one at a time in Stripe "created" order: an event is only
+  claimable when no earlier event with its key is pending or processing;
+- a failed attempt is retried with exponential backoff, up to
+  STRIPE_WEBHOOK_MAX_ATTEMPTS, then the event is marked failed (it no longer
+  holds back later events of its key);
+- a claim is a lease: an event whose worker died is claimable again after
+  STRIPE_WEBHOOK_LEASE_SECONDS.
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.webhook_event import WebhookEvent, WebhookEventStatus
+from app.services.stripe_client import LatencyHistogram
+
+# Events claimed per worker round trip
+CLAIM_BATCH_SIZE = 10
+# Longest delay between two attempts (seconds)
+RETRY_DELAY_CAP = 3600.0
+
+EventProcessor = Callable[[Dict[str, Any], AsyncSession], Awaitable[None]]
+
+PENDING = WebhookEventStatus.PENDING.value
+PROCESSING = WebhookEventStatus.PROCESSING.value
+PROCESSED = WebhookEventStatus.PROCESSED.value
+FAILED = WebhookEventStatus.FAILED.value
+
+
+def ordering_key(event: Dict[str, Any]) -> Optional[str]:
+    """Key whose events must be processed in order: the customer, else the object itself"""
+    event_object = (event.get("data") or {}).get("object") or {}
+    if event_object.get("object") == "customer":
+        return event_object.get("id")
+    customer = event_object.get("customer")
+    if isinstance(customer, dict):
+        customer = customer.get("id")
+    return customer or event_object.get("id")
+
+
+async def enqueue_event(db: AsyncSession, event: Dict[str, Any], payload: Optional[str] = None) -> bool:
+    """
+    Store a verified Stripe event for processing
+
+    Returns False if the event id was already received.
+    """
+    now = datetime.now(timezone.utc)
+    row = {
+        "stripe_event_id": event["id"],
+        "event_type": event.get("type") or "",
+        "event_data": payload if payload is not None else json.dumps(event),
+        "status": PENDING,
+        "ordering_key": ordering_key(event),
+        "stripe_created": event.get("created"),
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+    }
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        result = await db.execute(
+            upsert(WebhookEvent).values(row).on_conflict_do_nothing(index_elements=[WebhookEvent.stripe_event_id])
+        )
+        await db.commit()
+        return result.rowcount == 1
+    try:
+        await db.execute(insert(WebhookEvent).values(row))
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+        return False
+
+
+class WebhookQueueMetrics:
+    """Throughput counters and processing latency for this process"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.processing = LatencyHistogram()
+        # Time from receipt to successful processing
+        self.delay = LatencyHistogram(buckets=(0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 3600.0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "processing_seconds": self.processing.snapshot(),
+            "delay_seconds": self.delay.snapshot(),
+        }
+
+
+class WebhookQueue:
+    """Workers processing queued Stripe webhook events"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = CLAIM_BATCH_SIZE,
+        metrics: Optional[WebhookQueueMetrics] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.metrics = metrics or WebhookQueueMetrics()
+        self._processor: Optional[EventProcessor] = None
+        self._workers: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+    def start(self, processor: EventProcessor, workers: Optional[int] = None) -> None:
+        """Start processing with `processor(event, db)` (no workers when STRIPE_WEBHOOK_WORKERS is 0)"""
+        self._processor = processor
+        self._stopping = False
+        count = settings.STRIPE_WEBHOOK_WORKERS if workers is None else workers
+        for index in range(count):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+        if count:
+            logger.info(f"Started {count} Stripe webhook workers")
+
+    async def enqueue(self, db: AsyncSession, event: Dict[str, Any], payload: Optional[str] = None) -> bool:
+        """Store a verified event and wake the workers; returns False for a duplicate delivery"""
+        inserted = await enqueue_event(db, event, payload)
+        if inserted:
+            self.metrics.received += 1
+            self._wake.set()
+        else:
+            self.metrics.duplicates += 1
+        return inserted
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Let workers finish their current batch, then stop them (called on application shutdown)"""
+        self._stopping = True
+        self._wake.set()
+        workers, self._workers = self._workers, []
+        if not workers:
+            return
+        _, still_running = await asyncio.wait(workers, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stripe webhook worker {index} error: {e}")
+                processed = 0
+            if processed == 0 and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.STRIPE_WEBHOOK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._stopping:
+                    self._wake.clear()
+
+    async def run_once(self) -> int:
+        """Claim a batch of events and process it; returns the number of events claimed"""
+        if self._processor is None:
+            raise RuntimeError("WebhookQueue.start() must be called before processing")
+        async with self.session_factory() as db:
+            events = await self.claim(db, self.batch_size)
+        for event in events:
+            await self._process(event)
+        return len(events)
+
+    async def claim(self, db: AsyncSession, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to `limit` claimable events (at most one per ordering key)"""
+        now = datetime.now(timezone.utc)
+        claimable = or_(
+            and_(WebhookEvent.status == PENDING, WebhookEvent.next_attempt_at <= now),
+            and_(
+                WebhookEvent.status == PROCESSING,
+                WebhookEvent.locked_at < now - timedelta(seconds=settings.STRIPE_WEBHOOK_LEASE_SECONDS),
+            ),
+        )
+        earlier = aliased(WebhookEvent)
+        held_back = exists().where(
+            earlier.ordering_key == WebhookEvent.ordering_key,
+            earlier.status.in_([PENDING, PROCESSING]),
+            or_(
+                earlier.stripe_created < WebhookEvent.stripe_created,
+                and_(earlier.stripe_created == WebhookEvent.stripe_created, earlier.id < WebhookEvent.id),
+            ),
+        )
+        ids = (await db.execute(
+            select(WebhookEvent.id)
+            .where(claimable, ~held_back)
+            .order_by(WebhookEvent.stripe_created, WebhookEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        if not ids:
+            await db.rollback()
+            return []
+        # Claimability is checked again: without row locks (SQLite) another
+        # worker may have claimed some of these rows since the select
+        rows = (await db.execute(
+            update(WebhookEvent)
+            .where(WebhookEvent.id.in_(ids), claimable)
+            .values(status=PROCESSING, locked_at=now, attempts=WebhookEvent.attempts + 1)
+            .returning(WebhookEvent.id, WebhookEvent.event_data, WebhookEvent.attempts, WebhookEvent.created_at)
+        )).all()
+        await db.commit()
+        return sorted(
+            ({"id": row.id, "event_data": row.event_data, "attempts": row.attempts, "created_at": row.created_at}
+             for row in rows),
+            key=lambda claimed: ids.index(claimed["id"]),
+        )
+
+    async def _process(self, claimed: Dict[str, Any]) -> None:
+        start_time = time.perf_counter()
+        try:
+            event = json.loads(claimed["event_data"])
+            async with self.session_factory() as db:
+                await self._processor(event, db)
+        except asyncio.CancelledError:
+            # Left as processing: claimable again when the lease expires
+            raise
+        except Exception as e:
+            self.metrics.processing.observe(time.perf_counter() - start_time, error=True)
+            await self._record_failure(claimed, e)
+            return
+        self.metrics.processing.observe(time.perf_counter() - start_time)
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id == claimed["id"])
+                .values(status=PROCESSED, processed_at=now, locked_at=None, last_error=None)
+            )
+            await db.commit()
+        self.metrics.processed += 1
+        created_at = claimed["created_at"]
+        if created_at is not None:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            self.metrics.delay.observe(max(0.0, (now - created_at).total_seconds()))
+
+    async def _record_failure(self, claimed: Dict[str, Any], error: Exception) -> None:
+        attempts = claimed["attempts"]
+        values: Dict[str, Any] = {"locked_at": None, "last_error": f"{type(error).__name__}: {error}"[:2000]}
+        if attempts >= settings.STRIPE_WEBHOOK_MAX_ATTEMPTS:
+            values["status"] = FAILED
+            self.metrics.failed += 1
+            logger.error(f"Stripe webhook event {claimed['id']} failed after {attempts} attempts: {error}")
+        else:
+            delay = min(RETRY_DELAY_CAP, settings.STRIPE_WEBHOOK_RETRY_BASE * 2 ** (attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            values["status"] = PENDING
+            values["next_attempt_at"] = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            self.metrics.retried += 1
+            logger.warning(f"Stripe webhook event {claimed['id']} attempt {attempts} failed ({error}), retry in {delay:.0f}s")
+        async with self.session_factory() as db:
+            await db.execute(update(WebhookEvent).where(WebhookEvent.id == claimed["id"]).values(**values))
+            await db.commit()
+
+    async def backlog(self, db: AsyncSession) -> Dict[str, Any]:
+        """Queue depth by status and age of the oldest unprocessed event"""
+        counts = dict((await db.execute(
+            select(WebhookEvent.status, func.count())
+            .where(WebhookEvent.status != PROCESSED)
+            .group_by(WebhookEvent.status)
+        )).all())
+        oldest = (await db.execute(
+            select(func.min(WebhookEvent.created_at)).where(WebhookEvent.status.in_([PENDING, PROCESSING]))
+        )).scalar()
+        oldest_age = None
+        if oldest is not None:
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            oldest_age = round(max(0.0, (datetime.now(timezone.utc) - oldest).total_seconds()), 3)
+        return {
+            "pending": counts.get(PENDING, 0),
+            "processing": counts.get(PROCESSING, 0),
+            "failed": counts.get(FAILED, 0),
+            "oldest_pending_age_seconds": oldest_age,
+        }
+
+
+stripe_webhook_queue = WebhookQueue()
@@ -10,6 +10,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models.tag import Tag, Category, EntityTag
 from app.core.logging import logger
+from app.services.post_listing_cache import post_listing_cache
 import re
 
 
@@ -297,6 +298,8 @@ class CategoryService:
         
         await self.db.commit()
         await self.db.refresh(category)
+        # Post listings show category names and filter by slug
+        await post_listing_cache.invalidate()
         
         return category
 
@@ -318,6 +321,7 @@ class CategoryService:
         
         await self.db.delete(category)
         await self.db.commit()
+        await post_listing_cache.invalidate()
         
         return True
 
@@ -0,0 +1,485 @@
+"""
+Scheduled Task Executor
+Runs due scheduled_tasks rows, in every process, without running a task twice
+
+Each process runs one executor loop with up to SCHEDULED_TASK_CONCURRENCY
+tasks in flight. The loop claims due tasks in batches with
+SELECT ... FOR UPDATE SKIP LOCKED, so executors in any number of processes
+share the table without waiting on each other, and marks them running under
+a lease (locked_by / locked_at):
+- the lease is renewed while the task runs; a task whose executor died is
+  claimable again once its lease is SCHEDULED_TASK_LEASE_SECONDS old, and an
+  executor that lost its lease cancels the task instead of finishing it;
+- completion updates are fenced on locked_by, so only the lease holder can
+  record a result;
+- a failed attempt is retried with exponential backoff up to
+  SCHEDULED_TASK_MAX_ATTEMPTS (handlers raise NonRetryableTaskError to fail
+  at once);
+- a recurring task keeps its row: it is rescheduled to its next occurrence
+  (hourly, daily, weekly, monthly or a cron expression), skipping occurrences
+  missed while nothing was running. Every run is recorded in
+  task_execution_logs.
+
+Handlers are registered per task type with register_task_handler; a CUSTOM
+task names its handler in task_data["handler"].
+"""
+
+import asyncio
+import calendar
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.scheduled_task import ScheduledTask, TaskExecutionLog, TaskStatus, TaskType
+from app.services.stripe_client import LatencyHistogram
+from app.utils.cron import CronError, CronExpression
+
+# Longest delay between two attempts (seconds)
+RETRY_DELAY_CAP = 3600.0
+# Histogram buckets for task durations and start lag (seconds)
+TASK_BUCKETS = (0.1, 1.0, 5.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+RECURRENCE_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+
+class NonRetryableTaskError(Exception):
+    """Raised by a task handler for a failure that retrying will not fix"""
+
+
+@dataclass
+class ClaimedTask:
+    """A task leased by this executor"""
+    id: int
+    name: str
+    task_type: TaskType
+    task_data: Dict[str, Any]
+    recurrence: Optional[str]
+    recurrence_config: Optional[Dict[str, Any]]
+    scheduled_at: datetime
+    due_at: datetime
+    attempts: int
+    user_id: Optional[int]
+
+
+TaskHandler = Callable[[ClaimedTask], Awaitable[Optional[Dict[str, Any]]]]
+
+_handlers: Dict[str, TaskHandler] = {}
+
+
+def register_task_handler(key: Union[TaskType, str], handler: TaskHandler) -> None:
+    """Register the handler of a task type, or of a named CUSTOM task"""
+    _handlers[key.value if isinstance(key, TaskType) else key] = handler
+
+
+def task_handler(key: Union[TaskType, str]) -> Callable[[TaskHandler], TaskHandler]:
+    """Decorator form of register_task_handler"""
+    def decorator(handler: TaskHandler) -> TaskHandler:
+        register_task_handler(key, handler)
+        return handler
+    return decorator
+
+
+def get_task_handler(task: ClaimedTask) -> TaskHandler:
+    key = task.task_data.get("handler") if task.task_type == TaskType.CUSTOM else task.task_type.value
+    handler = _handlers.get(key) if key else None
+    if handler is None:
+        raise NonRetryableTaskError(f"No handler registered for {task.task_type.value} task '{key}'")
+    return handler
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def validate_recurrence(recurrence: Optional[str], recurrence_config: Optional[Dict[str, Any]]) -> None:
+    """Raise ValueError (CronError for cron expressions) for an unsupported recurrence"""
+    if recurrence is None:
+        return
+    if recurrence == "cron":
+        config = recurrence_config or {}
+        if not config.get("expression"):
+            raise CronError("Cron recurrence requires recurrence_config.expression")
+        CronExpression(config["expression"], config.get("timezone"))
+    elif recurrence != "monthly" and recurrence not in RECURRENCE_INTERVALS:
+        raise ValueError(f"Unsupported recurrence '{recurrence}'")
+
+
+def next_occurrence(
+    recurrence: Optional[str],
+    recurrence_config: Optional[Dict[str, Any]],
+    scheduled_at: datetime,
+    now: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Next occurrence after `now` of a task last scheduled at `scheduled_at` (None if not recurring)"""
+    if not recurrence:
+        return None
+    now = _as_utc(now or datetime.now(timezone.utc))
+    scheduled_at = _as_utc(scheduled_at)
+    if recurrence == "cron":
+        config = recurrence_config or {}
+        return CronExpression(config.get("expression", ""), config.get("timezone")).next_after(max(now, scheduled_at))
+    if recurrence == "monthly":
+        months = 1
+        while _add_months(scheduled_at, months) <= now:
+            months += 1
+        return _add_months(scheduled_at, months)
+    interval = RECURRENCE_INTERVALS.get(recurrence)
+    if interval is None:
+        raise ValueError(f"Unsupported recurrence '{recurrence}'")
+    # Skip the occurrences missed while nothing ran
+    missed = max(0, int((now - scheduled_at) / interval))
+    return scheduled_at + interval * (missed + 1)
+
+
+class TaskExecutorMetrics:
+    """Execution counters and latencies for this process"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.lease_lost = 0
+        self.duration = LatencyHistogram(buckets=TASK_BUCKETS)
+        # Delay between the time a task was due and the time it started
+        self.lag = LatencyHistogram(buckets=TASK_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "lease_lost": self.lease_lost,
+            "duration_seconds": self.duration.snapshot(),
+            "lag_seconds": self.lag.snapshot(),
+        }
+
+
+class TaskExecutor:
+    """Claims and runs due scheduled tasks"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        concurrency: Optional[int] = None,
+        metrics: Optional[TaskExecutorMetrics] = None,
+    ):
+        self.session_factory = session_factory
+        self._concurrency = concurrency
+        self.metrics = metrics or TaskExecutorMetrics()
+        self.instance_id = f"{socket.gethostname()[:60]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency if self._concurrency is not None else settings.SCHEDULED_TASK_CONCURRENCY
+
+    def start(self) -> None:
+        """Start the executor loop (not started when SCHEDULED_TASK_CONCURRENCY is 0)"""
+        if self.concurrency <= 0 or self._loop_task is not None:
+            return
+        self._stop.clear()
+        self._loop_task = asyncio.create_task(self._loop())
+        logger.info(f"Scheduled task executor {self.instance_id} started ({self.concurrency} concurrent tasks)")
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop claiming, give running tasks `timeout` seconds, then cancel them (their leases expire)"""
+        self._stop.set()
+        if self._loop_task is not None:
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self._running:
+            _, still_running = await asyncio.wait(self._running, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while not self._stop.is_set():
+            free = self.concurrency - len(self._running)
+            claimed: List[ClaimedTask] = []
+            if free > 0:
+                try:
+                    claimed = await self.claim(free)
+                except Exception as e:
+                    logger.warning(f"Scheduled task claim failed: {e}")
+            for task in claimed:
+                execution = asyncio.create_task(self.execute(task))
+                self._running.add(execution)
+                execution.add_done_callback(self._running.discard)
+            if len(self._running) >= self.concurrency:
+                # Full: wait for a slot, or for shutdown (which times running tasks out)
+                stopping = asyncio.create_task(self._stop.wait())
+                try:
+                    await asyncio.wait({stopping, *self._running}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    stopping.cancel()
+            elif len(claimed) < free:
+                # Nothing else due: poll again later
+                try:
+                    await asyncio.wait_for(self._stop.wait(), settings.SCHEDULED_TASK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self, limit: Optional[int] = None) -> int:
+        """Claim due tasks and run them to completion; returns the number of tasks run"""
+        claimed = await self.claim(limit or max(1, self.concurrency))
+        await asyncio.gather(*[self.execute(task) for task in claimed])
+        return len(claimed)
+
+    def _claimable(self, now: datetime):
+        lease_expired = now - timedelta(seconds=settings.SCHEDULED_TASK_LEASE_SECONDS)
+        return or_(
+            and_(
+                ScheduledTask.status == TaskStatus.PENDING,
+                ScheduledTask.scheduled_at <= now,
+                or_(ScheduledTask.next_attempt_at.is_(None), ScheduledTask.next_attempt_at <= now),
+            ),
+            and_(ScheduledTask.status == TaskStatus.RUNNING, ScheduledTask.locked_at < lease_expired),
+        )
+
+    async def claim(self, limit: int) -> List[ClaimedTask]:
+        """Lease up to `limit` due tasks"""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            ids = (await db.execute(
+                select(ScheduledTask.id)
+                .where(self._claimable(now))
+                .order_by(ScheduledTask.scheduled_at, ScheduledTask.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not ids:
+                await db.rollback()
+                return []
+            # Claimability is checked again: without row locks (SQLite) another
+            # executor may have claimed some of these rows since the select
+            rows = (await db.execute(
+                update(ScheduledTask)
+                .where(ScheduledTask.id.in_(ids), self._claimable(now))
+                .values(
+                    status=TaskStatus.RUNNING,
+                    started_at=now,
+                    locked_at=now,
+                    locked_by=self.instance_id,
+                    attempts=ScheduledTask.attempts + 1,
+                )
+                .returning(
+                    ScheduledTask.id, ScheduledTask.name, ScheduledTask.task_type, ScheduledTask.task_data,
+                    ScheduledTask.recurrence, ScheduledTask.recurrence_config, ScheduledTask.scheduled_at,
+                    ScheduledTask.next_attempt_at, ScheduledTask.attempts, ScheduledTask.user_id,
+                )
+            )).all()
+            await db.commit()
+        self.metrics.claimed += len(rows)
+        claimed = []
+        for row in sorted(rows, key=lambda r: ids.index(r.id)):
+            scheduled_at = _as_utc(row.scheduled_at)
+            due_at = max(scheduled_at, _as_utc(row.next_attempt_at)) if row.next_attempt_at else scheduled_at
+            claimed.append(ClaimedTask(
+                id=row.id, name=row.name, task_type=row.task_type, task_data=row.task_data or {},
+                recurrence=row.recurrence, recurrence_config=row.recurrence_config,
+                scheduled_at=scheduled_at, due_at=due_at, attempts=row.attempts, user_id=row.user_id,
+            ))
+        return claimed
+
+    async def execute(self, task: ClaimedTask) -> None:
+        """Run a claimed task and record the outcome"""
+        started_at = datetime.now(timezone.utc)
+        self.metrics.lag.observe(max(0.0, (started_at - task.due_at).total_seconds()))
+        start_time = time.perf_counter()
+        run = asyncio.create_task(self._run_handler(task))
+        heartbeat = asyncio.create_task(self._heartbeat(task, run))
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[BaseException] = None
+        try:
+            result = await run
+        except asyncio.CancelledError:
+            if not heartbeat.done() or heartbeat.result() is not False:
+                raise
+            # Lease lost: another executor owns the task now
+            self.metrics.lease_lost += 1
+            logger.warning(f"Scheduled task {task.id} lost its lease and was cancelled")
+            return
+        except Exception as e:
+            error = e
+        finally:
+            if not heartbeat.done():
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+        duration = time.perf_counter() - start_time
+        self.metrics.duration.observe(duration, error=error is not None)
+        try:
+            await self._finish(task, started_at, result, error)
+        except Exception as e:
+            logger.error(f"Could not record the outcome of scheduled task {task.id}: {e}")
+
+    async def _run_handler(self, task: ClaimedTask) -> Optional[Dict[str, Any]]:
+        handler = get_task_handler(task)
+        try:
+            return await asyncio.wait_for(handler(task), settings.SCHEDULED_TASK_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Task timed out after {settings.SCHEDULED_TASK_TIMEOUT:.0f}s") from None
+
+    async def _heartbeat(self, task: ClaimedTask, run: asyncio.Task) -> bool:
+        """Renew the lease while the task runs; cancels it and returns False if the lease was lost"""
+        interval = settings.SCHEDULED_TASK_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self.session_factory() as db:
+                    renewed = (await db.execute(
+                        update(ScheduledTask)
+                        .where(
+                            ScheduledTask.id == task.id,
+                            ScheduledTask.locked_by == self.instance_id,
+                            ScheduledTask.status == TaskStatus.RUNNING,
+                        )
+                        .values(locked_at=datetime.now(timezone.utc))
+                    )).rowcount
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of scheduled task {task.id}: {e}")
+                continue
+            if renewed == 0:
+                run.cancel()
+                return False
+
+    async def _finish(
+        self,
+        task: ClaimedTask,
+        started_at: datetime,
+        result: Optional[Dict[str, Any]],
+        error: Optional[BaseException],
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        values: Dict[str, Any] = {"locked_at": None, "locked_by": None, "next_attempt_at": None}
+        retry = (
+            error is not None
+            and not isinstance(error, NonRetryableTaskError)
+            and task.attempts < settings.SCHEDULED_TASK_MAX_ATTEMPTS
+        )
+        if retry:
+            delay = min(RETRY_DELAY_CAP, settings.SCHEDULED_TASK_RETRY_BASE * 2 ** (task.attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            values.update(status=TaskStatus.PENDING, next_attempt_at=now + timedelta(seconds=delay),
+                          error_message=str(error)[:2000])
+            self.metrics.retried += 1
+            logger.warning(f"Scheduled task {task.id} attempt {task.attempts} failed ({error}), retry in {delay:.0f}s")
+        else:
+            if error is None:
+                values.update(error_message=None, result_data=result)
+                self.metrics.succeeded += 1
+            else:
+                values.update(error_message=str(error)[:2000])
+                self.metrics.failed += 1
+                logger.error(f"Scheduled task {task.id} failed after {task.attempts} attempts: {error}")
+            try:
+                next_run = next_occurrence(task.recurrence, task.recurrence_config, task.scheduled_at, now)
+            except ValueError as e:
+                logger.error(f"Scheduled task {task.id} has an invalid recurrence: {e}")
+                next_run = None
+            values["completed_at"] = now
+            if next_run is not None:
+                # Recurring: the same row waits for its next occurrence
+                values.update(status=TaskStatus.PENDING, scheduled_at=next_run, attempts=0)
+            else:
+                values["status"] = TaskStatus.COMPLETED if error is None else TaskStatus.FAILED
+
+        async with self.session_factory() as db:
+            recorded = (await db.execute(
+                update(ScheduledTask)
+                .where(
+                    ScheduledTask.id == task.id,
+                    ScheduledTask.locked_by == self.instance_id,
+                    ScheduledTask.status == TaskStatus.RUNNING,
+                )
+                .values(**values)
+            )).rowcount
+            if recorded == 0:
+                await db.rollback()
+                self.metrics.lease_lost += 1
+                logger.warning(f"Scheduled task {task.id} finished after losing its lease; outcome not recorded")
+                return
+            await db.execute(insert(TaskExecutionLog).values(
+                task_id=task.id,
+                status=TaskStatus.COMPLETED if error is None else TaskStatus.FAILED,
+                started_at=started_at,
+                completed_at=now,
+                duration_seconds=int((now - started_at).total_seconds()),
+                error_message=str(error)[:2000] if error is not None else None,
+                result_data=result if error is None else None,
+            ))
+            await db.commit()
+
+    async def backlog(self, db: AsyncSession) -> Dict[str, Any]:
+        """Due, retrying and running task counts, and how late the oldest due task is"""
+        now = datetime.now(timezone.utc)
+        due = and_(
+            ScheduledTask.status == TaskStatus.PENDING,
+            ScheduledTask.scheduled_at <= now,
+            or_(ScheduledTask.next_attempt_at.is_(None), ScheduledTask.next_attempt_at <= now),
+        )
+        due_count, oldest_due = (await db.execute(
+            select(func.count(), func.min(ScheduledTask.scheduled_at)).where(due)
+        )).one()
+        retrying = (await db.execute(
+            select(func.count()).where(ScheduledTask.status == TaskStatus.PENDING, ScheduledTask.next_attempt_at > now)
+        )).scalar()
+        running = (await db.execute(
+            select(func.count()).where(ScheduledTask.status == TaskStatus.RUNNING)
+        )).scalar()
+        return {
+            "due": due_count,
+            "retrying": retrying,
+            "running": running,
+            "max_lag_seconds": round((now - _as_utc(oldest_due)).total_seconds(), 3) if oldest_due else None,
+        }
+
+
+@task_handler(TaskType.EMAIL)
+async def send_email_task(task: ClaimedTask) -> Dict[str, Any]:
+    """task_data: to_email, subject, html_content and optionally text_content"""
+    from app.services.email_service import EmailService
+
+    data = task.task_data
+    missing = [key for key in ("to_email", "subject", "html_content") if not data.get(key)]
+    if missing:
+        raise NonRetryableTaskError(f"Missing task_data fields: {', '.join(missing)}")
+    email_service = EmailService()
+    if not email_service.is_configured():
+        raise NonRetryableTaskError("Email service not configured")
+    # SendGrid's client is blocking
+    return await asyncio.to_thread(
+        email_service.send_email, data["to_email"], data["subject"], data["html_content"], data.get("text_content")
+    )
+
+
+task_executor = TaskExecutor()
@@ -0,0 +1,211 @@
+"""
+Template Renderer
+Compiled template rendering shared by TemplateService and EmailTemplateService
+
+A template is parsed once into a render plan: a list of literal segments and
+placeholders. Rendering is a single pass over the plan, so the cost no longer
+grows with the number of variables, and substituted values are never
+re-scanned for placeholders. Plans are cached per template and recompiled when
+the template's updated_at changes.
+
+Template usage counters are buffered in memory and flushed to the database in
+batches instead of committing on every render.
+"""
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from sqlalchemy import update
+
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.template import Template
+
+# {{name}} or {name} (generic templates), {{name}} only (email templates)
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([^{}]+)\}\}|\{([^{}]+)\}')
+DOUBLE_BRACE_PATTERN = re.compile(r'\{\{([^{}]+)\}\}')
+
+# Maximum number of compiled plans kept in memory
+PLAN_CACHE_SIZE = 1024
+
+# Usage counters are flushed when this many renders are pending...
+USAGE_FLUSH_THRESHOLD = 100
+# ...or when the oldest pending render is older than this (seconds)
+USAGE_FLUSH_INTERVAL = 30.0
+
+
+class RenderPlan:
+    """
+    Compiled template
+
+    `parts` alternates literals and placeholders: even indexes are literal
+    text, odd indexes are (variable name, original placeholder text).
+    """
+
+    __slots__ = ('parts', 'variables')
+
+    def __init__(self, source: str, double_brace_only: bool = False):
+        pattern = DOUBLE_BRACE_PATTERN if double_brace_only else PLACEHOLDER_PATTERN
+        parts: List[Union[str, Tuple[str, str]]] = []
+        position = 0
+        for match in pattern.finditer(source):
+            name = match.group(1) if match.group(1) is not None else match.group(2)
+            parts.append(source[position:match.start()])
+            parts.append((name, match.group(0)))
+            position = match.end()
+        parts.append(source[position:])
+        self.parts = parts
+        self.variables = frozenset(name for name, _ in parts[1::2])
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        """Render the plan; placeholders without a value are left untouched"""
+        parts = self.parts
+        if len(parts) == 1:
+            return parts[0]
+        output = [parts[0]]
+        for index in range(1, len(parts), 2):
+            name, placeholder = parts[index]
+            if name in variables:
+                value = variables[name]
+                output.append(value if isinstance(value, str) else str(value))
+            else:
+                output.append(placeholder)
+            output.append(parts[index + 1])
+        return ''.join(output)
+
+
+class RenderPlanCache:
+    """LRU cache of render plans, invalidated by the template's updated_at"""
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._plans: "OrderedDict[Hashable, Tuple[datetime, RenderPlan]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        key: Hashable,
+        updated_at: Optional[datetime],
+        source: Optional[str],
+        double_brace_only: bool = False,
+    ) -> RenderPlan:
+        """Get the plan for `key`, compiling it if missing or outdated"""
+        entry = self._plans.get(key)
+        if entry is not None and updated_at is not None and entry[0] == updated_at:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        plan = RenderPlan(source or '', double_brace_only=double_brace_only)
+        if updated_at is not None:
+            # Objects not flushed yet have no version and are never cached
+            self._plans[key] = (updated_at, plan)
+            self._plans.move_to_end(key)
+            if len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, *key_prefix: Hashable) -> None:
+        """Drop every plan whose key starts with `key_prefix`"""
+        size = len(key_prefix)
+        for key in [k for k in self._plans if k[:size] == key_prefix]:
+            del self._plans[key]
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+
+class UsageCounter:
+    """
+    Buffered template usage counters
+
+    Renders are counted in memory and written with one
+    `UPDATE ... SET usage_count = usage_count + n` per template, either when
+    enough renders are pending or when the oldest one is old enough.
+    Counts still pending when a worker is killed are lost, which is
+    acceptable for a popularity counter.
+    """
+
+    def __init__(
+        self,
+        threshold: int = USAGE_FLUSH_THRESHOLD,
+        interval: float = USAGE_FLUSH_INTERVAL,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self._pending: Dict[int, int] = {}
+        self._pending_total = 0
+        self._first_pending_at: Optional[float] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> Dict[int, int]:
+        return dict(self._pending)
+
+    def record(self, template_id: int, count: int = 1) -> None:
+        """Count renders of a template and schedule a flush when due"""
+        if count <= 0:
+            return
+        self._pending[template_id] = self._pending.get(template_id, 0) + count
+        self._pending_total += count
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+        due = (
+            self._pending_total >= self.threshold
+            or time.monotonic() - self._first_pending_at >= self.interval
+        )
+        if due and (self._flush_task is None or self._flush_task.done()):
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                # No running loop (sync caller): the next flush will pick it up
+                pass
+
+    async def flush(self) -> int:
+        """Write pending counters; returns the number of renders flushed"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+            self._first_pending_at = None
+            try:
+                async with AsyncSessionLocal() as session:
+                    for template_id, count in sorted(pending.items()):
+                        await session.execute(
+                            update(Template)
+                            .where(Template.id == template_id)
+                            # updated_at is kept as is: it versions the content, not the counters
+                            .values(usage_count=Template.usage_count + count, updated_at=Template.updated_at)
+                            .execution_options(synchronize_session=False)
+                        )
+                    await session.commit()
+            except Exception as e:
+                # Put the counts back so they are retried with the next flush
+                for template_id, count in pending.items():
+                    self._pending[template_id] = self._pending.get(template_id, 0) + count
+                    self._pending_total += count
+                if self._first_pending_at is None:
+                    self._first_pending_at = time.monotonic()
+                logger.warning(f"Failed to flush template usage counters: {e}")
+                return 0
+            return sum(pending.values())
+
+    async def shutdown(self) -> None:
+        """Flush remaining counters (called on application shutdown)"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+
+# Global instances
+plan_cache = RenderPlanCache()
+usage_counter = UsageCounter()
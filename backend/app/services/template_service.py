@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import re
 
 from app.models.template import Template, TemplateVariable
+from app.services.template_renderer import plan_cache, usage_counter
 from app.core.logging import logger
 
 
@@ -136,21 +137,30 @@ class TemplateService:
         user_id: Optional[int] = None
     ) -> str:
         """Render a template with provided variables"""
+        rendered = await self.render_many(template_id, [variables], user_id)
+        return rendered[0]
+
+    async def render_many(
+        self,
+        template_id: int,
+        variables_list: List[Dict[str, Any]],
+        user_id: Optional[int] = None
+    ) -> List[str]:
+        """
+        Render a template once per set of variables (mass mailings)
+
+        The template is loaded and compiled once; {{variable}} and {variable}
+        placeholders are substituted in a single pass. Usage is counted in
+        the buffered usage counter instead of being committed per render.
+        """
         template = await self.get_template(template_id, user_id)
         if not template:
             raise ValueError("Template not found or access denied")
-        
-        # Increment usage count
-        template.usage_count += 1
-        await self.db.commit()
-        
-        # Simple variable substitution
-        rendered = template.content
-        for key, value in variables.items():
-            # Replace {{variable}} or {variable} patterns
-            rendered = re.sub(r'\{\{' + re.escape(key) + r'\}\}', str(value), rendered)
-            rendered = re.sub(r'\{' + re.escape(key) + r'\}', str(value), rendered)
-        
+
+        plan = plan_cache.get(('template', template.id), template.updated_at, template.content)
+        rendered = [plan.render(variables) for variables in variables_list]
+
+        usage_counter.record(template.id, len(rendered))
         return rendered
 
     async def update_template(
@@ -199,6 +209,7 @@ class TemplateService:
         
         await self.db.delete(template)
         await self.db.commit()
+        plan_cache.invalidate('template', template_id)
         
         return True
 
@@ -0,0 +1,230 @@
+"""
+WebSocket Broker
+Cluster-wide fan-out for WebSocket messages.
+
+Every process holds a single Redis pub/sub connection and subscribes only to
+the channels it has local sockets for:
+- ws:user:{user_id}   messages for one user
+- ws:room:{room_id}   messages for one room
+- ws:broadcast        messages for everyone
+
+A message is delivered to local sockets right away and published to Redis for
+the other processes (which ignore their own messages). Envelopes carry the
+message already encoded ("text"), so it is serialized once for the cluster.
+Presence counts are kept per process in Redis hashes refreshed by a
+heartbeat, so a crashed process drops out of the totals when its hash expires.
+
+Without Redis, LocalBroker keeps the previous single-process behaviour.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+from app.core.config import settings
+from app.core.logging import logger
+
+USER_CHANNEL = "ws:user:"
+ROOM_CHANNEL = "ws:room:"
+BROADCAST_CHANNEL = "ws:broadcast"
+
+PRESENCE_NODES_KEY = "ws:presence:nodes"
+PRESENCE_NODE_KEY = "ws:presence:node:"
+# A process is considered gone when it has not refreshed its presence for this long
+PRESENCE_TTL = 60
+HEARTBEAT_INTERVAL = 20
+
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def user_channel(user_id: str) -> str:
+    return f"{USER_CHANNEL}{user_id}"
+
+
+def room_channel(room_id: str) -> str:
+    return f"{ROOM_CHANNEL}{room_id}"
+
+
+class LocalBroker:
+    """Single-process broker: nothing leaves the process"""
+
+    distributed = False
+
+    def __init__(self):
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._presence: Dict[str, int] = {}
+
+    async def start(self, handler: MessageHandler) -> None:
+        pass
+
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    async def unsubscribe(self, channel: str) -> None:
+        pass
+
+    async def publish(self, channel: str, envelope: Dict[str, Any]) -> None:
+        pass
+
+    async def presence_incr(self, field: str, delta: int) -> None:
+        count = self._presence.get(field, 0) + delta
+        if count > 0:
+            self._presence[field] = count
+        else:
+            self._presence.pop(field, None)
+
+    async def presence(self, field: str) -> int:
+        return self._presence.get(field, 0)
+
+    async def close(self) -> None:
+        self._presence.clear()
+
+
+class RedisBroker:
+    """Redis pub/sub broker (one subscription connection per process)"""
+
+    distributed = True
+
+    def __init__(self, redis_url: str, node_id: Optional[str] = None):
+        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._presence_key = f"{PRESENCE_NODE_KEY}{self.node_id}"
+        self._pubsub = None
+        self._handler: Optional[MessageHandler] = None
+        self._tasks = []
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(BROADCAST_CHANNEL)
+        await self._heartbeat()
+        self._tasks = [
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+        ]
+        logger.info(f"WebSocket broker started on Redis (node {self.node_id})")
+
+    async def subscribe(self, channel: str) -> None:
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, envelope: Dict[str, Any]) -> None:
+        await self.redis_client.publish(channel, json.dumps(envelope, default=str))
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                envelope = json.loads(message["data"])
+                if envelope.get("origin") == self.node_id:
+                    # Already delivered locally when it was published
+                    continue
+                await self._handler(message["channel"], envelope)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket broker read error: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _heartbeat(self) -> None:
+        now = time.time()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(PRESENCE_NODES_KEY, {self.node_id: now})
+            pipe.zremrangebyscore(PRESENCE_NODES_KEY, "-inf", now - PRESENCE_TTL)
+            pipe.expire(self._presence_key, PRESENCE_TTL)
+            await pipe.execute()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self._heartbeat()
+            except Exception as e:
+                logger.warning(f"WebSocket presence heartbeat failed: {e}")
+
+    async def presence_incr(self, field: str, delta: int) -> None:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(self._presence_key, field, delta)
+            pipe.expire(self._presence_key, PRESENCE_TTL)
+            count, _ = await pipe.execute()
+        if count <= 0:
+            await self.redis_client.hdel(self._presence_key, field)
+
+    async def presence(self, field: str) -> int:
+        """Connections for `field` across every live process"""
+        nodes = await self.redis_client.zrangebyscore(PRESENCE_NODES_KEY, time.time() - PRESENCE_TTL, "+inf")
+        if not nodes:
+            return 0
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for node in nodes:
+                pipe.hget(f"{PRESENCE_NODE_KEY}{node}", field)
+            counts = await pipe.execute()
+        return sum(int(count) for count in counts if count)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(self._presence_key)
+                pipe.zrem(PRESENCE_NODES_KEY, self.node_id)
+                await pipe.execute()
+            if self._pubsub is not None:
+                await self._pubsub.close()
+        finally:
+            await self.redis_client.close()
+
+
+def create_broker():
+    """Pick the Redis broker when configured, otherwise the local broker"""
+    if REDIS_AVAILABLE and settings.REDIS_URL:
+        try:
+            return RedisBroker(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Failed to initialize Redis WebSocket broker: {e}")
+    logger.info("Using local WebSocket broker (Redis not configured)")
+    return LocalBroker()
+
+
+def publish_to_user_sync(user_id: str, message: Dict[str, Any]) -> bool:
+    """
+    Publish a message for a user from synchronous code (e.g. Celery tasks)
+
+    Returns False when Redis is not configured: without a broker a worker
+    process cannot reach sockets held by the web processes.
+    """
+    if not (REDIS_AVAILABLE and settings.REDIS_URL):
+        return False
+    import redis as redis_sync
+
+    client = redis_sync.from_url(settings.REDIS_URL)
+    try:
+        envelope = {
+            "origin": f"{socket.gethostname()}:{os.getpid()}:sync",
+            "text": json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str),
+        }
+        client.publish(user_channel(str(user_id)), json.dumps(envelope, default=str))
+        return True
+    finally:
+        client.close()
@@ -0,0 +1,129 @@
+"""
+WebSocket Writer
+Per-connection bounded outbound queues for WebSocket delivery.
+
+Fan-out only enqueues the (already encoded) message on each connection; a
+writer task per connection drains its queue. A slow or stalled client only
+fills its own queue, and when the queue is full the slow consumer policy
+applies:
+- "disconnect": the connection is closed (1013 Try Again Later), the client
+  is expected to reconnect and resync
+- "drop": the oldest queued message is dropped
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from app.core.logging import logger
+
+SLOW_CONSUMER_POLICIES = ("disconnect", "drop")
+
+# Close code sent to clients disconnected for being too slow
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode_message(message: Any) -> str:
+    """Encode a message once for every recipient (same format as send_json)"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class WriterMetrics:
+    """Counters shared by every writer of a manager"""
+
+    def __init__(self):
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.slow_consumers_disconnected = 0
+        self.send_errors = 0
+        self.queue_high_water = 0
+
+
+class ConnectionWriter:
+    """Outbound queue and writer task for one WebSocket"""
+
+    def __init__(
+        self,
+        websocket: Any,
+        max_queue: int,
+        policy: str,
+        metrics: WriterMetrics,
+        on_lost: Callable[["ConnectionWriter", bool], Awaitable[None]],
+        user_id: Optional[str] = None,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.user_id = user_id
+        self.rooms: Set[str] = set()
+        self.policy = policy
+        self.high_water = 0
+        self.dropped = 0
+        self.closed = False
+        self._metrics = metrics
+        self._on_lost = on_lost
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(self, text: str) -> bool:
+        """Queue an encoded message without waiting; False if the connection was dropped"""
+        if self.closed:
+            return False
+        if self._queue.full():
+            if self.policy == "drop":
+                self._queue.get_nowait()
+                self.dropped += 1
+                self._metrics.messages_dropped += 1
+            else:
+                self._metrics.slow_consumers_disconnected += 1
+                logger.warning(
+                    f"Disconnecting slow WebSocket consumer (user_id={self.user_id}, "
+                    f"{self._queue.qsize()} messages queued)"
+                )
+                self._lose(slow=True)
+                return False
+        self._queue.put_nowait(text)
+        size = self._queue.qsize()
+        if size > self.high_water:
+            self.high_water = size
+            if size > self._metrics.queue_high_water:
+                self._metrics.queue_high_water = size
+        return True
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            text = await queue.get()
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                self._metrics.send_errors += 1
+                logger.debug(f"WebSocket send failed (user_id={self.user_id}): {e}")
+                self._lose(slow=False)
+                return
+            self._metrics.messages_sent += 1
+
+    def _lose(self, slow: bool) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        asyncio.create_task(self._on_lost(self, slow))
+
+    async def close(self, code: Optional[int] = None) -> None:
+        """Stop the writer task (and close the socket with `code` if given)"""
+        self.closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if code is not None:
+            try:
+                await self.websocket.close(code=code)
+            except Exception:
+                pass
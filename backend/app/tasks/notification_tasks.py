@@ -140,48 +140,41 @@ def send_notification_task(
                     # Don't fail the whole task if email fails
         
             # Send WebSocket notification if user is connected
-            # NOTE: This is a best-effort attempt, WebSocket may not be available in Celery context
-            # WebSocket connections are managed in the main application context
+            # Published through the WebSocket broker (Redis) so it reaches the
+            # web process holding the user's sockets; best effort
             try:
-                from app.api.v1.endpoints.websocket import manager
-                # Try to send via WebSocket (non-blocking)
+                ws_message = {
+                    "type": "notification",
+                    "data": {
+                        "id": notification.id,
+                        "title": title,
+                        "message": message,
+                        "type": notification_type,
+                        "user_id": str(user_id_int),
+                        "read": False,
+                        "created_at": notification.created_at.isoformat() if notification.created_at else None
+                    }
+                }
                 import asyncio
                 try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        # If loop is running, schedule the coroutine
-                        asyncio.create_task(manager.send_personal_message({
-                            "type": "notification",
-                            "data": {
-                                "id": notification.id,
-                                "title": title,
-                                "message": message,
-                                "type": notification_type,
-                                "user_id": str(user_id_int),
-                                "read": False,
-                                "created_at": notification.created_at.isoformat() if notification.created_at else None
-                            }
-                        }, str(user_id_int)))
-                    else:
-                        # If no loop is running, run the coroutine
-                        loop.run_until_complete(manager.send_personal_message({
-                            "type": "notification",
-                            "data": {
-                                "id": notification.id,
-                                "title": title,
-                                "message": message,
-                                "type": notification_type,
-                                "user_id": str(user_id_int),
-                                "read": False,
-                                "created_at": notification.created_at.isoformat() if notification.created_at else None
-                            }
-                        }, str(user_id_int)))
+                    asyncio.get_running_loop()
+                    loop_running = True
+                except RuntimeError:
+                    loop_running = False
+                
+                if loop_running:
+                    # Called from the application's event loop: schedule the coroutine
+                    from app.api.v1.endpoints.websocket import manager
+                    asyncio.create_task(manager.send_personal_message(ws_message, str(user_id_int)))
                     result["websocket_sent"] = True
+                else:
+                    from app.services.websocket_broker import publish_to_user_sync
+                    result["websocket_sent"] = publish_to_user_sync(str(user_id_int), ws_message)
+                
+                if result["websocket_sent"]:
                     logger.info(f"WebSocket notification sent to user {user_id_int}")
-                except RuntimeError:
-                    # No event loop available, skip WebSocket
-                    logger.debug(f"No event loop available for WebSocket notification to user {user_id_int}")
-                    result["websocket_sent"] = False
+                else:
+                    logger.debug(f"No WebSocket broker available for notification to user {user_id_int}")
             except Exception as ws_error:
                 logger.warning(f"Failed to send WebSocket notification: {ws_error}")
                 result["websocket_sent"] = False
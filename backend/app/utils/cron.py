@@ -0,0 +1,124 @@
+"""
+Cron expressions
+Parse standard 5-field cron expressions and compute their next occurrence
+
+Fields: minute hour day-of-month month day-of-week. Each field accepts
+`*`, numbers, ranges (`1-5`), lists (`1,15`) and steps (`*/15`, `10-50/20`);
+month and day-of-week also accept names (`jan`, `mon`). Day of week 0 and 7
+are Sunday. As in cron, when both day-of-month and day-of-week are
+restricted, a day matching either one matches. The macros @yearly,
+@annually, @monthly, @weekly, @daily, @midnight and @hourly are supported.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import FrozenSet, Optional
+from zoneinfo import ZoneInfo
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+MONTH_NAMES = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+# Give up looking for a matching day after this many years (e.g. "0 0 30 2 *")
+MAX_YEARS_AHEAD = 5
+
+
+class CronError(ValueError):
+    """Invalid cron expression"""
+
+
+def _parse_field(text: str, low: int, high: int, names: Optional[dict] = None) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"Invalid step '{step_text}'")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            # "5/15" means 5 through the maximum, every 15
+            end = high if step > 1 else start
+        if not (low <= start <= high and low <= end <= high) or start > end:
+            raise CronError(f"Value out of range in '{text}' (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def _parse_value(text: str, names: Optional[dict]) -> int:
+    if names and text.lower() in names:
+        return names[text.lower()]
+    if not text.isdigit():
+        raise CronError(f"Invalid value '{text}'")
+    return int(text)
+
+
+class CronExpression:
+    """A parsed cron expression, evaluated in the given time zone (default UTC)"""
+
+    def __init__(self, expression: str, tz: Optional[str] = None):
+        self.expression = expression.strip()
+        fields = MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Expected 5 fields in cron expression '{expression}'")
+        minute, hour, day, month, weekday = fields
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = _parse_field(day, 1, 31)
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        self.weekdays = frozenset(d % 7 for d in _parse_field(weekday, 0, 7, DAY_NAMES))
+        self.day_restricted = day != "*"
+        self.weekday_restricted = weekday != "*"
+        try:
+            self.tz: tzinfo = ZoneInfo(tz) if tz else timezone.utc
+        except Exception:
+            raise CronError(f"Unknown time zone '{tz}'") from None
+
+    def _day_matches(self, day: date) -> bool:
+        in_days = day.day in self.days
+        # date.weekday() is 0 for Monday, cron uses 0 for Sunday
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """First occurrence strictly after `after` (an aware datetime), returned in UTC"""
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=timezone.utc)
+        local = after.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        day = local.date()
+        last_day = day + timedelta(days=366 * MAX_YEARS_AHEAD)
+        while day <= last_day:
+            if day.month not in self.months:
+                # Jump to the first day of the next month
+                day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+                continue
+            if self._day_matches(day):
+                start = local.time() if day == local.date() else None
+                for hour in sorted(self.hours):
+                    if start is not None and hour < start.hour:
+                        continue
+                    for minute in sorted(self.minutes):
+                        if start is not None and hour == start.hour and minute < start.minute:
+                            continue
+                        candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz)
+                        result = candidate.astimezone(timezone.utc)
+                        if result > after:
+                            return result
+            day += timedelta(days=1)
+        raise CronError(f"Cron expression '{self.expression}' has no occurrence in the next {MAX_YEARS_AHEAD} years")
@@ -118,7 +118,9 @@ if [ -n "$DATABASE_URL" ]; then
         echo "✅ Database migrations completed successfully"
         # Skip ensure_avatar_migration and create_default_theme here so the server starts sooner.
         # The app's background_init() in main.py runs ensure_avatar_column(), ensure_theme_preference_column(),
-        # and ensure_default_theme() after the server is already serving (so healthchecks pass).
+        # and ensure_default_theme() after the server is already serving (so healthchecks pass), in one worker
+        # per schema version (app/core/startup.py). With SCHEMA_INIT_ON_STARTUP=false, run it here instead:
+        #   python -m app.core.startup
     else
         echo "⚠️  Database migrations failed, timed out, or skipped!"
         echo "This may be due to:"
@@ -145,7 +147,14 @@ echo "Application will be available at http://0.0.0.0:$PORT"
 echo "Health check endpoint: http://0.0.0.0:$PORT/api/v1/health"
 echo "=========================================="
 
+# Prometheus multiprocess mode (several workers): start from an empty metrics directory
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    echo "Prometheus multiprocess metrics directory: $PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Use exec to replace shell process with uvicorn
 # This ensures signals are properly handled
-exec python -m uvicorn app.main:app --host 0.0.0.0 --port "$PORT" --log-level info --access-log
+exec python -m uvicorn app.main:app --host 0.0.0.0 --port "$PORT" --workers "${WEB_CONCURRENCY:-1}" --log-level info --access-log
 
@@ -0,0 +1,62 @@
+"""
+Project Rollup Backfill Script
+Builds the daily project rollups read by the insights and analytics endpoints
+
+Recomputes project_daily_rollups from the projects table, one chunk of users
+per transaction. Rollups are otherwise built per user on first read and kept
+up to date by the flush hooks; run this after deploying them, and
+periodically (e.g. nightly cron) to reconcile writes that bypass the ORM.
+
+Usage (from backend/):
+    python scripts/backfill_project_rollups.py                  # every user
+    python scripts/backfill_project_rollups.py --user-id 42 --user-id 43
+    python scripts/backfill_project_rollups.py --chunk-size 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.models.project import ProjectDailyRollup, ProjectRollupState  # noqa: E402
+from app.services.project_rollup_service import BACKFILL_CHUNK_SIZE, ProjectRollupService  # noqa: E402
+
+
+async def backfill(user_ids, chunk_size: int) -> None:
+    if engine.dialect.name != "postgresql":
+        sys.exit("Project rollups are only maintained on PostgreSQL")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[ProjectDailyRollup.__table__, ProjectRollupState.__table__],
+        )
+
+    start_time = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        service = ProjectRollupService(db)
+        if user_ids:
+            rows = await service.rebuild(user_ids)
+            await db.commit()
+            result = {"users": len(set(user_ids)), "rows": rows}
+        else:
+            result = await service.backfill(chunk_size=chunk_size)
+    await engine.dispose()
+    print(f"Rebuilt project rollups for {result['users']} users: {result['rows']} rows "
+          f"in {time.perf_counter() - start_time:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, action="append", default=[], help="only rebuild this user")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE, help="users per transaction")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.user_id, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
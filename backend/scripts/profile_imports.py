@@ -0,0 +1,110 @@
+"""
+Import Time Profiling Script
+Reports what importing the application costs, per module and per package
+
+Runs `python -X importtime` on `import app.main` in a fresh interpreter and
+prints the slowest modules (self and cumulative time), the time per
+top-level package and the wall time and resident memory of the process.
+
+Usage (from backend/):
+    python scripts/profile_imports.py                 # lazy route groups (default)
+    python scripts/profile_imports.py --eager         # LAZY_ROUTES=false, as before
+    python scripts/profile_imports.py --warmup        # then load every lazy route group
+    python scripts/profile_imports.py --prefix app.api --top 40
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter() - start
+if {warmup}:
+    from app.core.lazy_routes import lazy_route_groups
+    lazy_route_groups.load_all()
+elapsed = time.perf_counter() - start
+with open("/proc/self/statm") as statm:
+    rss = int(statm.read().split()[1]) * resource.getpagesize()
+print(f"PROFILE {{imported:.3f}} {{elapsed:.3f}} {{rss}} {{len(sys.modules)}}", file=sys.stderr)
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def run_probe(eager: bool, warmup: bool) -> tuple:
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "LAZY_ROUTES": "false" if eager else "true"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(warmup=warmup)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        sys.exit(completed.stderr[-2000:])
+    imports: List[ImportTime] = []
+    summary = None
+    for line in completed.stderr.splitlines():
+        if line.startswith("PROFILE "):
+            summary = line.split()[1:]
+        elif line.startswith("import time:") and "cumulative" not in line:
+            self_us, cumulative_us, module = (part.strip() for part in line[len("import time:"):].split("|"))
+            imports.append(ImportTime(module, int(self_us), int(cumulative_us)))
+    return imports, summary
+
+
+def print_table(title: str, rows: List[tuple]) -> None:
+    print(f"\n{title}")
+    for milliseconds, name in rows:
+        print(f"  {milliseconds:9.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eager", action="store_true", help="include every route group at import (LAZY_ROUTES=false)")
+    parser.add_argument("--warmup", action="store_true", help="load the lazy route groups after the import")
+    parser.add_argument("--prefix", default="", help="only list modules starting with this prefix")
+    parser.add_argument("--top", type=int, default=25, help="number of modules listed")
+    args = parser.parse_args()
+
+    imports, summary = run_probe(args.eager, args.warmup)
+    selected = [item for item in imports if item.module.startswith(args.prefix)]
+
+    packages: Dict[str, int] = defaultdict(int)
+    for item in imports:
+        packages[item.module.split(".")[0]] += item.self_us
+
+    print_table(
+        f"Slowest modules, self time{f' ({args.prefix}*)' if args.prefix else ''}",
+        [(item.self_us / 1000, item.module) for item in sorted(selected, key=lambda item: -item.self_us)[:args.top]],
+    )
+    print_table(
+        "Slowest modules, cumulative time",
+        [(item.cumulative_us / 1000, item.module)
+         for item in sorted(selected, key=lambda item: -item.cumulative_us)[:args.top]],
+    )
+    print_table(
+        "Self time per top-level package",
+        [(total / 1000, package) for package, total in sorted(packages.items(), key=lambda item: -item[1])[:args.top]],
+    )
+
+    if summary:
+        imported, elapsed, rss, modules = summary
+        mode = "eager" if args.eager else "lazy"
+        print(f"\nimport app.main ({mode} route groups): {float(imported):.2f}s"
+              + (f", with warmup {float(elapsed):.2f}s" if args.warmup else "")
+              + f", {int(rss) / 2 ** 20:.0f} MiB RSS, {modules} modules")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,13 @@ from typing import Generator
 
 from app.main import app
 from app.core.database import Base, get_db
+from app.core.query_instrumentation import instrument_engine
 from app.models.user import User
 from app.core.auth import get_password_hash, create_access_token
 from datetime import timedelta
 
+pytest_plugins = ["tests.plugins.query_budget"]
+
 
 # Test database URL (use in-memory SQLite for tests)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -29,6 +32,7 @@ engine = create_async_engine(
     connect_args={"check_same_thread": False},
     echo=False,
 )
+instrument_engine(engine)
 
 TestingSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
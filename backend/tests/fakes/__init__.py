@@ -0,0 +1,3 @@
+"""
+Fake external services for tests
+"""
@@ -0,0 +1,218 @@
+"""
+Fake AI provider server for tests
+
+Serves the OpenAI chat completions API (/v1/chat/completions) and the
+Anthropic messages API (/v1/messages), both plain and streamed, on a free
+local port. Point the SDKs at it with OPENAI_BASE_URL=server.openai_url and
+ANTHROPIC_BASE_URL=server.anthropic_url.
+
+Every reply is `server.reply` split into word tokens. Latency can be
+injected:
+
+    with FakeAIServer() as server:
+        server.first_token_delay = 0.5   # before the first token
+        server.token_delay = 0.01        # between tokens
+        ...
+        server.requests      # (path, JSON body) log
+        server.connections   # distinct client connections seen
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+class FakeAIServer:
+    """OpenAI and Anthropic compatible completions served over HTTP on localhost"""
+
+    def __init__(self, reply: str = "Hello from the fake provider, streamed one word at a time."):
+        self.reply = reply
+        self.first_token_delay = 0.0
+        self.token_delay = 0.0
+        self.requests: List[Tuple[str, Dict[str, Any]]] = []
+        self._clients: Set[Tuple[str, int]] = set()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.port: Optional[int] = None
+        self.app = Starlette(routes=[
+            Route("/v1/chat/completions", self._openai, methods=["POST"]),
+            Route("/v1/messages", self._anthropic, methods=["POST"]),
+        ])
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def openai_url(self) -> str:
+        return f"{self.url}/v1"
+
+    @property
+    def anthropic_url(self) -> str:
+        return self.url
+
+    @property
+    def connections(self) -> int:
+        return len(self._clients)
+
+    @property
+    def tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [word if index == 0 else f" {word}" for index, word in enumerate(words)]
+
+    def start(self) -> "FakeAIServer":
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake AI server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+    def __enter__(self) -> "FakeAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    async def _receive(self, request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        self.requests.append((request.url.path, body))
+        if request.client:
+            self._clients.add((request.client.host, request.client.port))
+        return body
+
+    async def _generate(self):
+        """Reply tokens with the configured delays"""
+        await asyncio.sleep(self.first_token_delay)
+        for index, token in enumerate(self.tokens):
+            if index and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    @staticmethod
+    def _stream(events) -> StreamingResponse:
+        return StreamingResponse(events, media_type="text/event-stream")
+
+    async def _openai(self, request: Request):
+        body = await self._receive(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-test")
+        prompt_tokens = sum(len(str(msg.get("content", "")).split()) for msg in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(self.tokens),
+            "total_tokens": prompt_tokens + len(self.tokens),
+        }
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(data)}\n\n"
+
+        if not body.get("stream"):
+            content = "".join([token async for token in self._generate()])
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            async for token in self._generate():
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                data = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(data)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return self._stream(events())
+
+    async def _anthropic(self, request: Request):
+        body = await self._receive(request)
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "claude-test")
+        input_tokens = sum(len(str(msg.get("content", "")).split()) for msg in body.get("messages", []))
+
+        if not body.get("stream"):
+            content = "".join([token async for token in self._generate()])
+            return JSONResponse({
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": content}],
+                "model": model,
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": len(self.tokens)},
+            })
+
+        def event(name: str, data: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n"
+
+        async def events():
+            yield event("message_start", {"message": {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "content": [],
+                "model": model,
+                "stop_reason": None,
+                "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+            }})
+            yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            async for token in self._generate():
+                yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": token}})
+            yield event("content_block_stop", {"index": 0})
+            yield event("message_delta", {
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": len(self.tokens)},
+            })
+            yield event("message_stop", {})
+
+        return self._stream(events())
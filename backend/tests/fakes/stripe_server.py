@@ -0,0 +1,215 @@
+"""
+Fake Stripe API server for tests
+
+A small HTTP server speaking enough of the Stripe API for the integration
+(customers, checkout and portal sessions, subscriptions, payment intents).
+It runs uvicorn in a background thread on a free local port; point
+StripeGateway (api_base) or the SDK (stripe.api_base) at `server.url`.
+
+Failures and latency can be injected:
+
+    with FakeStripeServer() as server:
+        server.fail_next(503, 429)   # next two requests fail
+        server.latency = 0.2         # every request takes 200 ms
+        ...
+        server.requests              # (method, path, idempotency key) log
+
+Responses are replayed for a repeated Idempotency-Key, like Stripe does.
+"""
+
+import asyncio
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+KEY_PART = re.compile(r"\[([^\]]*)\]")
+
+
+def parse_form(body: bytes) -> Dict[str, Any]:
+    """Decode Stripe's form encoding (a[b][0][c]=v) into nested dicts and lists"""
+    result: Dict[str, Any] = {}
+    for raw_key, value in parse_qsl(body.decode(), keep_blank_values=True):
+        head = raw_key.split("[", 1)[0]
+        parts = [head] + KEY_PART.findall(raw_key[len(head):])
+        node: Any = result
+        for part, following in zip(parts, parts[1:] + [None], strict=True):
+            container_type = list if following is not None and following.isdigit() else dict
+            if isinstance(node, list):
+                index = int(part)
+                while len(node) <= index:
+                    node.append(None)
+                if following is None:
+                    node[index] = value
+                else:
+                    if node[index] is None:
+                        node[index] = container_type()
+                    node = node[index]
+            else:
+                if following is None:
+                    node[part] = value
+                else:
+                    node = node.setdefault(part, container_type())
+    return result
+
+
+def _stripe_error(status_code: int, message: str, error_type: str = "api_error") -> JSONResponse:
+    return JSONResponse({"error": {"type": error_type, "message": message}}, status_code=status_code)
+
+
+class FakeStripeServer:
+    """In-memory Stripe API served over HTTP on localhost"""
+
+    def __init__(self):
+        self.latency = 0.0
+        self.requests: List[Tuple[str, str, Optional[str]]] = []
+        self.objects: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "customer": {}, "checkout.session": {}, "billing_portal.session": {},
+            "subscription": {}, "payment_intent": {},
+        }
+        self._failures: Deque[int] = deque()
+        self._idempotent: Dict[str, Tuple[int, Any]] = {}
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.port: Optional[int] = None
+        self.app = Starlette(routes=[
+            Route("/v1/customers", self._endpoint(self._customers), methods=["GET", "POST"]),
+            Route("/v1/checkout/sessions", self._endpoint(self._create("checkout.session", "cs")), methods=["POST"]),
+            Route("/v1/billing_portal/sessions", self._endpoint(self._create("billing_portal.session", "bps")),
+                  methods=["POST"]),
+            Route("/v1/subscriptions/{id}", self._endpoint(self._subscription), methods=["GET", "POST"]),
+            Route("/v1/payment_intents", self._endpoint(self._create("payment_intent", "pi")), methods=["POST"]),
+            Route("/v1/payment_intents/{id}", self._endpoint(self._retrieve("payment_intent")), methods=["GET"]),
+        ])
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def fail_next(self, *status_codes: int) -> None:
+        """Make the next requests fail with these HTTP statuses, in order"""
+        self._failures.extend(status_codes)
+
+    def add_subscription(self, subscription_id: str, price_ids: List[str]) -> Dict[str, Any]:
+        subscription = {
+            "id": subscription_id,
+            "object": "subscription",
+            "status": "active",
+            "cancel_at_period_end": False,
+            "items": {
+                "object": "list",
+                "data": [
+                    {"id": f"si_{index}_{subscription_id}", "object": "subscription_item", "price": {"id": price_id}}
+                    for index, price_id in enumerate(price_ids)
+                ],
+            },
+        }
+        self.objects["subscription"][subscription_id] = subscription
+        return subscription
+
+    def start(self) -> "FakeStripeServer":
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake Stripe server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+    def __enter__(self) -> "FakeStripeServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _endpoint(self, handler):
+        """Wrap a handler with the request log, injected latency/failures and idempotent replay"""
+        async def endpoint(request: Request) -> JSONResponse:
+            idempotency_key = request.headers.get("idempotency-key")
+            self.requests.append((request.method, request.url.path, idempotency_key))
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self._failures:
+                status_code = self._failures.popleft()
+                error_type = "rate_limit_error" if status_code == 429 else "api_error"
+                return _stripe_error(status_code, "Injected failure", error_type)
+            if idempotency_key and idempotency_key in self._idempotent:
+                status_code, body = self._idempotent[idempotency_key]
+                return JSONResponse(body, status_code=status_code)
+            response = await handler(request)
+            if idempotency_key and request.method == "POST":
+                self._idempotent[idempotency_key] = (response.status_code, json.loads(response.body))
+            return response
+        return endpoint
+
+    def _store(self, object_type: str, prefix: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        object_id = f"{prefix}_{uuid.uuid4().hex[:14]}"
+        stripe_object = {"id": object_id, "object": object_type, **params}
+        if object_type == "checkout.session":
+            stripe_object["url"] = f"https://checkout.stripe.test/{object_id}"
+        elif object_type == "billing_portal.session":
+            stripe_object["url"] = f"https://billing.stripe.test/{object_id}"
+        elif object_type == "payment_intent":
+            stripe_object["amount"] = int(params.get("amount", 0))
+            stripe_object["client_secret"] = f"{object_id}_secret_test"
+            stripe_object["status"] = "requires_payment_method"
+        self.objects[object_type][object_id] = stripe_object
+        return stripe_object
+
+    async def _customers(self, request: Request) -> JSONResponse:
+        if request.method == "POST":
+            return JSONResponse(self._store("customer", "cus", parse_form(await request.body())))
+        email = request.query_params.get("email")
+        limit = int(request.query_params.get("limit", 10))
+        customers = [c for c in self.objects["customer"].values() if email is None or c.get("email") == email]
+        return JSONResponse({"object": "list", "url": "/v1/customers", "has_more": False, "data": customers[:limit]})
+
+    def _create(self, object_type: str, prefix: str):
+        async def endpoint(request: Request) -> JSONResponse:
+            return JSONResponse(self._store(object_type, prefix, parse_form(await request.body())))
+        return endpoint
+
+    def _retrieve(self, object_type: str):
+        async def endpoint(request: Request) -> JSONResponse:
+            stripe_object = self.objects[object_type].get(request.path_params["id"])
+            if stripe_object is None:
+                return _stripe_error(404, f"No such {object_type}", "invalid_request_error")
+            return JSONResponse(stripe_object)
+        return endpoint
+
+    async def _subscription(self, request: Request) -> JSONResponse:
+        subscription = self.objects["subscription"].get(request.path_params["id"])
+        if subscription is None:
+            return _stripe_error(404, "No such subscription", "invalid_request_error")
+        if request.method == "POST":
+            params = parse_form(await request.body())
+            if "cancel_at_period_end" in params:
+                subscription["cancel_at_period_end"] = params["cancel_at_period_end"] == "true"
+            for update in params.get("items", []):
+                for item in subscription["items"]["data"]:
+                    if item["id"] == update.get("id"):
+                        item["price"] = {"id": update["price"]}
+        return JSONResponse(subscription)
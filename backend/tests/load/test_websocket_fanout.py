@@ -0,0 +1,126 @@
+"""
+WebSocket Fan-out Harness
+Starts several uvicorn processes sharing one Redis, connects clients to each
+and measures cross-process delivery latency and messages per second.
+
+Requires REDIS_URL (e.g. redis://localhost:6379/0).
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+REDIS_URL = os.getenv("REDIS_URL")
+PROCESSES = 3
+CLIENTS_PER_PROCESS = 20
+MESSAGES = 500
+# Messages sent one every PACING seconds to measure latency without queueing
+PACED_MESSAGES = 50
+PACING = 0.01
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+pytestmark = pytest.mark.skipif(not REDIS_URL, reason="REDIS_URL not set")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"uvicorn on port {port} did not start")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestWebSocketFanOut:
+    """Cross-process delivery through the Redis broker"""
+
+    @pytest.mark.asyncio
+    async def test_room_fanout_across_processes(self):
+        ports = [_free_port() for _ in range(PROCESSES)]
+        env = {**os.environ, "REDIS_URL": REDIS_URL, "LOG_LEVEL": "WARNING"}
+        servers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "tests.load.websocket_app:app",
+                 "--port", str(port), "--log-level", "warning"],
+                cwd=BACKEND_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            for port in ports
+        ]
+        clients = []
+        try:
+            await asyncio.gather(*(_wait_until_up(port) for port in ports))
+            room = f"bench-{os.getpid()}"
+            for port in ports:
+                for _ in range(CLIENTS_PER_PROCESS):
+                    clients.append(await websockets.connect(f"ws://127.0.0.1:{port}/api/v1/ws/room/{room}"))
+            sender, receivers = clients[0], clients[1:]
+            await asyncio.sleep(0.5)
+
+            async def receive(client, count, latencies):
+                received = 0
+                while received < count:
+                    message = json.loads(await client.recv())
+                    if message.get("type") != "bench":
+                        continue
+                    latencies.append(time.time() - message["data"]["sent_at"])
+                    received += 1
+
+            async def run(count, pacing):
+                latencies = []
+                readers = [asyncio.create_task(receive(client, count, latencies)) for client in receivers]
+                start_time = time.perf_counter()
+                for n in range(count):
+                    await sender.send(json.dumps({"type": "bench", "data": {"n": n, "sent_at": time.time()}}))
+                    if pacing:
+                        await asyncio.sleep(pacing)
+                await asyncio.wait_for(asyncio.gather(*readers), timeout=120)
+                return latencies, time.perf_counter() - start_time
+
+            paced_latencies, _ = await run(PACED_MESSAGES, PACING)
+            burst_latencies, elapsed = await run(MESSAGES, 0)
+            expected = MESSAGES * len(receivers)
+
+            print(
+                f"\n{PROCESSES} processes x {CLIENTS_PER_PROCESS} clients: "
+                f"latency p50 {_percentile(paced_latencies, 0.5) * 1000:.1f} ms, "
+                f"p99 {_percentile(paced_latencies, 0.99) * 1000:.1f} ms; "
+                f"burst of {MESSAGES}: {expected} deliveries in {elapsed:.2f}s "
+                f"({expected / elapsed:,.0f} msg/s)"
+            )
+            assert len(paced_latencies) == PACED_MESSAGES * len(receivers)
+            assert len(burst_latencies) == expected
+        finally:
+            for client in clients:
+                await client.close()
+            for server in servers:
+                server.terminate()
+            for server in servers:
+                server.wait(timeout=10)
@@ -0,0 +1,16 @@
+"""
+Minimal ASGI app serving only the WebSocket endpoints, used by the
+multi-process fan-out harness (uvicorn tests.load.websocket_app:app)
+"""
+
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import websocket
+
+app = FastAPI()
+app.include_router(websocket.router, prefix="/api/v1")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await websocket.manager.shutdown()
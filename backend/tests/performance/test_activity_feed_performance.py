@@ -0,0 +1,124 @@
+"""
+Performance Tests for Activity Feeds
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Seeds 500k audit
+logs and 500k activities, then compares the previous feed query (ILIKE over
+security_audit_logs with OFFSET paging) with keyset pages of the activities
+table, near the top of the feed and deep into it.
+"""
+
+import os
+import time
+
+import pytest
+from sqlalchemy import desc, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditLog
+from app.models.activity import Activity
+from app.models.favorite import Favorite
+from app.models.user import User
+from app.services import activity_service
+from app.services.activity_service import ActivityService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+ROWS = 500_000
+PAGE_SIZE = 50
+DEEP_PAGE = 200
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+async def _timed(coro):
+    start_time = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start_time
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestActivityFeedPerformance:
+    """Benchmark activity feeds with 500k rows"""
+
+    @pytest.mark.asyncio
+    async def test_keyset_feeds_versus_audit_log_scan(self, monkeypatch):
+        monkeypatch.setattr(activity_service.cache_backend, "redis_client", None)
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL)
+        tables = [User.__table__, Favorite.__table__, Activity.__table__, SecurityAuditLog.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+            await conn.execute(text(
+                "INSERT INTO users (id, email, hashed_password, is_active, created_at, updated_at) "
+                "SELECT g, 'user' || g || '@example.com', 'x', true, now(), now() FROM generate_series(1, 100) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO security_audit_logs (timestamp, event_type, severity, user_id, description, success) "
+                "SELECT now() - g * interval '1 second', 'data_modified', 'info', 1 + g % 100, "
+                "(ARRAY['Post', 'Page', 'Form', 'Project'])[1 + g % 4] || ' ' || g || ' updated', 'success' "
+                f"FROM generate_series(1, {ROWS}) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO activities (actor_id, entity_type, entity_id, verb, created_at) "
+                "SELECT 1 + g % 100, (ARRAY['post', 'page', 'form', 'project'])[1 + g % 4], g % 5000, 'updated', "
+                f"now() - g * interval '1 second' FROM generate_series(1, {ROWS}) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO favorites (user_id, entity_type, entity_id, created_at, updated_at) "
+                "SELECT 1, 'post', g * 4, now(), now() FROM generate_series(1, 50) g"
+            ))
+            await conn.execute(text("ANALYZE"))
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                service = ActivityService(db)
+                await service.list_activities(limit=1)
+
+                # Previous implementation: substring match and OFFSET paging
+                legacy_query = (
+                    select(SecurityAuditLog)
+                    .where(
+                        SecurityAuditLog.event_type.ilike("%post%")
+                        | SecurityAuditLog.description.ilike("%post%")
+                    )
+                    .order_by(desc(SecurityAuditLog.timestamp))
+                    .limit(PAGE_SIZE)
+                )
+                _, legacy_first = await _timed(db.execute(legacy_query))
+                _, legacy_deep = await _timed(db.execute(legacy_query.offset(PAGE_SIZE * DEEP_PAGE)))
+
+                results = {}
+                feeds = {
+                    "entity": lambda cursor: service.get_entity_feed("post", 400, cursor=cursor, limit=PAGE_SIZE),
+                    "user": lambda cursor: service.get_user_feed(7, cursor=cursor, limit=PAGE_SIZE),
+                    "home": lambda cursor: service.get_home_feed(1, cursor=cursor, limit=PAGE_SIZE),
+                    "type": lambda cursor: service.list_activities(entity_type="post", cursor=cursor, limit=PAGE_SIZE),
+                }
+                for name, fetch in feeds.items():
+                    cursor, timings = None, []
+                    for _ in range(DEEP_PAGE):
+                        page, elapsed = await _timed(fetch(cursor))
+                        timings.append(elapsed)
+                        cursor = page.next_cursor
+                        if cursor is None:
+                            break
+                    results[name] = (timings[0], timings[-1], len(timings))
+
+            print(f"\nlegacy ILIKE feed: first page {legacy_first * 1000:.1f} ms, "
+                  f"page {DEEP_PAGE} {legacy_deep * 1000:.1f} ms")
+            for name, (first, last, pages) in results.items():
+                print(f"{name} feed: first page {first * 1000:.1f} ms, page {pages} {last * 1000:.1f} ms")
+
+            first, last, pages = results["type"]
+            assert pages == DEEP_PAGE
+            assert last < legacy_deep / 5
+            assert last < first * 5 + 0.005
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await engine.dispose()
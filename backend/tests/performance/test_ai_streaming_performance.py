@@ -0,0 +1,132 @@
+"""
+Performance Tests for AI Chat
+
+Runs /ai/chat on a local uvicorn server against the fake provider (300 ms to
+the first token, 20 ms per token). Compares the previous behaviour (a new
+provider client per request, response returned when the completion ends)
+with pooled clients and streamed server-sent events: time to first byte, time
+to the first token and provider connections opened.
+"""
+
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from openai import AsyncOpenAI
+
+from app.api import ai as ai_api
+from app.core import cache as cache_module
+from app.dependencies import get_current_user
+from app.services.ai_service import ai_clients
+from tests.fakes.ai_server import FakeAIServer
+
+REQUESTS = 20
+ROUNDS = 2
+TOKENS = 40
+
+
+class _AppServer:
+    """Serve a FastAPI app with uvicorn in a background thread"""
+
+    def __init__(self, app):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def _legacy_completion(provider_url):
+    # Previous AIService: a new client (and connection pool) for every request
+    client = AsyncOpenAI(api_key="sk-test", base_url=provider_url)
+    try:
+        response = await client.chat.completions.create(
+            model="gpt-test", messages=[{"role": "user", "content": "Hi"}], temperature=0.7, max_tokens=100,
+        )
+        return response.choices[0].message.content
+    finally:
+        await client.close()
+
+
+async def _timed_stream(client):
+    start_time = time.perf_counter()
+    first_byte = first_token = None
+    async with client.stream("POST", "/ai/chat", json={
+        "messages": [{"role": "user", "content": "Hi"}], "provider": "openai", "stream": True,
+    }) as response:
+        first_byte = time.perf_counter() - start_time
+        async for line in response.aiter_lines():
+            if first_token is None and line.startswith('data: {"type": "delta"'):
+                first_token = time.perf_counter() - start_time
+    return first_byte, first_token, time.perf_counter() - start_time
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestAIStreamingPerformance:
+    """Benchmark per-request clients against pooled streaming"""
+
+    @pytest.mark.asyncio
+    async def test_time_to_first_byte_and_connections(self, monkeypatch):
+        app = FastAPI()
+        app.include_router(ai_api.router)
+        app.dependency_overrides[get_current_user] = lambda: object()
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+
+        with FakeAIServer(reply=" ".join(f"token{i}" for i in range(TOKENS))) as provider:
+            provider.first_token_delay = 0.3
+            provider.token_delay = 0.02
+            monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+            monkeypatch.setenv("OPENAI_BASE_URL", provider.openai_url)
+
+            legacy_times = []
+            for _ in range(ROUNDS):
+                legacy_times += await asyncio.gather(*[
+                    self._timed(_legacy_completion(provider.openai_url)) for _ in range(REQUESTS)
+                ])
+            legacy_connections = provider.connections
+
+            provider._clients.clear()
+            results = []
+            with _AppServer(app) as url:
+                async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+                    for _ in range(ROUNDS):
+                        results += await asyncio.gather(*[_timed_stream(client) for _ in range(REQUESTS)])
+            await ai_clients.close()
+            pooled_connections = provider.connections
+
+        legacy_median = statistics.median(legacy_times)
+        first_bytes = statistics.median(result[0] for result in results)
+        first_tokens = statistics.median(result[1] for result in results)
+        print(f"\n{ROUNDS} rounds of {REQUESTS} concurrent chats of {TOKENS} tokens: per-request clients "
+              f"{legacy_median * 1000:.0f} ms to response, {legacy_connections} provider connections; "
+              f"pooled SSE first byte {first_bytes * 1000:.0f} ms, first token {first_tokens * 1000:.0f} ms "
+              f"(median), {pooled_connections} provider connections")
+        assert first_bytes < 0.25 < 1.0 < legacy_median
+        assert first_tokens < legacy_median / 2
+        assert legacy_connections == ROUNDS * REQUESTS
+        assert pooled_connections <= REQUESTS
+
+    @staticmethod
+    async def _timed(coroutine):
+        start_time = time.perf_counter()
+        await coroutine
+        return time.perf_counter() - start_time
@@ -0,0 +1,126 @@
+"""
+Performance Tests for Announcements
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Seeds 200 active
+announcements with user, team and role targeting, then compares the previous
+per-request path (load active announcements and dismissals, parse targeting
+JSON) with matching against the compiled set.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import and_, desc, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.announcement import Announcement, AnnouncementDismissal
+from app.models.user import User
+from app.services import announcement_cache as cache_module
+from app.services.announcement_cache import announcement_cache
+from app.services.announcement_service import AnnouncementService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+ANNOUNCEMENTS = 200
+REQUESTS = 500
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+async def _legacy_active_announcements(db, user_id, user_team_id, user_roles):
+    # Previous implementation, as it ran on every page load
+    now = datetime.utcnow()
+    query = select(Announcement).where(
+        and_(
+            Announcement.is_active == True,
+            or_(Announcement.start_date == None, Announcement.start_date <= now),
+            or_(Announcement.end_date == None, Announcement.end_date >= now),
+            Announcement.show_in_app == True,
+        )
+    )
+    dismissed_result = await db.execute(
+        select(AnnouncementDismissal.announcement_id).where(AnnouncementDismissal.user_id == user_id)
+    )
+    dismissed_ids = set(dismissed_result.scalars().all())
+    result = await db.execute(query.order_by(desc(Announcement.priority), desc(Announcement.created_at)))
+    filtered = []
+    for ann in result.scalars().all():
+        if ann.id in dismissed_ids:
+            continue
+        if ann.target_users and user_id not in json.loads(ann.target_users):
+            continue
+        if ann.target_teams and user_team_id not in json.loads(ann.target_teams):
+            continue
+        if ann.target_roles and not any(role in json.loads(ann.target_roles) for role in user_roles):
+            continue
+        filtered.append(ann)
+    return filtered
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestAnnouncementPerformance:
+    """Benchmark announcement matching with 200 active announcements"""
+
+    @pytest.mark.asyncio
+    async def test_compiled_set_versus_per_request_queries(self, monkeypatch):
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+        announcement_cache.clear()
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL)
+        tables = [User.__table__, Announcement.__table__, AnnouncementDismissal.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+            await conn.execute(text(
+                "INSERT INTO users (id, email, hashed_password, is_active, created_at, updated_at) "
+                "SELECT g, 'user' || g || '@example.com', 'x', true, now(), now() FROM generate_series(1, 100) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO announcements (title, message, type, priority, is_active, is_dismissible, "
+                "show_on_login, show_in_app, target_users, target_teams, target_roles) "
+                "SELECT 'Announcement ' || g, 'message', 'INFO', "
+                "(ARRAY['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'])[1 + g % 4]::announcementpriority, true, true, false, true, "
+                "CASE WHEN g % 3 = 0 THEN '[' || array_to_string(ARRAY(SELECT generate_series(1, 500)), ',') || ']' END, "
+                "CASE WHEN g % 5 = 0 THEN '[1, 2, 3]' END, "
+                "CASE WHEN g % 7 = 0 THEN '[\"admin\", \"editor\"]' END "
+                f"FROM generate_series(1, {ANNOUNCEMENTS}) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO announcement_dismissals (announcement_id, user_id) "
+                "SELECT g, 7 FROM generate_series(1, 40) g"
+            ))
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                service = AnnouncementService(db)
+                legacy = await _legacy_active_announcements(db, 7, 2, ["editor"])
+                compiled = await service.get_active_announcements(user_id=7, user_team_id=2, user_roles=["editor"])
+                assert sorted(a.id for a in legacy) == sorted(a["id"] for a in compiled)
+
+                start_time = time.perf_counter()
+                for _ in range(REQUESTS):
+                    await _legacy_active_announcements(db, 7, 2, ["editor"])
+                legacy_time = (time.perf_counter() - start_time) / REQUESTS
+
+                start_time = time.perf_counter()
+                for _ in range(REQUESTS):
+                    active_set = await service.get_active_set()
+                    active_set.for_user(user_id=7, user_team_id=2, user_roles=["editor"], dismissed={1, 2, 3})
+                compiled_time = (time.perf_counter() - start_time) / REQUESTS
+
+            print(f"\nper request: legacy {legacy_time * 1000:.2f} ms, "
+                  f"compiled set {compiled_time * 1000:.3f} ms (plus one dismissal set read)")
+            assert compiled_time < legacy_time / 10
+        finally:
+            announcement_cache.clear()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=tables)
+                await conn.execute(text("DROP TYPE IF EXISTS announcementtype, announcementpriority"))
+            await engine.dispose()
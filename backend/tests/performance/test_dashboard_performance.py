@@ -0,0 +1,158 @@
+"""
+Performance Tests for Dashboard Queries
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Seeds users,
+invoices, projects and tickets in a dedicated schema, then compares the
+dashboard aggregates executed one after another (as before) with the fused
+CTE statement and with one pooled connection per aggregate, and the insights
+endpoint loading project rows with its single conditional count.
+"""
+
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import app.main  # noqa: F401 - register every model on Base.metadata
+from app.api.v1.endpoints.insights import get_insights
+from app.core.config import settings
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditLogger
+from app.models.project import Project
+from app.services.client_service import ClientService
+from app.services.erp_service import ERPService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+SCHEMA = "perf_dashboard"
+USERS = 200
+INVOICES = 200_000
+PROJECTS = 50_000
+TICKETS = 50_000
+RUNS = 15
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+SEED = [
+    f"""INSERT INTO users (email, hashed_password, is_active, created_at, updated_at)
+        SELECT 'user' || i || '@example.com', 'x', i % 4 <> 0, now(), now()
+        FROM generate_series(1, {USERS}) AS i""",
+    f"""INSERT INTO invoices (user_id, amount_due, amount_paid, currency, status, created_at, updated_at)
+        SELECT 1 + i % {USERS}, (i % 500) + 0.5, 0, 'usd',
+               ('{{PAID,OPEN,DRAFT}}'::text[])[1 + i % 3]::invoicestatus, now(), now()
+        FROM generate_series(1, {INVOICES}) AS i""",
+    f"""INSERT INTO projects (name, user_id, status, created_at, updated_at)
+        SELECT 'project ' || i, 1 + i % {USERS}, ('{{ACTIVE,ARCHIVED}}'::text[])[1 + i % 2]::projectstatus,
+               now() - (i % 200) * interval '1 day', now()
+        FROM generate_series(1, {PROJECTS}) AS i""",
+    f"""INSERT INTO support_tickets (subject, category, status, priority, user_id, created_at, updated_at)
+        SELECT 'ticket ' || i, 'general', ('{{open,closed}}'::text[])[1 + i % 2], 'medium', 1 + i % {USERS},
+               now(), now()
+        FROM generate_series(1, {TICKETS}) AS i""",
+]
+
+
+@pytest.fixture
+async def engine():
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_async_engine(
+        PERFORMANCE_DATABASE_URL, pool_size=5,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED:
+            await conn.execute(text(statement))
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    yield engine
+    await engine.dispose()
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await admin.dispose()
+
+
+async def _median(engine, call):
+    async with AsyncSession(engine) as session:
+        await call(session)  # warm the connection and the plan cache
+        timings = []
+        for _ in range(RUNS):
+            start_time = time.perf_counter()
+            await call(session)
+            timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+async def _previous_insights(db, user_id):
+    """What the insights endpoint did before: load the rows, then 12 monthly counts"""
+    projects = (await db.execute(select(Project).where(Project.user_id == user_id))).scalars().all()
+    prev = (await db.execute(select(Project).where(
+        Project.user_id == user_id,
+        Project.created_at >= datetime.utcnow() - timedelta(days=60),
+        Project.created_at < datetime.utcnow() - timedelta(days=30),
+    ))).scalars().all()
+    counts = [len(projects), len(prev)]
+    for i in range(6):
+        month_start = datetime.utcnow() - timedelta(days=30 * (6 - i))
+        for condition in (
+            (Project.created_at >= month_start, Project.created_at < month_start + timedelta(days=30)),
+            (Project.created_at < month_start + timedelta(days=30),),
+        ):
+            counts.append((await db.execute(
+                select(func.count(Project.id)).where(Project.user_id == user_id, *condition)
+            )).scalar())
+    return counts
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestDashboardPerformance:
+    """Benchmark dashboard aggregate execution"""
+
+    @pytest.mark.asyncio
+    async def test_dashboard_aggregates(self, engine, monkeypatch):
+        timings = {}
+        for mode in ("sequential", "fused", "concurrent"):
+            monkeypatch.setattr(settings, "DASHBOARD_QUERY_MODE", mode)
+            timings[mode] = (
+                await _median(engine, lambda db: ERPService(db).get_erp_dashboard_stats(1)),
+                await _median(engine, lambda db: ClientService(db).get_client_dashboard_stats(1)),
+            )
+
+        print(f"\nERP dashboard ({INVOICES} invoices, {PROJECTS} projects, {USERS} users) / client dashboard, "
+              f"{os.cpu_count()} CPU(s):")
+        for mode, (erp, client) in timings.items():
+            print(f"  {mode:<10} {erp * 1000:7.2f} ms / {client * 1000:6.2f} ms")
+        # One statement instead of three: never slower, faster with network round trips
+        assert timings["fused"][1] < timings["sequential"][1] * 1.25
+        # Aggregates only overlap when the database server has cores to run them on
+        if os.cpu_count() >= 4:
+            assert timings["concurrent"][0] < timings["sequential"][0]
+
+    @pytest.mark.asyncio
+    async def test_insights_counts(self, engine, monkeypatch):
+        async def log_event(**kwargs):
+            return None
+
+        # Measure the queries, not the audit log write
+        monkeypatch.setattr(SecurityAuditLogger, "log_event", log_event)
+        user = SimpleNamespace(id=1)
+        request = SimpleNamespace(client=None)
+
+        previous = await _median(engine, lambda db: _previous_insights(db, user.id))
+        current = await _median(engine, lambda db: get_insights(request=request, current_user=user, db=db))
+
+        print(f"\nInsights ({PROJECTS // USERS} projects per user): rows + 12 counts {previous * 1000:.2f} ms, "
+              f"single conditional count {current * 1000:.2f} ms")
+        assert current < previous
@@ -0,0 +1,116 @@
+"""
+Performance Tests for Documentation Retrieval
+
+Compares the previous search (glob and read every markdown file per query)
+with the BM25 index, the prompt size of the previous 80 KB documentation
+dump with the top-k chunks, and building the index with loading its
+snapshot.
+"""
+
+import random
+import statistics
+import time
+
+import pytest
+
+from app.services.documentation_index import DocumentationIndex
+from app.services.documentation_service import DocumentationService
+
+FILES = 300
+SECTIONS = 12
+QUERIES = 50
+
+WORDS = (
+    "alembic migration postgres redis cache queue worker webhook stripe invoice subscription theme font "
+    "color token layout tenant team role permission audit log session token oauth email template "
+    "upload storage bucket search index deploy railway docker health metrics tracing rate limit"
+).split()
+FILLER = "the application uses configuration and settings for each environment with sensible defaults".split()
+
+
+def _write_corpus(docs_path):
+    rng = random.Random(7)
+    for file_index in range(FILES):
+        sections = []
+        for section in range(SECTIONS):
+            topic = rng.sample(WORDS, 3)
+            body = " ".join(rng.choice(FILLER + topic) for _ in range(250))
+            sections.append(f"## {' '.join(topic).title()} {section}\n\n{body}\n")
+        folder = docs_path / f"area{file_index % 10}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"GUIDE_{file_index}.md").write_text(f"# Guide {file_index}\n\n" + "\n".join(sections))
+
+
+def _legacy_search(docs_path, query, max_results=5):
+    # Previous DocumentationService.search_documentation
+    query_lower = query.lower()
+    results = []
+    for md_file in docs_path.glob("**/*.md"):
+        content = md_file.read_text(encoding="utf-8")
+        content_lower = content.lower()
+        index = content_lower.find(query_lower)
+        if index >= 0:
+            results.append({
+                "file": str(md_file.relative_to(docs_path)),
+                "content": content[max(0, index - 500):index + len(query) + 500],
+                "relevance": content_lower.count(query_lower),
+            })
+            if len(results) >= max_results:
+                break
+    results.sort(key=lambda x: x["relevance"], reverse=True)
+    return results
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestDocumentationIndexPerformance:
+    """Benchmark documentation search and chat context size"""
+
+    def test_search_context_and_snapshot(self, tmp_path):
+        docs_path = tmp_path / "docs"
+        _write_corpus(docs_path)
+        snapshot = tmp_path / "index.json.gz"
+        rng = random.Random(11)
+        # Chat questions: the previous substring search rarely matches them, so reads every file
+        queries = ["How do I configure {} with {}?".format(*rng.sample(WORDS, 2)) for _ in range(QUERIES)]
+
+        legacy_times = []
+        for query in queries[:10]:
+            start_time = time.perf_counter()
+            _legacy_search(docs_path, query)
+            legacy_times.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        index = DocumentationIndex(docs_path, snapshot_path=snapshot, check_interval=5)
+        index.ensure_fresh()
+        build_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        reloaded = DocumentationIndex(docs_path, snapshot_path=snapshot, check_interval=5)
+        reloaded.ensure_fresh()
+        load_time = time.perf_counter() - start_time
+        assert reloaded.builds == 0
+
+        search_times = []
+        for query in queries:
+            start_time = time.perf_counter()
+            results = index.search(query, top_k=8)
+            search_times.append(time.perf_counter() - start_time)
+            assert results
+
+        service = DocumentationService(str(docs_path))
+        service.index = index
+        dump = service.format_documentation_for_context(max_total_size=80000)
+        context = service.format_relevant_documentation(queries[0])
+
+        legacy_median = statistics.median(legacy_times)
+        search_median = statistics.median(search_times)
+        print(f"\n{FILES} files ({sum(f.stat().st_size for f in docs_path.glob('**/*.md')) // 1024} KiB), "
+              f"{len(index._state.chunks)} chunks: "
+              f"glob+read search {legacy_median * 1000:.1f} ms, BM25 search {search_median * 1000:.3f} ms "
+              f"(median); build {build_time * 1000:.0f} ms, snapshot load {load_time * 1000:.0f} ms "
+              f"({snapshot.stat().st_size // 1024} KiB); prompt documentation {len(dump)} -> {len(context)} chars")
+        assert search_median < 0.005
+        assert search_median * 10 < legacy_median
+        assert len(context) <= 12000 < len(dump)
+        assert load_time < build_time
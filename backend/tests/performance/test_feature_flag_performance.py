@@ -0,0 +1,104 @@
+"""
+Performance Tests for Feature Flag Evaluation
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Compares the
+previous evaluation path (flag query, MD5 bucketing, one committed log row per
+positive evaluation) with the in-process snapshot and buffered counters.
+"""
+
+import hashlib
+import os
+import time
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.feature_flag import FeatureFlag, FeatureFlagEvaluationCount, FeatureFlagLog
+from app.models.user import User
+from app.services import feature_flag_evaluator
+from app.services.feature_flag_evaluator import EvaluationCounter, flag_store
+from app.services.feature_flag_service import FeatureFlagService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+FLAGS = 50
+EVALUATIONS = 2000
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+async def _legacy_is_enabled(db, key, user_id):
+    # Previous implementation of FeatureFlagService.is_enabled
+    flag = (await db.execute(select(FeatureFlag).where(FeatureFlag.key == key))).scalar_one_or_none()
+    if not flag or not flag.enabled:
+        return False
+    if flag.rollout_percentage < 100.0:
+        hash_value = int(hashlib.md5(f"{key}:{user_id}".encode()).hexdigest(), 16)
+        if (hash_value % 100) + 1 > flag.rollout_percentage:
+            return False
+    log = FeatureFlagLog(flag_id=flag.id, user_id=user_id, enabled=True)
+    db.add(log)
+    await db.commit()
+    await db.refresh(log)
+    return True
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestFeatureFlagPerformance:
+    """Benchmark flag evaluation"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_versus_per_call_queries(self, monkeypatch):
+        monkeypatch.setattr(feature_flag_evaluator.cache_backend, "redis_client", None)
+        flag_store.clear()
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL)
+        tables = [User.__table__, FeatureFlag.__table__, FeatureFlagLog.__table__, FeatureFlagEvaluationCount.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+            await conn.execute(text(
+                "INSERT INTO users (id, email, hashed_password, is_active, created_at, updated_at) "
+                "SELECT g, 'user' || g || '@example.com', 'x', true, now(), now() FROM generate_series(1, 1000) g"
+            ))
+            await conn.execute(text(
+                "INSERT INTO feature_flags (key, name, enabled, rollout_percentage, is_ab_test) "
+                f"SELECT 'flag_' || g, 'Flag ' || g, true, 50.0, false FROM generate_series(1, {FLAGS}) g"
+            ))
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        counter = EvaluationCounter(session_factory=session_factory)
+        monkeypatch.setattr("app.services.feature_flag_service.evaluation_counter", counter)
+        try:
+            async with session_factory() as db:
+                service = FeatureFlagService(db)
+
+                start_time = time.perf_counter()
+                for i in range(EVALUATIONS):
+                    await _legacy_is_enabled(db, f"flag_{i % FLAGS + 1}", i % 1000 + 1)
+                legacy_time = (time.perf_counter() - start_time) / EVALUATIONS
+
+                await service.is_enabled("flag_1", user_id=1)
+                start_time = time.perf_counter()
+                for i in range(EVALUATIONS):
+                    await service.is_enabled(f"flag_{i % FLAGS + 1}", user_id=i % 1000 + 1)
+                await counter.shutdown()
+                snapshot_time = (time.perf_counter() - start_time) / EVALUATIONS
+
+                start_time = time.perf_counter()
+                flags = await service.evaluate_all(user_id=42)
+                evaluate_all_time = time.perf_counter() - start_time
+                assert len(flags) == FLAGS
+
+            print(f"\nper evaluation: legacy {legacy_time * 1e6:.0f} us, snapshot {snapshot_time * 1e6:.1f} us; "
+                  f"evaluate_all over {FLAGS} flags {evaluate_all_time * 1000:.2f} ms")
+            assert snapshot_time < legacy_time / 20
+        finally:
+            flag_store.clear()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await engine.dispose()
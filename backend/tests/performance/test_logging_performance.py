@@ -0,0 +1,107 @@
+"""
+Performance Tests for Request Logging
+
+Drives a FastAPI app directly through ASGI (no network) and compares the
+per-request cost of the previous request logging (BaseHTTPMiddleware writing
+two JSON lines synchronously) with RequestLoggingMiddleware writing one line
+through the queue listener, sampled and unsampled.
+"""
+
+import statistics
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+
+from app.core import request_logging
+from app.core.logging import StructuredLogger
+from app.core.request_logging import RequestLoggingMiddleware
+
+REQUESTS = 3000
+ROUNDS = 5
+
+
+def _app(middleware=None, sync_logger=None, sample_rate=1.0):
+    posts = APIRouter()
+
+    @posts.get("/{post_id}")
+    async def get_post(post_id: int):
+        return {"id": post_id}
+
+    app = FastAPI()
+    app.include_router(posts, prefix="/api/v1/posts")
+    if middleware == "previous":
+        @app.middleware("http")
+        async def log_requests_middleware(request: Request, call_next):
+            start_time = time.time()
+            sync_logger.info(f"Incoming request: {request.method} {request.url.path} from {request.client.host}")
+            response = await call_next(request)
+            sync_logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code} "
+                             f"({time.time() - start_time:.4f}s)")
+            return response
+    elif middleware == "queued":
+        app.add_middleware(
+            RequestLoggingMiddleware, sample_rate=sample_rate, route_sample_rates="", slow_threshold=10,
+        )
+    return app
+
+
+async def _drive(app):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start_time = time.perf_counter()
+    for index in range(REQUESTS):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/api/v1/posts/{index}", "raw_path": f"/api/v1/posts/{index}".encode(),
+            "root_path": "", "query_string": b"", "headers": [(b"host", b"test")],
+            "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start_time) / REQUESTS
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestRequestLoggingPerformance:
+    """Benchmark the request logging overhead"""
+
+    @pytest.mark.asyncio
+    async def test_request_logging_overhead(self, tmp_path, monkeypatch):
+        sync_file = open(tmp_path / "sync.log", "w")
+        queued_file = open(tmp_path / "queued.log", "w")
+        sync_logger = StructuredLogger("perf.logging.sync", stream=sync_file, asynchronous=False)
+        queued_logger = StructuredLogger("perf.logging.queued", stream=queued_file, asynchronous=True)
+        sync_logger.logger.propagate = queued_logger.logger.propagate = False
+        monkeypatch.setattr(request_logging, "logger", queued_logger)
+
+        apps = {
+            "plain": _app(),
+            "previous": _app("previous", sync_logger),
+            "queued": _app("queued"),
+            "sampled": _app("queued", sample_rate=0.1),
+        }
+        try:
+            times = {name: [] for name in apps}
+            for app in apps.values():
+                await _drive(app)
+            for _ in range(ROUNDS):
+                for name, app in apps.items():
+                    times[name].append(await _drive(app))
+                    queued_logger.flush()
+        finally:
+            queued_logger.shutdown()
+            sync_file.close()
+            queued_file.close()
+
+        plain, previous, queued, sampled = (statistics.median(times[name]) for name in apps)
+        print(f"\n{REQUESTS} requests x {ROUNDS}: plain {plain * 1e6:.0f} us/request, "
+              f"previous (2 sync lines) +{(previous - plain) * 1e6:.1f} us, "
+              f"queued (1 line) +{(queued - plain) * 1e6:.1f} us, "
+              f"queued sampled at 10% +{(sampled - plain) * 1e6:.1f} us")
+        assert queued < previous
+        assert sampled < queued
@@ -0,0 +1,101 @@
+"""
+Performance Tests for Request Metrics
+
+Drives a FastAPI app directly through ASGI (no network) with and without
+MetricsMiddleware to measure the per-request cost of recording the latency
+histogram, and compares it with the previous visibility: the request logging
+middleware writing two JSON log lines per request.
+"""
+
+import logging
+import statistics
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+
+from app.core.logging import JsonFormatter, logger
+from app.core.metrics import MetricsMiddleware
+
+REQUESTS = 5000
+ROUNDS = 5
+
+
+def _app(with_metrics=False, with_logging=False):
+    posts = APIRouter()
+
+    @posts.get("/{post_id}")
+    async def get_post(post_id: int):
+        return {"id": post_id}
+
+    app = FastAPI()
+    app.include_router(posts, prefix="/api/v1/posts")
+    if with_logging:
+        @app.middleware("http")
+        async def log_requests_middleware(request: Request, call_next):
+            start_time = time.time()
+            logger.info(f"Incoming request: {request.method} {request.url.path}")
+            response = await call_next(request)
+            logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code} "
+                        f"({time.time() - start_time:.4f}s)")
+            return response
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def _drive(app):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start_time = time.perf_counter()
+    for index in range(REQUESTS):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/api/v1/posts/{index}", "raw_path": f"/api/v1/posts/{index}".encode(),
+            "root_path": "", "query_string": b"", "headers": [(b"host", b"test")],
+            "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start_time) / REQUESTS
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestMetricsPerformance:
+    """Benchmark the request metrics overhead"""
+
+    @pytest.mark.asyncio
+    async def test_middleware_overhead(self, tmp_path):
+        # Same JSON log lines, written synchronously to a file instead of stdout
+        handler = logging.FileHandler(tmp_path / "requests.log")
+        handler.setFormatter(JsonFormatter())
+        previous_handlers = logger.logger.handlers
+        logger.logger.handlers = [handler]
+
+        apps = {
+            "plain": _app(),
+            "metrics": _app(with_metrics=True),
+            "logging": _app(with_logging=True),
+        }
+        try:
+            times = {name: [] for name in apps}
+            for app in apps.values():
+                await _drive(app)
+            for _ in range(ROUNDS):
+                for name, app in apps.items():
+                    times[name].append(await _drive(app))
+        finally:
+            logger.logger.handlers = previous_handlers
+            handler.close()
+
+        plain, with_metrics, with_logging = (statistics.median(times[name]) for name in apps)
+        overhead = with_metrics - plain
+        print(f"\n{REQUESTS} requests x {ROUNDS}: plain {plain * 1e6:.0f} us/request, "
+              f"latency histogram +{overhead * 1e6:.1f} us, "
+              f"request log lines +{(with_logging - plain) * 1e6:.1f} us")
+        assert overhead < 25e-6
+        assert overhead < with_logging - plain
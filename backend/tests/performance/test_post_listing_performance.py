@@ -0,0 +1,151 @@
+"""
+Performance Tests for the Post Listing
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL); the cached
+listing is also measured when REDIS_URL is set. Compares a limit=1000
+listing as it was (one author and one category query per post) with the
+single joined statement, with and without the content columns.
+"""
+
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.v1.endpoints.posts import list_posts
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditLogger
+from app.models.post import Post
+from app.models.tag import Category
+from app.models.user import User
+from app.services import post_listing_cache as cache_module
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+SCHEMA = "perf_post_listing"
+TABLES = ("users", "categories", "posts")
+POSTS = 20_000
+AUTHORS = 200
+CATEGORIES = 20
+LIMIT = 1000
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+@pytest.fixture
+async def engine():
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_async_engine(
+        PERFORMANCE_DATABASE_URL, connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Base.metadata.tables[name] for name in TABLES])
+        await conn.execute(text(
+            f"""INSERT INTO users (email, hashed_password, first_name, last_name, is_active, created_at, updated_at)
+                SELECT 'author' || i || '@example.com', 'x', 'First' || i, 'Last' || i, true, now(), now()
+                FROM generate_series(1, {AUTHORS}) AS i"""
+        ))
+        await conn.execute(text(
+            f"""INSERT INTO categories (name, slug, entity_type, sort_order, user_id, created_at, updated_at)
+                SELECT 'Category ' || i, 'category-' || i, 'post', 0, 1, now(), now()
+                FROM generate_series(1, {CATEGORIES}) AS i"""
+        ))
+        # ~6 KB of (incompressible) content and HTML per post
+        await conn.execute(text(
+            f"""INSERT INTO posts (title, slug, excerpt, content, content_html, status, author_id, category_id,
+                                   tags, published_at, created_at, updated_at)
+                SELECT 'Post ' || i, 'post-' || i, 'Excerpt ' || i,
+                       (SELECT string_agg(md5(i || '-' || g), ' ') FROM generate_series(1, 130) AS g),
+                       (SELECT string_agg('<p>' || md5(g || '-' || i) || '</p>', '') FROM generate_series(1, 50) AS g),
+                       'published', 1 + i % {AUTHORS},
+                       1 + i % {CATEGORIES}, '["news"]', now(), now() - i * interval '1 minute', now()
+                FROM generate_series(1, {POSTS}) AS i"""
+        ))
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    yield engine
+    await engine.dispose()
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await admin.dispose()
+
+
+async def _previous_listing(db):
+    """The listing as it was: posts, then one author and one category query per post"""
+    posts = (await db.execute(
+        select(Post).where(Post.status == 'published').order_by(Post.created_at.desc()).limit(LIMIT)
+    )).scalars().all()
+    names = []
+    for post in posts:
+        author = (await db.execute(select(User).where(User.id == post.author_id))).scalar_one_or_none()
+        category = (await db.execute(select(Category).where(Category.id == post.category_id))).scalar_one_or_none()
+        names.append((author.email, category.name))
+    return names
+
+
+async def _median(engine, call, runs):
+    async with AsyncSession(engine) as session:
+        await call(session)
+        timings = []
+        for _ in range(runs):
+            session.expunge_all()
+            start_time = time.perf_counter()
+            await call(session)
+            timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestPostListingPerformance:
+    """Benchmark a 1000 post listing"""
+
+    @pytest.mark.asyncio
+    async def test_listing(self, engine, monkeypatch):
+        async def log_event(**kwargs):
+            return None
+
+        monkeypatch.setattr(SecurityAuditLogger, "log_event", log_event)
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+
+        def listing(**params):
+            async def call(db):
+                return await list_posts(
+                    request=SimpleNamespace(client=None), skip=0, limit=LIMIT, status="published",
+                    category_id=None, category_slug=None, tag=None, author_id=None, author_slug=None, year=None,
+                    current_user=SimpleNamespace(id=1), db=db, **params,
+                )
+            return call
+
+        previous = await _median(engine, _previous_listing, runs=3)
+        joined = await _median(engine, listing(exclude_content=False), runs=10)
+        without_content = await _median(engine, listing(exclude_content=True), runs=10)
+        print(f"\n{LIMIT} of {POSTS} posts: per-post queries {previous * 1000:.0f} ms, "
+              f"one statement {joined * 1000:.1f} ms, without content {without_content * 1000:.1f} ms")
+
+        if os.getenv("REDIS_URL"):
+            import redis.asyncio as redis
+
+            client = redis.from_url(os.environ["REDIS_URL"])
+            monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+            monkeypatch.setattr(cache_module.cache_backend, "use_redis", True)
+            try:
+                await cache_module.post_listing_cache.invalidate()
+                cached = await _median(engine, listing(exclude_content=True), runs=20)
+                print(f"Cached listing without content: {cached * 1000:.1f} ms")
+            finally:
+                await cache_module.post_listing_cache.invalidate()
+                await client.aclose()
+
+        assert joined * 5 < previous
+        assert without_content < joined
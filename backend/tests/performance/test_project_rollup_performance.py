@@ -0,0 +1,153 @@
+"""
+Performance Tests for the Daily Project Rollups
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Seeds 1M
+projects over two years in a dedicated schema and compares, for one user,
+the insights endpoint as it was (loading the user's project rows), the
+conditional count over the projects table (ANALYTICS_ROLLUPS=false) and the
+read from the rollups. Also reports the backfill duration and what the flush
+hooks add to a project insert.
+"""
+
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.insights import get_insights
+from app.core.config import settings
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditLogger
+from app.models.project import Project, ProjectStatus
+from app.services import project_rollup_service
+from app.services.project_rollup_service import ProjectRollupService, register_project_rollup_hooks
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+SCHEMA = "perf_project_rollups"
+TABLES = ("users", "projects", "project_daily_rollups", "project_rollup_state")
+USERS = 10
+PROJECTS = 1_000_000
+DAYS = 730
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+@pytest.fixture
+async def engine():
+    register_project_rollup_hooks()
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_async_engine(
+        PERFORMANCE_DATABASE_URL, connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Base.metadata.tables[name] for name in TABLES])
+        await conn.execute(text(
+            f"""INSERT INTO users (email, hashed_password, is_active, created_at, updated_at)
+                SELECT 'user' || i || '@example.com', 'x', true, now(), now()
+                FROM generate_series(1, {USERS}) AS i"""
+        ))
+        await conn.execute(text(
+            f"""INSERT INTO projects (name, user_id, status, created_at, updated_at)
+                SELECT 'project ' || i, 1 + i % {USERS},
+                       ('{{ACTIVE,ARCHIVED,COMPLETED}}'::text[])[1 + i % 3]::projectstatus,
+                       now() - (i % {DAYS}) * interval '1 day' - (i % 86400) * interval '1 second', now()
+                FROM generate_series(1, {PROJECTS}) AS i"""
+        ))
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    yield engine
+    await engine.dispose()
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await admin.dispose()
+
+
+async def _median(engine, call, runs):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await call(session)
+        timings = []
+        for _ in range(runs):
+            session.expunge_all()
+            start_time = time.perf_counter()
+            await call(session)
+            timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+async def _previous_insights(db, user_id):
+    """The project rows the insights endpoint loaded before (plus its 12 monthly counts, not included)"""
+    projects = (await db.execute(select(Project).where(Project.user_id == user_id))).scalars().all()
+    return len(projects), len([project for project in projects if project.status == ProjectStatus.ACTIVE])
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestProjectRollupPerformance:
+    """Benchmark insights reads and rollup maintenance against 1M projects"""
+
+    @pytest.mark.asyncio
+    async def test_insights_read_and_rollup_maintenance(self, engine, monkeypatch):
+        async def log_event(**kwargs):
+            return None
+
+        monkeypatch.setattr(SecurityAuditLogger, "log_event", log_event)
+        user = SimpleNamespace(id=1)
+        request = SimpleNamespace(client=None)
+
+        async def insights(db):
+            return await get_insights(request=request, current_user=user, db=db)
+
+        async with AsyncSession(engine) as db:
+            start_time = time.perf_counter()
+            backfill = await ProjectRollupService(db).backfill()
+            backfill_time = time.perf_counter() - start_time
+
+        previous = await _median(engine, lambda db: _previous_insights(db, user.id), runs=3)
+        monkeypatch.setattr(settings, "ANALYTICS_ROLLUPS", False)
+        live = await _median(engine, insights, runs=5)
+        live_result = await _median_result(engine, insights)
+        monkeypatch.setattr(settings, "ANALYTICS_ROLLUPS", True)
+        rollups = await _median(engine, insights, runs=20)
+        assert await _median_result(engine, insights) == live_result
+
+        async def create_project(db):
+            db.add(Project(name="new", user_id=user.id))
+            await db.commit()
+
+        with_hooks = await _median(engine, create_project, runs=30)
+        event.remove(Session, "before_flush", project_rollup_service._before_flush)
+        event.remove(Session, "after_flush", project_rollup_service._after_flush)
+        try:
+            without_hooks = await _median(engine, create_project, runs=30)
+        finally:
+            register_project_rollup_hooks()
+        async with AsyncSession(engine) as db:
+            await ProjectRollupService(db).rebuild([user.id])
+            await db.commit()
+
+        print(f"\n{PROJECTS} projects, {USERS} users, {DAYS} days; backfill {backfill_time:.1f}s "
+              f"({backfill['rows']} rollup rows)")
+        print(f"Insights for a user with {PROJECTS // USERS} projects: loading rows {previous * 1000:.0f} ms, "
+              f"count over projects {live * 1000:.1f} ms, rollups {rollups * 1000:.2f} ms")
+        print(f"Project insert + commit: {without_hooks * 1000:.2f} ms without hooks, "
+              f"{with_hooks * 1000:.2f} ms with rollup maintenance")
+        assert rollups * 10 < live
+        assert live < previous
+
+
+async def _median_result(engine, call):
+    async with AsyncSession(engine) as db:
+        response = await call(db)
+    return response.model_dump()
@@ -0,0 +1,143 @@
+"""
+Performance Tests for Query Instrumentation
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Measures the
+per-statement cost of the engine instrumentation (end to end, and in the
+cursor hooks alone since round trips dominate on a shared CPU) and what the
+N+1 detector reports for a post listing that loads authors and categories
+one post at a time (the list_posts pattern) against one that batches them.
+"""
+
+import os
+import statistics
+import time
+import timeit
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.query_instrumentation import (
+    _after_cursor_execute,
+    _before_cursor_execute,
+    instrument_engine,
+    track_queries,
+)
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+POSTS = 200
+LOOKUPS = 3000
+ROUNDS = 5
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+async def _setup(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS perf_qi_posts, perf_qi_users, perf_qi_categories"))
+        await conn.execute(text("CREATE TABLE perf_qi_users (id INTEGER PRIMARY KEY, name TEXT)"))
+        await conn.execute(text("CREATE TABLE perf_qi_categories (id INTEGER PRIMARY KEY, name TEXT)"))
+        await conn.execute(text(
+            "CREATE TABLE perf_qi_posts (id INTEGER PRIMARY KEY, author_id INTEGER, category_id INTEGER)"
+        ))
+        await conn.execute(text("INSERT INTO perf_qi_users SELECT i, 'user ' || i FROM generate_series(1, 50) i"))
+        await conn.execute(text("INSERT INTO perf_qi_categories SELECT i, 'cat ' || i FROM generate_series(1, 10) i"))
+        await conn.execute(text(
+            f"INSERT INTO perf_qi_posts SELECT i, 1 + i % 50, 1 + i % 10 FROM generate_series(1, {POSTS}) i"
+        ))
+
+
+async def _lookups(engine):
+    async with engine.connect() as conn:
+        start_time = time.perf_counter()
+        for index in range(LOOKUPS):
+            await conn.execute(text("SELECT name FROM perf_qi_users WHERE id = :id"), {"id": 1 + index % 50})
+        return time.perf_counter() - start_time
+
+
+class _Connection:
+    info = {}
+
+
+def _hook_time(statement, calls=100000):
+    """Seconds spent in the before/after cursor hooks per statement"""
+    conn = _Connection()
+
+    def execute():
+        _before_cursor_execute(conn, None, statement, None, None, False)
+        _after_cursor_execute(conn, None, statement, None, None, False)
+
+    with track_queries():
+        return timeit.timeit(execute, number=calls) / calls
+
+
+async def _listing_one_by_one(conn):
+    posts = (await conn.execute(text("SELECT id, author_id, category_id FROM perf_qi_posts"))).all()
+    for post in posts:
+        await conn.execute(text("SELECT name FROM perf_qi_users WHERE id = :id"), {"id": post.author_id})
+        await conn.execute(text("SELECT name FROM perf_qi_categories WHERE id = :id"), {"id": post.category_id})
+
+
+async def _listing_batched(conn):
+    posts = (await conn.execute(text("SELECT id, author_id, category_id FROM perf_qi_posts"))).all()
+    await conn.execute(
+        text("SELECT id, name FROM perf_qi_users WHERE id = ANY(:ids)"), {"ids": list({post.author_id for post in posts})}
+    )
+    await conn.execute(
+        text("SELECT id, name FROM perf_qi_categories WHERE id = ANY(:ids)"),
+        {"ids": list({post.category_id for post in posts})},
+    )
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestQueryInstrumentationPerformance:
+    """Benchmark instrumentation overhead and N+1 detection"""
+
+    @pytest.mark.asyncio
+    async def test_overhead_and_n_plus_one_detection(self):
+        plain = create_async_engine(PERFORMANCE_DATABASE_URL)
+        instrumented = create_async_engine(PERFORMANCE_DATABASE_URL)
+        instrument_engine(instrumented)
+        try:
+            await _setup(plain)
+            await _lookups(plain)
+            await _lookups(instrumented)
+            plain_times, instrumented_times = [], []
+            for _ in range(ROUNDS):
+                plain_times.append(await _lookups(plain))
+                with track_queries() as stats:
+                    instrumented_times.append(await _lookups(instrumented))
+                assert stats.count == LOOKUPS
+
+            async with instrumented.connect() as conn:
+                start_time = time.perf_counter()
+                with track_queries() as one_by_one:
+                    await _listing_one_by_one(conn)
+                one_by_one_time = time.perf_counter() - start_time
+                start_time = time.perf_counter()
+                with track_queries() as batched:
+                    await _listing_batched(conn)
+                batched_time = time.perf_counter() - start_time
+        finally:
+            async with plain.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS perf_qi_posts, perf_qi_users, perf_qi_categories"))
+            await plain.dispose()
+            await instrumented.dispose()
+
+        plain_median = statistics.median(plain_times)
+        instrumented_median = statistics.median(instrumented_times)
+        hook_time = _hook_time("SELECT name FROM perf_qi_users WHERE id = $1::INTEGER")
+        print(f"\n{LOOKUPS} lookups: plain {plain_median * 1000:.0f} ms, instrumented "
+              f"{instrumented_median * 1000:.0f} ms (hooks {hook_time * 1e6:.1f} us/statement); "
+              f"{POSTS}-post listing one by one {one_by_one.count} queries, {one_by_one_time * 1000:.0f} ms, "
+              f"{len(one_by_one.n_plus_one())} N+1 patterns; batched {batched.count} queries, "
+              f"{batched_time * 1000:.0f} ms, {len(batched.n_plus_one())} N+1 patterns")
+        assert hook_time < 10e-6
+        assert instrumented_median < plain_median * 1.5
+        assert one_by_one.count == 2 * POSTS + 1
+        assert [executions for _, executions in one_by_one.n_plus_one()] == [POSTS, POSTS]
+        assert batched.count == 3 and batched.n_plus_one() == []
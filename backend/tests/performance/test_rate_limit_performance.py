@@ -0,0 +1,89 @@
+"""
+Performance Tests for Rate Limiting
+
+Measures the overhead per request of the rate limiting engine: route lookup,
+in-memory GCRA, and (with REDIS_URL set) the Redis Lua script with and
+without the local lease pre-filter.
+"""
+
+import os
+import time
+
+import pytest
+
+from app.core.rate_limit import RATE_LIMITS, get_rate_limit
+from app.core.rate_limiter import REDIS_AVAILABLE, RateLimiter, parse_rate
+
+REQUESTS = 20_000
+PATHS = ["/api/v1/auth/login", "/api/v1/users/42", "/api/v1/projects/7", "/api/v1/unknown/path"]
+
+
+def _legacy_get_rate_limit(path):
+    """Previous lookup: scan every pattern on every call"""
+    for category, limits in RATE_LIMITS.items():
+        if category == "default":
+            continue
+        for pattern, limit in limits.items():
+            if pattern == path:
+                return limit
+            if "{user_id}" in pattern and path.startswith(pattern.replace("{user_id}", "")):
+                return limit
+            if "{project_id}" in pattern and path.startswith(pattern.replace("{project_id}", "")):
+                return limit
+    return RATE_LIMITS["default"]
+
+
+async def _per_request_us(engine, keys, rate):
+    start_time = time.perf_counter()
+    for i in range(REQUESTS):
+        await engine.hit(keys[i % len(keys)], rate)
+    return (time.perf_counter() - start_time) / REQUESTS * 1_000_000
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestRateLimitPerformance:
+    """Benchmark rate limiting overhead per request"""
+
+    def test_route_lookup(self):
+        start_time = time.perf_counter()
+        for i in range(REQUESTS):
+            _legacy_get_rate_limit(PATHS[i % len(PATHS)])
+        legacy_us = (time.perf_counter() - start_time) / REQUESTS * 1_000_000
+
+        start_time = time.perf_counter()
+        for i in range(REQUESTS):
+            get_rate_limit(PATHS[i % len(PATHS)])
+        compiled_us = (time.perf_counter() - start_time) / REQUESTS * 1_000_000
+
+        print(f"\nroute lookup: scan {legacy_us:.2f} us, compiled {compiled_us:.2f} us")
+        assert [get_rate_limit(p) for p in PATHS] == [_legacy_get_rate_limit(p) for p in PATHS]
+        assert compiled_us < legacy_us
+
+    @pytest.mark.asyncio
+    async def test_memory_engine_overhead(self):
+        engine = RateLimiter()
+        overhead = await _per_request_us(engine, [f"ip:{i}" for i in range(100)], parse_rate("1000000/hour"))
+        print(f"\nmemory GCRA: {overhead:.2f} us/request")
+        assert overhead < 50
+
+    @pytest.mark.skipif(
+        not (REDIS_AVAILABLE and os.getenv("REDIS_URL")),
+        reason="REDIS_URL not set",
+    )
+    @pytest.mark.asyncio
+    async def test_redis_engine_overhead(self):
+        rate = parse_rate("1000000/hour")
+        keys = [f"bench:{i}" for i in range(10)]
+        script_only = RateLimiter(redis_url=os.environ["REDIS_URL"], lease_max=1)
+        leased = RateLimiter(redis_url=os.environ["REDIS_URL"], lease_max=100, lease_ttl=5)
+        try:
+            await script_only.reset()
+            script_us = await _per_request_us(script_only, keys, rate)
+            leased_us = await _per_request_us(leased, keys, rate)
+            print(f"\nRedis GCRA: script every request {script_us:.1f} us, with local leases {leased_us:.1f} us")
+            assert leased_us * 3 < script_us
+        finally:
+            await script_only.reset()
+            await script_only.close()
+            await leased.close()
@@ -0,0 +1,131 @@
+"""
+Performance Tests for Security Audit Logs
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Seeds 1M audit
+logs over two years in the previous (unpartitioned) layout, measures stats and
+retention there, then applies migration 032 and measures the same operations
+on monthly partitions with daily rollups.
+"""
+
+import importlib.util
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.security_audit import SecurityAuditLog
+from app.services.audit_log_service import AuditLogMaintenance, AuditStatsService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+ROWS = 1_000_000
+USERS = 50
+VERSIONS = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+def _migration(filename):
+    spec = importlib.util.spec_from_file_location(filename, VERSIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run_migration(sync_conn, step):
+    with Operations.context(MigrationContext.configure(sync_conn)):
+        step()
+
+
+async def _timed(coro):
+    start_time = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start_time
+
+
+async def _legacy_stats(db, user_id, start_date=None):
+    # Previous implementation: group the raw logs on every request
+    query = select(SecurityAuditLog.event_type, func.count()).where(
+        SecurityAuditLog.user_id == user_id
+    ).group_by(SecurityAuditLog.event_type)
+    if start_date:
+        query = query.where(SecurityAuditLog.timestamp >= start_date)
+    return dict((await db.execute(query)).all())
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestSecurityAuditPerformance:
+    """Benchmark audit stats and retention with 1M rows"""
+
+    @pytest.mark.asyncio
+    async def test_partitions_and_rollups_versus_plain_table(self):
+        create_table = _migration("020_add_security_audit_logs_table.py")
+        partition_table = _migration("032_partition_security_audit_logs.py")
+        now = datetime.now(timezone.utc)
+        recent = now - timedelta(days=30)
+        cutoff = now - timedelta(days=365)
+
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS security_audit_logs, security_audit_daily_stats CASCADE"))
+            await conn.run_sync(_run_migration, create_table.upgrade)
+            await conn.execute(text(
+                "INSERT INTO security_audit_logs (timestamp, event_type, severity, user_id, description, success) "
+                f"SELECT now() - g * interval '{int(730 * 86400 / ROWS * 1000)} milliseconds', "
+                "(ARRAY['login_success', 'login_failure', 'data_modified', 'api_key_used'])[1 + g % 4], "
+                f"(ARRAY['info', 'warning', 'error'])[1 + g % 3], 1 + g % {USERS}, 'event', 'success' "
+                f"FROM generate_series(1, {ROWS}) g"
+            ))
+            await conn.execute(text("ANALYZE security_audit_logs"))
+
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                await _legacy_stats(db, 7)
+                legacy_all, legacy_all_time = await _timed(_legacy_stats(db, 7))
+                legacy_recent, legacy_recent_time = await _timed(_legacy_stats(db, 7, recent))
+                _, legacy_delete_time = await _timed(db.execute(
+                    text("DELETE FROM security_audit_logs WHERE timestamp < :cutoff"), {"cutoff": cutoff}
+                ))
+                await db.rollback()
+
+            async with engine.begin() as conn:
+                await conn.run_sync(_run_migration, partition_table.upgrade)
+
+            async with session_factory() as db:
+                maintenance = AuditLogMaintenance(db)
+                assert await maintenance.is_partitioned()
+                days, rollup_time = await _timed(maintenance.rollup_daily_stats(now=now))
+                assert days >= 729
+
+                service = AuditStatsService(db)
+                await service.get_stats(7)
+                stats_all, stats_all_time = await _timed(service.get_stats(7))
+                stats_recent, stats_recent_time = await _timed(service.get_stats(7, start_date=recent))
+                assert stats_all["event_type_counts"] == legacy_all
+                assert stats_recent["event_type_counts"] == legacy_recent
+
+                dropped, drop_time = await _timed(maintenance.drop_expired_partitions(now=now))
+                assert len(dropped) >= 11
+
+            print(f"\nrollup of {days} days: {rollup_time * 1000:.0f} ms")
+            print(f"stats, all time: {legacy_all_time * 1000:.1f} ms -> {stats_all_time * 1000:.1f} ms")
+            print(f"stats, last 30 days: {legacy_recent_time * 1000:.1f} ms -> {stats_recent_time * 1000:.1f} ms")
+            print(f"retention: DELETE {legacy_delete_time * 1000:.0f} ms -> "
+                  f"drop {len(dropped)} partitions {drop_time * 1000:.0f} ms")
+
+            assert stats_all_time < legacy_all_time / 3
+            assert drop_time < legacy_delete_time
+        finally:
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS security_audit_logs, security_audit_daily_stats CASCADE"))
+            await engine.dispose()
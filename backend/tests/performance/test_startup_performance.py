@@ -0,0 +1,92 @@
+"""
+Performance Tests for Startup Schema Initialization
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Boots several
+simulated workers at once, in a dedicated schema holding every model table,
+and compares the database work each did at startup before (create_all and
+ANALYZE in every worker) with the marker check of run_schema_init.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.main  # noqa: F401 - register every model on Base.metadata
+from app.core import startup
+from app.core.database import Base
+from app.core.startup import run_schema_init
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+SCHEMA = "perf_startup"
+WORKERS = 4
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+def _worker_engine():
+    return create_async_engine(
+        PERFORMANCE_DATABASE_URL, connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+
+
+async def _previous_boot(engine):
+    """What background_init did in every worker (minus the theme and index checks)"""
+    start_time = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    return time.perf_counter() - start_time
+
+
+async def _initialize(bind):
+    async with bind.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with bind.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+    return {}
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestStartupPerformance:
+    """Benchmark per-worker startup database work"""
+
+    @pytest.mark.asyncio
+    async def test_worker_cold_start(self, monkeypatch):
+        monkeypatch.setattr(startup, "initialize_schema", _initialize)
+        admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        workers = [_worker_engine() for _ in range(WORKERS)]
+        try:
+            first_deploy = await asyncio.gather(*(run_schema_init(worker) for worker in workers))
+            previous = await asyncio.gather(*(_previous_boot(worker) for worker in workers))
+            restart = await asyncio.gather(*(run_schema_init(worker) for worker in workers))
+        finally:
+            for worker in workers:
+                await worker.dispose()
+            async with admin.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await admin.dispose()
+
+        statuses = sorted(outcome["status"] for outcome in first_deploy)
+        previous_time = statistics.median(previous)
+        restart_time = statistics.median(outcome["duration"] for outcome in restart)
+        print(f"\n{WORKERS} workers, {len(Base.metadata.tables)} tables: first deploy {statuses}, "
+              f"previous per-worker startup {previous_time * 1000:.0f} ms, "
+              f"restart with current marker {restart_time * 1000:.1f} ms")
+        assert statuses.count("initialized") == 1
+        assert {outcome["status"] for outcome in restart} == {"current"}
+        assert restart_time * 10 < previous_time
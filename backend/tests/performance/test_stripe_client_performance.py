@@ -0,0 +1,90 @@
+"""
+Performance Tests for Stripe API Calls
+
+Runs against the local fake Stripe API with injected latency. Compares the
+previous path (blocking SDK calls made from async code) with the async
+gateway: throughput of concurrent calls and event loop lag while they run.
+"""
+
+import asyncio
+import time
+
+import pytest
+import stripe
+
+from app.services.stripe_client import StripeGateway, StripeMetrics
+from tests.fakes.stripe_server import FakeStripeServer
+
+LATENCY = 0.1
+CALLS = 50
+
+
+async def _max_loop_lag(work) -> float:
+    """Run `work` while a 10 ms ticker measures how late the event loop wakes it"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start_time = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start_time - 0.01)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    try:
+        await work()
+    finally:
+        done.set()
+        await task
+    return max(lags, default=0.0)
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestStripeClientPerformance:
+    """Benchmark blocking SDK calls against the async gateway"""
+
+    @pytest.mark.asyncio
+    async def test_async_gateway_versus_blocking_sdk(self, monkeypatch):
+        with FakeStripeServer() as server:
+            server.latency = LATENCY
+            # Previous setup: module-level key and blocking requests
+            monkeypatch.setattr(stripe, "api_key", "sk_test_fake")
+            monkeypatch.setattr(stripe, "api_base", server.url)
+
+            async def legacy():
+                for i in range(CALLS):
+                    stripe.Customer.create(email=f"legacy{i}@example.com")
+
+            start_time = time.perf_counter()
+            legacy_lag = await _max_loop_lag(legacy)
+            legacy_time = time.perf_counter() - start_time
+
+            metrics = StripeMetrics()
+            gateway = StripeGateway(api_key="sk_test_fake", api_base=server.url, timeout=5.0, metrics=metrics)
+            try:
+                # Warm up: client construction and lazy SDK imports happen on first use
+                await gateway.create_customer({"email": "warmup@example.com"})
+                metrics.reset()
+
+                async def concurrent():
+                    await asyncio.gather(*[
+                        gateway.create_customer({"email": f"async{i}@example.com"}) for i in range(CALLS)
+                    ])
+
+                start_time = time.perf_counter()
+                async_lag = await _max_loop_lag(concurrent)
+                async_time = time.perf_counter() - start_time
+            finally:
+                await gateway.close()
+
+        snapshot = metrics.snapshot()["customers.create"]
+        print(f"\n{CALLS} customer creates at {LATENCY * 1000:.0f} ms latency: "
+              f"blocking {legacy_time * 1000:.0f} ms (max loop lag {legacy_lag * 1000:.0f} ms), "
+              f"async {async_time * 1000:.0f} ms (max loop lag {async_lag * 1000:.1f} ms, "
+              f"p50 {snapshot['p50']}, p99 {snapshot['p99']})")
+        assert snapshot["count"] == CALLS and snapshot["errors"] == 0
+        assert async_time < legacy_time / 5
+        assert legacy_lag > LATENCY * CALLS / 2
+        assert async_lag < legacy_lag / 10
@@ -0,0 +1,134 @@
+"""
+Performance Tests for Stripe Webhook Processing
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Compares the
+previous endpoint (check the event id, run the handler inline, then insert
+the marker) with queueing: concurrent duplicate deliveries, response time
+with a slow handler, and draining a backlog with workers in two "processes"
+sharing the queue through SKIP LOCKED.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.webhook_event import WebhookEvent, WebhookEventStatus
+from app.services.stripe_webhook_queue import WebhookQueue
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+HANDLER_TIME = 0.05
+DELIVERIES = 20
+EVENTS = 400
+CUSTOMERS = 40
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+def _event(index, customer):
+    return {
+        "id": f"evt_{index}",
+        "type": "invoice.paid",
+        "created": 1_700_000_000 + index,
+        "data": {"object": {"id": f"in_{index}", "object": "invoice", "customer": customer}},
+    }
+
+
+async def _legacy_webhook(session_factory, event, handled):
+    # Previous endpoint: idempotency check, inline processing, then the marker
+    async with session_factory() as db:
+        existing = await db.execute(select(WebhookEvent).where(WebhookEvent.stripe_event_id == event["id"]))
+        if existing.scalar_one_or_none() is not None:
+            return
+        await asyncio.sleep(HANDLER_TIME)
+        handled.append(event["id"])
+        db.add(WebhookEvent(stripe_event_id=event["id"], event_type=event["type"], event_data=json.dumps(event),
+                            status=WebhookEventStatus.PROCESSED.value))
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestStripeWebhookPerformance:
+    """Benchmark inline webhook processing against the queue"""
+
+    @pytest.mark.asyncio
+    async def test_queue_versus_inline_processing(self):
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL, pool_size=30)
+        tables = [WebhookEvent.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        try:
+            # Concurrent deliveries of one event
+            handled = []
+            start_time = time.perf_counter()
+            await asyncio.gather(*[
+                _legacy_webhook(session_factory, _event(0, "cus_0"), handled) for _ in range(DELIVERIES)
+            ])
+            legacy_response = time.perf_counter() - start_time
+
+            queue = WebhookQueue(session_factory=session_factory)
+
+            async def deliver(event):
+                async with session_factory() as db:
+                    return await queue.enqueue(db, event)
+
+            start_time = time.perf_counter()
+            inserted = await asyncio.gather(*[deliver(_event(1, "cus_0")) for _ in range(DELIVERIES)])
+            queued_response = time.perf_counter() - start_time
+            assert inserted.count(True) == 1
+
+            # Backlog drained by 2 x 4 workers
+            for index in range(2, EVENTS + 2):
+                await deliver(_event(index, f"cus_{index % CUSTOMERS}"))
+            processed = []
+
+            async def processor(event, db):
+                await asyncio.sleep(HANDLER_TIME / 10)
+                processed.append(event["id"])
+
+            queues = [WebhookQueue(session_factory=session_factory) for _ in range(2)]
+            start_time = time.perf_counter()
+            for worker_queue in queues:
+                worker_queue.start(processor, workers=4)
+            deadline = time.monotonic() + 60
+            while len(processed) < EVENTS + 1 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            drain_time = time.perf_counter() - start_time
+            for worker_queue in queues:
+                await worker_queue.shutdown()
+
+            assert len(processed) == len(set(processed)) == EVENTS + 1
+            for customer in range(CUSTOMERS):
+                indexes = [int(e[4:]) for e in processed if e != "evt_1" and int(e[4:]) % CUSTOMERS == customer]
+                assert indexes == sorted(indexes)
+            async with session_factory() as db:
+                remaining = (await db.execute(
+                    select(func.count()).where(WebhookEvent.status != WebhookEventStatus.PROCESSED.value)
+                )).scalar()
+            assert remaining == 0
+
+            print(f"\n{DELIVERIES} concurrent deliveries of one event: inline handled {len(handled)} times in "
+                  f"{legacy_response * 1000:.0f} ms, queued once in {queued_response * 1000:.0f} ms; "
+                  f"{EVENTS + 1} events drained by 8 workers in {drain_time * 1000:.0f} ms "
+                  f"({(EVENTS + 1) / drain_time:.0f} events/s)")
+            assert len(handled) > 1
+            assert queued_response < legacy_response
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await engine.dispose()
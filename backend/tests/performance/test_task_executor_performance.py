@@ -0,0 +1,114 @@
+"""
+Performance Tests for the Scheduled Task Executor
+
+Runs against PostgreSQL only (set PERFORMANCE_DATABASE_URL). Compares two
+pollers built on the previous service API (get_pending_tasks then
+update_task_status), which run tasks more than once, with executors in three
+"processes" claiming through SKIP LOCKED.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.scheduled_task import ScheduledTask, TaskExecutionLog, TaskStatus
+from app.models.user import User
+from app.services import task_executor as executor_module
+from app.services.scheduled_task_service import ScheduledTaskService
+from app.services.task_executor import TaskExecutor
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+TASKS = 1000
+TASK_TIME = 0.01
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+async def _legacy_poller(session_factory, runs):
+    # What a loop over the previous service API looks like
+    while True:
+        async with session_factory() as db:
+            service = ScheduledTaskService(db)
+            tasks = await service.get_pending_tasks(limit=50)
+            if not tasks:
+                return
+            for task in tasks:
+                await service.update_task_status(task.id, TaskStatus.RUNNING)
+                await asyncio.sleep(TASK_TIME)
+                runs[task.id] += 1
+                await service.update_task_status(task.id, TaskStatus.COMPLETED)
+
+
+async def _seed(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM task_execution_logs"))
+        await conn.execute(text("DELETE FROM scheduled_tasks"))
+        await conn.execute(text(
+            "INSERT INTO scheduled_tasks (name, task_type, scheduled_at, status, attempts, task_data, "
+            "created_at, updated_at) "
+            f"SELECT 'task ' || g, 'CUSTOM', now() - interval '1 minute', 'PENDING', 0, "
+            f"'{{\"handler\": \"bench\"}}', now(), now() FROM generate_series(1, {TASKS}) g"
+        ))
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestTaskExecutorPerformance:
+    """Benchmark naive polling against SKIP LOCKED executors"""
+
+    @pytest.mark.asyncio
+    async def test_executors_versus_polling(self, monkeypatch):
+        engine = create_async_engine(PERFORMANCE_DATABASE_URL, pool_size=20)
+        tables = [User.__table__, ScheduledTask.__table__, TaskExecutionLog.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        try:
+            await _seed(engine)
+            legacy_runs = Counter()
+            start_time = time.perf_counter()
+            await asyncio.gather(*[_legacy_poller(session_factory, legacy_runs) for _ in range(2)])
+            legacy_time = time.perf_counter() - start_time
+
+            await _seed(engine)
+            runs = Counter()
+
+            async def bench(task):
+                await asyncio.sleep(TASK_TIME)
+                runs[task.id] += 1
+
+            monkeypatch.setitem(executor_module._handlers, "bench", bench)
+            monkeypatch.setattr("app.services.task_executor.settings.SCHEDULED_TASK_POLL_INTERVAL", 0.05)
+            executors = [TaskExecutor(session_factory=session_factory, concurrency=8) for _ in range(3)]
+            start_time = time.perf_counter()
+            for executor in executors:
+                executor.start()
+            deadline = time.monotonic() + 120
+            while sum(runs.values()) < TASKS and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            executor_time = time.perf_counter() - start_time
+            for executor in executors:
+                await executor.shutdown()
+
+            lag = max(executor.metrics.lag.quantile(0.99) or 0 for executor in executors)
+            print(f"\n{TASKS} tasks of {TASK_TIME * 1000:.0f} ms: 2 pollers {legacy_time * 1000:.0f} ms, "
+                  f"{sum(legacy_runs.values()) - len(legacy_runs)} duplicate runs; "
+                  f"3 executors x 8 {executor_time * 1000:.0f} ms, "
+                  f"{sum(runs.values()) - len(runs)} duplicate runs, p99 lag <= {lag}s")
+            assert len(runs) == TASKS and max(runs.values()) == 1
+            assert executor_time < legacy_time / 2
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=tables)
+            await engine.dispose()
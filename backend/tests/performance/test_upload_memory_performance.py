@@ -0,0 +1,122 @@
+"""
+Performance Tests for Upload Handling
+
+Compares memory held while validating a spooled upload (the previous code
+read the whole file for MIME sniffing and again for the size check) and the
+bytes consumed before an oversized chunked body is rejected.
+"""
+
+import tempfile
+import time
+import tracemalloc
+
+import magic
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+
+from app.api.upload import get_upload_size, validate_file_content
+from app.core.request_limits import RequestSizeLimitMiddleware
+
+FILE_SIZE = 32 * 1024 * 1024
+CHUNK = 64 * 1024
+
+
+def _spooled_upload() -> UploadFile:
+    # Same spooling as Starlette's multipart parser (1 MB in memory, then disk)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(b"%PDF-1.4\n")
+    block = b"0" * CHUNK
+    for _ in range(FILE_SIZE // CHUNK):
+        spooled.write(block)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename="report.pdf")
+
+
+def _peak(func) -> tuple[float, int]:
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _legacy_validate(upload: UploadFile) -> None:
+    content = upload.file.read()
+    upload.file.seek(0)
+    magic.from_buffer(content, mime=True)
+    size = len(upload.file.read())
+    upload.file.seek(0)
+    assert size > 0
+
+
+def _validate(upload: UploadFile) -> None:
+    validate_file_content(upload)
+    assert get_upload_size(upload) > 0
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestUploadMemoryPerformance:
+    """Benchmark upload validation memory and early body rejection"""
+
+    def test_validation_memory(self):
+        upload = _spooled_upload()
+        try:
+            legacy_time, legacy_peak = _peak(lambda: _legacy_validate(upload))
+            new_time, new_peak = _peak(lambda: _validate(upload))
+        finally:
+            upload.file.close()
+
+        print(f"\nValidating a {FILE_SIZE // (1024 * 1024)} MB upload: full reads "
+              f"{legacy_peak / 1024:.0f} KiB peak in {legacy_time * 1000:.1f} ms, "
+              f"prefix sniff {new_peak / 1024:.0f} KiB peak in {new_time * 1000:.1f} ms")
+        assert legacy_peak >= FILE_SIZE
+        assert new_peak < 256 * 1024
+
+    @pytest.mark.asyncio
+    async def test_oversized_chunked_body_is_rejected_early(self):
+        app = FastAPI()
+
+        @app.post("/upload")
+        async def upload(request: Request):
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+            return {"size": size}
+
+        limit = 1024 * 1024
+        middleware = RequestSizeLimitMiddleware(app, file_upload_limit=limit)
+        total_chunks = FILE_SIZE // CHUNK
+        chunks_sent = 0
+        statuses = []
+
+        async def receive():
+            nonlocal chunks_sent
+            chunks_sent += 1
+            return {"type": "http.request", "body": b"0" * CHUNK, "more_body": chunks_sent < total_chunks}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/upload",
+            "raw_path": b"/upload",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/octet-stream"), (b"transfer-encoding", b"chunked")],
+            "app": app,
+        }
+        await middleware(scope, receive, send)
+
+        print(f"\nChunked {FILE_SIZE // (1024 * 1024)} MB body against a 1 MB limit: "
+              f"rejected after {chunks_sent * CHUNK // 1024} KiB "
+              f"(Content-Length check alone reads all {FILE_SIZE // 1024} KiB)")
+        assert statuses == [413]
+        assert chunks_sent * CHUNK <= limit + CHUNK
@@ -0,0 +1,97 @@
+"""
+Performance Tests for WebSocket Broadcast
+
+Broadcasts to 1k-30k in-process connections, 1% of which never read, and
+measures the time until every healthy client has the message. The previous
+implementation awaited send_json (re-encoding the message) one socket at a
+time, so each stalled client added its full send timeout to everyone's latency.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.api.v1.endpoints.websocket import ConnectionManager
+from app.services.websocket_broker import LocalBroker
+
+CONNECTION_COUNTS = [1_000, 10_000, 30_000]
+STALLED_EVERY = 100
+MESSAGE = {"type": "notification", "data": {"title": "Deploy finished", "body": "x" * 200, "tags": list(range(20))}}
+
+
+class BenchWebSocket:
+    def __init__(self, stalled: bool, done: asyncio.Event, counter: list):
+        self.stalled = stalled
+        self._done = done
+        self._counter = counter
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self._counter[0] -= 1
+        if self._counter[0] == 0:
+            self._done.set()
+
+    async def send_json(self, message):
+        await self.send_text(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _broadcast_latency(count: int) -> float:
+    manager = ConnectionManager(broker=LocalBroker(), max_queue=64)
+    done = asyncio.Event()
+    healthy = count - count // STALLED_EVERY
+    counter = [healthy]
+    for i in range(count):
+        await manager.connect(BenchWebSocket(i % STALLED_EVERY == 0, done, counter), str(i))
+    await asyncio.sleep(0)
+
+    start_time = time.perf_counter()
+    await manager.broadcast(MESSAGE)
+    await asyncio.wait_for(done.wait(), timeout=60)
+    elapsed = time.perf_counter() - start_time
+    await manager.shutdown()
+    return elapsed
+
+
+async def _legacy_broadcast_latency(count: int, stall_timeout: float) -> float:
+    done = asyncio.Event()
+    counter = [count - count // STALLED_EVERY]
+    sockets = [BenchWebSocket(i % STALLED_EVERY == 0, done, counter) for i in range(count)]
+
+    start_time = time.perf_counter()
+    for websocket in sockets:
+        try:
+            await asyncio.wait_for(websocket.send_json(MESSAGE), timeout=stall_timeout)
+        except asyncio.TimeoutError:
+            pass
+    return time.perf_counter() - start_time
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestWebSocketBroadcastPerformance:
+    """Broadcast latency versus number of connections"""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_latency_is_flat_per_connection(self):
+        per_connection = {}
+        for count in CONNECTION_COUNTS:
+            elapsed = await _broadcast_latency(count)
+            per_connection[count] = elapsed / count
+            print(f"\n{count} connections: broadcast delivered in {elapsed * 1000:.1f} ms "
+                  f"({elapsed / count * 1_000_000:.2f} us/connection)")
+
+        # Even a 10 ms send timeout per stalled client dominates the old loop
+        legacy = await _legacy_broadcast_latency(1_000, stall_timeout=0.01)
+        print(f"\nsequential send_json, 1000 connections: {legacy * 1000:.1f} ms")
+
+        assert per_connection[CONNECTION_COUNTS[-1]] < 3 * per_connection[CONNECTION_COUNTS[0]]
+        assert per_connection[1_000] * 1_000 < legacy
@@ -0,0 +1,3 @@
+"""
+Pytest plugins for backend tests
+"""
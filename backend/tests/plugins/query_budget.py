@@ -0,0 +1,60 @@
+"""
+Query budget pytest plugin
+
+Fails tests that execute more SQL statements than they declare:
+
+    @pytest.mark.query_budget(3)
+    async def test_list_posts(client):
+        ...
+
+Statements are counted through the engine instrumentation in
+app.core.query_instrumentation, so every engine passed to instrument_engine
+(the application engine and the test engine in conftest.py) is covered. The
+`query_stats` fixture gives a test its own counter for finer assertions.
+"""
+
+from typing import Optional
+
+import pytest
+
+from app.core.query_instrumentation import QueryStats, track_queries
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries): fail the test when it executes more than max_queries SQL statements",
+    )
+
+
+def _budget_report(stats: QueryStats, budget: int) -> str:
+    lines = [f"Query budget exceeded: {stats.count} statements executed, budget is {budget}"]
+    for statement, executions in stats.fingerprints.most_common(10):
+        lines.append(f"  {executions:>4} x {statement[:200]}")
+    repeated = stats.n_plus_one()
+    if repeated:
+        lines.append(f"Possible N+1 patterns: {len(repeated)}")
+    return "\n".join(lines)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    budget: Optional[int] = marker.args[0] if marker.args else marker.kwargs.get("max_queries")
+    if budget is None:
+        raise pytest.UsageError(f"{item.nodeid}: query_budget needs the maximum number of statements")
+    with track_queries() as stats:
+        result = yield
+    if stats.count > budget:
+        pytest.fail(_budget_report(stats, budget), pytrace=False)
+    return result
+
+
+@pytest.fixture
+def query_stats():
+    """Count the statements executed while the test runs"""
+    with track_queries() as stats:
+        yield stats
@@ -6,6 +6,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.services.client_service import ClientService
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.project import Project
@@ -162,11 +163,11 @@ async def test_get_client_tickets(client_service, mock_db):
 
 
 @pytest.mark.asyncio
-async def test_get_client_dashboard_stats(client_service, mock_db):
+async def test_get_client_dashboard_stats(client_service, mock_db, monkeypatch):
     """Test getting client dashboard statistics"""
     # Mock query results
     mock_invoice_result = MagicMock()
-    mock_invoice_result.first.return_value = MagicMock(
+    mock_invoice_result.mappings.return_value.one.return_value = dict(
         total=10,
         total_amount=1000.00,
         pending_amount=200.00,
@@ -175,17 +176,19 @@ async def test_get_client_dashboard_stats(client_service, mock_db):
     )
     
     mock_project_result = MagicMock()
-    mock_project_result.first.return_value = MagicMock(
+    mock_project_result.mappings.return_value.one.return_value = dict(
         total=5,
         active=3
     )
     
     mock_ticket_result = MagicMock()
-    mock_ticket_result.first.return_value = MagicMock(
+    mock_ticket_result.mappings.return_value.one.return_value = dict(
         open_count=2
     )
     
-    # Set up mock execute to return different results
+    # One query per aggregate, routed to its result by table name
+    monkeypatch.setattr(settings, "DASHBOARD_QUERY_MODE", "sequential")
+
     async def mock_execute(query):
         query_str = str(query)
         if "invoices" in query_str.lower():
@@ -6,6 +6,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.services.erp_service import ERPService
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.user import User
@@ -128,11 +129,11 @@ async def test_get_all_clients(erp_service, mock_db):
 
 
 @pytest.mark.asyncio
-async def test_get_erp_dashboard_stats(erp_service, mock_db):
+async def test_get_erp_dashboard_stats(erp_service, mock_db, monkeypatch):
     """Test getting ERP dashboard statistics"""
     # Mock query results
     mock_invoice_result = MagicMock()
-    mock_invoice_result.first.return_value = MagicMock(
+    mock_invoice_result.mappings.return_value.one.return_value = dict(
         total=20,
         total_amount=5000.00,
         pending_amount=1000.00,
@@ -141,18 +142,20 @@ async def test_get_erp_dashboard_stats(erp_service, mock_db):
     )
     
     mock_client_result = MagicMock()
-    mock_client_result.first.return_value = MagicMock(
+    mock_client_result.mappings.return_value.one.return_value = dict(
         total=10,
         active=8
     )
     
     mock_project_result = MagicMock()
-    mock_project_result.first.return_value = MagicMock(
+    mock_project_result.mappings.return_value.one.return_value = dict(
         total=15,
         active=10
     )
     
-    # Set up mock execute to return different results
+    # One query per aggregate, routed to its result by table name
+    monkeypatch.setattr(settings, "DASHBOARD_QUERY_MODE", "sequential")
+
     async def mock_execute(query):
         query_str = str(query)
         if "invoices" in query_str.lower():
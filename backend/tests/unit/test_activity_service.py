@@ -0,0 +1,152 @@
+"""
+Unit tests for the activity stream
+"""
+
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.activity import Activity
+from app.models.favorite import Favorite
+from app.models.user import User
+from app.services import activity_service
+from app.services.activity_service import ActivityService, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """In-memory SQLite session with the activity tables"""
+    monkeypatch.setattr(activity_service.cache_backend, "redis_client", None)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Favorite.__table__, Activity.__table__],
+        )
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        for user_id in (1, 2, 3):
+            session.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x"))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+async def _read_all(fetch_page, limit):
+    """Follow cursors until the last page"""
+    items, cursor = [], None
+    while True:
+        page = await fetch_page(cursor=cursor, limit=limit)
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items
+        cursor = page.next_cursor
+
+
+class TestActivityCursor:
+    """Test cursor encoding"""
+
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), 1)[:-3] + "!!!"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestActivityFeeds:
+    """Test ActivityService feeds"""
+
+    @pytest.mark.asyncio
+    async def test_entity_and_user_feeds(self, db):
+        """Test keyset pages cover the feed exactly once, newest first"""
+        service = ActivityService(db)
+        for i in range(7):
+            await service.record(1 + i % 2, "updated", "post", 10, {"n": i})
+        await service.record(1, "created", "page", 5)
+
+        post_feed = await _read_all(lambda **kw: service.get_entity_feed("post", 10, **kw), limit=3)
+        assert [item["event_metadata"]["n"] for item in post_feed] == [6, 5, 4, 3, 2, 1, 0]
+        assert {item["entity_type"] for item in post_feed} == {"post"}
+
+        user_feed = await _read_all(lambda **kw: service.get_user_feed(1, **kw), limit=2)
+        assert [item["action"] for item in user_feed] == ["created", "updated", "updated", "updated", "updated"]
+        assert {item["user_id"] for item in user_feed} == {1}
+
+    @pytest.mark.asyncio
+    async def test_list_activities_filters(self, db):
+        """Test filters combine and an exact entity type is required"""
+        service = ActivityService(db)
+        await service.record(1, "created", "post", 1)
+        await service.record(2, "created", "postcard", 1)
+        await service.record(2, "deleted", "post", 2)
+
+        page = await service.list_activities(entity_type="post", actor_id=2)
+        assert [(item["action"], item["entity_id"]) for item in page.items] == [("deleted", "2")]
+        assert page.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_home_feed_from_database(self, db):
+        """Test the home feed merges own activity and favorited entities"""
+        db.add(Favorite(user_id=1, entity_type="project", entity_id=7))
+        await db.commit()
+        service = ActivityService(db)
+        await service.record(1, "created", "project", 7)
+        await service.record(2, "commented", "project", 7)
+        await service.record(2, "created", "project", 8)
+        await service.record(1, "updated", "form", 3)
+        await service.record(None, "updated", "project", 7)
+
+        feed = await _read_all(lambda **kw: service.get_home_feed(1, **kw), limit=2)
+        assert [(item["action"], item["entity_type"], item["entity_id"]) for item in feed] == [
+            ("updated", "project", "7"),
+            ("updated", "form", "3"),
+            ("commented", "project", "7"),
+            ("created", "project", "7"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_record_never_raises(self, db):
+        """Test a failed insert is logged and does not break the caller"""
+        service = ActivityService(db)
+        assert await service.record(1, "created", "post", None) is None
+        assert await service.record(1, "created", "post", 1) is not None
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+class TestHomeFeedCache:
+    """Test the Redis home feed cache (fan-out on write)"""
+
+    @pytest.mark.asyncio
+    async def test_cached_feed_matches_database(self, db, monkeypatch):
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.environ["REDIS_URL"])
+        monkeypatch.setattr(activity_service.cache_backend, "redis_client", client)
+        monkeypatch.setattr(ActivityService, "_fanout_script", None)
+        monkeypatch.setattr(activity_service.settings, "ACTIVITY_FEED_CACHE_SIZE", 10)
+        await client.delete(*[f"{activity_service.HOME_FEED_KEY}{user_id}" for user_id in (1, 2, 3)])
+        try:
+            db.add(Favorite(user_id=3, entity_type="post", entity_id=1))
+            await db.commit()
+            service = ActivityService(db)
+            await service.record(1, "created", "post", 1)
+
+            # First read builds the cache, later activities are pushed to it
+            first = await service.get_home_feed(3)
+            assert [item["action"] for item in first.items] == ["created"]
+            for i in range(12):
+                await service.record(2, "updated", "post", 1, {"n": i})
+            assert await client.llen(f"{activity_service.HOME_FEED_KEY}3") == 10
+
+            cached = await _read_all(lambda **kw: service.get_home_feed(3, **kw), limit=4)
+            from_db = await _read_all(lambda **kw: service._home_feed_from_db(3, **kw), limit=50)
+            assert cached == from_db
+            assert len(cached) == 13
+        finally:
+            await client.delete(*[f"{activity_service.HOME_FEED_KEY}{user_id}" for user_id in (1, 2, 3)])
+            await client.close()
@@ -0,0 +1,152 @@
+"""
+Unit tests for the AI service, run against a local fake provider API
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import ai as ai_api
+from app.core import cache as cache_module
+from app.dependencies import get_current_user
+from app.services.ai_service import AIProvider, AIService, ai_clients, completion_cache_key
+from tests.fakes.ai_server import FakeAIServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeAIServer() as fake:
+        yield fake
+
+
+@pytest.fixture
+async def providers(server, monkeypatch):
+    server.first_token_delay = 0.0
+    server.token_delay = 0.0
+    server.requests.clear()
+    server._clients.clear()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.openai_url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", server.anthropic_url)
+    monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+    yield server
+    # Pooled clients are bound to the test's event loop
+    await ai_clients.close()
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_and_connections_reused(providers):
+    first, second = AIService(AIProvider.OPENAI), AIService(AIProvider.OPENAI)
+    assert first.client is second.client
+    assert AIService(AIProvider.ANTHROPIC).client is not first.client
+
+    for _ in range(5):
+        response = await AIService(AIProvider.OPENAI).chat_completion([{"role": "user", "content": "Hi"}])
+        assert response["content"] == providers.reply
+    assert providers.connections == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", [AIProvider.OPENAI, AIProvider.ANTHROPIC])
+async def test_stream_yields_tokens_then_done(providers, provider):
+    service = AIService(provider)
+
+    events = await _collect(service.stream_chat_completion(
+        [{"role": "user", "content": "Say hello"}], system_prompt="Be brief",
+    ))
+
+    deltas = [event["content"] for event in events if event["type"] == "delta"]
+    assert deltas == providers.tokens
+    done = events[-1]
+    assert done["type"] == "done" and done["provider"] == provider.value
+    assert done["usage"]["total_tokens"] > len(providers.tokens)
+    assert done["finish_reason"] in ("stop", "end_turn")
+    path, body = providers.requests[-1]
+    if provider == AIProvider.OPENAI:
+        assert body["messages"][0] == {"role": "system", "content": "Be brief"}
+    else:
+        assert body["system"] == "Be brief"
+
+
+@pytest.mark.asyncio
+async def test_zero_temperature_is_sent_and_messages_are_not_mutated(providers):
+    messages = [{"role": "user", "content": "Hi"}]
+
+    await AIService(AIProvider.OPENAI).chat_completion(messages, temperature=0, system_prompt="System")
+
+    assert providers.requests[-1][1]["temperature"] == 0
+    assert messages == [{"role": "user", "content": "Hi"}]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_per_provider(providers, monkeypatch):
+    monkeypatch.setattr("app.services.ai_service.settings.AI_MAX_CONCURRENCY", 2)
+    providers.first_token_delay = 0.2
+    service = AIService(AIProvider.ANTHROPIC)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[service.chat_completion([{"role": "user", "content": "Hi"}]) for _ in range(4)])
+    elapsed = time.perf_counter() - start_time
+
+    assert 0.4 <= elapsed < 0.8
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_streams_server_sent_events(providers):
+    app = FastAPI()
+    app.include_router(ai_api.router)
+    app.dependency_overrides[get_current_user] = lambda: object()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/ai/chat", json={
+            "messages": [{"role": "user", "content": "Hi"}], "provider": "openai", "stream": True,
+        })
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [event["content"] for event in events if event["type"] == "delta"] == providers.tokens
+    assert events[-1]["type"] == "done"
+
+
+def test_cache_key_is_content_addressed():
+    messages = [{"role": "user", "content": "Hi"}]
+    key = completion_cache_key(AIProvider.OPENAI, "gpt-test", messages, "System", 100)
+
+    assert key == completion_cache_key(AIProvider.OPENAI, "gpt-test", [dict(messages[0])], "System", 100)
+    assert key != completion_cache_key(AIProvider.OPENAI, "gpt-test", messages, "Other", 100)
+    assert key != completion_cache_key(AIProvider.ANTHROPIC, "gpt-test", messages, "System", 100)
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+@pytest.mark.asyncio
+async def test_deterministic_completions_are_cached(providers, monkeypatch):
+    import redis.asyncio as redis
+
+    client = redis.from_url(os.environ["REDIS_URL"])
+    monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+    monkeypatch.setattr(cache_module.cache_backend, "use_redis", True)
+    messages = [{"role": "user", "content": f"Cached question {time.time()}"}]
+    service = AIService(AIProvider.OPENAI)
+    try:
+        first = await service.chat_completion(messages, temperature=0)
+        second = await service.chat_completion(messages, temperature=0)
+        streamed = await _collect(service.stream_chat_completion(messages, temperature=0))
+        assert first == second
+        assert streamed[0] == {"type": "delta", "content": first["content"]}
+        assert len(providers.requests) == 1
+
+        await service.chat_completion(messages, temperature=0.5)
+        assert len(providers.requests) == 2
+    finally:
+        await client.flushdb()
+        await client.aclose()
@@ -0,0 +1,183 @@
+"""
+Unit tests for the compiled announcement cache
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.announcement import Announcement, AnnouncementDismissal, AnnouncementPriority
+from app.models.user import User
+from app.services import announcement_cache as cache_module
+from app.services.announcement_cache import announcement_cache
+from app.services.announcement_service import AnnouncementService
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """In-memory SQLite session with the announcement tables"""
+    monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+    announcement_cache.clear()
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Announcement.__table__, AnnouncementDismissal.__table__],
+        )
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        for user_id in (1, 2):
+            session.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x"))
+        await session.commit()
+        yield session
+    announcement_cache.clear()
+    await engine.dispose()
+
+
+def _ids(announcements):
+    return [a["id"] for a in announcements]
+
+
+class TestAnnouncementTargeting:
+    """Test matching against the compiled set"""
+
+    @pytest.mark.asyncio
+    async def test_targeting_and_order(self, db):
+        service = AnnouncementService(db)
+        everyone = await service.create_announcement("All", "m")
+        critical = await service.create_announcement("Critical", "m", priority=AnnouncementPriority.CRITICAL)
+        user_2 = await service.create_announcement("User 2", "m", target_users=[2])
+        team_5 = await service.create_announcement("Team 5", "m", target_teams=[5])
+        admins = await service.create_announcement("Admins", "m", target_roles=["admin", "superadmin"])
+        login = await service.create_announcement("Login", "m", show_on_login=True, show_in_app=False)
+        await service.create_announcement("Inactive", "m", is_active=False)
+        await service.create_announcement("Expired", "m", end_date=datetime.now(timezone.utc) - timedelta(days=1))
+        await service.create_announcement("Scheduled", "m", start_date=datetime.now(timezone.utc) + timedelta(days=1))
+
+        active_set = await service.get_active_set()
+        assert active_set.targets_teams and active_set.targets_roles
+
+        assert _ids(await service.get_active_announcements(user_id=1)) == [critical.id, everyone.id]
+        assert _ids(await service.get_active_announcements(
+            user_id=2, user_team_id=5, user_roles=["superadmin"]
+        )) == [critical.id, admins.id, team_5.id, user_2.id, everyone.id]
+        assert _ids(await service.get_active_announcements(show_on_login=True)) == [login.id]
+
+        announcement = (await service.get_active_announcements(user_id=1))[0]
+        assert announcement["priority"] == "critical"
+        assert isinstance(announcement["created_at"], str)
+
+    @pytest.mark.asyncio
+    async def test_scheduled_announcement_shows_without_reload(self, db):
+        service = AnnouncementService(db)
+        start = datetime.now(timezone.utc) + timedelta(hours=1)
+        scheduled = await service.create_announcement("Later", "m", start_date=start)
+        active_set = await service.get_active_set()
+        assert active_set.for_user(user_id=1) == []
+        assert _ids(active_set.for_user(user_id=1, now=start + timedelta(minutes=1))) == [scheduled.id]
+
+    @pytest.mark.asyncio
+    async def test_changes_invalidate_compiled_set(self, db):
+        service = AnnouncementService(db)
+        announcement = await service.create_announcement("First", "m")
+        assert _ids(await service.get_active_announcements(user_id=1)) == [announcement.id]
+
+        await service.update_announcement(announcement.id, {"target_users": [2]})
+        assert await service.get_active_announcements(user_id=1) == []
+
+        await service.delete_announcement(announcement.id)
+        assert await service.get_active_announcements(user_id=2) == []
+
+    @pytest.mark.asyncio
+    async def test_cached_set_is_reused(self, db):
+        service = AnnouncementService(db)
+        await service.create_announcement("First", "m")
+        first = await service.get_active_set()
+        assert await service.get_active_set() is first
+
+    @pytest.mark.asyncio
+    async def test_malformed_targeting_matches_nobody(self, db):
+        db.add(Announcement(title="Broken", message="m", target_users="not json"))
+        await db.commit()
+        assert await AnnouncementService(db).get_active_announcements(user_id=1) == []
+
+    @pytest.mark.asyncio
+    async def test_dismissals(self, db):
+        service = AnnouncementService(db)
+        first = await service.create_announcement("First", "m")
+        second = await service.create_announcement("Second", "m")
+        await service.dismiss_announcement(first.id, 1)
+        assert _ids(await service.get_active_announcements(user_id=1)) == [second.id]
+        assert len(await service.get_active_announcements(user_id=2)) == 2
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+class TestAnnouncementRedisCache:
+    """Test cross-worker invalidation and dismissal sets in Redis"""
+
+    @pytest.mark.asyncio
+    async def test_version_and_dismissal_sets(self, db, monkeypatch):
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.environ["REDIS_URL"])
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+        await client.delete(cache_module.VERSION_KEY, f"{cache_module.DISMISSED_KEY}1")
+        try:
+            service = AnnouncementService(db)
+            first = await service.create_announcement("First", "m")
+            second = await service.create_announcement("Second", "m")
+
+            # Another worker replaced the version token
+            active_set = await service.get_active_set()
+            await client.set(cache_module.VERSION_KEY, "other-worker")
+            assert await service.get_active_set() is not active_set
+
+            # First read loads the set from the database, with the sentinel
+            assert len(await service.get_active_announcements(user_id=1)) == 2
+            assert await client.smembers(f"{cache_module.DISMISSED_KEY}1") == {b"0"}
+
+            await service.dismiss_announcement(first.id, 1)
+            assert await client.smembers(f"{cache_module.DISMISSED_KEY}1") == {b"0", str(first.id).encode()}
+            assert _ids(await service.get_active_announcements(user_id=1)) == [second.id]
+
+            # A dismissal recorded while the set is not cached does not mark it loaded
+            await client.delete(f"{cache_module.DISMISSED_KEY}1")
+            await service.dismiss_announcement(second.id, 1)
+            assert await client.smembers(f"{cache_module.DISMISSED_KEY}1") == {str(second.id).encode()}
+            assert await service.get_active_announcements(user_id=1) == []
+            assert await client.smembers(f"{cache_module.DISMISSED_KEY}1") == {
+                b"0", str(first.id).encode(), str(second.id).encode(),
+            }
+        finally:
+            await client.delete(cache_module.VERSION_KEY, f"{cache_module.DISMISSED_KEY}1")
+            await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_dismissal_during_a_set_load_is_kept(self, db, monkeypatch):
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.environ["REDIS_URL"])
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+        await client.delete(cache_module.VERSION_KEY, f"{cache_module.DISMISSED_KEY}1")
+        try:
+            service = AnnouncementService(db)
+            first = await service.create_announcement("First", "m")
+            second = await service.create_announcement("Second", "m")
+            load_dismissed = cache_module.AnnouncementCache._load_dismissed
+
+            async def racing_load(db, user_id):
+                # The database is read, then another request dismisses before the set is written
+                dismissed = await load_dismissed(db, user_id)
+                await service.dismiss_announcement(first.id, user_id)
+                return dismissed
+
+            monkeypatch.setattr(cache_module.AnnouncementCache, "_load_dismissed", staticmethod(racing_load))
+            assert len(await service.get_active_announcements(user_id=1)) == 2
+            monkeypatch.setattr(cache_module.AnnouncementCache, "_load_dismissed", staticmethod(load_dismissed))
+
+            assert _ids(await service.get_active_announcements(user_id=1)) == [second.id]
+        finally:
+            await client.delete(cache_module.VERSION_KEY, f"{cache_module.DISMISSED_KEY}1")
+            await client.aclose()
@@ -0,0 +1,192 @@
+"""
+Unit tests for security audit log maintenance and statistics
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditDailyStat, SecurityAuditLog
+from app.services.audit_log_service import (
+    AuditLogMaintenance,
+    AuditStatsService,
+    add_months,
+    partition_name,
+)
+
+NOW = datetime(2026, 10, 19, 15, 30, tzinfo=timezone.utc)
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+
+
+@pytest.fixture
+async def db():
+    """In-memory SQLite session with the audit tables"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[SecurityAuditLog.__table__, SecurityAuditDailyStat.__table__],
+        )
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _seed(db, hours=24 * 20):
+    """One event per hour for 20 days, alternating users and severities"""
+    for hour in range(hours):
+        db.add(SecurityAuditLog(
+            timestamp=NOW - timedelta(hours=hour),
+            event_type="login_success" if hour % 3 else "login_failure",
+            severity="error" if hour % 3 == 0 else "info",
+            user_id=[1, 2, None][hour % 3],
+            description="event",
+            success="success",
+        ))
+    await db.commit()
+
+
+async def _raw_counts(db, user_id, start_date=None, end_date=None):
+    query = select(SecurityAuditLog.event_type, func.count()).where(
+        SecurityAuditLog.user_id == user_id
+    ).group_by(SecurityAuditLog.event_type)
+    if start_date:
+        query = query.where(SecurityAuditLog.timestamp >= start_date)
+    if end_date:
+        query = query.where(SecurityAuditLog.timestamp <= end_date)
+    return dict((await db.execute(query)).all())
+
+
+class TestPartitionNames:
+    """Test month arithmetic"""
+
+    def test_add_months(self):
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+    def test_partition_name(self):
+        assert partition_name(date(2027, 3, 1)) == "security_audit_logs_y2027m03"
+
+
+class TestAuditRollups:
+    """Test daily rollups and statistics"""
+
+    @pytest.mark.asyncio
+    async def test_rollup_complete_days_only(self, db):
+        """Test only days that ended before now are rolled up, and rolling again is idempotent"""
+        await _seed(db)
+        maintenance = AuditLogMaintenance(db)
+
+        assert await maintenance.rollup_daily_stats(now=NOW) == 20
+        days = (await db.execute(select(func.max(SecurityAuditDailyStat.day)))).scalar()
+        assert days == date(2026, 10, 18)
+
+        total = (await db.execute(select(func.sum(SecurityAuditDailyStat.count)))).scalar()
+        # Today (15 hours so far + the current hour) is not rolled up
+        assert total == 24 * 20 - 16
+
+        # The last day is rolled up again on every run
+        assert await maintenance.rollup_daily_stats(now=NOW) == 1
+        assert (await db.execute(select(func.sum(SecurityAuditDailyStat.count)))).scalar() == total
+
+        anonymous = (await db.execute(
+            select(func.sum(SecurityAuditDailyStat.count)).where(SecurityAuditDailyStat.user_id == 0)
+        )).scalar()
+        assert anonymous > 0
+
+    @pytest.mark.asyncio
+    async def test_rollup_max_days(self, db):
+        """Test a long backlog can be rolled up in steps"""
+        await _seed(db)
+        maintenance = AuditLogMaintenance(db)
+        assert await maintenance.rollup_daily_stats(now=NOW, max_days=5) == 5
+        assert await maintenance.rollup_daily_stats(now=NOW) == 16
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("start_date,end_date", [
+        (None, None),
+        (datetime(2026, 10, 5, 6, 15), None),
+        (datetime(2026, 10, 5), datetime(2026, 10, 12)),
+        (datetime(2026, 10, 5, 6), datetime(2026, 10, 12, 18, 30)),
+        (None, datetime(2026, 10, 19, 3)),
+        (datetime(2026, 10, 19, 1), None),
+        (datetime(2026, 10, 10, 1), datetime(2026, 10, 10, 23)),
+    ])
+    async def test_stats_match_raw_counts(self, db, start_date, end_date):
+        """Test rollups plus raw rows give the same counts as the raw logs alone"""
+        await _seed(db)
+        await AuditLogMaintenance(db).rollup_daily_stats(now=NOW)
+
+        service = AuditStatsService(db)
+        for user_id in (1, 2):
+            stats = await service.get_stats(user_id, start_date=start_date, end_date=end_date)
+            bounds = [value.replace(tzinfo=timezone.utc) if value else None for value in (start_date, end_date)]
+            assert stats["event_type_counts"] == await _raw_counts(db, user_id, *bounds)
+            assert sum(stats["severity_counts"].values()) == sum(stats["event_type_counts"].values())
+
+    @pytest.mark.asyncio
+    async def test_stats_without_rollups(self, db):
+        """Test statistics fall back to the raw logs before the first rollup"""
+        await _seed(db, hours=30)
+        stats = await AuditStatsService(db).get_stats(1)
+        assert stats["event_type_counts"] == await _raw_counts(db, 1)
+
+    @pytest.mark.asyncio
+    async def test_maintenance_without_postgres(self, db):
+        """Test partition steps are skipped on other databases"""
+        await _seed(db, hours=48)
+        maintenance = AuditLogMaintenance(db)
+        assert await maintenance.is_partitioned() is False
+        assert await maintenance.run(now=NOW) == {"rolled_up_days": 2}
+
+
+@pytest.mark.skipif(not PERFORMANCE_DATABASE_URL, reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set")
+@pytest.mark.asyncio
+async def test_maintenance_releases_its_lock():
+    """Test back to back maintenance runs each take the advisory lock"""
+    schema = "test_audit_maintenance"
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_async_engine(
+        PERFORMANCE_DATABASE_URL, pool_size=3,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[SecurityAuditLog.__table__, SecurityAuditDailyStat.__table__],
+            )
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            await _seed(db, hours=72)
+        # Several idle pooled connections: each commit of a run may continue on another one
+        async with engine.connect(), engine.connect(), engine.connect():
+            pass
+
+        results = []
+        for _ in range(2):
+            async with session_factory() as db:
+                results.append(await AuditLogMaintenance(db).run(now=NOW))
+        assert results == [
+            {"created": [], "dropped": [], "rolled_up_days": 3},
+            {"created": [], "dropped": [], "rolled_up_days": 1},
+        ]
+
+        # No pooled connection kept the lock
+        async with admin.connect() as conn:
+            held = (await conn.execute(text(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid <> pg_backend_pid()"
+            ))).scalar()
+        assert held == 0
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await admin.dispose()
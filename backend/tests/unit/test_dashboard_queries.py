@@ -0,0 +1,174 @@
+"""
+Unit tests for the dashboard aggregate query helper
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.v1.endpoints.analytics import get_analytics_metrics
+from app.api.v1.endpoints.insights import get_insights
+from app.core.dashboard_queries import fuse_aggregates, run_aggregates
+from app.core.database import Base
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.project import Project, ProjectStatus
+from app.models.support_ticket import SupportTicket
+from app.models.user import User
+from app.services.client_service import ClientService
+from app.services.erp_service import ERPService
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """SQLite session with two users, their invoices, projects and tickets"""
+    import app.models  # noqa: F401 - resolve every foreign key target
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+    tables = [Base.metadata.tables[name] for name in ("users", "invoices", "projects", "support_tickets")]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        users = [
+            User(email=f"user{i}@example.com", hashed_password="x", is_active=i == 0)
+            for i in range(2)
+        ]
+        session.add_all(users)
+        await session.flush()
+        owner = users[0].id
+        session.add_all([
+            Invoice(user_id=owner, amount_due=Decimal("100"), status=InvoiceStatus.PAID),
+            Invoice(user_id=owner, amount_due=Decimal("40"), status=InvoiceStatus.OPEN),
+            Invoice(user_id=owner, amount_due=Decimal("10"), status=InvoiceStatus.OPEN),
+            Invoice(user_id=users[1].id, amount_due=Decimal("5"), status=InvoiceStatus.OPEN),
+            Project(name="a", user_id=owner, status=ProjectStatus.ACTIVE),
+            Project(name="b", user_id=owner, status=ProjectStatus.ARCHIVED),
+            SupportTicket(user_id=owner, subject="s", category="general", status="open"),
+            SupportTicket(user_id=owner, subject="s", category="general", status="closed"),
+        ])
+        await session.commit()
+        session.owner_id = owner
+        yield session
+    await engine.dispose()
+
+
+def _queries(user_id):
+    return {
+        "invoices": select(
+            func.count(Invoice.id).label("total"),
+            func.sum(Invoice.amount_due).label("amount"),
+        ).where(Invoice.user_id == user_id),
+        "projects": select(func.count(Project.id).label("total")).where(Project.user_id == user_id),
+        "tickets": select(func.count(SupportTicket.id).label("total")),
+    }
+
+
+def _statements(session):
+    statements = []
+    event.listen(
+        session.bind.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["fused", "sequential", "concurrent"])
+async def test_every_mode_returns_each_aggregate_row(db, mode):
+    statements = _statements(db)
+
+    stats = await run_aggregates(db, _queries(db.owner_id), mode=mode)
+
+    assert (stats["invoices"].total, Decimal(str(stats["invoices"].amount))) == (3, Decimal("150"))
+    assert stats["projects"].total == 2
+    assert stats["tickets"].total == 2
+    # Concurrent falls back to the fused statement on SQLite
+    assert len(statements) == (3 if mode == "sequential" else 1)
+
+
+def test_fused_statement_cross_joins_one_cte_per_query():
+    sql = str(fuse_aggregates(_queries(1)))
+
+    assert sql.startswith("WITH invoices_agg AS")
+    assert "invoices_agg.total AS invoices__total" in sql
+    assert sql.endswith("FROM invoices_agg JOIN projects_agg ON true JOIN tickets_agg ON true")
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_are_counted_in_one_statement(db):
+    statements = _statements(db)
+
+    client = await ClientService(db).get_client_dashboard_stats(db.owner_id)
+    erp = await ERPService(db).get_erp_dashboard_stats(db.owner_id)
+
+    assert len(statements) == 2
+    assert client == {
+        "total_invoices": 3,
+        "pending_invoices": 2,
+        "paid_invoices": 1,
+        "total_projects": 2,
+        "active_projects": 1,
+        "open_tickets": 1,
+        "total_spent": Decimal("150"),
+        "pending_amount": Decimal("50"),
+    }
+    assert (erp["total_invoices"], erp["pending_invoices"], erp["pending_revenue"]) == (4, 3, Decimal("55"))
+    assert (erp["total_clients"], erp["active_clients"]) == (2, 1)
+    assert (erp["total_projects"], erp["active_projects"]) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_insights_and_analytics_count_projects_in_sql(db):
+    now = datetime.utcnow()
+    db.add_all([
+        Project(name="old", user_id=db.owner_id, status=ProjectStatus.ACTIVE, created_at=now - timedelta(days=45)),
+        Project(name="older", user_id=db.owner_id, status=ProjectStatus.COMPLETED, created_at=now - timedelta(days=100)),
+    ])
+    await db.commit()
+    statements = _statements(db)
+    user = SimpleNamespace(id=db.owner_id)
+    request = SimpleNamespace(client=None)
+
+    insights = await get_insights(request=request, current_user=user, db=db)
+    analytics = await get_analytics_metrics(request=request, start_date=None, end_date=None, current_user=user, db=db)
+
+    assert len([sql for sql in statements if "FROM projects" in sql]) == 2
+    assert [(metric.label, metric.value) for metric in insights.metrics[:2]] == [
+        ("Total Projects", 4.0), ("Active Projects", 2.0),
+    ]
+    assert insights.metrics[0].change == 300.0
+    assert [point.value for point in insights.trends] == [0.0, 0.0, 1.0, 0.0, 1.0, 2.0]
+    assert [point.value for point in insights.userGrowth] == [0.0, 0.0, 1.0, 1.0, 2.0, 4.0]
+    assert [(metric.label, metric.value) for metric in analytics.metrics[:2]] == [
+        ("Total Projects", 2.0), ("Active Projects", 1.0),
+    ]
+    assert analytics.metrics[0].change == 100.0
+
+
+@pytest.mark.skipif(not PERFORMANCE_DATABASE_URL, reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set")
+@pytest.mark.asyncio
+async def test_concurrent_mode_overlaps_queries_on_separate_connections():
+    engine = create_async_engine(PERFORMANCE_DATABASE_URL, pool_size=4)
+    sleep = select(func.pg_sleep(0.2).label("slept")).subquery()
+    queries = {name: select(func.count().label("rows")).select_from(sleep) for name in ("a", "b", "c")}
+    try:
+        async with AsyncSession(engine) as session:
+            timings = {}
+            for mode in ("sequential", "concurrent"):
+                start_time = time.perf_counter()
+                stats = await run_aggregates(session, queries, mode=mode)
+                timings[mode] = time.perf_counter() - start_time
+                assert [row.rows for row in stats.values()] == [1, 1, 1]
+    finally:
+        await engine.dispose()
+
+    assert timings["sequential"] >= 0.6
+    assert timings["concurrent"] < 0.45
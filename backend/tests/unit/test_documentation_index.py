@@ -0,0 +1,174 @@
+"""
+Unit tests for the documentation BM25 index
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.documentation_index import DocumentationIndex, chunk_markdown, tokenize
+from app.services.documentation_service import DocumentationService
+
+SETUP = """# Setup
+
+Install the dependencies with pnpm.
+
+## Database
+
+Run the alembic migrations against PostgreSQL before starting the backend.
+
+```bash
+# not a heading
+alembic upgrade head
+```
+
+## Redis
+
+Set REDIS_URL to enable caching and rate limiting.
+"""
+
+THEMING = """# Theming
+
+Themes are edited in the admin panel. Colors, fonts and spacing are stored as theme tokens.
+"""
+
+
+@pytest.fixture
+def docs(tmp_path):
+    docs_path = tmp_path / "docs"
+    (docs_path / "guides").mkdir(parents=True)
+    (docs_path / "SETUP.md").write_text(SETUP, encoding="utf-8")
+    (docs_path / "guides" / "THEMING.md").write_text(THEMING, encoding="utf-8")
+    return docs_path
+
+
+def _index(docs, tmp_path, **kwargs):
+    return DocumentationIndex(docs, snapshot_path=tmp_path / "index.json.gz", check_interval=0, **kwargs)
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("How do I run the Alembic migrations? a b") == ["run", "alembic", "migrations"]
+
+
+def test_chunks_follow_headings_and_ignore_code_fences():
+    chunks = chunk_markdown("SETUP.md", SETUP)
+
+    assert [chunk.heading for chunk in chunks] == ["Setup", "Setup > Database", "Setup > Redis"]
+    assert "# not a heading" in chunks[1].text
+    assert all(len(chunk.text) <= 100 for chunk in chunk_markdown("x.md", "word " * 200, chunk_size=100))
+
+
+def test_search_ranks_relevant_chunks(docs, tmp_path):
+    index = _index(docs, tmp_path)
+
+    results = index.search("alembic migrations postgresql", top_k=2)
+
+    assert results[0][0].file == "SETUP.md"
+    assert results[0][0].heading == "Setup > Database"
+    assert [chunk.file for chunk, _ in index.search("theme colors")] == ["guides/THEMING.md"]
+    assert index.search("kubernetes") == []
+
+
+def test_changed_files_invalidate_the_index(docs, tmp_path):
+    index = _index(docs, tmp_path)
+    assert index.search("webhooks") == []
+
+    theming = docs / "guides" / "THEMING.md"
+    theming.write_text(THEMING + "\n## Webhooks\n\nStripe webhooks are queued.\n", encoding="utf-8")
+    os.utime(theming, ns=(1, 1))
+    (docs / "SETUP.md").unlink()
+
+    assert [chunk.heading for chunk, _ in index.search("webhooks")] == ["Theming > Webhooks"]
+    assert index.search("alembic") == []
+    assert index.files() == ["guides/THEMING.md"]
+    assert index.builds == 2
+
+
+def test_checks_are_throttled(docs, tmp_path):
+    index = DocumentationIndex(docs, snapshot_path=tmp_path / "index.json.gz", check_interval=3600)
+    index.search("redis")
+    (docs / "NEW.md").write_text("# New\n\nKubernetes deployment.\n", encoding="utf-8")
+
+    assert index.search("kubernetes") == []
+    index.ensure_fresh(force=True)
+    assert index.search("kubernetes")[0][0].file == "NEW.md"
+
+
+def test_snapshot_is_reused_by_a_new_process(docs, tmp_path):
+    first = _index(docs, tmp_path)
+    expected = first.search("redis caching")
+
+    second = _index(docs, tmp_path)
+    assert second.search("redis caching") == expected
+    assert second.builds == 0
+
+    (docs / "SETUP.md").write_text(SETUP + "\nMore text.\n", encoding="utf-8")
+    third = _index(docs, tmp_path)
+    third.ensure_fresh()
+    assert third.builds == 1
+
+
+def test_corrupt_snapshot_is_rebuilt(docs, tmp_path):
+    (tmp_path / "index.json.gz").write_bytes(b"not gzip")
+    index = _index(docs, tmp_path)
+
+    assert index.search("redis")[0][0].heading == "Setup > Redis"
+    assert index.builds == 1
+
+
+def test_relevant_context_is_bounded(docs, tmp_path):
+    service = DocumentationService(str(docs))
+    service.index = _index(docs, tmp_path)
+
+    context = service.format_relevant_documentation("alembic migrations", top_k=1)
+    assert context.startswith("\n\n=== SETUP.md > Setup > Database ===")
+    assert "Theming" not in context
+    assert service.format_relevant_documentation("kubernetes") == "No relevant documentation found."
+    assert service.search_documentation("redis", max_results=1)[0]["heading"] == "Setup > Redis"
+
+
+@pytest.mark.asyncio
+async def test_template_chat_looks_documentation_up_off_the_event_loop(docs, tmp_path, monkeypatch):
+    from app.api import ai as ai_api
+
+    service = DocumentationService(str(docs))
+    service.index = _index(docs, tmp_path)
+    prompts = []
+
+    class FakeAIService:
+        def __init__(self, provider):
+            pass
+
+        @staticmethod
+        def is_configured():
+            return True
+
+        async def chat_completion(self, system_prompt, **kwargs):
+            prompts.append(system_prompt)
+            return {"content": "ok", "model": "m", "provider": "p", "usage": {}, "finish_reason": "stop"}
+
+    monkeypatch.setattr(ai_api, "get_documentation_service", lambda: service)
+    monkeypatch.setattr(ai_api, "AIService", FakeAIService)
+    request = ai_api.ChatRequest(messages=[{"role": "user", "content": "How do I run the alembic migrations?"}])
+
+    # A build in another thread holds the index lock: the event loop keeps running
+    locked = threading.Event()
+
+    def build():
+        with service.index._lock:
+            locked.set()
+            time.sleep(0.5)
+
+    builder = threading.Thread(target=build)
+    builder.start()
+    locked.wait()
+    chat = asyncio.create_task(ai_api.template_chat(request, current_user=None))
+    await asyncio.sleep(0.1)
+    assert not chat.done()
+
+    assert (await chat).content == "ok"
+    builder.join()
+    assert "alembic upgrade head" in prompts[0]
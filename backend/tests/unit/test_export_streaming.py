@@ -0,0 +1,92 @@
+"""
+Unit tests for streaming exports
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.export_service import ExportService
+from app.services.entity_export_service import get_export_entity
+
+
+async def _rows(count):
+    for i in range(count):
+        yield {"id": i, "name": f"row {i}", "created_at": datetime(2024, 1, 1), "meta": {"n": i}}
+
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestStreamingWriters:
+    """Test ExportService streaming writers"""
+
+    @pytest.mark.asyncio
+    async def test_stream_csv_yields_bounded_chunks(self):
+        """Test CSV output is chunked and complete"""
+        chunks = [chunk async for chunk in ExportService.stream_csv(_rows(5000), ["id", "name", "created_at"])]
+        assert len(chunks) > 1
+        assert all(len(chunk) < 2 * 64 * 1024 for chunk in chunks)
+
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        assert rows[0] == ["id", "name", "created_at"]
+        assert len(rows) == 5001
+        assert rows[1] == ["0", "row 0", "2024-01-01T00:00:00"]
+
+    @pytest.mark.asyncio
+    async def test_stream_jsonl(self):
+        """Test JSONL output has one object per row"""
+        content = await _collect(ExportService.stream_jsonl(_rows(3)))
+        lines = content.decode("utf-8").splitlines()
+        assert len(lines) == 3
+        assert json.loads(lines[2]) == {"id": 2, "name": "row 2", "created_at": "2024-01-01T00:00:00", "meta": {"n": 2}}
+
+    @pytest.mark.asyncio
+    async def test_write_xlsx(self):
+        """Test XLSX is written in write-only mode and readable"""
+        openpyxl = pytest.importorskip("openpyxl")
+        xlsx_file = await ExportService.write_xlsx(_rows(10), ["id", "name", "meta"], sheet_name="rows")
+        content = await _collect(ExportService.iter_file(xlsx_file))
+
+        sheet = openpyxl.load_workbook(io.BytesIO(content))["rows"]
+        values = list(sheet.values)
+        assert values[0] == ("id", "name", "meta")
+        assert values[10] == (9, "row 9", '{"n": 9}')
+
+    def test_export_to_csv_unchanged(self):
+        """Test buffered CSV export still produces the same output"""
+        buffer, _ = ExportService.export_to_csv([{"a": 1, "b": date(2024, 1, 2)}], filename="x.csv")
+        assert buffer.read().decode("utf-8") == "a,b\r\n1,2024-01-02\r\n"
+
+
+class TestExportEntities:
+    """Test export entity query building"""
+
+    def test_contacts_query_uses_joins_and_filters(self):
+        """Test contacts export selects joined columns and applies filters"""
+        stmt, columns = get_export_entity("contacts").build(
+            filters={"circle": "client", "company_id": [1, 2]},
+            columns=["first_name", "company_name"],
+        )
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert columns == ["first_name", "company_name"]
+        assert "LEFT OUTER JOIN companies" in sql
+        assert "contacts.circle = " in sql
+        assert "contacts.company_id IN" in sql
+
+    def test_projects_are_scoped_to_owner(self):
+        """Test owner scoping is applied for user-owned entities"""
+        stmt, _ = get_export_entity("projects").build(owner_id=42)
+        assert "projects.user_id = " in str(stmt.compile(dialect=postgresql.dialect()))
+
+    def test_unknown_filter_and_entity_rejected(self):
+        """Test unsupported filters and entities raise ValueError"""
+        with pytest.raises(ValueError):
+            get_export_entity("contacts").build(filters={"password": "x"})
+        with pytest.raises(ValueError):
+            get_export_entity("users")
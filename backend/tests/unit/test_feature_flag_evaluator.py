@@ -0,0 +1,186 @@
+"""
+Unit tests for the feature flag snapshot and evaluation counters
+"""
+
+import os
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.feature_flag import FeatureFlag, FeatureFlagEvaluationCount, FeatureFlagLog
+from app.models.user import User
+from app.services import feature_flag_evaluator
+from app.services.feature_flag_evaluator import BUCKETS, CompiledFlag, EvaluationCounter, bucket, flag_store
+from app.services.feature_flag_service import FeatureFlagService
+
+
+@pytest.fixture
+async def session_factory(monkeypatch):
+    """In-memory SQLite database with the feature flag tables"""
+    monkeypatch.setattr(feature_flag_evaluator.cache_backend, "redis_client", None)
+    flag_store.clear()
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[
+                User.__table__,
+                FeatureFlag.__table__,
+                FeatureFlagLog.__table__,
+                FeatureFlagEvaluationCount.__table__,
+            ],
+        )
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    counter = EvaluationCounter(threshold=10 ** 9, interval=10 ** 9, session_factory=factory)
+    monkeypatch.setattr(feature_flag_evaluator, "evaluation_counter", counter)
+    monkeypatch.setattr("app.services.feature_flag_service.evaluation_counter", counter)
+    yield factory
+    flag_store.clear()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+class TestCompiledFlag:
+    """Test evaluation of a compiled flag"""
+
+    def _flag(self, **overrides):
+        values = dict(id=1, key="beta", enabled=True, rollout_percentage=100.0, target_users=None,
+                      target_teams=None, is_ab_test=False, variants=None)
+        values.update(overrides)
+        return CompiledFlag.from_model(FeatureFlag(**values))
+
+    def test_disabled(self):
+        assert self._flag(enabled=False).evaluate(1).enabled is False
+
+    def test_targeting(self):
+        flag = self._flag(target_users=[1, 2], target_teams=[10])
+        assert flag.evaluate(1, 10).enabled
+        assert not flag.evaluate(3, 10).enabled
+        assert not flag.evaluate(1, 11).enabled
+
+    def test_rollout_is_deterministic_and_proportional(self):
+        flag = self._flag(rollout_percentage=25.0)
+        enabled = [user_id for user_id in range(1, 20001) if flag.evaluate(user_id).enabled]
+        assert enabled == [user_id for user_id in range(1, 20001) if flag.evaluate(user_id).enabled]
+        assert 0.23 < len(enabled) / 20000 < 0.27
+        assert all(bucket("beta", user_id) < BUCKETS // 4 for user_id in enabled)
+
+    def test_rollout_bounds(self):
+        assert not any(self._flag(rollout_percentage=0.0).evaluate(u).enabled for u in range(1, 1000))
+        assert all(self._flag(rollout_percentage=100.0).evaluate(u).enabled for u in range(1, 1000))
+
+    def test_variants(self):
+        flag = self._flag(is_ab_test=True, variants={"control": {}, "treatment": {}})
+        variants = [flag.evaluate(user_id).variant for user_id in range(1, 2001)]
+        assert set(variants) == {"control", "treatment"}
+        assert 0.45 < variants.count("control") / 2000 < 0.55
+        assert flag.evaluate(None).variant is None
+
+
+class TestFeatureFlagService:
+    """Test the service on top of the snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_invalidated_on_change(self, db):
+        service = FeatureFlagService(db)
+        flag = await service.create_flag("beta", "Beta", enabled=True, rollout_percentage=100.0)
+        assert await service.is_enabled("beta", user_id=1)
+        assert not await service.is_enabled("missing", user_id=1)
+
+        await service.update_flag(flag.id, {"enabled": False})
+        assert not await service.is_enabled("beta", user_id=1)
+
+        await service.delete_flag(flag.id)
+        assert "beta" not in (await flag_store.get_snapshot(db)).flags
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_reused(self, db):
+        service = FeatureFlagService(db)
+        await service.create_flag("beta", "Beta", enabled=True, rollout_percentage=100.0)
+        snapshot = await flag_store.get_snapshot(db)
+        await service.is_enabled("beta", user_id=1)
+        assert await flag_store.get_snapshot(db) is snapshot
+
+    @pytest.mark.asyncio
+    async def test_evaluate_all(self, db):
+        service = FeatureFlagService(db)
+        await service.create_flag("on", "On", enabled=True, rollout_percentage=100.0)
+        await service.create_flag("off", "Off", enabled=False)
+        await service.create_flag("ab", "AB", enabled=True, rollout_percentage=100.0,
+                                  is_ab_test=True, variants={"a": {}, "b": {}})
+        flags = await service.evaluate_all(user_id=7)
+        assert flags["on"] == {"enabled": True, "variant": None}
+        assert flags["off"] == {"enabled": False, "variant": None}
+        assert flags["ab"]["variant"] in ("a", "b")
+        assert await service.get_variant("ab", user_id=7) == flags["ab"]["variant"]
+
+    @pytest.mark.asyncio
+    async def test_counters_are_flushed_in_batches(self, db, monkeypatch):
+        monkeypatch.setattr(feature_flag_evaluator.settings, "FEATURE_FLAG_LOG_SAMPLE_RATE", 0.0)
+        service = FeatureFlagService(db)
+        flag = await service.create_flag("half", "Half", enabled=True, rollout_percentage=50.0)
+        results = [await service.is_enabled("half", user_id=user_id) for user_id in range(1, 501)]
+
+        counter = feature_flag_evaluator.evaluation_counter
+        assert sum(counter.pending.values()) == 500
+        assert await counter.flush() == 500
+        assert counter.pending == {}
+
+        stats = await service.get_flag_stats(flag.id)
+        assert stats["total_evaluations"] == 500
+        assert stats["enabled_count"] == sum(results)
+        assert (await db.execute(select(func.count(FeatureFlagLog.id)))).scalar() == 0
+
+        # Flushing again adds to the same daily counters
+        for user_id in range(1, 101):
+            await service.is_enabled("half", user_id=user_id)
+        await counter.flush()
+        assert (await service.get_flag_stats(flag.id))["total_evaluations"] == 600
+        assert (await db.execute(select(func.count()).select_from(FeatureFlagEvaluationCount))).scalar() == 2
+
+    @pytest.mark.asyncio
+    async def test_sampled_logs_and_deleted_flags(self, db, monkeypatch):
+        monkeypatch.setattr(feature_flag_evaluator.settings, "FEATURE_FLAG_LOG_SAMPLE_RATE", 1.0)
+        service = FeatureFlagService(db)
+        kept = await service.create_flag("kept", "Kept", enabled=True, rollout_percentage=100.0, is_ab_test=True,
+                                         variants={"a": {}})
+        gone = await service.create_flag("gone", "Gone", enabled=True, rollout_percentage=100.0)
+        await service.is_enabled("kept", user_id=1)
+        await service.is_enabled("gone", user_id=1)
+        await service.delete_flag(gone.id)
+
+        assert await feature_flag_evaluator.evaluation_counter.flush() == 2
+        logs = (await db.execute(select(FeatureFlagLog))).scalars().all()
+        assert [(log.flag_id, log.variant) for log in logs] == [(kept.id, "a")]
+        assert (await service.get_flag_stats(kept.id))["variant_counts"] == {"a": 1}
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+class TestFeatureFlagVersion:
+    """Test cross-worker invalidation through the Redis version token"""
+
+    @pytest.mark.asyncio
+    async def test_version_change_reloads_snapshot(self, db, monkeypatch):
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.environ["REDIS_URL"])
+        monkeypatch.setattr(feature_flag_evaluator.cache_backend, "redis_client", client)
+        monkeypatch.setattr(feature_flag_evaluator.settings, "FEATURE_FLAG_VERSION_CHECK_INTERVAL", 0.0)
+        await client.delete(feature_flag_evaluator.VERSION_KEY)
+        try:
+            await FeatureFlagService(db).create_flag("beta", "Beta", enabled=True, rollout_percentage=100.0)
+            snapshot = await flag_store.get_snapshot(db)
+            assert await flag_store.get_snapshot(db) is snapshot
+
+            await client.set(feature_flag_evaluator.VERSION_KEY, "other-worker")
+            assert await flag_store.get_snapshot(db) is not snapshot
+        finally:
+            await client.delete(feature_flag_evaluator.VERSION_KEY)
+            await client.aclose()
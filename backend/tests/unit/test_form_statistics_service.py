@@ -0,0 +1,148 @@
+"""
+Unit tests for form statistics
+"""
+
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.form import Form, FormFieldRollup, FormSubmission
+from app.models.user import User
+from app.services.form_statistics_service import (
+    FormStatisticsService,
+    _field_values,
+    _parse_number,
+    _stat_fields,
+)
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+
+FIELDS = [
+    {"name": "score", "type": "rating"},
+    {"name": "color", "type": "select"},
+    {"name": "comment", "type": "text"},
+]
+
+
+@pytest.fixture
+async def db():
+    """In-memory SQLite session with the forms tables"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Form.__table__, FormSubmission.__table__],
+        )
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestFormStatistics:
+    """Test FormStatisticsService"""
+
+    @pytest.mark.asyncio
+    async def test_statistics_fallback(self, db):
+        """Test streamed statistics on a database without JSON operators"""
+        form = Form(name="Survey", fields=FIELDS)
+        db.add(form)
+        await db.flush()
+        for data in [
+            {"score": 4, "color": "red"},
+            {"score": "5", "color": "blue"},
+            {"score": "n/a", "color": "red", "comment": None},
+            {"color": True},
+        ]:
+            db.add(FormSubmission(form_id=form.id, data=data))
+        await db.commit()
+
+        stats = await FormStatisticsService(db).get_statistics(form)
+
+        assert stats["total_submissions"] == 4
+        score = stats["field_statistics"]["score"]
+        assert score["count"] == 2
+        assert score["average"] == 4.5
+        assert (score["min"], score["max"]) == (4.0, 5.0)
+        assert score["distribution"] == {4: 1, 5: 1}
+        assert stats["field_statistics"]["color"]["distribution"] == {"red": 2, "blue": 1, "true": 1}
+        assert stats["field_statistics"]["comment"]["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rollup_maintenance_is_noop_without_postgres(self, db):
+        """Test incremental rollup hooks are skipped on other databases"""
+        service = FormStatisticsService(db)
+        form = Form(id=1, name="Survey", fields=FIELDS)
+        await service.record_submission(form, {"score": 3})
+        await service.invalidate_rollups(1)
+
+    def test_parse_number_matches_sql_pattern(self):
+        """Test only plain decimal numbers are treated as numeric"""
+        assert _parse_number("3.5") == 3.5
+        assert _parse_number("-2") == -2.0
+        assert _parse_number(7) == 7.0
+        for value in ["1e5", "nan", " 3", "1.2.3", True, float("inf")]:
+            assert _parse_number(value) is None
+
+    def test_field_values_buckets(self):
+        """Test numeric buckets round half away from zero like Postgres"""
+        values = list(_field_values(_stat_fields(Form(fields=FIELDS)), {"score": 2.5, "color": ["a", "b"]}))
+        assert values == [
+            ("score", True, "3", 2.5),
+            ("color", False, '["a", "b"]', None),
+        ]
+
+    def test_sql_aggregation_uses_json_operators(self):
+        """Test the Postgres path aggregates with ->> and a numeric guard"""
+        raw = FormSubmission.data["score"].as_string()
+        sql = str(raw.regexp_match(r"^-?[0-9]+(\.[0-9]+)?$").compile(dialect=postgresql.dialect()))
+        assert "->>" in sql
+        assert "~" in sql
+
+
+@pytest.mark.skipif(not PERFORMANCE_DATABASE_URL, reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set")
+@pytest.mark.asyncio
+async def test_rebuilt_and_incremental_rollups_round_halves_alike():
+    """Test .5 values land in the same bucket whether rolled up from SQL or per submission"""
+    schema = "test_form_statistics"
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_async_engine(PERFORMANCE_DATABASE_URL, connect_args={"server_settings": {"search_path": schema}})
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[User.__table__, Form.__table__, FormSubmission.__table__, FormFieldRollup.__table__],
+            )
+        scores = [2.5, "0.5", -2.5, 3.5, 1.4]
+        async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            service = FormStatisticsService(db)
+            form = Form(name="Survey", fields=FIELDS)
+            db.add(form)
+            await db.flush()
+            db.add_all(FormSubmission(form_id=form.id, data={"score": score}) for score in scores)
+            await db.commit()
+
+            live = await service.get_statistics(form, source="live")
+            assert live["field_statistics"]["score"]["distribution"] == {3: 1, 1: 2, -3: 1, 4: 1}
+            # Built from SQL on the first read, then updated per submission
+            assert (await service.get_statistics(form)) == live
+            for score in scores:
+                db.add(FormSubmission(form_id=form.id, data={"score": score}))
+                await service.record_submission(form, {"score": score})
+            await db.commit()
+            incremental = await service.get_statistics(form)
+            await service.rebuild_rollups(form)
+            await db.commit()
+            assert (await service.get_statistics(form)) == incremental
+            assert incremental["field_statistics"]["score"]["distribution"] == {3: 2, 1: 4, -3: 2, 4: 2}
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await admin.dispose()
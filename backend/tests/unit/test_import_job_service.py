@@ -0,0 +1,107 @@
+"""
+Unit tests for the import job service
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.import_job_service import ImportJobService, MemoryImportJobStore
+
+
+@pytest.fixture
+def service():
+    """Import job service backed by the in-memory store"""
+    return ImportJobService(MemoryImportJobStore(retention_seconds=3600, max_events=100), concurrency=1)
+
+
+class TestImportJobService:
+    """Test ImportJobService with the in-memory store"""
+
+    @pytest.mark.asyncio
+    async def test_logs_and_status_are_streamed_in_order(self, service):
+        """Test events are returned in append order and resume from last id"""
+        await service.create_job("job-1", owner_id=7)
+        await service.add_log("job-1", "first")
+        await service.update_status("job-1", "processing", progress=1, total=2)
+
+        events = await service.read_events("job-1", "0", block_ms=0)
+        assert [e.get("type", "log") for _, e in events] == ["status", "log", "status"]
+        assert events[1][1]["message"] == "first"
+        assert events[2][1]["data"]["progress"] == 1
+        assert events[2][1]["data"]["owner_id"] == 7
+
+        last_id = events[-1][0]
+        assert await service.read_events("job-1", last_id, block_ms=0) == []
+
+    @pytest.mark.asyncio
+    async def test_reader_is_woken_by_append(self, service):
+        """Test a blocked reader returns as soon as an event is appended"""
+        await service.create_job("job-2")
+        last_id = (await service.read_events("job-2", "0", block_ms=0))[-1][0]
+
+        reader = asyncio.create_task(service.read_events("job-2", last_id, block_ms=5000))
+        await asyncio.sleep(0)
+        await service.add_log("job-2", "pushed")
+
+        events = await asyncio.wait_for(reader, timeout=1)
+        assert [e["message"] for _, e in events] == ["pushed"]
+
+    @pytest.mark.asyncio
+    async def test_read_times_out_without_events(self, service):
+        """Test blocking read returns an empty list after the timeout"""
+        assert await service.read_events("missing", "0", block_ms=10) == []
+
+    @pytest.mark.asyncio
+    async def test_submit_marks_crashed_job_failed(self, service):
+        """Test a job raising an exception ends in the failed status"""
+        await service.create_job("job-3")
+
+        async def crash():
+            raise RuntimeError("boom")
+
+        await service.submit("job-3", crash())
+        status = await service.get_status("job-3")
+        assert status["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_cleanup_drops_expired_jobs(self):
+        """Test jobs older than the retention window are removed"""
+        store = MemoryImportJobStore(retention_seconds=0, max_events=10)
+        service = ImportJobService(store, concurrency=1)
+        await service.create_job("old")
+        await service.set_result("old", {"ok": True})
+
+        assert await store.cleanup() == 1
+        assert await service.get_status("old") is None
+        assert await service.get_result("old") is None
+
+
+class TestImportLogStreamAccess:
+    """Test the import endpoints only serve the job owner"""
+
+    @pytest.mark.asyncio
+    async def test_other_user_cannot_stream_or_read_an_import(self, service, monkeypatch):
+        from types import SimpleNamespace
+
+        from fastapi import HTTPException
+
+        from app.api.v1.endpoints.commercial import contacts
+
+        monkeypatch.setattr(contacts, "import_job_service", service)
+        await service.create_job("job-5", owner_id=1)
+        await service.add_log("job-5", "row 1 imported")
+        first_log_id = (await service.read_events("job-5", "0", block_ms=0))[0][0]
+
+        # Resuming after the initial status event: the stream starts with a log event
+        request = SimpleNamespace(headers={"last-event-id": first_log_id})
+        other_user = SimpleNamespace(id=2)
+        with pytest.raises(HTTPException) as exc_info:
+            await contacts.stream_import_logs("job-5", request, current_user=other_user)
+        assert exc_info.value.status_code == 404
+        with pytest.raises(HTTPException):
+            await contacts.get_import_job("job-5", current_user=other_user)
+
+        response = await contacts.stream_import_logs("job-5", request, current_user=SimpleNamespace(id=1))
+        first_chunk = await response.body_iterator.__anext__()
+        assert "row 1 imported" in first_chunk
@@ -0,0 +1,131 @@
+"""
+Unit tests for lazy imports and lazily included route groups
+"""
+
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.lazy_imports import LazyModule, is_available, lazy_import
+from app.core.lazy_routes import LazyRouteGroups, LazyRouteMiddleware
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ["openai", "anthropic", "pandas", "numpy", "reportlab", "openpyxl", "boto3", "stripe", "sendgrid"]
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Write importable modules to a temporary directory: modules(name=source)"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def write(**sources):
+        for name, source in sources.items():
+            (tmp_path / f"{name}.py").write_text(textwrap.dedent(source))
+            monkeypatch.delitem(sys.modules, name, raising=False)
+
+    return write
+
+
+def test_lazy_module_imports_on_first_attribute_access(modules):
+    modules(lazy_sdk="LOADED = True\nVALUE = 42\n")
+
+    sdk = lazy_import("lazy_sdk")
+    assert isinstance(sdk, LazyModule)
+    assert "lazy_sdk" not in sys.modules
+    assert sdk.VALUE == 42
+    assert "lazy_sdk" in sys.modules
+    assert lazy_import("lazy_sdk") is sys.modules["lazy_sdk"]
+
+    assert is_available("lazy_sdk")
+    assert not is_available("missing_sdk_for_tests")
+    assert not is_available("missing_sdk_for_tests.sub")
+    # A missing module only fails on first use
+    missing = lazy_import("missing_sdk_for_tests")
+    with pytest.raises(ImportError, match="missing_sdk_for_tests"):
+        _ = missing.anything
+
+
+ROUTES = """
+from fastapi import APIRouter
+
+router = APIRouter()
+
+@router.get("/formats")
+async def formats():
+    return ["csv"]
+"""
+
+
+def _app(groups, lazy=True):
+    app = FastAPI()
+
+    @app.get("/api/v1/health")
+    async def health():
+        return {"status": "ok"}
+
+    groups.bind(app, prefix="/api/v1", lazy=lazy)
+    app.add_middleware(LazyRouteMiddleware, groups=groups)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_route_group_is_loaded_by_its_first_request(modules):
+    modules(lazy_exports=ROUTES)
+    groups = LazyRouteGroups()
+    groups.add("lazy_exports", prefix="/exports", tags=["exports"])
+    app = _app(groups)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/api/v1/health")).status_code == 200
+        assert (await client.get("/api/v1/exportsx")).status_code == 404
+        assert "lazy_exports" not in sys.modules and groups.pending
+
+        response = await client.get("/api/v1/exports/formats")
+        assert response.status_code == 200 and response.json() == ["csv"]
+        assert not groups.pending
+        assert (await client.get("/api/v1/exports/formats")).status_code == 200
+
+    operation = app.openapi()["paths"]["/api/v1/exports/formats"]["get"]
+    assert operation["tags"] == ["exports"]
+
+
+def test_openapi_and_eager_mode_include_every_group(modules):
+    modules(lazy_exports=ROUTES, lazy_imports_group=ROUTES)
+    groups = LazyRouteGroups()
+    groups.add("lazy_exports", prefix="/exports")
+    groups.add("lazy_imports_group", prefix="/imports")
+
+    app = _app(groups)
+    groups.load_all()
+    assert {"/api/v1/exports/formats", "/api/v1/imports/formats"} <= set(app.openapi()["paths"])
+
+    eager_groups = LazyRouteGroups()
+    eager_groups.add("lazy_exports", prefix="/exports")
+    eager_app = _app(eager_groups, lazy=False)
+    assert not eager_groups.pending
+    assert "/api/v1/exports/formats" in eager_app.openapi()["paths"]
+
+
+@pytest.mark.asyncio
+async def test_warmup_loads_pending_groups(modules):
+    modules(lazy_exports=ROUTES)
+    groups = LazyRouteGroups()
+    groups.add("lazy_exports", prefix="/exports")
+    _app(groups)
+
+    await groups.warmup()
+
+    assert not groups.pending and "lazy_exports" in sys.modules
+
+
+def test_application_import_leaves_heavy_dependencies_unloaded():
+    script = f"import sys, app.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,174 @@
+"""
+Unit tests for the structured logger and the sampled request logging middleware
+"""
+
+import io
+import json
+import logging
+import threading
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from app.core import request_logging
+from app.core.logging import StructuredLogger
+from app.core.request_logging import RequestLoggingMiddleware, parse_sample_rates
+
+
+class _BlockingStream(io.StringIO):
+    """Stream whose writes wait until released, like a stalled stdout pipe"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def structured():
+    stream = io.StringIO()
+    structured_logger = StructuredLogger("tests.logging", stream=stream, asynchronous=True)
+    yield structured_logger, stream
+    structured_logger.shutdown()
+
+
+def test_records_are_json_with_context_and_caller_location(structured):
+    structured_logger, stream = structured
+    context = {"user_id": 7}
+
+    structured_logger.info("Imported %s rows", 12, context=context)
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        structured_logger.error("Import failed", exc_info=True)
+    structured_logger.flush()
+
+    info, error = _lines(stream)
+    assert info["message"] == "Imported 12 rows"
+    assert info["levelname"] == "INFO" and info["user_id"] == 7
+    assert info["pathname"] == __file__
+    assert context == {"user_id": 7}
+    assert error["exception"] == {"type": "ValueError", "message": "bad row"}
+    assert "Traceback" in error["exc_info"]
+
+
+def test_logging_does_not_wait_for_the_stream():
+    stream = _BlockingStream()
+    structured_logger = StructuredLogger("tests.logging.blocking", stream=stream, asynchronous=True)
+    try:
+        for index in range(100):
+            structured_logger.info("Line %s", index)
+        assert stream.getvalue() == ""
+    finally:
+        stream.release.set()
+        structured_logger.shutdown()
+
+    assert len(_lines(stream)) == 100
+
+
+def test_messages_are_formatted_lazily():
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    structured_logger = StructuredLogger("tests.logging.lazy", stream=io.StringIO(), asynchronous=False)
+    structured_logger.logger.setLevel(logging.INFO)
+    structured_logger.logger.propagate = False
+
+    structured_logger.debug("Value %s", Expensive())
+    assert Expensive.formatted == 0
+    structured_logger.info("Value %s", Expensive())
+    assert Expensive.formatted == 1
+
+
+def test_records_logged_after_shutdown_are_written():
+    stream = io.StringIO()
+    structured_logger = StructuredLogger("tests.logging.shutdown", stream=stream, asynchronous=True)
+    structured_logger.shutdown()
+
+    structured_logger.warning("After shutdown")
+
+    assert _lines(stream)[0]["message"] == "After shutdown"
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("/api/v1/health=0, /api/v1=0.5,/api/v1/posts=1,broken,/x=abc") == [
+        ("/api/v1/health", 0.0), ("/api/v1/posts", 1.0), ("/api/v1", 0.5),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_success_logs_are_sampled_per_route_and_errors_always_kept(monkeypatch):
+    stream = io.StringIO()
+    structured_logger = StructuredLogger("tests.logging.requests", stream=stream, asynchronous=False)
+    monkeypatch.setattr(request_logging, "logger", structured_logger)
+
+    router = APIRouter()
+
+    @router.get("/posts/{post_id}")
+    async def get_post(post_id: int):
+        return {"id": post_id}
+
+    @router.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @router.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.add_middleware(
+        RequestLoggingMiddleware, sample_rate=0.0, route_sample_rates="/api/v1/posts=1", slow_threshold=10,
+    )
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for post_id in range(3):
+            await client.get(f"/api/v1/posts/{post_id}")
+        for _ in range(5):
+            await client.get("/api/v1/health")
+        await client.get("/api/v1/missing")
+        await client.get("/api/v1/boom")
+
+    lines = _lines(stream)
+    assert [line["message"].split(" (")[0] for line in lines] == [
+        "Request completed: GET /api/v1/posts/0 - 200",
+        "Request completed: GET /api/v1/posts/1 - 200",
+        "Request completed: GET /api/v1/posts/2 - 200",
+        "Request completed: GET /api/v1/missing - 404",
+        "Request failed: GET /api/v1/boom",
+    ]
+    assert lines[0]["route"] == "/api/v1/posts/{post_id}" and lines[0]["status_code"] == 200
+    assert lines[-1]["levelname"] == "ERROR" and lines[-1]["exception"]["type"] == "RuntimeError"
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_always_logged(monkeypatch):
+    stream = io.StringIO()
+    structured_logger = StructuredLogger("tests.logging.slow", stream=stream, asynchronous=False)
+    monkeypatch.setattr(request_logging, "logger", structured_logger)
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        return {}
+
+    app.add_middleware(RequestLoggingMiddleware, sample_rate=0.0, route_sample_rates="", slow_threshold=0.0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/slow")
+
+    assert _lines(stream)[0]["route"] == "/slow"
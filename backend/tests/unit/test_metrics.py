@@ -0,0 +1,193 @@
+"""
+Unit tests for the Prometheus metrics registry, middleware and endpoint
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api import metrics as metrics_api
+from app.core import cache as cache_module
+from app.core import metrics
+from app.core.config import Settings
+from app.core.metrics import (
+    MetricsMiddleware,
+    TimedAsyncAdaptedQueuePool,
+    cache_key_prefix,
+    instrument_pool,
+    record_websocket_connections,
+    registry,
+    route_template,
+)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def _sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def _app():
+    posts = APIRouter()
+
+    @posts.get("/{post_id}")
+    async def get_post(post_id: int):
+        return {"id": post_id}
+
+    @posts.get("/{post_id}/fail")
+    async def fail(post_id: int):
+        raise RuntimeError("boom")
+
+    api = APIRouter()
+    api.include_router(posts, prefix="/posts")
+    app = FastAPI()
+    app.include_router(api, prefix="/api/v1")
+    app.include_router(metrics_api.router)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    labels = {"method": "GET", "route": "/api/v1/posts/{post_id}", "status": "2xx"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    unmatched = _sample("http_request_duration_seconds_count", method="GET", route="<unmatched>", status="4xx")
+    failed = {"method": "GET", "route": "/api/v1/posts/{post_id}/fail", "status": "5xx"}
+    failed_before = _sample("http_request_duration_seconds_count", **failed)
+
+    transport = httpx.ASGITransport(app=_app(), raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for post_id in range(3):
+            assert (await client.get(f"/api/v1/posts/{post_id}")).status_code == 200
+        assert (await client.get("/missing")).status_code == 404
+        assert (await client.get("/api/v1/posts/1/fail")).status_code == 500
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 3
+    assert _sample("http_request_duration_seconds_count", method="GET", route="<unmatched>", status="4xx") == unmatched + 1
+    assert _sample("http_request_duration_seconds_count", **failed) == failed_before + 1
+    assert _sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_route_template_falls_back_to_the_route_path():
+    class Route:
+        path = "/health"
+
+    assert route_template({"route": Route()}) == "/health"
+    assert route_template({}) == "<unmatched>"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_text_format_and_checks_token(monkeypatch):
+    app = _app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # Not served under the default settings (no token)
+        monkeypatch.setattr(metrics_api.settings, "METRICS_TOKEN", Settings.model_fields["METRICS_TOKEN"].default)
+        assert (await client.get("/metrics")).status_code == 404
+
+        monkeypatch.setattr(metrics_api.settings, "METRICS_TOKEN", "secret")
+        assert (await client.get("/metrics")).status_code == 401
+        assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+        response = await client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "# TYPE celery_queue_length gauge" in response.text
+
+
+@pytest.mark.asyncio
+async def test_pool_checkouts_and_connections_in_use(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=TimedAsyncAdaptedQueuePool)
+    instrument_pool(engine)
+    instrument_pool(engine)
+    checkouts = _sample("db_pool_checkout_seconds_count")
+    in_use = _sample("db_pool_connections_in_use")
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            assert _sample("db_pool_connections_in_use") == in_use + 2
+        assert _sample("db_pool_connections_in_use") == in_use
+        assert _sample("db_pool_checkout_seconds_count") == checkouts + 2
+    finally:
+        await engine.dispose()
+
+
+def test_cache_key_prefix_and_websocket_gauge():
+    assert cache_key_prefix("ai:completion:abc") == "ai"
+    assert cache_key_prefix("0f3a9c") == "other"
+    assert cache_key_prefix(":odd") == "other"
+
+    connections = _sample("websocket_connections")
+    record_websocket_connections(2)
+    record_websocket_connections(-1)
+    assert _sample("websocket_connections") == connections + 1
+    record_websocket_connections(-1)
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+@pytest.mark.asyncio
+async def test_cache_hits_misses_and_celery_queue_length(monkeypatch):
+    import redis.asyncio as redis
+
+    client = redis.from_url(os.environ["REDIS_URL"])
+    monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+    monkeypatch.setattr(cache_module.cache_backend, "use_redis", True)
+    monkeypatch.setattr(metrics.settings, "METRICS_CELERY_QUEUES", "celery, emails")
+    hits = _sample("cache_requests_total", prefix="metrics-test", result="hit")
+    misses = _sample("cache_requests_total", prefix="metrics-test", result="miss")
+    try:
+        await cache_module.cache_backend.set("metrics-test:key", {"value": 1})
+        assert await cache_module.cache_backend.get("metrics-test:key") == {"value": 1}
+        assert await cache_module.cache_backend.get("metrics-test:missing") is None
+        await client.rpush("emails", "job-1", "job-2")
+
+        await metrics.refresh_scrape_time_metrics()
+        body, _ = metrics.render_latest()
+    finally:
+        await client.flushdb()
+        await client.aclose()
+
+    assert _sample("cache_requests_total", prefix="metrics-test", result="hit") == hits + 1
+    assert _sample("cache_requests_total", prefix="metrics-test", result="miss") == misses + 1
+    assert 'celery_queue_length{queue="emails"} 2.0' in body.decode()
+    assert 'celery_queue_length{queue="celery"} 0.0' in body.decode()
+
+
+WORKER = """
+from app.core.metrics import REQUEST_LATENCY, WEBSOCKET_CONNECTIONS, mark_process_dead
+for _ in range({requests}):
+    REQUEST_LATENCY.labels("GET", "/api/v1/posts", "2xx").observe(0.01)
+WEBSOCKET_CONNECTIONS.inc({sockets})
+if {dead}:
+    mark_process_dead()
+"""
+
+SCRAPE = """
+from app.core.metrics import render_latest
+print(render_latest()[0].decode())
+"""
+
+
+def test_multiprocess_mode_aggregates_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(BACKEND_DIR)}
+
+    def run(script):
+        return subprocess.run(
+            [sys.executable, "-c", script], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+
+    run(WORKER.format(requests=3, sockets=2, dead=False))
+    run(WORKER.format(requests=4, sockets=5, dead=False))
+    run(WORKER.format(requests=1, sockets=7, dead=True))
+    output = run(SCRAPE)
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/posts",status="2xx"} 8.0' in output
+    # Live gauges of exited workers are dropped once they are marked dead; the others are still counted
+    assert "websocket_connections 7.0" in output
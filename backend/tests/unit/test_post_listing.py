@@ -0,0 +1,168 @@
+"""
+Unit tests for the post and page listings and the published listing cache
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.v1.endpoints.pages import list_pages
+from app.api.v1.endpoints.posts import create_post, get_post_by_slug, list_posts, PostCreate
+from app.core.database import Base
+from app.core.security_audit import SecurityAuditLogger
+from app.models.page import Page
+from app.models.post import Post
+from app.models.tag import Category
+from app.models.user import User
+from app.services import post_listing_cache as cache_module
+from app.services.tag_service import CategoryService
+
+LISTING = dict(
+    skip=0, limit=100, status=None, category_id=None, category_slug=None, tag=None,
+    author_id=None, author_slug=None, year=None, exclude_content=False,
+)
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """SQLite session with two authors, a category, posts and pages"""
+    async def log_event(**kwargs):
+        return None
+
+    monkeypatch.setattr(SecurityAuditLogger, "log_event", log_event)
+    monkeypatch.setattr(cache_module.cache_backend, "redis_client", None)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'posts.db'}")
+    tables = [Base.metadata.tables[name] for name in ("users", "categories", "posts", "pages", "activities")]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        jane = User(email="jane@example.com", hashed_password="x", first_name="Jane", last_name="Doe")
+        bot = User(email="50%_bot@example.com", hashed_password="x")
+        session.add_all([jane, bot])
+        await session.flush()
+        news = Category(name="News", slug="news", entity_type="post", user_id=jane.id)
+        session.add(news)
+        await session.flush()
+        session.add_all([
+            Post(title=f"Post {i}", slug=f"post-{i}", content="body " * 100, content_html="<p>body</p>",
+                 status="published" if i % 3 else "draft", author_id=(jane.id, bot.id, None)[i % 3],
+                 category_id=news.id if i % 2 else None, tags=["a"])
+            for i in range(12)
+        ])
+        session.add_all([
+            Page(title=f"Page {i}", slug=f"page-{i}", content="body", sections=[{"id": "s"}], user_id=jane.id)
+            for i in range(3)
+        ])
+        await session.commit()
+        session.user = SimpleNamespace(id=jane.id, first_name="Jane", last_name="Doe", email=jane.email)
+        session.category_id = news.id
+        session.statements = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: session.statements.append(statement),
+        )
+        yield session
+    await engine.dispose()
+
+
+async def _list(db, **params):
+    request = SimpleNamespace(client=None)
+    return await list_posts(request=request, current_user=db.user, db=db, **{**LISTING, **params})
+
+
+class TestPostListing:
+    """Test the single-statement post listing"""
+
+    @pytest.mark.asyncio
+    async def test_listing_loads_authors_and_categories_in_one_statement(self, db):
+        posts = await _list(db)
+        assert len(db.statements) == 1
+        assert len(posts) == 12
+        by_slug = {post["slug"]: post for post in posts}
+        assert by_slug["post-1"]["author_name"] == "50%_bot@example.com"
+        assert by_slug["post-3"]["author_name"] == "Jane Doe"
+        assert by_slug["post-3"]["category_name"] == "News"
+        assert by_slug["post-2"]["author_name"] is None and by_slug["post-2"]["category_name"] is None
+        assert by_slug["post-1"]["content"].startswith("body")
+
+    @pytest.mark.asyncio
+    async def test_exclude_content_leaves_the_content_columns_out(self, db):
+        posts = await _list(db, exclude_content=True)
+        assert "content" not in db.statements[0].split("FROM")[0].replace("content_html", "")
+        assert all(post["content"] is None and post["content_html"] is None for post in posts)
+        assert posts[0]["title"]
+
+    @pytest.mark.asyncio
+    async def test_filters_resolve_in_the_same_statement(self, db):
+        assert {p["slug"] for p in await _list(db, category_slug="news", status="published")} == {
+            "post-1", "post-5", "post-7", "post-11",
+        }
+        assert await _list(db, category_slug="missing") == []
+        # LIKE wildcards in the slug are matched literally
+        assert {p["author_name"] for p in await _list(db, author_slug="50%_")} == {"50%_bot@example.com"}
+        assert {p["author_name"] for p in await _list(db, author_slug="%")} == {"50%_bot@example.com"}
+        assert await _list(db, author_slug="0_b") == []
+        assert {p["author_name"] for p in await _list(db, author_slug="doe")} == {"Jane Doe"}
+        assert len(db.statements) == 6
+
+    @pytest.mark.asyncio
+    async def test_get_post_by_slug(self, db):
+        request = SimpleNamespace(client=None)
+        post = await get_post_by_slug(slug="post-3", request=request, current_user=db.user, db=db)
+        assert (post.author_name, post.category_name) == ("Jane Doe", "News")
+        assert len(db.statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_page_listing_can_exclude_content(self, db):
+        request = SimpleNamespace(client=None, headers={}, method="GET", url=SimpleNamespace(path="/pages"))
+        pages = await list_pages(
+            request=request, skip=0, limit=100, status=None, exclude_content=True, current_user=db.user, db=db,
+        )
+        assert len(pages) == 3
+        assert all(page["content"] is None and page["sections"] is None for page in pages)
+        assert isinstance(pages[0]["created_at"], str)
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="REDIS_URL not set")
+class TestPublishedListingCache:
+    """Test the version-keyed cache of published listings"""
+
+    @pytest.mark.asyncio
+    async def test_published_listings_are_cached_until_a_write(self, db, monkeypatch):
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.environ["REDIS_URL"])
+        monkeypatch.setattr(cache_module.cache_backend, "redis_client", client)
+        monkeypatch.setattr(cache_module.cache_backend, "use_redis", True)
+        await client.set(cache_module.VERSION_KEY, 0)
+        try:
+            published = await _list(db, status="published")
+            assert len(published) == 8
+            assert await _list(db, status="published") == published
+            assert len(db.statements) == 1
+            # Other listings are not cached
+            await _list(db)
+            await _list(db)
+            assert len(db.statements) == 3
+
+            request = SimpleNamespace(client=None)
+            await create_post(
+                PostCreate(title="New", slug="new", content="c", status="published"),
+                request=request, current_user=db.user, db=db,
+            )
+            published = await _list(db, status="published")
+            assert len(published) == 9
+
+            # Category names are part of the cached listing
+            await CategoryService(db).update_category(db.category_id, {"name": "World News"})
+            relisted = await _list(db, status="published")
+            assert {post["category_name"] for post in relisted} == {"World News", None}
+        finally:
+            await client.delete(cache_module.VERSION_KEY)
+            async for key in client.scan_iter(f"{cache_module.LISTING_KEY}*"):
+                await client.delete(key)
+            await client.aclose()
@@ -0,0 +1,151 @@
+"""
+Unit tests for the daily project rollups
+"""
+
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import Base
+from app.models.project import Project, ProjectDailyRollup, ProjectRollupState, ProjectStatus
+from app.models.user import User
+from app.services.project_rollup_service import (
+    DayRange, ProjectRollupService, project_day, register_project_rollup_hooks,
+)
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+SCHEMA = "test_project_rollups"
+TABLES = ("users", "projects", "project_daily_rollups", "project_rollup_state")
+
+pytestmark = pytest.mark.skipif(
+    not PERFORMANCE_DATABASE_URL,
+    reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set",
+)
+
+
+@pytest.fixture
+async def engine():
+    register_project_rollup_hooks()
+    admin = create_async_engine(PERFORMANCE_DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_async_engine(
+        PERFORMANCE_DATABASE_URL, connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[Base.metadata.tables[name] for name in TABLES])
+    yield engine
+    await engine.dispose()
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await admin.dispose()
+
+
+async def _users(engine, count):
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        users = [User(email=f"user{i}@example.com", hashed_password="x") for i in range(count)]
+        db.add_all(users)
+        await db.commit()
+        return [user.id for user in users]
+
+
+async def _assert_rollups_match_projects(db):
+    """Rollup rows of the users with built rollups equal a GROUP BY over their projects"""
+    day = project_day("postgresql")
+    built = select(ProjectRollupState.user_id)
+    live = {
+        tuple(row[:3]): row[3] for row in await db.execute(
+            select(Project.user_id, day, Project.status, func.count())
+            .where(Project.user_id.in_(built))
+            .group_by(Project.user_id, day, Project.status)
+        )
+    }
+    rollups = {
+        (row.user_id, row.day, row.status): row.count
+        for row in (await db.execute(select(ProjectDailyRollup))).scalars()
+        if row.count
+    }
+    assert rollups == live
+
+
+@pytest.mark.asyncio
+async def test_rollups_are_built_on_first_read_and_follow_project_writes(engine):
+    owner, other = await _users(engine, 2)
+    today = datetime.now(timezone.utc)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        projects = [
+            Project(name=f"p{i}", user_id=owner, status=ProjectStatus.ACTIVE, created_at=today - timedelta(days=i))
+            for i in range(5)
+        ]
+        db.add_all(projects + [Project(name="other", user_id=other)])
+        await db.commit()
+        # Not built yet: the hooks leave the rollups alone
+        assert (await db.scalar(select(func.count()).select_from(ProjectDailyRollup))) == 0
+
+        service = ProjectRollupService(db)
+        ranges = {
+            "total": DayRange(),
+            "active": DayRange(status=ProjectStatus.ACTIVE),
+            "last_3_days": DayRange(today.date() - timedelta(days=2), today.date()),
+        }
+        assert await service.count_projects(owner, ranges) == {"total": 5, "active": 5, "last_3_days": 3}
+        assert (await db.scalar(select(ProjectRollupState.user_id))) == owner
+
+        projects[0].status = ProjectStatus.ARCHIVED
+        projects[1].created_at = today - timedelta(days=10)
+        await db.delete(projects[2])
+        db.add(Project(name="new", user_id=owner, status=ProjectStatus.COMPLETED))
+        await db.commit()
+
+        assert await service.count_projects(owner, ranges) == {"total": 5, "active": 3, "last_3_days": 2}
+        await _assert_rollups_match_projects(db)
+
+
+@pytest.mark.asyncio
+async def test_backfill_builds_every_user_and_matches_live_counts(engine, monkeypatch):
+    user_ids = await _users(engine, 7)
+    async with AsyncSession(engine) as db:
+        db.add_all([
+            Project(name=f"p{i}", user_id=user_ids[i % 5], status=list(ProjectStatus)[i % 3],
+                    created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=7 * i))
+            for i in range(200)
+        ])
+        await db.commit()
+
+        result = await ProjectRollupService(db).backfill(chunk_size=3)
+        assert result["users"] == 7
+        assert (await db.scalar(select(func.count()).select_from(ProjectRollupState))) == 7
+        assert (await db.scalar(select(func.count()).select_from(ProjectDailyRollup))) == result["rows"]
+        await _assert_rollups_match_projects(db)
+
+        ranges = {"january": DayRange(date(2026, 1, 1), date(2026, 1, 31), ProjectStatus.ARCHIVED)}
+        from_rollups = await ProjectRollupService(db).count_projects(user_ids[1], ranges)
+        monkeypatch.setattr("app.core.config.settings.ANALYTICS_ROLLUPS", False)
+        assert await ProjectRollupService(db).count_projects(user_ids[1], ranges) == from_rollups
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_and_rebuilds_stay_consistent(engine):
+    (owner,) = await _users(engine, 1)
+
+    async def write(i):
+        async with AsyncSession(engine) as db:
+            db.add(Project(name=f"p{i}", user_id=owner, status=list(ProjectStatus)[i % 3]))
+            await db.commit()
+
+    async def rebuild():
+        async with AsyncSession(engine) as db:
+            await ProjectRollupService(db).rebuild([owner])
+            await db.commit()
+
+    await rebuild()
+    await asyncio.gather(*[write(i) for i in range(30)], *[rebuild() for _ in range(3)])
+
+    async with AsyncSession(engine) as db:
+        await _assert_rollups_match_projects(db)
+        assert await ProjectRollupService(db).count_projects(owner, {"total": DayRange()}) == {"total": 30}
@@ -0,0 +1,192 @@
+"""
+Unit tests for the engine query instrumentation and the query budget plugin
+"""
+
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.query_instrumentation import (
+    QueryInstrumentationMiddleware,
+    QueryMetrics,
+    fingerprint,
+    instrument_engine,
+    query_metrics,
+    track_queries,
+)
+from app.core.query_optimization_advanced import QueryOptimizer
+
+pytest_plugins = ["pytester", "tests.plugins.query_budget"]
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        await conn.execute(text("CREATE TABLE posts (id INTEGER PRIMARY KEY, author_id INTEGER)"))
+        for index in range(10):
+            await conn.execute(text("INSERT INTO users VALUES (:id, :name)"), {"id": index, "name": f"user{index}"})
+            await conn.execute(text("INSERT INTO posts VALUES (:id, :author)"), {"id": index, "author": index})
+    yield engine
+    await engine.dispose()
+
+
+async def _authors_one_by_one(conn):
+    posts = (await conn.execute(text("SELECT id, author_id FROM posts"))).all()
+    for post in posts:
+        await conn.execute(text("SELECT name FROM users WHERE id = :id"), {"id": post.author_id})
+
+
+def test_fingerprint_normalises_parameters_and_literals():
+    assert fingerprint("SELECT users.id FROM users WHERE users.id = $1::INTEGER AND name = 'o''neil' LIMIT $2") == (
+        "SELECT users.id FROM users WHERE users.id = ?::INTEGER AND name = ? LIMIT ?"
+    )
+    assert fingerprint("SELECT a FROM t2 WHERE t2.id IN (%s, %s, %s)\n  AND b > 2.5") == (
+        "SELECT a FROM t2 WHERE t2.id IN (?) AND b > ?"
+    )
+    assert fingerprint("INSERT INTO t (a, b) VALUES (:a_1, :b_1), (:a_2, :b_2)") == "INSERT INTO t (a, b) VALUES (?, ?)"
+
+
+@pytest.mark.asyncio
+async def test_scopes_count_statements_and_time(engine):
+    async with engine.connect() as conn:
+        with track_queries() as outer:
+            await conn.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                await conn.execute(text("SELECT 2"))
+        await conn.execute(text("SELECT 3"))
+
+    assert (outer.count, inner.count) == (2, 1)
+    assert outer.total_time > 0
+    assert outer.fingerprints == {"SELECT ?": 2}
+
+
+@pytest.mark.asyncio
+async def test_repeated_lookups_are_reported_as_n_plus_one(engine):
+    async with engine.connect() as conn:
+        with track_queries() as one_by_one:
+            await _authors_one_by_one(conn)
+        with track_queries() as batched:
+            await conn.execute(text("SELECT id, author_id FROM posts"))
+            await conn.execute(text("SELECT name FROM users WHERE id IN (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)"))
+
+    assert one_by_one.count == 11
+    assert one_by_one.n_plus_one() == [("SELECT name FROM users WHERE id = ?", 10)]
+    assert one_by_one.n_plus_one(threshold=10) == []
+    assert batched.n_plus_one() == []
+
+
+def test_detect_n_plus_one_groups_by_fingerprint():
+    queries = [f"SELECT * FROM categories WHERE id = {index}" for index in range(6)] + ["SELECT * FROM posts"]
+
+    patterns = QueryOptimizer.detect_n_plus_one(queries)
+
+    assert patterns == [{
+        "query": "SELECT * FROM categories WHERE id = ?",
+        "occurrences": 6,
+        "suggestion": "Consider using JOIN or eager loading",
+    }]
+
+
+def test_metrics_are_bounded():
+    metrics = QueryMetrics(max_fingerprints=10)
+    for index in range(12):
+        metrics.record_query(f"SELECT * FROM table_{index}", 0.001)
+    metrics.record_query("SELECT * FROM table_0", 0.003)
+
+    snapshot = metrics.snapshot(limit=5)
+
+    assert snapshot["tracked_fingerprints"] == 10
+    assert snapshot["untracked_fingerprints"] == 2
+    assert snapshot["statements"][0] == {
+        "fingerprint": "SELECT * FROM table_0", "calls": 2, "total_time": 0.004, "mean_time": 0.002, "max_time": 0.003,
+    }
+    assert len(snapshot["statements"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_headers_metrics_and_warnings(engine, caplog):
+    app = FastAPI()
+
+    @app.get("/posts/{post_id}/authors")
+    async def authors(post_id: int):
+        async with engine.connect() as conn:
+            await _authors_one_by_one(conn)
+        return {"ok": True}
+
+    app.add_middleware(QueryInstrumentationMiddleware, debug_headers=True)
+    query_metrics.reset()
+
+    with caplog.at_level(logging.WARNING):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for post_id in range(3):
+                response = await client.get(f"/posts/{post_id}/authors")
+
+    assert response.headers["x-db-query-count"] == "11"
+    assert response.headers["x-db-query-time"].endswith("ms")
+    assert response.headers["x-db-n-plus-one"] == "1"
+    route = query_metrics.snapshot()["routes"][0]
+    assert route["route"] == "GET /posts/{post_id}/authors"
+    assert (route["requests"], route["max_queries"], route["n_plus_one_requests"]) == (3, 11, 3)
+    assert route["n_plus_one"] == [{"fingerprint": "SELECT name FROM users WHERE id = ?", "executions": 10}]
+    assert "Possible N+1 query on GET /posts/{post_id}/authors" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_headers_are_off_without_debug(engine):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(QueryInstrumentationMiddleware, debug_headers=False)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/ping")
+
+    assert "x-db-query-count" not in response.headers
+
+
+@pytest.mark.query_budget(11)
+@pytest.mark.asyncio
+async def test_query_budget_marker_allows_declared_statements(engine):
+    async with engine.connect() as conn:
+        await _authors_one_by_one(conn)
+
+
+@pytest.mark.asyncio
+async def test_query_stats_fixture(engine, query_stats):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+    assert query_stats.count == 1
+
+
+def test_query_budget_marker_fails_tests_over_budget(pytester):
+    pytester.makepyfile("""
+        import pytest
+        from sqlalchemy import create_engine, text
+        from app.core.query_instrumentation import instrument_engine
+
+        pytest_plugins = ["tests.plugins.query_budget"]
+
+        @pytest.mark.query_budget(2)
+        def test_over_budget():
+            engine = create_engine("sqlite://")
+            instrument_engine(engine)
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text("SELECT 1"))
+    """)
+
+    result = pytester.runpytest_inprocess("-p", "no:cacheprovider", "-o", "addopts=")
+
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*Query budget exceeded: 3 statements executed, budget is 2*", "*3 x SELECT ?*"])
@@ -0,0 +1,248 @@
+"""
+Unit tests for the async GCRA rate limiter
+"""
+
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimitMiddleware, get_rate_limit, rate_limit_decorator, setup_rate_limiting
+from app.core.rate_limiter import (
+    REDIS_AVAILABLE,
+    MemoryRateLimitBackend,
+    RateLimiter,
+    parse_rate,
+)
+
+
+class CountingBackend(MemoryRateLimitBackend):
+    """Memory buckets flagged as distributed, counting backend round trips"""
+
+    distributed = True
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def acquire(self, key, rate, requested=1):
+        self.calls += 1
+        return await super().acquire(key, rate, requested)
+
+
+class TestParseRate:
+    """Test rate string parsing"""
+
+    def test_formats(self):
+        assert parse_rate("5/minute").limit == 5
+        assert parse_rate("5/minute").period == 60
+        assert parse_rate("10 per second").period == 1
+        assert parse_rate("30/5 minutes").period == 300
+        assert parse_rate("1000/hour").interval == 3.6
+
+    def test_invalid(self):
+        for value in ["", "5", "0/minute", "5/week"]:
+            with pytest.raises(ValueError):
+                parse_rate(value)
+
+
+class TestGCRA:
+    """Test the GCRA algorithm (memory backend)"""
+
+    def test_burst_then_steady_rate(self):
+        backend = MemoryRateLimitBackend()
+        rate = parse_rate("5/minute")
+        allowed = [backend.acquire_now("k", rate, 1, 100.0)[1] for _ in range(6)]
+        assert [r.allowed for r in allowed] == [True] * 5 + [False]
+        assert [r.remaining for r in allowed[:5]] == [4, 3, 2, 1, 0]
+        assert allowed[5].retry_after == pytest.approx(12.0)
+
+        # One token is back after one emission interval
+        assert backend.acquire_now("k", rate, 1, 112.0)[1].allowed
+        assert not backend.acquire_now("k", rate, 1, 112.0)[1].allowed
+
+    def test_partial_grant(self):
+        backend = MemoryRateLimitBackend()
+        rate = parse_rate("10/second")
+        assert backend.acquire_now("k", rate, 8, 0.0)[0] == 8
+        assert backend.acquire_now("k", rate, 8, 0.0)[0] == 2
+        assert backend.acquire_now("k", rate, 8, 0.0)[0] == 0
+
+
+class TestLocalPreFilter:
+    """Test leases and cached denials in front of a distributed backend"""
+
+    @pytest.mark.asyncio
+    async def test_hot_key_uses_leases(self):
+        backend = CountingBackend()
+        engine = RateLimiter(lease_max=20, lease_ttl=60)
+        engine.backend = backend
+        rate = parse_rate("1000/hour")
+
+        results = [await engine.hit("user:1", rate) for _ in range(200)]
+
+        assert all(r.allowed for r in results)
+        # Leases double up to lease_max: 1 + 2 + 4 + 8 + 16 + 20 * 8 < 200
+        assert backend.calls < 20
+
+    @pytest.mark.asyncio
+    async def test_never_exceeds_limit_and_caches_denials(self):
+        backend = CountingBackend()
+        engine = RateLimiter(lease_max=20, lease_ttl=60)
+        engine.backend = backend
+        rate = parse_rate("50/hour")
+
+        results = [await engine.hit("user:1", rate) for _ in range(100)]
+
+        assert sum(r.allowed for r in results) == 50
+        calls = backend.calls
+        denied = await engine.hit("user:1", rate)
+        assert not denied.allowed and denied.local
+        assert backend.calls == calls
+
+    @pytest.mark.asyncio
+    async def test_strict_limits_are_not_leased(self):
+        backend = CountingBackend()
+        engine = RateLimiter(lease_max=20, lease_ttl=60)
+        engine.backend = backend
+        rate = parse_rate("5/minute")
+        for _ in range(5):
+            assert (await engine.hit("ip:1", rate)).allowed
+        assert backend.calls == 5
+
+    @pytest.mark.skipif(
+        not (REDIS_AVAILABLE and os.getenv("REDIS_URL")),
+        reason="REDIS_URL not set",
+    )
+    @pytest.mark.asyncio
+    async def test_redis_script(self):
+        engine = RateLimiter(redis_url=os.environ["REDIS_URL"], lease_max=1)
+        await engine.reset()
+        rate = parse_rate("3/minute")
+        try:
+            results = [await engine.hit("redis-test", rate) for _ in range(4)]
+            assert [r.allowed for r in results] == [True, True, True, False]
+            assert 0 < results[3].retry_after <= 20
+        finally:
+            await engine.reset()
+            await engine.close()
+
+
+class TestRateLimitIntegration:
+    """Test the middleware, decorator and route table"""
+
+    def test_route_table(self):
+        assert get_rate_limit("/api/v1/auth/login") == "5/minute"
+        assert get_rate_limit("/api/v1/users") == "100/hour"
+        assert get_rate_limit("/api/v1/users/123") == "200/hour"
+        assert get_rate_limit("/api/v1/unknown") == "1000/hour"
+
+    def test_decorator_and_middleware(self, monkeypatch):
+        engine = RateLimiter()
+        monkeypatch.setattr(rate_limit, "limiter", engine)
+        app = FastAPI()
+        setup_rate_limiting(app)
+        app.user_middleware.clear()
+        app.add_middleware(RateLimitMiddleware, engine=engine)
+
+        @app.post("/api/v1/auth/login")
+        @rate_limit_decorator("2/minute")
+        async def login(request: Request):
+            return {"ok": True}
+
+        client = TestClient(app)
+        first = client.post("/api/v1/auth/login")
+        assert first.status_code == 200
+        assert first.headers["X-RateLimit-Limit"] == "5"
+        assert client.post("/api/v1/auth/login").status_code == 200
+        limited = client.post("/api/v1/auth/login")
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert limited.json()["error"] == "rate_limit_exceeded"
+
+
+class TestRateLimitIdentity:
+    """Test tiers and client keys resolved by the middleware"""
+
+    @pytest.fixture
+    async def app(self, tmp_path, monkeypatch):
+        from decimal import Decimal
+
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.api.v1.endpoints.auth import create_access_token
+        from app.core import rate_limit_identity
+        from app.core.api_key import hash_api_key
+        from app.core.database import Base
+        from app.models.api_key import APIKey
+        from app.models.plan import Plan
+        from app.models.subscription import Subscription, SubscriptionStatus
+        from app.models.user import User
+
+        db_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'identity.db'}")
+        async with db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[
+                Base.metadata.tables[name] for name in ("users", "plans", "subscriptions", "api_keys")
+            ])
+        sessions = async_sessionmaker(db_engine, expire_on_commit=False)
+        async with sessions() as db:
+            users = [User(email=f"user{i}@example.com", hashed_password="x") for i in range(3)]
+            plans = [
+                Plan(name="Free", amount=Decimal("0")),
+                Plan(name="Business", amount=Decimal("99"), features='{"rate_limit_tier": "pro"}'),
+            ]
+            db.add_all(users + plans)
+            await db.flush()
+            db.add_all([
+                Subscription(user_id=users[0].id, plan_id=plans[0].id, status=SubscriptionStatus.ACTIVE),
+                Subscription(user_id=users[1].id, plan_id=plans[1].id, status=SubscriptionStatus.ACTIVE),
+                APIKey(user_id=users[1].id, name="ci", key_hash=hash_api_key("sk_test_key"), key_prefix="sk_test_"),
+            ])
+            await db.commit()
+
+        monkeypatch.setattr(rate_limit_identity, "AsyncSessionLocal", sessions)
+        monkeypatch.setattr(rate_limit_identity.settings, "TRUSTED_PROXY_HOPS", 1)
+        rate_limit_identity.clear_identity_cache()
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, engine=RateLimiter())
+
+        @app.get("/api/v1/things")
+        async def things(request: Request):
+            user = getattr(request.state, "user", None)
+            return {"user_id": user.id if user else None}
+
+        app.tokens = [
+            create_access_token({"sub": user.email, "type": "access"}) for user in users
+        ]
+        yield app
+        rate_limit_identity.clear_identity_cache()
+        await db_engine.dispose()
+
+    def test_users_get_the_limit_of_their_plan_tier(self, app):
+        client = TestClient(app)
+        free, pro, no_plan = (
+            client.get("/api/v1/things", headers={"Authorization": f"Bearer {token}"}) for token in app.tokens
+        )
+        assert free.headers["X-RateLimit-Limit"] == "500"
+        assert pro.headers["X-RateLimit-Limit"] == "5000"
+        assert no_plan.headers["X-RateLimit-Limit"] == "1000"
+        assert free.json()["user_id"] != pro.json()["user_id"]
+
+        by_key = client.get("/api/v1/things", headers={"X-API-Key": "sk_test_key"})
+        assert by_key.headers["X-RateLimit-Limit"] == "5000"
+        assert by_key.json() == pro.json()
+        # Invalid credentials are rate limited as anonymous traffic
+        assert client.get("/api/v1/things", headers={"Authorization": "Bearer nope"}).json() == {"user_id": None}
+
+    def test_anonymous_clients_are_keyed_on_the_forwarded_address(self, app):
+        client = TestClient(app)
+
+        def remaining(forwarded_for):
+            response = client.get("/api/v1/things", headers={"X-Forwarded-For": forwarded_for})
+            return int(response.headers["X-RateLimit-Remaining"])
+
+        assert remaining("203.0.113.1") == 999
+        assert remaining("198.51.100.7, 203.0.113.1") == 998  # forged left entry is ignored
+        assert remaining("203.0.113.2") == 999
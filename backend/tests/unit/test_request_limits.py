@@ -59,3 +59,44 @@ class TestRequestSizeLimitMiddleware:
         # Should fail due to JSON limit
         assert response.status_code == 413
 
+    
+    def test_request_size_limit_counts_chunked_body(self, app):
+        """Test middleware enforces the limit when no Content-Length is sent"""
+        app.add_middleware(RequestSizeLimitMiddleware, default_limit=100)
+        client = TestClient(app)
+        
+        def chunks():
+            for _ in range(10):
+                yield b"x" * 50
+        
+        response = client.post("/test", content=chunks())
+        assert response.status_code == 413
+    
+    @pytest.mark.asyncio
+    async def test_request_size_limit_stops_reading_early(self, app):
+        """Test the body stream is abandoned as soon as the limit is crossed"""
+        middleware = RequestSizeLimitMiddleware(app, file_upload_limit=1000)
+        chunks_sent = 0
+        messages = []
+        
+        async def receive():
+            nonlocal chunks_sent
+            chunks_sent += 1
+            return {"type": "http.request", "body": b"x" * 400, "more_body": chunks_sent < 100}
+        
+        async def send(message):
+            messages.append(message)
+        
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/test",
+            "raw_path": b"/test",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/octet-stream")],
+        }
+        await middleware(scope, receive, send)
+        
+        assert messages[0]["status"] == 413
+        assert chunks_sent == 3
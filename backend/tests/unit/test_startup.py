@@ -0,0 +1,97 @@
+"""
+Unit tests for the once per deploy startup schema initialization
+"""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import startup
+from app.core.startup import MARKER_TABLE, read_marker, run_schema_init, schema_version
+
+PERFORMANCE_DATABASE_URL = os.getenv("PERFORMANCE_DATABASE_URL")
+
+
+@pytest.fixture
+def initializations(monkeypatch):
+    """Replace the schema work with a counter; returns the list of binds it ran for"""
+    calls = []
+
+    async def initialize_schema(bind):
+        calls.append(bind)
+        await asyncio.sleep(0.2)
+        return {"indexes_created": 0}
+
+    monkeypatch.setattr(startup, "initialize_schema", initialize_schema)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_initialization_runs_once_per_schema_version(tmp_path, initializations, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}")
+    try:
+        assert await read_marker(engine) is None
+
+        first = await run_schema_init(engine)
+        second = await run_schema_init(engine)
+        assert (first["status"], second["status"]) == ("initialized", "current")
+        assert await read_marker(engine) == first["version"] == schema_version()
+        assert len(initializations) == 1
+
+        assert (await run_schema_init(engine, force=True))["status"] == "initialized"
+        monkeypatch.setattr(startup, "SCHEMA_INIT_REVISION", startup.SCHEMA_INIT_REVISION + 1)
+        assert (await run_schema_init(engine))["status"] == "initialized"
+        assert len(initializations) == 3
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_initialization_is_retried(tmp_path, monkeypatch):
+    attempts = []
+
+    async def initialize_schema(bind):
+        attempts.append(bind)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return {}
+
+    monkeypatch.setattr(startup, "initialize_schema", initialize_schema)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}")
+    try:
+        with pytest.raises(RuntimeError):
+            await run_schema_init(engine)
+        assert await read_marker(engine) is None
+        assert (await run_schema_init(engine))["status"] == "initialized"
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.skipif(not PERFORMANCE_DATABASE_URL, reason="PERFORMANCE_DATABASE_URL (PostgreSQL) not set")
+@pytest.mark.asyncio
+async def test_one_worker_is_elected_and_the_others_start_immediately(initializations):
+    workers = [create_async_engine(PERFORMANCE_DATABASE_URL) for _ in range(6)]
+    try:
+        async with workers[0].begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {MARKER_TABLE}"))
+
+        outcomes = await asyncio.gather(*(run_schema_init(worker) for worker in workers))
+        statuses = sorted(outcome["status"] for outcome in outcomes)
+        assert statuses.count("initialized") == 1
+        assert set(statuses) <= {"initialized", "locked", "current"}
+        assert len(initializations) == 1
+        # Followers do not wait for the leader's 0.2s of work
+        assert all(outcome["duration"] < 0.2 for outcome in outcomes if outcome["status"] != "initialized")
+
+        # Next boot: every worker sees the marker
+        restarts = await asyncio.gather(*(run_schema_init(worker) for worker in workers))
+        assert {outcome["status"] for outcome in restarts} == {"current"}
+        assert len(initializations) == 1
+    finally:
+        async with workers[0].begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {MARKER_TABLE}"))
+        for worker in workers:
+            await worker.dispose()
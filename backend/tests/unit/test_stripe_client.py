@@ -0,0 +1,185 @@
+"""
+Unit tests for the async Stripe gateway, run against a local fake Stripe API
+"""
+
+import pytest
+import stripe
+
+from app.models.plan import Plan
+from app.models.subscription import Subscription
+from app.services.stripe_client import LatencyHistogram, StripeGateway, StripeMetrics
+from app.services.stripe_service import StripeService
+from tests.fakes.stripe_server import FakeStripeServer, parse_form
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeStripeServer() as fake:
+        yield fake
+
+
+@pytest.fixture
+async def gateway(server):
+    server.latency = 0.0
+    server.requests.clear()
+    server._failures.clear()
+    gateway = StripeGateway(
+        api_key="sk_test_fake", api_base=server.url, timeout=2.0, max_retries=2, metrics=StripeMetrics()
+    )
+    yield gateway
+    await gateway.close()
+
+
+def test_parse_form_nested_keys():
+    params = parse_form(b"items[0][id]=si_1&items[0][price]=price_2&metadata[user_id]=7&email=a%40b.c")
+    assert params == {
+        "items": [{"id": "si_1", "price": "price_2"}],
+        "metadata": {"user_id": "7"},
+        "email": "a@b.c",
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_customer_and_checkout_session(server, gateway):
+    customer = await gateway.create_customer({"email": "user@example.com", "metadata": {"user_id": "1"}})
+    assert customer.id.startswith("cus_")
+    assert customer.metadata["user_id"] == "1"
+
+    customers = await gateway.list_customers({"email": "user@example.com", "limit": 1})
+    assert [c.id for c in customers.data] == [customer.id]
+
+    session = await gateway.create_checkout_session({
+        "customer": customer.id,
+        "mode": "subscription",
+        "line_items": [{"price": "price_1", "quantity": 1}],
+    })
+    assert session.url.endswith(session.id)
+    assert gateway.metrics.snapshot()["customers.create"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_reuses_idempotency_key(server, gateway, monkeypatch):
+    monkeypatch.setattr("app.services.stripe_client.random.uniform", lambda a, b: 0)
+    before = len(server.objects["customer"])
+    server.fail_next(500, 429)
+
+    customer = await gateway.create_customer({"email": "retry@example.com"})
+
+    posts = [r for r in server.requests if r[0] == "POST" and r[1] == "/v1/customers"]
+    assert len(posts) == 3
+    assert len({key for _, _, key in posts}) == 1 and posts[0][2]
+    assert len(server.objects["customer"]) == before + 1
+    assert customer.id in server.objects["customer"]
+    histogram = gateway.metrics.histogram("customers.create")
+    assert (histogram.retries, histogram.errors, histogram.total) == (2, 2, 3)
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_retried_then_raised(server, gateway, monkeypatch):
+    monkeypatch.setattr("app.services.stripe_client.random.uniform", lambda a, b: 0)
+    server.latency = 0.3
+
+    with pytest.raises(stripe.APIConnectionError, match="timed out"):
+        await gateway.call(
+            "payment_intents.retrieve", gateway.client.v1.payment_intents.retrieve_async, "pi_missing", timeout=0.05
+        )
+
+    histogram = gateway.metrics.histogram("payment_intents.retrieve")
+    assert (histogram.total, histogram.errors, histogram.retries) == (3, 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(server, gateway):
+    with pytest.raises(stripe.InvalidRequestError):
+        await gateway.retrieve_subscription("sub_missing")
+
+    assert len(server.requests) == 1
+    assert gateway.metrics.histogram("subscriptions.retrieve").retries == 0
+
+
+@pytest.mark.asyncio
+async def test_missing_api_key(monkeypatch):
+    monkeypatch.setattr("app.services.stripe_client.settings.STRIPE_SECRET_KEY", None)
+    with pytest.raises(stripe.AuthenticationError):
+        await StripeGateway().create_customer({"email": "x@example.com"})
+
+
+@pytest.mark.asyncio
+async def test_update_subscription_plan(server, gateway):
+    server.add_subscription("sub_plan", ["price_old"])
+    subscription = Subscription(id=1, stripe_subscription_id="sub_plan")
+    plan = Plan(id=2, stripe_price_id="price_new")
+    service = StripeService(db=None, gateway=gateway)
+
+    assert await service.update_subscription_plan(subscription, plan) is True
+    assert server.objects["subscription"]["sub_plan"]["items"]["data"][0]["price"]["id"] == "price_new"
+
+    assert await service.cancel_subscription(subscription) is True
+    assert server.objects["subscription"]["sub_plan"]["cancel_at_period_end"] is True
+
+    missing = Subscription(id=3, stripe_subscription_id="sub_missing")
+    assert await service.update_subscription_plan(missing, plan) is False
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets=(0.1, 0.5, 1.0))
+    assert histogram.quantile(0.5) is None
+    for seconds in (0.05, 0.05, 0.2, 0.3, 0.7):
+        histogram.observe(seconds)
+    histogram.observe(2.0, error=True)
+
+    assert histogram.quantile(0.3) == 0.1
+    assert histogram.quantile(0.5) == 0.5
+    assert histogram.quantile(0.99) is None
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 6
+    assert snapshot["errors"] == 1
+    assert snapshot["buckets"] == {"0.1": 2, "0.5": 4, "1.0": 5, "+Inf": 6}
+
+
+@pytest.mark.parametrize("path", ["/subscriptions/stripe/metrics", "/subscriptions/stripe/webhooks/metrics"])
+def test_metrics_endpoints_require_superadmin(tmp_path, path):
+    import asyncio
+    from types import SimpleNamespace
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.api.v1.endpoints.subscriptions import router
+    from app.core.database import Base, get_db
+    from app.dependencies import get_current_user
+    from app.models import Role, UserRole
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'roles.db'}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Role.__table__, UserRole.__table__, Base.metadata.tables["webhook_events"]])
+        async with sessions() as db:
+            role = Role(name="Superadmin", slug="superadmin", is_active=True)
+            db.add(role)
+            await db.flush()
+            db.add(UserRole(user_id=1, role_id=role.id))
+            await db.commit()
+
+    asyncio.run(setup())
+
+    async def db_session():
+        async with sessions() as db:
+            yield db
+
+    user = SimpleNamespace(id=2)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = db_session
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    try:
+        assert client.get(path).status_code == 403
+        user.id = 1
+        assert client.get(path).status_code == 200
+    finally:
+        asyncio.run(engine.dispose())
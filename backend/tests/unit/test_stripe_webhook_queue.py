@@ -0,0 +1,254 @@
+"""
+Unit tests for the Stripe webhook queue and the queueing webhook endpoint
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.webhooks import stripe as stripe_webhooks
+from app.core.database import Base, get_db
+from app.models.webhook_event import WebhookEvent, WebhookEventStatus
+from app.services.stripe_webhook_queue import WebhookQueue, ordering_key
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+def make_event(event_id, customer="cus_1", created=1000, event_type="invoice.paid", object_id=None):
+    return {
+        "id": event_id,
+        "type": event_type,
+        "created": created,
+        "data": {"object": {"id": object_id or f"in_{event_id}", "object": "invoice", "customer": customer}},
+    }
+
+
+@pytest.fixture
+async def session_factory():
+    """In-memory SQLite database with the webhook_events table"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[WebhookEvent.__table__])
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def processed():
+    return []
+
+
+@pytest.fixture
+def queue(session_factory, processed):
+    async def processor(event, db):
+        processed.append(event["id"])
+
+    queue = WebhookQueue(session_factory=session_factory, batch_size=10)
+    queue._processor = processor
+    return queue
+
+
+async def _rows(session_factory):
+    async with session_factory() as db:
+        return {row.stripe_event_id: row for row in (await db.execute(select(WebhookEvent))).scalars()}
+
+
+def test_ordering_key():
+    assert ordering_key(make_event("evt_1", customer="cus_9")) == "cus_9"
+    assert ordering_key(make_event("evt_1", customer=None, object_id="pi_1")) == "pi_1"
+    customer_event = {"id": "evt_2", "data": {"object": {"id": "cus_3", "object": "customer"}}}
+    assert ordering_key(customer_event) == "cus_3"
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent(session_factory, queue):
+    async with session_factory() as db:
+        assert await queue.enqueue(db, make_event("evt_1")) is True
+        assert await queue.enqueue(db, make_event("evt_1")) is False
+
+    rows = await _rows(session_factory)
+    assert list(rows) == ["evt_1"]
+    assert rows["evt_1"].status == WebhookEventStatus.PENDING.value
+    assert rows["evt_1"].ordering_key == "cus_1"
+    assert (queue.metrics.received, queue.metrics.duplicates) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_events_of_a_customer_are_processed_in_order(session_factory, queue, processed):
+    async with session_factory() as db:
+        for event in (
+            make_event("evt_c3", created=1003),
+            make_event("evt_c1", created=1001),
+            make_event("evt_other", customer="cus_2", created=1005),
+            make_event("evt_c2", created=1002),
+        ):
+            await queue.enqueue(db, event)
+
+    # One event per customer per claim
+    assert await queue.run_once() == 2
+    assert sorted(processed) == ["evt_c1", "evt_other"]
+    while await queue.run_once():
+        pass
+    assert [e for e in processed if e.startswith("evt_c")] == ["evt_c1", "evt_c2", "evt_c3"]
+
+    rows = await _rows(session_factory)
+    assert {row.status for row in rows.values()} == {WebhookEventStatus.PROCESSED.value}
+    assert all(row.processed_at is not None and row.attempts == 1 for row in rows.values())
+    assert queue.metrics.processed == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_is_retried_and_holds_back_later_events(session_factory, queue, processed):
+    failures = {"evt_1": 1}
+
+    async def processor(event, db):
+        if failures.get(event["id"]):
+            failures[event["id"]] -= 1
+            raise RuntimeError("handler failed")
+        processed.append(event["id"])
+
+    queue._processor = processor
+    async with session_factory() as db:
+        await queue.enqueue(db, make_event("evt_1", created=1001))
+        await queue.enqueue(db, make_event("evt_2", created=1002))
+
+    assert await queue.run_once() == 1
+    row = (await _rows(session_factory))["evt_1"]
+    assert row.status == WebhookEventStatus.PENDING.value
+    assert row.attempts == 1
+    assert "handler failed" in row.last_error
+    # Backing off: neither evt_1 nor the later evt_2 is claimable
+    assert await queue.run_once() == 0
+
+    async with session_factory() as db:
+        await db.execute(update(WebhookEvent).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        await db.commit()
+    while await queue.run_once():
+        pass
+
+    assert processed == ["evt_1", "evt_2"]
+    assert (await _rows(session_factory))["evt_1"].attempts == 2
+    assert queue.metrics.retried == 1
+
+
+@pytest.mark.asyncio
+async def test_event_fails_after_max_attempts(session_factory, queue, processed, monkeypatch):
+    monkeypatch.setattr("app.services.stripe_webhook_queue.settings.STRIPE_WEBHOOK_MAX_ATTEMPTS", 1)
+
+    async def processor(event, db):
+        if event["id"] == "evt_bad":
+            raise ValueError("bad event")
+        processed.append(event["id"])
+
+    queue._processor = processor
+    async with session_factory() as db:
+        await queue.enqueue(db, make_event("evt_bad", created=1001))
+        await queue.enqueue(db, make_event("evt_next", created=1002))
+
+    while await queue.run_once():
+        pass
+
+    rows = await _rows(session_factory)
+    assert rows["evt_bad"].status == WebhookEventStatus.FAILED.value
+    assert processed == ["evt_next"]
+    assert queue.metrics.failed == 1
+    async with session_factory() as db:
+        backlog = await queue.backlog(db)
+    assert backlog == {"pending": 0, "processing": 0, "failed": 1, "oldest_pending_age_seconds": None}
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_claimed_again(session_factory, queue, processed):
+    async with session_factory() as db:
+        await queue.enqueue(db, make_event("evt_1"))
+        claimed = await queue.claim(db, 10)
+    assert [c["attempts"] for c in claimed] == [1]
+    # Claimed by a worker that died
+    async with session_factory() as db:
+        assert await queue.claim(db, 10) == []
+        backlog = await queue.backlog(db)
+        assert backlog["processing"] == 1 and backlog["oldest_pending_age_seconds"] is not None
+        await db.execute(update(WebhookEvent).values(locked_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+        await db.commit()
+
+    assert await queue.run_once() == 1
+    assert processed == ["evt_1"]
+    assert (await _rows(session_factory))["evt_1"].attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_process_queued_events(tmp_path, processed):
+    # A database file, so that concurrent workers get their own connections
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'webhooks.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[WebhookEvent.__table__])
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def processor(event, db):
+        await asyncio.sleep(0.01)
+        processed.append(event["id"])
+
+    queue = WebhookQueue(session_factory=session_factory)
+    queue.start(processor, workers=2)
+    try:
+        async with session_factory() as db:
+            for i in range(6):
+                await queue.enqueue(db, make_event(f"evt_{i}", customer=f"cus_{i % 3}", created=1000 + i))
+        deadline = time.monotonic() + 5
+        while len(processed) < 6 and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+    finally:
+        await queue.shutdown()
+        await engine.dispose()
+
+    assert sorted(processed) == [f"evt_{i}" for i in range(6)]
+    for customer in range(3):
+        events = [e for e in processed if int(e.split("_")[1]) % 3 == customer]
+        assert events == sorted(events)
+
+
+def _signed(payload: bytes) -> str:
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+@pytest.mark.asyncio
+async def test_endpoint_queues_event_without_processing(session_factory, queue, monkeypatch):
+    monkeypatch.setattr("app.services.stripe_service.settings.STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    monkeypatch.setattr(stripe_webhooks, "stripe_webhook_queue", queue)
+
+    async def inline_processing(*args, **kwargs):
+        raise AssertionError("webhook processed inline")
+
+    monkeypatch.setattr(stripe_webhooks, "handle_invoice_paid", inline_processing)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(stripe_webhooks.router)
+    app.dependency_overrides[get_db] = override_get_db
+    payload = json.dumps(make_event("evt_http")).encode()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/webhooks/stripe", content=payload, headers={"stripe-signature": _signed(payload)})
+        second = await client.post("/webhooks/stripe", content=payload, headers={"stripe-signature": _signed(payload)})
+        forged = await client.post("/webhooks/stripe", content=payload, headers={"stripe-signature": "t=1,v1=00"})
+
+    assert first.status_code == 200 and first.json() == {"status": "success"}
+    assert second.status_code == 200 and second.json()["message"] == "Event already received"
+    assert forged.status_code == 401
+    rows = await _rows(session_factory)
+    assert rows["evt_http"].status == WebhookEventStatus.PENDING.value
+    assert json.loads(rows["evt_http"].event_data)["id"] == "evt_http"
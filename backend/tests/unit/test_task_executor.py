@@ -0,0 +1,312 @@
+"""
+Unit tests for cron parsing and the scheduled task executor
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.scheduled_task import ScheduledTask, TaskExecutionLog, TaskStatus, TaskType
+from app.models.user import User
+from app.services import task_executor as executor_module
+from app.services.scheduled_task_service import ScheduledTaskService
+from app.services.task_executor import NonRetryableTaskError, TaskExecutor, next_occurrence
+from app.utils.cron import CronError, CronExpression
+
+UTC = timezone.utc
+
+
+async def _create_engine(url="sqlite+aiosqlite:///:memory:"):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, ScheduledTask.__table__, TaskExecutionLog.__table__],
+        )
+    return engine
+
+
+@pytest.fixture
+async def session_factory():
+    """In-memory SQLite database with the scheduled task tables"""
+    engine = await _create_engine()
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Register CUSTOM handlers 'ok', 'flaky' and 'broken'; returns the ids of the tasks they ran"""
+    calls = []
+    failures = {}
+
+    async def ok(task):
+        calls.append(task.id)
+        return {"ran": task.id}
+
+    async def flaky(task):
+        calls.append(task.id)
+        if failures.setdefault(task.id, 0) < 1:
+            failures[task.id] += 1
+            raise RuntimeError("temporary failure")
+        return None
+
+    async def broken(task):
+        calls.append(task.id)
+        raise NonRetryableTaskError("bad task_data")
+
+    for name, handler in (("ok", ok), ("flaky", flaky), ("broken", broken)):
+        monkeypatch.setitem(executor_module._handlers, name, handler)
+    return calls
+
+
+async def _add_task(session_factory, handler="ok", scheduled_at=None, recurrence=None, recurrence_config=None):
+    async with session_factory() as db:
+        task = await ScheduledTaskService(db).create_task(
+            name=f"task {handler}",
+            task_type=TaskType.CUSTOM,
+            scheduled_at=scheduled_at or datetime.now(UTC) - timedelta(seconds=1),
+            recurrence=recurrence,
+            recurrence_config=recurrence_config,
+            task_data={"handler": handler},
+        )
+        return task.id
+
+
+async def _get(session_factory, task_id):
+    async with session_factory() as db:
+        return await db.get(ScheduledTask, task_id)
+
+
+class TestCron:
+    def test_steps_ranges_and_names(self):
+        assert CronExpression("*/15 * * * *").next_after(datetime(2026, 3, 2, 10, 7, tzinfo=UTC)) == \
+            datetime(2026, 3, 2, 10, 15, tzinfo=UTC)
+        # Friday 10:00 -> Monday 09:00
+        assert CronExpression("0 9 * * mon-fri").next_after(datetime(2026, 3, 6, 10, 0, tzinfo=UTC)) == \
+            datetime(2026, 3, 9, 9, 0, tzinfo=UTC)
+        assert CronExpression("30 4 1 jan,jul *").next_after(datetime(2026, 3, 6, tzinfo=UTC)) == \
+            datetime(2026, 7, 1, 4, 30, tzinfo=UTC)
+        assert CronExpression("@hourly").next_after(datetime(2026, 3, 6, 10, 0, tzinfo=UTC)) == \
+            datetime(2026, 3, 6, 11, 0, tzinfo=UTC)
+
+    def test_day_of_month_or_day_of_week(self):
+        # The 15th, or any Sunday (0 and 7 are both Sunday)
+        cron = CronExpression("0 0 15 * 7")
+        assert cron.next_after(datetime(2026, 3, 2, tzinfo=UTC)) == datetime(2026, 3, 8, tzinfo=UTC)
+        assert cron.next_after(datetime(2026, 3, 9, tzinfo=UTC)) == datetime(2026, 3, 15, tzinfo=UTC)
+
+    def test_time_zone(self):
+        cron = CronExpression("0 9 * * *", "Europe/Paris")
+        assert cron.next_after(datetime(2026, 1, 10, 12, 0, tzinfo=UTC)) == datetime(2026, 1, 11, 8, 0, tzinfo=UTC)
+        assert cron.next_after(datetime(2026, 7, 10, 12, 0, tzinfo=UTC)) == datetime(2026, 7, 11, 7, 0, tzinfo=UTC)
+
+    @pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 * foo *", "5-1 * * * *"])
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(CronError):
+            CronExpression(expression)
+
+    def test_impossible_date(self):
+        with pytest.raises(CronError):
+            CronExpression("0 0 30 2 *").next_after(datetime(2026, 1, 1, tzinfo=UTC))
+
+
+def test_next_occurrence_skips_missed_runs():
+    scheduled = datetime(2026, 3, 1, 8, 0, tzinfo=UTC)
+    now = datetime(2026, 3, 4, 9, 0, tzinfo=UTC)
+    assert next_occurrence("daily", None, scheduled, now) == datetime(2026, 3, 5, 8, 0, tzinfo=UTC)
+    assert next_occurrence("hourly", None, scheduled, now) == datetime(2026, 3, 4, 10, 0, tzinfo=UTC)
+    assert next_occurrence(None, None, scheduled, now) is None
+    assert next_occurrence("monthly", None, datetime(2026, 1, 31, tzinfo=UTC), datetime(2026, 2, 1, tzinfo=UTC)) == \
+        datetime(2026, 2, 28, tzinfo=UTC)
+    assert next_occurrence("cron", {"expression": "0 */6 * * *"}, scheduled, now) == \
+        datetime(2026, 3, 4, 12, 0, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_invalid_recurrence_is_rejected(session_factory):
+    with pytest.raises(CronError):
+        await _add_task(session_factory, recurrence="cron", recurrence_config={"expression": "bad"})
+    with pytest.raises(ValueError):
+        await _add_task(session_factory, recurrence="fortnightly")
+
+
+@pytest.mark.asyncio
+async def test_one_time_task_runs_once(session_factory, calls):
+    task_id = await _add_task(session_factory)
+    future_id = await _add_task(session_factory, scheduled_at=datetime.now(UTC) + timedelta(hours=1))
+    executor = TaskExecutor(session_factory=session_factory, concurrency=4)
+
+    assert await executor.run_once() == 1
+    assert await executor.run_once() == 0
+    assert calls == [task_id]
+
+    task = await _get(session_factory, task_id)
+    assert task.status == TaskStatus.COMPLETED
+    assert task.result_data == {"ran": task_id}
+    assert task.locked_by is None
+    assert (await _get(session_factory, future_id)).status == TaskStatus.PENDING
+    async with session_factory() as db:
+        logs = await ScheduledTaskService(db).get_execution_logs(task_id)
+    assert [log.status for log in logs] == [TaskStatus.COMPLETED]
+    assert executor.metrics.succeeded == 1
+
+
+@pytest.mark.asyncio
+async def test_recurring_task_is_rescheduled_in_place(session_factory, calls):
+    scheduled_at = datetime.now(UTC).replace(microsecond=0) - timedelta(days=2, minutes=1)
+    task_id = await _add_task(session_factory, scheduled_at=scheduled_at, recurrence="daily")
+    executor = TaskExecutor(session_factory=session_factory)
+
+    assert await executor.run_once() == 1
+    assert await executor.run_once() == 0
+
+    task = await _get(session_factory, task_id)
+    assert task.status == TaskStatus.PENDING
+    assert task.scheduled_at.replace(tzinfo=UTC) == scheduled_at + timedelta(days=3)
+    assert task.attempts == 0
+    async with session_factory() as db:
+        assert (await db.execute(select(func.count()).select_from(ScheduledTask))).scalar() == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_is_retried_with_backoff(session_factory, calls):
+    task_id = await _add_task(session_factory, handler="flaky")
+    executor = TaskExecutor(session_factory=session_factory)
+
+    assert await executor.run_once() == 1
+    task = await _get(session_factory, task_id)
+    assert task.status == TaskStatus.PENDING
+    assert task.attempts == 1
+    assert task.error_message == "temporary failure"
+    assert task.next_attempt_at.replace(tzinfo=UTC) > datetime.now(UTC)
+    assert await executor.run_once() == 0
+
+    async with session_factory() as db:
+        await db.execute(update(ScheduledTask).values(next_attempt_at=datetime.now(UTC) - timedelta(seconds=1)))
+        await db.commit()
+    assert await executor.run_once() == 1
+
+    task = await _get(session_factory, task_id)
+    assert task.status == TaskStatus.COMPLETED
+    assert task.attempts == 2 and task.error_message is None
+    assert executor.metrics.retried == 1
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_failures(session_factory, calls):
+    broken_id = await _add_task(session_factory, handler="broken")
+    missing_id = await _add_task(session_factory, handler="missing")
+    executor = TaskExecutor(session_factory=session_factory)
+
+    assert await executor.run_once() == 2
+    broken, missing = await _get(session_factory, broken_id), await _get(session_factory, missing_id)
+    assert broken.status == missing.status == TaskStatus.FAILED
+    assert "No handler registered" in missing.error_message
+    assert calls == [broken_id]
+    assert executor.metrics.failed == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_claimed_again_and_fenced(session_factory, calls):
+    task_id = await _add_task(session_factory)
+    first, second = TaskExecutor(session_factory=session_factory), TaskExecutor(session_factory=session_factory)
+
+    [claimed] = await first.claim(10)
+    assert await second.claim(10) == []
+    # The first executor stalls past its lease
+    async with session_factory() as db:
+        await db.execute(update(ScheduledTask).values(locked_at=datetime.now(UTC) - timedelta(hours=1)))
+        await db.commit()
+    assert await second.run_once() == 1
+
+    await first.execute(claimed)
+    assert first.metrics.lease_lost == 1
+    async with session_factory() as db:
+        logs = await ScheduledTaskService(db).get_execution_logs(task_id)
+    assert len(logs) == 1
+    assert (await _get(session_factory, task_id)).attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_the_running_task(session_factory, monkeypatch):
+    monkeypatch.setattr("app.services.task_executor.settings.SCHEDULED_TASK_LEASE_SECONDS", 0.3)
+    finished = []
+
+    async def slow(task):
+        await asyncio.sleep(1)
+        finished.append(task.id)
+
+    monkeypatch.setitem(executor_module._handlers, "slow", slow)
+    task_id = await _add_task(session_factory, handler="slow")
+    executor = TaskExecutor(session_factory=session_factory)
+    [claimed] = await executor.claim(1)
+
+    async def steal():
+        await asyncio.sleep(0.05)
+        async with session_factory() as db:
+            await db.execute(update(ScheduledTask).values(locked_by="other-executor"))
+            await db.commit()
+
+    await asyncio.gather(executor.execute(claimed), steal())
+    assert finished == []
+    assert executor.metrics.lease_lost == 1
+    assert (await _get(session_factory, task_id)).locked_by == "other-executor"
+
+
+@pytest.mark.asyncio
+async def test_executors_share_tasks_without_running_one_twice(tmp_path, calls):
+    # A database file, so that concurrent executors get their own connections
+    engine = await _create_engine(f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        task_ids = [await _add_task(session_factory) for _ in range(20)]
+        executors = [TaskExecutor(session_factory=session_factory, concurrency=3) for _ in range(3)]
+        for executor in executors:
+            executor.start()
+        deadline = asyncio.get_running_loop().time() + 10
+        while len(calls) < len(task_ids) and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+        for executor in executors:
+            await executor.shutdown()
+
+        assert sorted(calls) == task_ids
+        async with session_factory() as db:
+            backlog = await executors[0].backlog(db)
+        assert backlog == {"due": 0, "retrying": 0, "running": 0, "max_lag_seconds": None}
+        assert sum(executor.metrics.succeeded for executor in executors) == len(task_ids)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_timeout_applies_when_every_slot_is_busy(tmp_path, monkeypatch):
+    engine = await _create_engine(f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    started = []
+
+    async def slow(task):
+        started.append(task.id)
+        await asyncio.sleep(3)
+
+    monkeypatch.setitem(executor_module._handlers, "slow", slow)
+    try:
+        for _ in range(2):
+            await _add_task(session_factory, handler="slow")
+        executor = TaskExecutor(session_factory=session_factory, concurrency=2)
+        executor.start()
+        deadline = asyncio.get_running_loop().time() + 5
+        while len(started) < 2 and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.02)
+        assert len(started) == 2
+
+        start_time = asyncio.get_running_loop().time()
+        await executor.shutdown(timeout=0.3)
+        assert asyncio.get_running_loop().time() - start_time < 1
+        assert not executor._running
+    finally:
+        await engine.dispose()
@@ -0,0 +1,101 @@
+"""
+Unit tests for compiled template rendering
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.template import Template
+from app.models.user import User
+from app.services import template_renderer
+from app.services.template_renderer import RenderPlan, RenderPlanCache, UsageCounter
+
+
+class TestRenderPlan:
+    """Test RenderPlan"""
+
+    def test_single_and_double_braces(self):
+        """Test {{var}} and {var} are substituted like the previous re.sub passes"""
+        plan = RenderPlan("Hello {{name}}, your order {order} ships {when}.")
+        assert plan.variables == {"name", "order", "when"}
+        assert plan.render({"name": "Ada", "order": 42}) == "Hello Ada, your order 42 ships {when}."
+
+    def test_values_are_not_rescanned(self):
+        """Test substituted values are inserted verbatim"""
+        plan = RenderPlan("{a} {b}")
+        assert plan.render({"a": "{b}", "b": r"C:\new"}) == r"{b} C:\new"
+
+    def test_double_brace_only(self):
+        """Test email templates only substitute {{var}}"""
+        plan = RenderPlan("{{name}} {name}", double_brace_only=True)
+        assert plan.render({"name": "Ada"}) == "Ada {name}"
+
+    def test_plain_text(self):
+        """Test templates without placeholders render unchanged"""
+        assert RenderPlan("no variables").render({"x": 1}) == "no variables"
+        assert RenderPlan("").render({}) == ""
+
+
+class TestRenderPlanCache:
+    """Test RenderPlanCache"""
+
+    def test_invalidated_by_updated_at(self):
+        """Test plans are reused until updated_at changes"""
+        cache = RenderPlanCache()
+        updated_at = datetime(2024, 1, 1)
+        first = cache.get(("template", 1), updated_at, "{a}")
+        assert cache.get(("template", 1), updated_at, "{a}") is first
+        second = cache.get(("template", 1), updated_at + timedelta(seconds=1), "{b}")
+        assert second is not first
+        assert second.render({"b": "x"}) == "x"
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lru_eviction_and_invalidate(self):
+        """Test the cache is bounded and can be invalidated per template"""
+        cache = RenderPlanCache(maxsize=2)
+        updated_at = datetime(2024, 1, 1)
+        for template_id in range(3):
+            cache.get(("email", template_id, "subject"), updated_at, "x")
+        assert len(cache._plans) == 2
+        cache.invalidate("email", 2)
+        assert list(cache._plans) == [("email", 1, "subject")]
+
+
+class TestUsageCounter:
+    """Test UsageCounter"""
+
+    @pytest.mark.asyncio
+    async def test_flush_batches_increments(self, monkeypatch):
+        """Test renders are written with one increment per template"""
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, Template.__table__])
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        monkeypatch.setattr(template_renderer, "AsyncSessionLocal", session_factory)
+
+        async with session_factory() as db:
+            user = User(email="owner@example.com", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            template = Template(name="T", slug="t", content="{a}", entity_type="email", user_id=user.id)
+            db.add(template)
+            await db.commit()
+            updated_at = template.updated_at
+
+        counter = UsageCounter(threshold=1000, interval=3600)
+        for _ in range(5):
+            counter.record(template.id)
+        counter.record(template.id, 10)
+        assert counter.pending == {template.id: 15}
+
+        assert await counter.flush() == 15
+        assert counter.pending == {}
+        async with session_factory() as db:
+            row = (await db.execute(select(Template.usage_count, Template.updated_at))).one()
+        assert row.usage_count == 15
+        assert row.updated_at == updated_at
+        await engine.dispose()
@@ -0,0 +1,53 @@
+"""
+Unit tests for upload content sniffing and sizing
+"""
+
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.api.upload import SNIFF_BYTES, get_upload_size, validate_file_content
+
+
+class CountingFile(io.BytesIO):
+    """BytesIO recording how many bytes were read"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _upload(data: bytes, filename: str, size=None) -> UploadFile:
+    return UploadFile(file=CountingFile(data), filename=filename, size=size)
+
+
+def test_sniffing_reads_only_a_prefix():
+    upload = _upload(b"%PDF-1.4\n" + b"0" * (5 * 1024 * 1024), "report.pdf")
+
+    validate_file_content(upload)
+
+    assert upload.file.bytes_read == SNIFF_BYTES
+    assert upload.file.tell() == 0
+
+
+def test_sniffing_rejects_mismatched_content():
+    upload = _upload(b"\x89PNG\r\n\x1a\n" + b"\0" * 100, "report.pdf")
+
+    with pytest.raises(HTTPException) as exc_info:
+        validate_file_content(upload)
+    assert exc_info.value.status_code == 400
+
+
+def test_upload_size_does_not_read_the_file():
+    data = b"x" * (3 * 1024 * 1024)
+
+    assert get_upload_size(_upload(data, "a.txt", size=len(data))) == len(data)
+    upload = _upload(data, "a.txt")
+    assert get_upload_size(upload) == len(data)
+    assert upload.file.bytes_read == 0 and upload.file.tell() == 0
@@ -0,0 +1,119 @@
+"""
+Unit tests for WebSocket fan-out
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from app.api.v1.endpoints.websocket import ConnectionManager
+from app.services.websocket_broker import REDIS_AVAILABLE, LocalBroker, RedisBroker
+
+
+class FakeWebSocket:
+    """Records messages sent to the socket"""
+
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.fail = fail
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def _drain():
+    """Let writer tasks (and cleanup tasks) run"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestLocalFanOut:
+    """Test ConnectionManager with the single-process broker"""
+
+    @pytest.mark.asyncio
+    async def test_user_room_and_broadcast(self):
+        manager = ConnectionManager(broker=LocalBroker())
+        alice, bob, anonymous = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, "1")
+        await manager.connect(bob, "2")
+        await manager.connect(anonymous)
+        await manager.join_room(alice, "r")
+        await manager.join_room(bob, "r")
+
+        await manager.send_personal_message({"n": 1}, "1")
+        await manager.send_to_room({"n": 2}, "r", exclude_websocket=alice)
+        await manager.broadcast({"n": 3}, exclude_user_id="2")
+        await _drain()
+
+        assert alice.sent == [{"n": 1}, {"n": 3}]
+        assert bob.sent == [{"n": 2}]
+        assert anonymous.sent == [{"n": 3}]
+        assert await manager.get_room_presence("r") == 2
+        assert await manager.get_user_presence("1") == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_sockets_are_removed(self):
+        manager = ConnectionManager(broker=LocalBroker())
+        broken = FakeWebSocket(fail=True)
+        await manager.connect(broken, "1")
+        await manager.join_room(broken, "r")
+
+        await manager.send_to_room({"n": 1}, "r")
+        await _drain()
+        await manager.send_personal_message({"n": 2}, "1")
+        # Second disconnect from the endpoint's handler is a no-op
+        await manager.disconnect(broken, "1")
+
+        assert manager.rooms == {}
+        assert manager.active_connections == {}
+        assert await manager.get_user_presence("1") == 0
+
+
+@pytest.mark.skipif(
+    not (REDIS_AVAILABLE and os.getenv("REDIS_URL")),
+    reason="REDIS_URL not set",
+)
+class TestRedisFanOut:
+    """Test delivery between two managers (two processes) through Redis"""
+
+    @pytest.mark.asyncio
+    async def test_cross_process_delivery_and_presence(self):
+        first = ConnectionManager(broker=RedisBroker(os.environ["REDIS_URL"]))
+        second = ConnectionManager(broker=RedisBroker(os.environ["REDIS_URL"]))
+        try:
+            alice, bob = FakeWebSocket(), FakeWebSocket()
+            await first.connect(alice, "u1")
+            await second.connect(bob, "u2")
+            await first.join_room(alice, "room")
+            await second.join_room(bob, "room")
+            await asyncio.sleep(0.1)
+
+            await second.send_personal_message({"to": "alice"}, "u1")
+            await first.send_to_room({"room": True}, "room", exclude_websocket=alice)
+            await second.broadcast({"all": True})
+            for _ in range(50):
+                if len(alice.sent) == 2 and len(bob.sent) == 2:
+                    break
+                await asyncio.sleep(0.02)
+
+            # No ordering across channels: bob gets the local broadcast first
+            assert alice.sent == [{"to": "alice"}, {"all": True}]
+            assert sorted(bob.sent, key=str) == [{"all": True}, {"room": True}]
+            assert await first.get_room_presence("room") == 2
+
+            await second.leave_room(bob, "room")
+            assert await first.get_room_presence("room") == 1
+        finally:
+            await first.shutdown()
+            await second.shutdown()
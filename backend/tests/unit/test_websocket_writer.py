@@ -0,0 +1,102 @@
+"""
+Unit tests for WebSocket send queues
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api.v1.endpoints.websocket import ConnectionManager
+from app.services.websocket_broker import LocalBroker
+from app.services.websocket_writer import SLOW_CONSUMER_CLOSE_CODE, encode_message
+
+
+class StalledWebSocket:
+    """A client that stops reading: sends block until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class FastWebSocket(StalledWebSocket):
+    def __init__(self):
+        super().__init__()
+        self.release.set()
+
+
+async def _drain():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestSendQueues:
+    """Test per-connection queues and slow consumer policies"""
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_delay_others(self):
+        manager = ConnectionManager(broker=LocalBroker(), max_queue=100)
+        stalled, fast = StalledWebSocket(), FastWebSocket()
+        await manager.connect(stalled, "1")
+        await manager.connect(fast, "2")
+
+        for n in range(10):
+            await manager.broadcast({"n": n})
+        await _drain()
+
+        assert [m["n"] for m in fast.sent] == list(range(10))
+        assert stalled.sent == []
+        metrics = manager.get_metrics()
+        assert metrics["queued_messages"] == 9  # one is stuck in send_text
+        assert metrics["queue_high_water"] == 10
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy(self):
+        manager = ConnectionManager(broker=LocalBroker(), max_queue=3, slow_consumer_policy="disconnect")
+        stalled = StalledWebSocket()
+        await manager.connect(stalled, "1")
+        await manager.join_room(stalled, "r")
+
+        for n in range(5):
+            await manager.send_to_room({"n": n}, "r")
+        await _drain()
+
+        assert stalled.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert manager.active_connections == {}
+        assert manager.rooms == {}
+        assert manager.get_metrics()["slow_consumers_disconnected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_policy_keeps_newest(self):
+        manager = ConnectionManager(broker=LocalBroker(), max_queue=3, slow_consumer_policy="drop")
+        stalled = StalledWebSocket()
+        await manager.connect(stalled, "1")
+        await _drain()
+
+        await manager.send_personal_message({"n": 0}, "1")
+        await _drain()
+        for n in range(1, 6):
+            await manager.send_personal_message({"n": n}, "1")
+        stalled.release.set()
+        await _drain()
+
+        # n=0 was already being sent; 1 and 2 were dropped
+        assert [m["n"] for m in stalled.sent] == [0, 3, 4, 5]
+        assert manager.get_metrics()["messages_dropped"] == 2
+        await manager.shutdown()
+
+    def test_encode_matches_send_json(self):
+        assert encode_message({"a": "é", "b": [1, 2]}) == '{"a":"é","b":[1,2]}'